@@ -0,0 +1,183 @@
+"""Entry groups
+
+Revision ID: 4d6c0f2b9e17
+Revises: 83fac9948381
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '4d6c0f2b9e17'
+down_revision = '83fac9948381'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+
+
+#: Maximum number of rows inserted by a single statement.
+chunk_size = 1024
+
+
+def upgrade():
+
+    op.execute('''
+
+        CREATE SEQUENCE entry_group_id_seq;
+
+        CREATE TABLE entry_group_data (
+
+          field_client_id BIGINT NOT NULL,
+          field_object_id BIGINT NOT NULL,
+          entry_client_id BIGINT NOT NULL,
+          entry_object_id BIGINT NOT NULL,
+          group_id BIGINT NOT NULL,
+
+          PRIMARY KEY (
+            field_client_id, field_object_id, entry_client_id, entry_object_id)
+
+        );
+
+        CREATE INDEX entry_group_data_group_id_idx
+          ON entry_group_data (field_client_id, field_object_id, group_id);
+
+    ''')
+
+    # Computing groups of entries linked through tags of all grouping tag fields, as
+    # rebuild_entry_groups() of lingvodoc.utils.search does at the time of this revision.
+
+    connection = op.get_bind()
+
+    field_id_list = connection.execute('''
+
+        select
+          F.client_id,
+          F.object_id
+
+        from
+          field F
+
+        where
+          (F.data_type_translation_gist_client_id,
+            F.data_type_translation_gist_object_id) in (
+
+            select
+              G.client_id,
+              G.object_id
+
+            from
+              translationgist G,
+              translationatom A
+
+            where
+              G.marked_for_deletion = false and
+              G.type = 'Service' and
+              A.parent_client_id = G.client_id and
+              A.parent_object_id = G.object_id and
+              A.marked_for_deletion = false and
+              A.locale_id = 2 and
+              A.content = 'Grouping Tag'
+
+            order by
+              G.created_at,
+              G.client_id,
+              G.object_id
+
+            limit 1);
+
+    ''').fetchall()
+
+    group_table = (
+
+        sa.table(
+            'entry_group_data',
+            sa.column('field_client_id'),
+            sa.column('field_object_id'),
+            sa.column('entry_client_id'),
+            sa.column('entry_object_id'),
+            sa.column('group_id')))
+
+    for field_client_id, field_object_id in field_id_list:
+
+        # Entries and tags joined in a union-find forest.
+
+        parent_dict = {}
+
+        def find(x):
+
+            parent_dict.setdefault(x, x)
+
+            while parent_dict[x] != x:
+
+                parent_dict[x] = parent_dict[parent_dict[x]]
+                x = parent_dict[x]
+
+            return x
+
+        tag_row_list = connection.execute(
+
+            sa.text('''
+
+                select
+                  parent_client_id,
+                  parent_object_id,
+                  content
+
+                from
+                  entity
+
+                where
+                  field_client_id = :field_client_id and
+                  field_object_id = :field_object_id and
+                  marked_for_deletion = false;
+
+            '''),
+
+            field_client_id = field_client_id,
+            field_object_id = field_object_id)
+
+        for entry_client_id, entry_object_id, tag in tag_row_list:
+
+            parent_dict[
+                find((entry_client_id, entry_object_id))] = find(tag)
+
+        group_dict = {}
+
+        for x in list(parent_dict):
+
+            if isinstance(x, tuple):
+                group_dict.setdefault(find(x), []).append(x)
+
+        insert_list = []
+
+        for entry_id_list in group_dict.values():
+
+            group_id = connection.execute(
+                "select nextval('entry_group_id_seq')").scalar()
+
+            insert_list.extend(
+
+                {'field_client_id': field_client_id,
+                    'field_object_id': field_object_id,
+                    'entry_client_id': entry_client_id,
+                    'entry_object_id': entry_object_id,
+                    'group_id': group_id}
+
+                for entry_client_id, entry_object_id in entry_id_list)
+
+        for index in range(0, len(insert_list), chunk_size):
+
+            connection.execute(
+                group_table.insert().values(insert_list[index : index + chunk_size]))
+
+
+def downgrade():
+
+    op.execute('''
+
+        DROP TABLE entry_group_data;
+
+        DROP SEQUENCE entry_group_id_seq;
+
+    ''')
@@ -2,16 +2,15 @@
 # Standard library imports.
 
 import logging
+import uuid
 
 # Library imports.
 
 from pyramid.security import forget
+from pyramid.settings import asbool
 
-from sqlalchemy import (
-    literal,
-    or_)
-
-from sqlalchemy.orm import joinedload
+from sqlalchemy import event, literal, or_
+from sqlalchemy.orm import object_session
 
 # Project imports.
 
@@ -23,27 +22,447 @@ from lingvodoc.models import (
     DBSession,
     DictionaryPerspective,
     Group,
+    Organization,
     organization_to_group_association,
     User,
     user_to_group_association,
     user_to_organization_association)
 
+import lingvodoc.cache.caching as caching
+
 
 # Setting up logging.
 log = logging.getLogger(__name__)
 
 
+# Process-local version of the permission cache, incremented whenever permission groups are modified by
+# this process, and Redis keys of the version and permissions of the cache shared between processes.
+permission_cache_local_version = 0
+
+permission_cache_version_key = 'acl:version'
+permission_cache_key_format = 'acl:permissions:{0}'
+
+
 def get_effective_client_id(client_id, request):
     """
     Returns client id to be used for permission checking.
     """
 
-    if request.registry.settings.get("desktop") and request.registry.settings["desktop"].get("desktop"):
+    try:
+        settings = request.registry.settings
+
+    except AttributeError:
+        return client_id
+
+    if settings.get("desktop") and settings["desktop"].get("desktop"):
         return request.cookies.get('client_id')
 
     else:
         return client_id
 
+class Permission_Set(object):
+    """
+    Effective permissions of a user, i.e. all permission groups of the user and of the user's organizations,
+    materialized for fast checking.
+    """
+
+    def __init__(self, group_list):
+        """
+        Initializes permission set from a list of (action, subject, subject_client_id, subject_object_id,
+        subject_override, organization_flag) permission group tuples.
+        """
+
+        self.group_list = group_list
+
+        self.override_set = set()
+        self.user_override_set = set()
+
+        self.id_set = set()
+        self.object_id_set = set()
+
+        for (
+            action,
+            subject,
+            subject_client_id,
+            subject_object_id,
+            subject_override,
+            organization_flag) in group_list:
+
+            if subject_override:
+
+                self.override_set.add((action, subject))
+
+                if not organization_flag:
+                    self.user_override_set.add((action, subject))
+
+            self.id_set.add((action, subject, subject_client_id, subject_object_id))
+            self.object_id_set.add((action, subject, subject_object_id))
+
+    @staticmethod
+    def get_group_list(user_id, subject = None):
+        """
+        Retrieves from the DB permission groups of a user and of the user's organizations, optionally only
+        groups of a specified subject.
+
+        Subject override groups go first, and groups of their base groups with specific subjects are skipped,
+        as they do not grant anything beyond the overrides, e.g. the admin has overrides for everything and
+        is a member of the groups of each dictionary and perspective.
+        """
+
+        def group_query(organization_flag):
+
+            query = (
+
+                DBSession
+
+                    .query(
+                        BaseGroup.id,
+                        BaseGroup.action,
+                        BaseGroup.subject,
+                        Group.subject_client_id,
+                        Group.subject_object_id,
+                        Group.subject_override)
+
+                    .filter(
+                        Group.base_group_id == BaseGroup.id))
+
+            if organization_flag:
+
+                query = (
+
+                    query.filter(
+                        user_to_organization_association.c.user_id == user_id,
+                        organization_to_group_association.c.organization_id ==
+                            user_to_organization_association.c.organization_id,
+                        organization_to_group_association.c.group_id == Group.id))
+
+            else:
+
+                query = (
+
+                    query.filter(
+                        user_to_group_association.c.user_id == user_id,
+                        user_to_group_association.c.group_id == Group.id))
+
+            if subject is not None:
+                query = query.filter(BaseGroup.subject == subject)
+
+            return query
+
+        row_list = []
+
+        for organization_flag in (False, True):
+
+            row_list.extend(
+                (row, organization_flag)
+                for row in group_query(organization_flag).filter(Group.subject_override).distinct().all())
+
+        override_id_set = (
+            set(row[0] for row, _ in row_list))
+
+        for organization_flag in (False, True):
+
+            query = (
+                group_query(organization_flag).filter(Group.subject_override.isnot(True)))
+
+            if override_id_set:
+                query = query.filter(BaseGroup.id.notin_(override_id_set))
+
+            row_list.extend(
+                (row, organization_flag)
+                for row in query.distinct().all())
+
+        return [
+            tuple(row[1:]) + (organization_flag,)
+            for row, organization_flag in row_list]
+
+    def check(self, action, subject, subject_id):
+        """
+        Checks if a given action on a given subject is permitted.
+        """
+
+        # Subject is specified by a client_id/object_id pair.
+
+        if isinstance(subject_id, (list, tuple)):
+
+            return (
+                (action, subject) in self.override_set or
+                (action, subject, subject_id[0], subject_id[1]) in self.id_set)
+
+        # Subject is specified by a single object_id.
+
+        elif isinstance(subject_id, int):
+
+            return (
+                (action, subject) in self.override_set or
+                (action, subject, subject_id) in self.object_id_set)
+
+        # Subjects with no id, we only check by-user subject overrides, as there probably shouldn't be
+        # organizations with admin permissions.
+
+        return (action, subject) in self.user_override_set
+
+
+def get_request_cache(request):
+    """
+    Returns request-scoped permission cache dictionary, creating it if required, or None if there is no
+    request to keep it, e.g. in Celery tasks and scripts.
+    """
+
+    if request is None:
+        return None
+
+    request_cache = getattr(request, 'acl_permission_cache', None)
+
+    if request_cache is None:
+
+        request_cache = {'user': {}, 'permission': {}}
+
+        try:
+            request.acl_permission_cache = request_cache
+
+        except AttributeError:
+            return None
+
+    return request_cache
+
+
+def get_user(client_id, request):
+    """
+    Returns user of a specified client, caching it for the duration of the request.
+    """
+
+    request_cache = get_request_cache(request)
+
+    if request_cache is None:
+        return Client.get_user_by_client_id(client_id)
+
+    user_dict = request_cache['user']
+
+    if client_id in user_dict:
+        return user_dict[client_id]
+
+    user = Client.get_user_by_client_id(client_id)
+    user_dict[client_id] = user
+
+    return user
+
+
+def shared_cache_flag(request):
+    """
+    Checks if the permission cache shared between processes via Redis is enabled.
+    """
+
+    try:
+        settings = request.registry.settings
+
+    except AttributeError:
+        return False
+
+    return asbool(settings.get('acl_shared_cache', False))
+
+
+def get_permission_set(user_id, request):
+    """
+    Returns effective permissions of a user, cached for the duration of the request and, if enabled via the
+    'acl_shared_cache' setting, across requests and processes.
+
+    Requires a request, without it permissions should be checked via check_query().
+    """
+
+    permission_dict = get_request_cache(request)['permission']
+
+    local_version, permission_set = (
+        permission_dict.get(user_id, (None, None)))
+
+    if local_version == permission_cache_local_version:
+        return permission_set
+
+    cache = caching.CACHE
+
+    # Permissions modified by the current transaction are not yet visible to other processes, so we do
+    # not use the shared cache until they are committed.
+
+    if (cache is None or
+        not shared_cache_flag(request) or
+        DBSession().info.get('acl_invalidate')):
+
+        permission_set = (
+            Permission_Set(Permission_Set.get_group_list(user_id)))
+
+        permission_dict[user_id] = (
+            permission_cache_local_version, permission_set)
+
+        return permission_set
+
+    # Getting the shared version before the DB query, so that if permissions are changed in the meantime,
+    # we would store them with an already obsolete version.
+
+    version = cache.get(permission_cache_version_key)
+
+    if version is None:
+
+        version = uuid.uuid4().hex
+        cache.set(permission_cache_version_key, version)
+
+    key = permission_cache_key_format.format(user_id)
+
+    cached = cache.get(key)
+
+    if cached is not None and cached[0] == version:
+        group_list = cached[1]
+
+    else:
+
+        group_list = Permission_Set.get_group_list(user_id)
+        cache.set(key, (version, group_list))
+
+    permission_set = Permission_Set(group_list)
+
+    permission_dict[user_id] = (
+        permission_cache_local_version, permission_set)
+
+    return permission_set
+
+
+def check_query(user_id, action, subject, subject_id):
+    """
+    Checks if a given action on a given subject is permitted for a user via DB queries for just this check,
+    used when there is no request to cache effective permissions for.
+    """
+
+    if isinstance(subject_id, (list, tuple)):
+        subject_condition = Group.subject_id == tuple(subject_id[:2])
+
+    elif isinstance(subject_id, int):
+        subject_condition = Group.subject_object_id == subject_id
+
+    # Subjects with no id, we only check by-user subject overrides, as there probably shouldn't be
+    # organizations with admin permissions.
+
+    else:
+        subject_condition = None
+
+    # Checking first through by-user permissions, and then through by-organization permissions.
+    #
+    # NOTE: using exists() as tests have shown it's slightly faster than limit-count-based method, see
+    # gql_entity.py, CreateEntity mutation.
+
+    user_query = (
+
+        DBSession
+
+            .query(literal(1))
+
+            .filter(
+                BaseGroup.subject == subject,
+                BaseGroup.action == action,
+                Group.base_group_id == BaseGroup.id,
+
+                Group.subject_override if subject_condition is None else
+                    or_(Group.subject_override, subject_condition),
+
+                user_to_group_association.c.user_id == user_id,
+                user_to_group_association.c.group_id == Group.id))
+
+    if DBSession.query(user_query.exists()).scalar():
+        return True
+
+    if subject_condition is None:
+        return False
+
+    organization_query = (
+
+        DBSession
+
+            .query(literal(1))
+
+            .filter(
+                BaseGroup.subject == subject,
+                BaseGroup.action == action,
+                Group.base_group_id == BaseGroup.id,
+                or_(Group.subject_override, subject_condition),
+                user_to_organization_association.c.user_id == user_id,
+                organization_to_group_association.c.organization_id ==
+                    user_to_organization_association.c.organization_id,
+                organization_to_group_association.c.group_id == Group.id))
+
+    return DBSession.query(organization_query.exists()).scalar()
+
+
+def invalidate_permission_cache(session = None):
+    """
+    Invalidates cached permissions, immediately for the current process and, after the transaction of the
+    specified or current session is committed, for other processes using the shared cache.
+    """
+
+    global permission_cache_local_version
+
+    permission_cache_local_version += 1
+
+    if session is None:
+        session = DBSession()
+
+    session.info['acl_invalidate'] = True
+
+
+@event.listens_for(DBSession, 'after_flush')
+def permission_after_flush(session, flush_context):
+    """
+    Invalidates cached permissions if permission groups, their users or organizations were modified.
+    """
+
+    for instance in (
+        session.new | session.dirty | session.deleted):
+
+        if isinstance(instance, (Group, User, Organization)):
+
+            invalidate_permission_cache(session)
+            return
+
+
+def permission_attribute_change(target, value, *args):
+    """
+    Invalidates cached permissions on in-session modifications of permission groups, their users or
+    organizations, as permissions can be checked before such modifications are flushed.
+    """
+
+    invalidate_permission_cache(
+        object_session(target))
+
+
+for attribute in (
+    Group.users,
+    Group.organizations,
+    Organization.users):
+
+    event.listen(attribute, 'append', permission_attribute_change)
+    event.listen(attribute, 'remove', permission_attribute_change)
+
+for attribute in (
+    Group.base_group_id,
+    Group.subject_client_id,
+    Group.subject_object_id,
+    Group.subject_override):
+
+    event.listen(attribute, 'set', permission_attribute_change)
+
+
+@event.listens_for(DBSession, 'after_commit')
+def permission_after_commit(session):
+    """
+    Invalidates permissions cached by other processes after modifications of permission groups are committed.
+    """
+
+    if not session.info.pop('acl_invalidate', False):
+        return
+
+    if caching.CACHE is not None:
+
+        caching.CACHE.set(
+            permission_cache_version_key, uuid.uuid4().hex)
+
+
 def groupfinder(client_id, request, factory = None, subject = None):
 
     client_id = get_effective_client_id(client_id, request)
@@ -63,41 +482,18 @@ def groupfinder(client_id, request, factory = None, subject = None):
             pass
 
     if not subject or subject == 'no op subject':
-        try:
-            user = DBSession.query(User) \
-                        .join(Client) \
-                        .filter(Client.id == client_id).first()
-
-        except AttributeError as e:
-                log.error('forget in acl.py')
-                forget(request)
-                return None
+        user = get_user(client_id, request)
 
         groupset = set()
         if user is not None and user.id == 1:
             groupset.add('Admin')
         return groupset
 
-    try:
-        user = DBSession.query(User) \
-                        .join(Client) \
-                        .filter(Client.id == client_id).first()
-
-        groups = DBSession.query(Group)\
-            .join(BaseGroup)\
-            .join(Group.users)\
-            .options(joinedload('BaseGroup')) \
-            .filter(User.id == user.id)
-        if subject:
-            groups = groups.filter(BaseGroup.subject == subject)
-        groups = groups.all()
-
-    except AttributeError as e:
-            log.error('forget in acl.py')
-            forget(request)
-            return None
+    user = get_user(client_id, request)
 
     if not user:
+        log.error('forget in acl.py')
+        forget(request)
         return None
 
     groupset = set()
@@ -105,43 +501,41 @@ def groupfinder(client_id, request, factory = None, subject = None):
     if user.id == 1:
         groupset.add('Admin')
 
-    for group in groups:
-        base_group = group.BaseGroup
+    # Without a request to cache user's effective permissions we retrieve only groups of the subject.
 
-        # If the user is deactivated, we won't allow any actions except for viewing.
+    if get_request_cache(request) is None:
+        group_list = Permission_Set.get_group_list(user.id, subject)
 
-        if not user.is_active and base_group.action != 'view':
-            continue
+    else:
+        group_list = get_permission_set(user.id, request).group_list
 
-        if group.subject_override:
-            group_name = base_group.action + ":" + base_group.subject + ":" + str(group.subject_override)
+    for (
+        action,
+        group_subject,
+        subject_client_id,
+        subject_object_id,
+        subject_override,
+        organization_flag) in group_list:
 
-        else:
-            if group.subject_client_id:
-                group_name = base_group.action + ":" + base_group.subject \
-                             + ":" + str(group.subject_client_id) + ":" + str(group.subject_object_id)
-            else:
-                 group_name = base_group.action + ":" + base_group.subject \
-                             + ":" + str(group.subject_object_id)
+        if group_subject != subject:
+            continue
 
-        groupset.add(group_name)
+        # If the user is deactivated, we won't allow any actions except for viewing.
 
-    for org in user.organizations:
-        for group in org.groups:
-            base_group = group.BaseGroup
+        if not user.is_active and action != 'view':
+            continue
 
-            # If the user is deactivated, we won't allow any actions except for viewing.
+        if subject_override:
+            group_name = action + ":" + group_subject + ":" + str(subject_override)
 
-            if not user.is_active and base_group.action != 'view':
-                continue
+        elif subject_client_id or organization_flag:
+            group_name = action + ":" + group_subject \
+                         + ":" + str(subject_client_id) + ":" + str(subject_object_id)
 
-            if group.subject_override:
-                group_name = base_group.action + ":" + base_group.subject + ":" + str(group.subject_override)
-            else:
-                group_name = base_group.action + ":" + base_group.subject \
-                             + ":" + str(group.subject_client_id) + ":" + str(group.subject_object_id)
+        else:
+            group_name = action + ":" + group_subject + ":" + str(subject_object_id)
 
-            groupset.add(group_name)
+        groupset.add(group_name)
 
     log.debug("GROUPSET: %d, %s", len(groupset), list(sorted(groupset)))
     return groupset # todo: caching
@@ -191,14 +585,14 @@ def check(client_id, request, action, subject, subject_id):
 
 def check_direct(client_id, request, action, subject, subject_id):
     """
-    Checks if a given action on a given subject is permitted for the specified client, accesses DB directly,
-    so should be faster.
+    Checks if a given action on a given subject is permitted for the specified client, uses user's effective
+    permissions materialized and cached by get_permission_set(), so should be faster.
     """
 
     client_id = get_effective_client_id(client_id, request)
 
     try:
-        user = Client.get_user_by_client_id(client_id)
+        user = get_user(client_id, request)
 
     except:
         return False
@@ -220,189 +614,31 @@ def check_direct(client_id, request, action, subject, subject_id):
             (perspective.state == 'Published' or perspective.state == 'Limited access') and
             (action == 'view' or action == 'preview'))
 
-    # Subject is specified by a client_id/object_id pair.
-
-    if isinstance(subject_id, (list, tuple)):
-
-        # Special case for 'approve_entities' perspective subject, permission depends on perspective's
-        # state, see function acls_by_groups() in models.py.
-
-        if subject == 'approve_entities':
+    # Special case for 'approve_entities' perspective subject, permission depends on perspective's state,
+    # see function acls_by_groups() in models.py.
 
-            perspective = DictionaryPerspective.get(subject_id)
+    if (subject == 'approve_entities' and
+        isinstance(subject_id, (list, tuple))):
 
-            if (perspective and
-                (perspective.state == 'Published' or perspective.state == 'Limited access') and
-                (action == 'view' or action == 'preview')):
-
-                return True
+        perspective = DictionaryPerspective.get(subject_id)
 
-        # If the user is deactivated, we won't allow any actions except for viewing.
-
-        if not user.is_active and action != 'view':
-            return False
-
-        # Ok, checking as usual, first through by-user permissions...
-        #
-        # NOTE: using exists() as tests have shown it's slightly faster than limit-count-based method, see
-        # gql_entity.py, CreateEntity mutation.
-
-        user_query = (
-
-            DBSession
-
-                .query(literal(1))
-
-                .filter(
-                    BaseGroup.subject == subject,
-                    BaseGroup.action == action,
-                    Group.base_group_id == BaseGroup.id,
-
-                    or_(Group.subject_override,
-                        Group.subject_id == subject_id),
-
-                    user_to_group_association.c.user_id == user.id,
-                    user_to_group_association.c.group_id == Group.id))
-
-        user_exists = (
-
-            DBSession
-                .query(user_query.exists())
-                .scalar())
-
-        if user_exists:
-            return True
-
-        # ...and then through by-organization permissions.
-
-        organization_query = (
-
-            DBSession
-
-                .query(literal(1))
-
-                .filter(
-                    BaseGroup.subject == subject,
-                    BaseGroup.action == action,
-                    Group.base_group_id == BaseGroup.id,
-
-                    or_(Group.subject_override,
-                        Group.subject_id == subject_id),
-
-                    user_to_organization_association.c.user_id == user.id,
-                    organization_to_group_association.c.organization_id ==
-                        user_to_organization_association.c.organization_id,
-                    organization_to_group_association.c.group_id == Group.id))
-
-        return (
-
-            DBSession
-                .query(organization_query.exists())
-                .scalar())
-
-    # Subject is specified by a single object_id.
-
-    elif isinstance(subject_id, int):
-
-        subject_object_id = subject_id
-
-        # If the user is deactivated, we won't allow any actions except for viewing.
-
-        if not user.is_active and action != 'view':
-            return False
-
-        # Checking as usual, first through by-user permissions...
-
-        user_query = (
-
-            DBSession
-
-                .query(literal(1))
-
-                .filter(
-                    BaseGroup.subject == subject,
-                    BaseGroup.action == action,
-                    Group.base_group_id == BaseGroup.id,
-
-                    or_(Group.subject_override,
-                        Group.subject_object_id == subject_object_id),
-
-                    user_to_group_association.c.user_id == user.id,
-                    user_to_group_association.c.group_id == Group.id))
-
-        user_exists = (
-
-            DBSession
-                .query(user_query.exists())
-                .scalar())
+        if (perspective and
+            (perspective.state == 'Published' or perspective.state == 'Limited access') and
+            (action == 'view' or action == 'preview')):
 
-        if user_exists:
             return True
 
-        # ...and then through by-organization permissions.
-
-        organization_query = (
-
-            DBSession
-
-                .query(literal(1))
-
-                .filter(
-                    BaseGroup.subject == subject,
-                    BaseGroup.action == action,
-                    Group.base_group_id == BaseGroup.id,
-
-                    or_(Group.subject_override,
-                        Group.subject_object_id == subject_object_id),
-
-                    user_to_organization_association.c.user_id == user.id,
-                    organization_to_group_association.c.organization_id ==
-                        user_to_organization_association.c.organization_id,
-                    organization_to_group_association.c.group_id == Group.id))
+    # If the user is deactivated, we won't allow any actions except for viewing.
 
-        return (
-
-            DBSession
-                .query(organization_query.exists())
-                .scalar())
-
-    # There could be subjects with no id, because they don't exist yet.
-    # In that case we only need to check if user is authorized to create this type of objects.
-
-    else:
-
-        # If the user is deactivated, we won't allow any actions except for viewing.
-
-        if not user.is_active and action != 'view':
-            return False
-
-        user_query = (
-
-            DBSession.
-
-                query(literal(1))
-
-                .filter(
-                    BaseGroup.subject == subject,
-                    BaseGroup.action == action,
-                    Group.base_group_id == BaseGroup.id,
-                    Group.subject_override,
-                    user_to_group_association.c.user_id == user.id,
-                    user_to_group_association.c.group_id == Group.id))
-
-        # There probably shouldn't be organizations with admin permissions, so not checking through
-        # organizations.
-
-        return (
+    if not user.is_active and action != 'view':
+        return False
 
-            DBSession
-                .query(user_query.exists())
-                .scalar())
+    # Checking through both by-user and by-organization permissions.
 
-    # Ok, we have a subject we do not know how to process, so we terminate with error.
-    # 
-    # In the normal course of operation we shouldn't ever be able to reach this code, but if we somehow do,
-    # we at least should know that something is not right.
+    if get_request_cache(request) is None:
+        return check_query(user.id, action, subject, subject_id)
 
-    raise NotImplementedError
+    return (
 
+        get_permission_set(user.id, request).check(
+            action, subject, subject_id))
@@ -58,7 +58,21 @@ def initialize_cache(args):
         return
     # region = make_region().configure(**args)
     # MEMOIZE = cache_responses(region)
-    CACHE = ThroughCache(Redis(**args))
+
+    # Time-to-live settings, e.g. 'ttl_auto = 86400' for cached database objects or 'ttl_default' for
+    # other keys, are not Redis connection arguments.
+
+    redis_args = {
+        key: value
+        for key, value in args.items()
+        if not key.startswith('ttl_')}
+
+    ttl_dict = {
+        key[4:]: int(value) if value and value.lower() != 'none' else None
+        for key, value in args.items()
+        if key.startswith('ttl_')}
+
+    CACHE = ThroughCache(Redis(**redis_args), ttl_dict)
 
 
 class TaskStatus():
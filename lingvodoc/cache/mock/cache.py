@@ -4,8 +4,13 @@ from lingvodoc.cache.api.cache import ICache
 
 
 class MockCache(ICache):
-    def get(self, key):
+    def get(self, keys = None, objects = None, DBSession = None, keep_dims = False):
+        if isinstance(keys, list):
+            return [None] * len(keys)
         return None
 
-    def set(self, key, value):
+    def set(self, key = None, value = None, key_value = None, objects = None, transaction = False, DBSession = None):
+        pass
+
+    def rem(self, keys):
         pass
@@ -1,9 +1,18 @@
 __author__ = 'winking-maniac'
 
+import collections
+import itertools
+import pickle
+import weakref
+
 import dill
 # from lingvodoc.models import DBSession, Entity
 # from dogpile.cache.api import NO_VALUE
 
+from sqlalchemy import event, inspect, tuple_
+from sqlalchemy.orm import make_transient_to_detached, scoped_session, Session
+from sqlalchemy.orm.attributes import set_committed_value
+
 from lingvodoc.cache.api.cache import ICache
 
 import logging
@@ -12,7 +21,6 @@ log = logging.getLogger(__name__)
 
 '''
 TODO:
-    0) Make true bulk get query
     1) Add caching lists of childs
     2) Add caching types with 1 id instead of 2
     3) Add caching not marked_deleted objects
@@ -37,16 +45,225 @@ Classes supported:
 
 Task 1 can be implemented via extra classes with any structure you want to with signal field 'NO_DATABASE'
 Task 2 can be implemented using CompositeIdMixin and IdMixin, maybe with another signal field
+
+Objects are stored under 'auto:<class name>:<client_id>:<object_id>' keys as pickled dictionaries of column
+values, and are restored as persistent objects of the session they are requested with, without database
+queries. Objects missing from the cache are loaded with a single query for each class.
+
+Cached objects are invalidated when they are modified or deleted, on flush and again on commit, see
+through_cache_after_flush(), and objects cached by set() are invalidated if their transaction is rolled
+back.
+
+Keys expire after a time-to-live set for their namespace, i.e. the part of the key before the first ':',
+see ThroughCache.__init__().
 '''
 
+
+#: Default time-to-live values in seconds by key namespaces, None for keys without expiration.
+default_ttl_dict = {
+    'auto': 24 * 60 * 60,
+    'language_tree': 24 * 60 * 60,
+    'persisted_query': 30 * 24 * 60 * 60,
+    'default': None}
+
+#: Maximum number of keys requested by a single MGET / object ids queried by a single IN query.
+chunk_size = 1024
+
+#: Caches to invalidate objects in on database changes.
+through_cache_set = weakref.WeakSet()
+
+
+def object_key(obj_type, client_id, object_id):
+    return f'auto:{obj_type.__name__}:{client_id}:{object_id}'
+
+
+def get_session(DBSession):
+    """
+    Gets session from a session or a scoped session.
+    """
+
+    return DBSession() if isinstance(DBSession, scoped_session) else DBSession
+
+
+def delete_keys(key_set):
+
+    if not key_set:
+        return
+
+    key_list = list(key_set)
+
+    for cache in list(through_cache_set):
+
+        try:
+            cache.cache.delete(*key_list)
+
+        except Exception as exception:
+            log.warning(f'Failed to invalidate cached objects: {exception}')
+
+
+@event.listens_for(Session, 'after_flush')
+def through_cache_after_flush(session, flush_context):
+    """
+    Invalidates cached objects modified or deleted by the flush, remembers them to invalidate them again on
+    commit, as until then they can be cached again with the previous state by another transaction.
+    """
+
+    if not through_cache_set:
+        return
+
+    key_set = set()
+
+    for obj in itertools.chain(session.dirty, session.deleted):
+
+        client_id = getattr(obj, 'client_id', None)
+        object_id = getattr(obj, 'object_id', None)
+
+        if client_id is not None and object_id is not None:
+            key_set.add(object_key(type(obj), client_id, object_id))
+
+    if key_set:
+
+        delete_keys(key_set)
+
+        session.info.setdefault(
+            'through_cache_key_set', set()).update(key_set)
+
+
+@event.listens_for(Session, 'after_commit')
+def through_cache_after_commit(session):
+
+    delete_keys(
+        session.info.pop('through_cache_key_set', None))
+
+    session.info.pop('through_cache_new_key_set', None)
+
+
+@event.listens_for(Session, 'after_rollback')
+def through_cache_after_rollback(session):
+
+    key_set = (
+        session.info.pop('through_cache_key_set', set()))
+
+    key_set.update(
+        session.info.pop('through_cache_new_key_set', ()))
+
+    delete_keys(key_set)
+
+
 class ThroughCache(ICache):
-    def __init__(self, redis):
+    def __init__(self, redis, ttl_dict = None):
         """
         :param redis: redis database
+        :param ttl_dict: time-to-live values in seconds by key namespaces, with 'default' value for
+            namespaces not in the dictionary, override default_ttl_dict
         :return:
         """
         self.cache = redis
 
+        self.ttl_dict = dict(default_ttl_dict)
+
+        if ttl_dict:
+            self.ttl_dict.update(ttl_dict)
+
+        through_cache_set.add(self)
+
+    def ttl(self, key):
+        """
+        Gets time-to-live of a key based on its namespace.
+        """
+
+        namespace = key.split(':', 1)[0]
+
+        return self.ttl_dict.get(
+            namespace, self.ttl_dict.get('default'))
+
+    def set_values(self, key_value_list):
+        """
+        Stores already serialized values in a single pipeline, with expiration set according to keys'
+        namespaces.
+        """
+
+        pipeline = self.cache.pipeline(transaction = False)
+
+        for key, value in key_value_list:
+            pipeline.set(key, value, ex = self.ttl(key))
+
+        pipeline.execute()
+
+    def get_values(self, key_list):
+        """
+        Gets values of multiple keys via MGET, with multiple MGETs pipelined for a large number of keys.
+        """
+
+        if len(key_list) <= chunk_size:
+            return self.cache.mget(key_list)
+
+        pipeline = self.cache.pipeline(transaction = False)
+
+        for index in range(0, len(key_list), chunk_size):
+            pipeline.mget(key_list[index : index + chunk_size])
+
+        return list(
+            itertools.chain.from_iterable(pipeline.execute()))
+
+    @staticmethod
+    def dumps(obj):
+        """
+        Serializes object as a dictionary of its column values.
+        """
+
+        mapper = inspect(type(obj))
+
+        return pickle.dumps(
+            {attr.key: getattr(obj, attr.key) for attr in mapper.column_attrs},
+            pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def loads(obj_type, cached, session):
+        """
+        Restores object from a dictionary of its column values as a persistent object of the session, or
+        gets object already present in the session.
+
+        Returns None if the cached value is not a dictionary of column values, e.g. if it was stored in
+        a previous format.
+        """
+
+        try:
+            value_dict = pickle.loads(cached)
+
+        except Exception:
+            return None
+
+        if not isinstance(value_dict, dict):
+            return None
+
+        mapper = inspect(obj_type)
+
+        try:
+
+            identity_key = (
+
+                mapper.identity_key_from_primary_key([
+                    value_dict[column.key] for column in mapper.primary_key]))
+
+        except KeyError:
+            return None
+
+        obj = session.identity_map.get(identity_key)
+
+        if obj is not None:
+            return obj
+
+        obj = mapper.class_manager.new_instance()
+
+        for key, value in value_dict.items():
+            set_committed_value(obj, key, value)
+
+        make_transient_to_detached(obj)
+        session.add(obj)
+
+        return obj
+
     def get(self, keys = None, objects = dict(), DBSession=None, keep_dims=False):
         """
         Gets objects from cache and database, if needed
@@ -76,6 +293,8 @@ class ThroughCache(ICache):
                 int : ((1, 2)),                           -->   [object1,]
             }
 
+            All objects are requested from the cache with MGET, objects missing from the cache are loaded
+            from the database with a single query for each class.
         """
         if isinstance(keys, str):
             cached = self.cache.get(keys)
@@ -83,62 +302,87 @@ class ThroughCache(ICache):
                 return None
             return dill.loads(cached)
         elif isinstance(keys, list):
-            result = []
-            for key in keys:
-                cached = self.cache.get(key)
-                if cached is None:
-                    result.append(None)
-                result.append(dill.loads(cached))
-            return result
-
-        if not DBSession:
-            err_msg = 'DBSession cannot be None'
-            log.error(err_msg)
-            # raise ValueError(err_msg)
+            return [
+                dill.loads(cached) if cached is not None else None
+                for cached in self.get_values(keys)]
 
         if DBSession is None:
             log.error("Missing DBSession parameter in CACHE.get()")
             return None
-        # try:
+
+        session = get_session(DBSession)
+
         log.debug(objects)
+
+        # Getting all objects from the cache at once.
+
+        request_list = [
+            (obj_type, tuple(lingvodoc_id))
+            for obj_type in objects
+            for lingvodoc_id in objects[obj_type]]
+
+        cached_list = (
+
+            self.get_values([
+                object_key(obj_type, *lingvodoc_id)
+                for obj_type, lingvodoc_id in request_list]))
+
+        obj_dict = {}
+        missing_dict = collections.defaultdict(set)
+
+        for (obj_type, lingvodoc_id), cached in zip(request_list, cached_list):
+
+            obj = (
+                self.loads(obj_type, cached, session) if cached is not None else None)
+
+            if obj is not None:
+                obj_dict[(obj_type, lingvodoc_id)] = obj
+
+            else:
+                missing_dict[obj_type].add(lingvodoc_id)
+
+        # Loading objects missing from the cache from the database and caching them.
+
+        key_value_list = []
+
+        for obj_type, id_set in missing_dict.items():
+
+            id_list = list(id_set)
+
+            for index in range(0, len(id_list), chunk_size):
+
+                obj_query = (
+
+                    session
+                        .query(obj_type)
+                        .filter(
+                            tuple_(obj_type.client_id, obj_type.object_id)
+                                .in_(id_list[index : index + chunk_size])))
+
+                for obj in obj_query:
+
+                    obj_dict[(obj_type, (obj.client_id, obj.object_id))] = obj
+
+                    key_value_list.append(
+                        (object_key(obj_type, obj.client_id, obj.object_id), self.dumps(obj)))
+
+        if key_value_list:
+            self.set_values(key_value_list)
+
         result = dict()
+
         for obj_type in objects:
-            result[obj_type] = []
-            for lingvodoc_id in objects[obj_type]:
-                key = f"auto:{obj_type.__name__}:{lingvodoc_id[0]}:{lingvodoc_id[1]}"
-                log.debug(key)
-                cached = self.cache.get(key)
-                if cached is None:
-                    cached = DBSession.query(obj_type) \
-                                    .filter_by(client_id=lingvodoc_id[0], object_id=lingvodoc_id[1]) \
-                                    .first()
-                    if not cached:
-                        pass
-                    else:
-                        self.cache.set(key, dill.dumps(cached))
-                else:
-                    # potentially race condition following data loss
-                    # cached = DBSession.merge(dill.loads(cached), load=False)
-                    cached = dill.loads(cached)
-                    try:
-                        DBSession.add(cached)
-                    except:
-                        cached = DBSession.query(obj_type) \
-                                        .filter_by(client_id=lingvodoc_id[0], object_id=lingvodoc_id[1]) \
-                                        .first()
-
-                result[obj_type].append(cached)
-        # except Exception as e:
-        #     log.error(f'Exception during getting from cache : {e}')
-        #     return None
+
+            result[obj_type] = [
+                obj_dict.get((obj_type, tuple(lingvodoc_id)))
+                for lingvodoc_id in objects[obj_type]]
+
         if len(result) == 1:
             result = result.popitem()[1]
             if len(result) == 1 and not keep_dims:
                 result = result[0]
         return result
 
-
-
     # TODO: add try/catch handlers.
     def set(self, key = None, value = None, key_value = None, objects = list(), transaction = False, DBSession=None):
         """
@@ -154,46 +398,49 @@ class ThroughCache(ICache):
             Returns list of True/False(one value if :transaction:) flags of success
         """
         if key is not None:
-            self.cache.set(key, dill.dumps(value))
+            self.cache.set(key, dill.dumps(value), ex = self.ttl(key))
             return
         if key_value is not None:
-            self.cache.mset(
-                dict(
-                    map(lambda key_value_pair: (key_value_pair[0], dill.dumps(key_value_pair[1]) ),
-                        key_value.items()
-                    )
-                )
-            )
+            self.set_values([
+                (key, dill.dumps(value))
+                for key, value in key_value.items()])
+            return
 
 
 
         if DBSession is None:
             log.error("Missing DBSession parameter in CACHE.get()")
             return None
+
+        # Objects are cached before the commit, so we remember them to invalidate them if the transaction
+        # is rolled back.
+
+        new_key_set = (
+            get_session(DBSession).info.setdefault('through_cache_new_key_set', set()))
+
         if transaction:
             try:
-                accepted_for_caching = dict(
-                    map(
-                        lambda obj:
-                            (f'auto:{obj.__class__.__name__}:{obj.client_id}:{obj.object_id}', dill.dumps(obj)),
-                        objects
-                    )
-                )
                 DBSession.add_all(objects)
                 DBSession.flush()
-                self.cache.mset(accepted_for_caching)
+                accepted_for_caching = [
+                    (object_key(type(obj), obj.client_id, obj.object_id), self.dumps(obj))
+                    for obj in objects]
+                new_key_set.update(
+                    key for key, value in accepted_for_caching)
+                self.set_values(accepted_for_caching)
                 return True
             except:
                 return False
         else:
             result = []
             for obj in objects:
-                key = f'auto:{obj.__class__.__name__}:{obj.client_id}:{obj.object_id}'
+                key = object_key(type(obj), obj.client_id, obj.object_id)
                 log.debug(key)
                 try:
                     DBSession.add(obj)
                     DBSession.flush()
-                    self.cache.set(key, dill.dumps(obj))
+                    new_key_set.add(key)
+                    self.cache.set(key, self.dumps(obj), ex = self.ttl(key))
                     result.append(True)
                 except:
                     result.append(False)
@@ -1,5 +1,6 @@
+import collections
+import itertools
 import re
-from pylev import levenshtein as edit_distance
 
 
 braces = re.compile(r"\([^()]*\)")
@@ -15,8 +16,173 @@ def flattenDict(d):
     return [(ent, trans, origent[2]) for origent in d for ent in getWordParts(origent[0]) for trans in getWordParts(origent[1])]
 
 
+def bounded_edit_distance(string_a, string_b, limit):
+    """
+    Computes Levenshtein distance between two strings if it does not exceed the limit, otherwise returns
+    limit + 1.
+
+    Only the diagonal band of width 2 * limit + 1 of the dynamic programming matrix is computed, and
+    computation stops as soon as all values of a matrix row exceed the limit.
+    """
+
+    if string_a == string_b:
+        return 0
+
+    if len(string_a) > len(string_b):
+        string_a, string_b = string_b, string_a
+
+    length_a = len(string_a)
+    length_b = len(string_b)
+
+    out_of_limit = limit + 1
+
+    if length_b - length_a > limit:
+        return out_of_limit
+
+    previous_row = [
+        min(j, out_of_limit) for j in range(length_b + 1)]
+
+    for i in range(1, length_a + 1):
+
+        char_a = string_a[i - 1]
+
+        j_from = max(1, i - limit)
+        j_to = min(length_b, i + limit)
+
+        current_row = [out_of_limit] * (length_b + 1)
+
+        if j_from == 1:
+            current_row[0] = min(i, out_of_limit)
+
+        row_min = current_row[0]
+
+        for j in range(j_from, j_to + 1):
+
+            value = min(
+                previous_row[j - 1] + (char_a != string_b[j - 1]),
+                previous_row[j] + 1,
+                current_row[j - 1] + 1,
+                out_of_limit)
+
+            current_row[j] = value
+
+            if value < row_min:
+                row_min = value
+
+        if row_min > limit:
+            return out_of_limit
+
+        previous_row = current_row
+
+    return previous_row[length_b]
+
+
+#: Maximum number of deletion variants of a string to index, longer strings are compared with all strings
+#: of close enough length.
+deletion_variant_limit = 4096
+
+
+def deletion_variant_count(length, limit):
+    """
+    Number of ways to delete up to the limit characters from a string, an upper bound on the number of
+    its deletion variants.
+    """
+
+    count = 1
+    term = 1
+
+    for k in range(1, min(length, limit) + 1):
+
+        term = term * (length - k + 1) // k
+        count += term
+
+    return count
+
+
+def deletion_variants(string, limit):
+    """
+    Returns set of all strings obtainable from the given one by deleting up to the limit characters.
+    """
+
+    variant_set = {string}
+    current_set = {string}
+
+    for k in range(limit):
+
+        current_set = {
+            variant[:i] + variant[i + 1:]
+            for variant in current_set
+            for i in range(len(variant))}
+
+        variant_set.update(current_set)
+
+    return variant_set
+
+
+def levenshtein_pairs(string_list, limit):
+    """
+    Finds all pairs of different strings with Levenshtein distance not exceeding the limit.
+
+    Strings within the limit distance of each other always have a common deletion variant, i.e. a string
+    obtained by deleting up to the limit characters from each of them, so only pairs of strings sharing a
+    deletion variant are checked with bounded_edit_distance() instead of all N^2/2 pairs. Strings with
+    too many deletion variants are checked against all strings with length difference within the limit.
+
+    Returns list of pairs (string_a, string_b), string_a preceding string_b in the source list, sorted by
+    positions of strings in the source list.
+    """
+
+    if limit <= 0:
+        return []
+
+    variant_dict = collections.defaultdict(list)
+    length_dict = collections.defaultdict(list)
+
+    unindexed_list = []
+
+    for index, string in enumerate(string_list):
+
+        length_dict[len(string)].append(index)
+
+        if deletion_variant_count(len(string), limit) > deletion_variant_limit:
+
+            unindexed_list.append(index)
+            continue
+
+        for variant in deletion_variants(string, limit):
+            variant_dict[variant].append(index)
+
+    # Compiling candidate pairs.
+
+    candidate_set = set()
+
+    for index_list in variant_dict.values():
+        candidate_set.update(itertools.combinations(index_list, 2))
+
+    for index in unindexed_list:
+
+        length = len(string_list[index])
+
+        for other_length in range(length - limit, length + limit + 1):
+            for other_index in length_dict.get(other_length, ()):
+
+                if other_index != index:
+
+                    candidate_set.add(
+                        (index, other_index) if index < other_index else
+                        (other_index, index))
+
+    # Checking candidates.
+
+    return [
+        (string_list[index_a], string_list[index_b])
+        for index_a, index_b in sorted(candidate_set)
+        if bounded_edit_distance(
+            string_list[index_a], string_list[index_b], limit) <= limit]
+
+
 def additional_checks(w1, w2, levenstein = 1):
-    r = edit_distance(w1, w2)
+    r = bounded_edit_distance(w1, w2, max(levenstein, 0))
     return r <= levenstein
 
 
@@ -49,6 +215,18 @@ def mergeDicts(x, y, threshold = 0.0, levenstein = 1):
     while x[0] == "": x = nxtx()
     while y[0] == "": y = nxty()
 
+    # Translation pairs are compared many times, as with x == y each pair occurs at least twice, so we
+    # memoize check results.
+
+    check_cache = dict()
+
+    def check(w1, w2):
+        key = (w1, w2) if w1 <= w2 else (w2, w1)
+        r = check_cache.get(key)
+        if r is None:
+            r = check_cache[key] = additional_checks(w1, w2, levenstein)
+        return r
+
     matchcnts = dict()
     while x is not None and y is not None:
         if x[0] == y[0]:
@@ -78,7 +256,7 @@ def mergeDicts(x, y, threshold = 0.0, levenstein = 1):
                     prev_y = ay['tuple'][2]
                     if ax[2] == ay['tuple'][2]: continue
                     if matchcnts.get((ay['tuple'][2], ax[2])) is not None: continue
-                    if (additional_checks(ax[1], ay['tuple'][1], levenstein)):
+                    if (check(ax[1], ay['tuple'][1])):
                         m = (ax[2], ay['tuple'][2])
                         if not ax_marker:
                             matchcnts[m] = matchcnts.get(m, 0) + 1
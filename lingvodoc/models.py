@@ -1,8 +1,11 @@
 
 # Standard library imports.
 
+import collections
 import datetime
 import logging
+import threading
+import time
 import uuid
 import builtins
 
@@ -19,12 +22,14 @@ from pyramid.security import (
 from sqlalchemy import (
     and_,
     Column,
+    event,
     ForeignKey,
     ForeignKeyConstraint,
     Index,
     literal,
     or_,
     func,
+    select,
     Sequence,
     Table,
     tuple_)
@@ -43,11 +48,14 @@ from sqlalchemy.ext.hybrid import Comparator, hybrid_property
 from sqlalchemy.orm import (
     backref,
     Bundle,
+    object_session,
     relationship,
     scoped_session,
+    Session,
     sessionmaker)
 
-from sqlalchemy.orm.attributes import flag_modified
+from sqlalchemy.orm.attributes import flag_modified, set_committed_value
+from sqlalchemy.orm.util import identity_key
 
 from sqlalchemy.sql import text
 
@@ -288,26 +296,129 @@ class IdMixin(object):
                 .first())
 
 
-def get_client_counter(
+def reserve_client_ids(
     client_id,
+    count,
     session = DBSession):
+    """
+    Reserves a range of consecutive object ids of a client by advancing client's counter with a single
+    statement, returns the first reserved id.
+
+    Counter is advanced in the session's current transaction, so the reservation is undone if the
+    transaction is rolled back, and until then client's row stays locked, as with any other update.
+    """
 
-    (session
-        .query(Client)
-        .filter_by(id = client_id)
-        .update(
-            values  ={'counter': Client.counter + 1},
-            synchronize_session = 'fetch'))
+    if isinstance(session, scoped_session):
+        session = session()
+
+    # Flushing any pending changes of the client's counter, e.g. from Client.next_object_id(), so that
+    # they are not later flushed over the updated counter.
 
     session.flush()
 
-    return (
+    client_table = Client.__table__
+
+    update = (
+
+        client_table
+            .update()
+            .where(client_table.c.id == client_id)
+            .values(counter = client_table.c.counter + count))
+
+    connection = session.connection()
+
+    if connection.dialect.implicit_returning:
+
+        counter = (
+
+            connection
+                .execute(update.returning(client_table.c.counter))
+                .scalar())
+
+    else:
+
+        connection.execute(update)
+
+        counter = (
+
+            connection
+                .execute(
+                    select([client_table.c.counter])
+                        .where(client_table.c.id == client_id))
+                .scalar())
+
+    if counter is None:
+        raise ValueError('Unknown client id {0}.'.format(client_id))
+
+    # Synchronizing the client's object already loaded into the session, if there is one.
+
+    client = (
+        session.identity_map.get(identity_key(Client, client_id)))
+
+    if client is not None:
+        set_committed_value(client, 'counter', counter)
+
+    return counter - count + 1
+
+
+#: Maximum number of object ids reserved at once for a client by get_client_counter().
+client_id_block_size_max = 1024
+
+
+def get_client_counter(
+    client_id,
+    session = DBSession):
+    """
+    Gets a new object id of a client.
+
+    Object ids are taken from the session's pool of ids reserved by reserve_client_ids(), with each next
+    reservation for a client in the same transaction being twice as large up to client_id_block_size_max
+    ids, so that creation of N objects takes O(log N + N / client_id_block_size_max) counter updates.
 
-        session
-            .query(Client.counter)
-            .filter_by(id = client_id)
-            .with_for_update(of = Client)
-            .scalar())
+    Pool is discarded when the transaction ends, see client_id_pool_discard(), and when the client's
+    counter is changed directly, see client_id_pool_counter_set().
+    """
+
+    if isinstance(session, scoped_session):
+        session = session()
+
+    pool_dict = (
+        session.info.setdefault('client_id_pool', {}))
+
+    pool = pool_dict.get(client_id)
+
+    # Pool is a list [next id, last id, last reservation size].
+
+    if pool is None or pool[0] > pool[1]:
+
+        block_size = (
+            min(pool[2] * 2, client_id_block_size_max) if pool else 1)
+
+        first_id = (
+
+            reserve_client_ids(
+                client_id, block_size, session))
+
+        pool = [first_id, first_id + block_size - 1, block_size]
+        pool_dict[client_id] = pool
+
+    object_id = pool[0]
+    pool[0] += 1
+
+    return object_id
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def client_id_pool_discard(session, transaction):
+    """
+    Discards reserved object ids when the transaction or a savepoint they were reserved in ends, as
+    on rollback they become unreserved.
+
+    Subtransactions, e.g. of flushes, are ignored.
+    """
+
+    if transaction.parent is None or transaction.nested:
+        session.info.pop('client_id_pool', None)
 
 
 class ObjectTOC(
@@ -516,6 +627,12 @@ class CompositeIdMixin(object):
             kwargs['client_id'] = id[0]
             kwargs['object_id'] = id[1]
 
+        # Newly allocated ids can't have ObjectTOC rows, so we can just add ObjectTOC without checking
+        # for an existing one, and such rows are then inserted in batches on flush.
+
+        new_objecttoc = (
+            kwargs.pop('new_objecttoc', False))
+
         if kwargs.get('object_id') is None:
 
             kwargs['object_id'] = (
@@ -523,6 +640,8 @@ class CompositeIdMixin(object):
                 get_client_counter(
                     kwargs['client_id'], session))
 
+            new_objecttoc = True
+
         object_toc = (
 
             ObjectTOC(
@@ -531,10 +650,9 @@ class CompositeIdMixin(object):
                 table_name = self.__tablename__,
                 marked_for_deletion = kwargs.get('marked_for_deletion', False)))
 
-        if kwargs.get('new_objecttoc'):
-            
+        if new_objecttoc:
+
             session.add(object_toc)
-            del kwargs['new_objecttoc']
 
         else:
 
@@ -687,113 +805,396 @@ class ParentMixin(PrimeTableArgs):
                 cls.parent_object_id))
 
 
-def get_translation(
-    locale_id,
-    client_id,
-    object_id,
-    session = DBSession,
-    key_format_str = 'translation:%s:%s:%s',
-    default = None):
+#: Maximum number of translation gists in the in-process translation cache.
+translation_cache_size = 16384
+
+#: Interval in seconds between checks of the shared translation cache generation, i.e. maximum time for
+#: which other processes can return translations changed in this one.
+translation_cache_check_interval = 1.0
+
+#: Number of translation lookups between logging of translation cache metrics.
+translation_cache_log_interval = 16384
+
+#: Maximum number of translation gists loaded by a single query.
+translation_cache_chunk_size = 1024
+
+
+def select_translation(translation_dict, locale_id):
     """
-    Standard translation retrieval with caching.
+    Selects translation from a dictionary of translations by locale ids: translation in the requested
+    locale, if there is none, translation in English, or in Russian if English is requested, if there is
+    none too, translation in any locale, or None if there are no translations at all.
     """
 
-    cache = caching.CACHE
+    if not translation_dict:
+        return None
 
     main_locale = str(locale_id)
-    fallback_locale = str(ENGLISH_LOCALE) if str(locale_id) != str(ENGLISH_LOCALE) else str(RUSSIAN_LOCALE)
+    fallback_locale = str(ENGLISH_LOCALE) if main_locale != str(ENGLISH_LOCALE) else str(RUSSIAN_LOCALE)
 
-    key_main = key_format_str % (
-        str(client_id), str(object_id), str(main_locale))
+    translation = translation_dict.get(main_locale)
 
-    translation = cache.get(key_main)
-    if translation:
-        log.info("Got cached %s " % str(key_main))
+    if translation is not None:
         return translation
-    log.debug("No cached value, getting from DB: %s " % str(key_main))
-
-    all_translations = session.query(TranslationAtom.content, TranslationAtom.locale_id).filter_by(
-        parent_client_id=client_id,
-        parent_object_id=object_id,
-        marked_for_deletion=False).all()
-    all_translations_dict = dict((str(locale), translation) for translation, locale in all_translations)
 
-    if not all_translations_dict:
-        return default if default is not None else "Translation missing for all locales"
+    translation = translation_dict.get(fallback_locale)
 
-    elif all_translations_dict.get(main_locale) is not None:
-        translation = all_translations_dict.get(main_locale)
-        cache.set(key=key_main, value=translation)
-        return translation
-    elif all_translations_dict.get(fallback_locale) is not None:
-        translation = all_translations_dict.get(fallback_locale)
-        key_fallback = key_format_str % (
-            str(client_id), str(object_id), str(fallback_locale))
-        cache.set(key=key_fallback, value=translation)
+    if translation is not None:
         return translation
 
     # Ok, no main, no fallback, so we get anything at all.
 
-    for locale, translation in sorted(all_translations_dict.items()):
+    for locale, translation in sorted(translation_dict.items()):
 
         if locale != main_locale and locale != fallback_locale:
+            return translation
 
-            key = key_format_str % (
-                str(client_id), str(object_id), str(locale))
+    return None
 
-            cache.set(key = key, value = translation)
-            return translation
 
-    # Should be unreachable, so just in case.
+class Translation_Cache(object):
+    """
+    Two-level cache of translation gists' translations.
+
+    First level is an in-process LRU dictionary, second is the shared Redis cache, where translations of
+    a gist are stored together with the gist's version stamp, and are valid only while the version stamp
+    is current.
 
-    if default is not None:
-        return default
+    Changing translations of a gist, see bump(), sets a new version stamp of the gist, making its
+    translations cached in Redis invalid, and sets a new shared generation stamp, making processes clear
+    their in-process caches when they next check the generation.
+    """
 
-    return "Translation missing for all locales"
+    key_format_str = 'translation_cache:%s:%s'
+    version_key_format_str = 'translation_version:%s:%s'
+    generation_key_str = 'translation_generation'
 
+    def __init__(self, size = translation_cache_size):
 
-def get_translations(
+        self.size = size
+
+        self.lock = threading.Lock()
+        self.gist_dict = collections.OrderedDict()
+
+        self.generation = None
+        self.generation_time = None
+
+        self.counter = collections.Counter()
+
+    def check_generation(self):
+        """
+        Clears in-process cache if the shared generation stamp changed, checks at most once per
+        translation_cache_check_interval seconds.
+        """
+
+        current_time = time.monotonic()
+
+        if (self.generation_time is not None and
+            current_time - self.generation_time < translation_cache_check_interval):
+            return
+
+        generation = (
+            caching.CACHE.get(self.generation_key_str))
+
+        with self.lock:
+
+            if generation != self.generation:
+
+                self.gist_dict.clear()
+                self.generation = generation
+
+            self.generation_time = current_time
+
+    def l1_get(self, gist_id):
+
+        with self.lock:
+
+            translation_dict = self.gist_dict.get(gist_id)
+
+            if translation_dict is not None:
+                self.gist_dict.move_to_end(gist_id)
+
+            return translation_dict
+
+    def l1_set(self, gist_id, translation_dict):
+
+        with self.lock:
+
+            self.gist_dict[gist_id] = translation_dict
+            self.gist_dict.move_to_end(gist_id)
+
+            while len(self.gist_dict) > self.size:
+                self.gist_dict.popitem(last = False)
+
+    def count(self, name, value = 1):
+
+        self.counter[name] += value
+        self.counter['lookup'] += value
+
+        if self.counter['lookup'] % translation_cache_log_interval < value:
+            log.debug(f'translation cache: {self.metrics()}')
+
+    def metrics(self):
+        """
+        Returns numbers of in-process cache hits, Redis cache hits and database loads, and hit rates.
+        """
+
+        counter = self.counter.copy()
+        lookup_count = max(counter['lookup'], 1)
+
+        return {
+            'lookup': counter['lookup'],
+            'l1_hit': counter['l1_hit'],
+            'l2_hit': counter['l2_hit'],
+            'miss': counter['miss'],
+            'l1_hit_rate': counter['l1_hit'] / lookup_count,
+            'hit_rate': (counter['l1_hit'] + counter['l2_hit']) / lookup_count}
+
+    def get_many(self, gist_id_list, session = DBSession):
+        """
+        Gets translations of multiple translation gists as dictionaries of translations by string locale
+        ids, empty for gists without translations, looking up the in-process cache, then Redis with a
+        single MGET, then loading the rest from the database with a single query.
+        """
+
+        self.check_generation()
+
+        result_dict = {}
+        l2_id_list = []
+
+        for gist_id in gist_id_list:
+
+            gist_id = tuple(gist_id)
+
+            if gist_id in result_dict:
+                continue
+
+            translation_dict = self.l1_get(gist_id)
+
+            if translation_dict is not None:
+
+                result_dict[gist_id] = translation_dict
+                self.count('l1_hit')
+
+            else:
+                l2_id_list.append(gist_id)
+
+        if not l2_id_list:
+            return result_dict
+
+        # Getting versions and version-stamped translations from Redis.
+
+        key_list = []
+
+        for gist_id in l2_id_list:
+
+            key_list.append(self.version_key_format_str % gist_id)
+            key_list.append(self.key_format_str % gist_id)
+
+        cached_list = (
+            caching.CACHE.get(key_list) or [None] * len(key_list))
+
+        db_id_list = []
+        version_dict = {}
+
+        for index, gist_id in enumerate(l2_id_list):
+
+            version = cached_list[2 * index]
+            cached = cached_list[2 * index + 1]
+
+            if (isinstance(cached, tuple) and
+                len(cached) == 2 and
+                cached[0] == version):
+
+                result_dict[gist_id] = cached[1]
+                self.l1_set(gist_id, cached[1])
+
+                self.count('l2_hit')
+
+            else:
+
+                db_id_list.append(gist_id)
+                version_dict[gist_id] = version
+
+        if not db_id_list:
+            return result_dict
+
+        # Loading the rest from the database, caching it stamped with versions we've got before loading,
+        # so that if translations are changed concurrently, what we cache is already invalid.
+
+        db_dict = {
+            gist_id: {}
+            for gist_id in db_id_list}
+
+        for index in range(0, len(db_id_list), translation_cache_chunk_size):
+
+            translation_query = (
+
+                session
+
+                    .query(
+                        TranslationAtom.parent_client_id,
+                        TranslationAtom.parent_object_id,
+                        TranslationAtom.locale_id,
+                        TranslationAtom.content)
+
+                    .filter(
+
+                        tuple_(
+                            TranslationAtom.parent_client_id,
+                            TranslationAtom.parent_object_id)
+
+                            .in_(
+                                db_id_list[index : index + translation_cache_chunk_size]),
+
+                        TranslationAtom.marked_for_deletion == False))
+
+            for client_id, object_id, locale_id, content in translation_query:
+                db_dict[(client_id, object_id)][str(locale_id)] = content
+
+        key_value_dict = {}
+
+        for gist_id, translation_dict in db_dict.items():
+
+            result_dict[gist_id] = translation_dict
+            self.l1_set(gist_id, translation_dict)
+
+            key_value_dict[self.key_format_str % gist_id] = (
+                (version_dict[gist_id], translation_dict))
+
+        caching.CACHE.set(key_value = key_value_dict)
+
+        self.count('miss', len(db_id_list))
+
+        return result_dict
+
+    def get(self, client_id, object_id, session = DBSession):
+
+        return (
+
+            self.get_many(
+                [(client_id, object_id)], session)
+
+                .get((client_id, object_id)))
+
+    def bump(self, gist_id_list):
+        """
+        Invalidates cached translations of translation gists.
+        """
+
+        gist_id_list = [
+            tuple(gist_id) for gist_id in gist_id_list]
+
+        with self.lock:
+
+            for gist_id in gist_id_list:
+                self.gist_dict.pop(gist_id, None)
+
+        version = uuid.uuid4().hex
+
+        key_value_dict = {
+            self.version_key_format_str % gist_id: version
+            for gist_id in gist_id_list}
+
+        key_value_dict[self.generation_key_str] = version
+
+        caching.CACHE.set(key_value = key_value_dict)
+
+        # Cached data type translations of fields, see Field.data_type.
+
+        caching.CACHE.rem([
+            'translation:%s:%s:%s' % (gist_id + (ENGLISH_LOCALE,))
+            for gist_id in gist_id_list])
+
+
+translation_cache = Translation_Cache()
+
+
+def bump_translation_version(client_id, object_id, session = DBSession):
+    """
+    Invalidates cached translations of a translation gist after its translation atoms are created,
+    changed or deleted, immediately and then again after the transaction is committed, as until then
+    previous translations can be cached again by other transactions, or after it is rolled back, as
+    uncommitted translations can be cached by this transaction.
+    """
+
+    translation_cache.bump([(client_id, object_id)])
+
+    if isinstance(session, scoped_session):
+        session = session()
+
+    session.info.setdefault(
+        'translation_gist_id_set', set()).add((client_id, object_id))
+
+
+@event.listens_for(Session, 'after_commit')
+def translation_cache_after_commit(session):
+
+    gist_id_set = (
+        session.info.pop('translation_gist_id_set', None))
+
+    if gist_id_set:
+        translation_cache.bump(gist_id_set)
+
+
+@event.listens_for(Session, 'after_rollback')
+def translation_cache_after_rollback(session):
+
+    gist_id_set = (
+        session.info.pop('translation_gist_id_set', None))
+
+    if gist_id_set:
+        translation_cache.bump(gist_id_set)
+
+
+def warm_translations(gist_id_list, session = DBSession):
+    """
+    Loads translations of multiple translation gists into the translation cache at once, so that
+    subsequent get_translation() / get_translations() calls for them do not access Redis or database.
+    """
+
+    translation_cache.get_many(
+        [gist_id for gist_id in gist_id_list if gist_id[0] is not None],
+        session)
+
+
+def get_translation(
+    locale_id,
     client_id,
     object_id,
     session = DBSession,
-    key_format_str = 'translations:%s:%s'):
+    default = None):
     """
-    Standard translations retrieval with caching.
+    Standard translation retrieval with caching, see Translation_Cache.
     """
 
-    cache = caching.CACHE
-
-    key_str = (
-        key_format_str % (str(client_id), str(object_id)))
-
-    translations = cache.get(key_str)
-    if translations:
-        log.info("Got cached %s " % str(key_str))
-        return translations
-    log.debug("No cached value, getting from DB: %s " % str(key_str))
+    translation = (
 
-    all_translations = (
+        select_translation(
+            translation_cache.get(client_id, object_id, session),
+            locale_id))
 
-        session
+    if translation is not None:
+        return translation
 
-            .query(
-                TranslationAtom.locale_id,
-                TranslationAtom.content)
+    if default is not None:
+        return default
 
-            .filter_by(
-                parent_client_id = client_id,
-                parent_object_id = object_id,
-                marked_for_deletion = False)
+    return "Translation missing for all locales"
 
-            .all())
 
-    all_translations_dict = {
-        str(locale_id): translation
-        for locale_id, translation in all_translations}
+def get_translations(
+    client_id,
+    object_id,
+    session = DBSession):
+    """
+    Standard translations retrieval with caching, see Translation_Cache.
+    """
 
-    cache.set(key = key_str, value = all_translations_dict)
+    translation_dict = (
+        translation_cache.get(client_id, object_id, session))
 
-    return all_translations_dict or None
+    return dict(translation_dict) if translation_dict else None
 
 
 class TranslationMixin(PrimeTableArgs):
@@ -1725,12 +2126,7 @@ class LexicalEntry(
 
             filtered_lexes = lexs
 
-        ls = []
-
-        for i, x in enumerate(filtered_lexes):
-            ls.append({'traversal_lexical_order': i, 'client_id': x[1], 'object_id': x[2]})
-
-        if not ls:
+        if not filtered_lexes:
             return []
 
         # Filtering by deletion status, if requred.
@@ -1767,27 +2163,26 @@ class LexicalEntry(
         else:
             pub_filter = ''
 
-        temp_table_name = 'lexical_entries_temp_table' + str(uuid.uuid4()).replace("-", "")
-
-        DBSession.execute(
-            '''create TEMPORARY TABLE %s (traversal_lexical_order INTEGER, client_id BIGINT, object_id BIGINT) on COMMIT DROP;''' % temp_table_name)
-
-        DBSession.execute(
-            '''insert into %s (traversal_lexical_order, client_id, object_id) values (:traversal_lexical_order, :client_id, :object_id);''' % temp_table_name,
-            ls)
-
         result = DBSession.execute(text('''
-        WITH RECURSIVE cte_expr AS
+        WITH RECURSIVE lexical_entries AS
+        (SELECT *
+         FROM unnest(
+           CAST(:traversal_lexical_order AS INTEGER[]),
+           CAST(:client_id AS BIGINT[]),
+           CAST(:object_id AS BIGINT[]))
+           AS T(traversal_lexical_order, client_id, object_id)
+        ),
+        cte_expr AS
         (SELECT
            entity.*,
-           %s.traversal_lexical_order                                  AS traversal_lexical_order,
+           lexical_entries.traversal_lexical_order                     AS traversal_lexical_order,
            1                                                                                   AS tree_level,
             row_number() over(partition by traversal_lexical_order order by Entity.created_at) as tree_numbering_scheme
          FROM entity
-           INNER JOIN %s
+           INNER JOIN lexical_entries
              ON
-               entity.parent_client_id = %s.client_id
-               AND entity.parent_object_id = %s.object_id
+               entity.parent_client_id = lexical_entries.client_id
+               AND entity.parent_object_id = lexical_entries.object_id
 
          UNION ALL
          SELECT
@@ -1836,22 +2231,49 @@ class LexicalEntry(
                data_type_atom_fallback.locale_id = 1
           %s
         ORDER BY traversal_lexical_order, tree_numbering_scheme, tree_level;
-        ''' % (temp_table_name, temp_table_name, temp_table_name, temp_table_name, pub_filter)), {'locale': locale_id})
+        ''' % pub_filter), {
+
+            'locale': locale_id,
+            'traversal_lexical_order': list(range(len(filtered_lexes))),
+            'client_id': [x[1] for x in filtered_lexes],
+            'object_id': [x[2] for x in filtered_lexes]})
 
         entries = result.fetchall()
 
-        def remove_keys(obj, rubbish):
+        lexical_list = cls.group_entities(filtered_lexes, entries)
+        log.debug(lexical_list)
+
+        return lexical_list
+
+    @staticmethod
+    def group_entities(filtered_lexes, entries):
+        """
+        Builds lexical entry / entity tree structures from lexical entry info tuples and entity rows sorted
+        by traversal order, node group and tree level, in a single pass over the rows grouped by parent
+        lexical entry id.
+
+        Keys used for entity tree construction and None values are not included in the result.
+        """
+
+        rubbish = ('traversal_lexical_order', 'tree_level', 'tree_numbering_scheme')
+
+        def remove_keys(obj):
             if isinstance(obj, dict):
                 obj = {
-                    key: remove_keys(value, rubbish)
+                    key: remove_keys(value)
                     for key, value in obj.items()
                     if key not in rubbish and value is not None}
             elif isinstance(obj, list):
-                obj = [remove_keys(item, rubbish)
+                obj = [remove_keys(item)
                        for item in obj
                        if item not in rubbish]
             return obj
 
+        entry_dict = collections.defaultdict(list)
+
+        for i in entries:
+            entry_dict[(i['parent_client_id'], i['parent_object_id'])].append(i)
+
         lexical_list = []
         for k in filtered_lexes:
             a = []
@@ -1863,16 +2285,14 @@ class LexicalEntry(
                 'parent_object_id': k[4],
                 'contains': a,
                 'marked_for_deletion': k[5],
-                'additional_metadata': k[6],
-                'came_from': k[7],
+                'additional_metadata': remove_keys(k[6]),
+                'came_from': remove_keys(k[7]),
                 'level': 'lexicalentry',
                 'published': False
             }
 
             prev_nodegroup = -1
-            for i in entries:
-                if i['parent_client_id'] != k[1] or i['parent_object_id'] != k[2]:
-                    continue
+            for i in entry_dict.get((k[1], k[2]), ()):
                 cur_nodegroup = i['tree_numbering_scheme'] if prev_nodegroup != i[
                     'tree_numbering_scheme'] else prev_nodegroup
                 dictionary_form = dict(i)
@@ -1881,6 +2301,7 @@ class LexicalEntry(
                 dictionary_form['contains'] = []
                 if not dictionary_form.get('locale_id'):
                     dictionary_form['locale_id'] = 0
+                dictionary_form = remove_keys(dictionary_form)
                 if cur_nodegroup != prev_nodegroup:
                     prev_dictionary_form = dictionary_form
                 else:
@@ -1890,10 +2311,10 @@ class LexicalEntry(
                 prev_nodegroup = cur_nodegroup
             # TODO: published filtering
             # TODO: locale fallback
-            lexical_list.append(entry)
-        lexical_list = remove_keys(lexical_list, ['traversal_lexical_order', 'tree_level', 'tree_numbering_scheme'])
-        log.debug(lexical_list)
-        DBSession.execute('''drop TABLE %s''' % temp_table_name)
+            lexical_list.append({
+                key: value
+                for key, value in entry.items()
+                if value is not None})
 
         return lexical_list
 
@@ -2270,6 +2691,24 @@ class Client(Base, TableNameMixin, IdMixin, CreatedAtMixin, AdditionalMetadataMi
         return self.counter
 
 
+@event.listens_for(Client.counter, 'set')
+def client_id_pool_counter_set(client, value, old_value, initiator):
+    """
+    Discards object ids reserved for a client when its counter is set directly, e.g. by
+    Client.next_object_id() or by synchronization with a desktop client, as such ids may then collide
+    with ids allocated from the counter.
+    """
+
+    session = object_session(client)
+
+    if session is not None:
+
+        pool_dict = session.info.get('client_id_pool')
+
+        if pool_dict:
+            pool_dict.pop(client.id, None)
+
+
 class UserBlobs(CompositeIdMixin, Base, TableNameMixin, CreatedAtMixin, MarkedForDeletionMixin,
                 AdditionalMetadataMixin):  # TODO: decide what is nullable
     name = Column(UnicodeText, nullable=False)
@@ -2762,3 +3201,33 @@ class AdverbAnnotationData(
     instance_id = Column(SLBigInteger(), ForeignKey('adverb_instance_data.id'), primary_key = True)
     user_id = Column(SLBigInteger(), ForeignKey('user.id'), primary_key = True)
     accepted = Column(Boolean, default = None)
+
+
+EntryGroupIdSequence = Sequence('entry_group_id_seq')
+
+
+class EntryGroupData(
+    Base):
+    """
+    Groups of lexical entries linked through grouping tag fields, e.g. etymology groups, see
+    update_entry_groups() of lingvodoc.utils.search.
+
+    Each group contains at least all entries connected through tags of the field, and can contain more
+    after tags are deleted, so it is used to restrict the search of a connected group to a single indexed
+    lookup.
+    """
+
+    __tablename__ = 'entry_group_data'
+
+    __table_args__ = (
+        Index(
+            'entry_group_data_group_id_idx',
+            'field_client_id',
+            'field_object_id',
+            'group_id'),)
+
+    field_client_id = Column(SLBigInteger(), primary_key = True)
+    field_object_id = Column(SLBigInteger(), primary_key = True)
+    entry_client_id = Column(SLBigInteger(), primary_key = True)
+    entry_object_id = Column(SLBigInteger(), primary_key = True)
+    group_id = Column(SLBigInteger(), nullable = False)
@@ -110,10 +110,11 @@ from lingvodoc.utils.deletion import real_delete_entity
 
 from lingvodoc.utils.search import (
     find_all_tags,
-    find_lexical_entries_by_tags)
+    find_lexical_entries_by_tags,
+    linked_group_list)
 
 import lingvodoc.views.v2.phonology as phonology
-from lingvodoc.views.v2.phonology import process_sound_markup, PickleCache
+from lingvodoc.views.v2.phonology import process_sound_markup, SqliteCache
 
 from lingvodoc.views.v2.utils import anonymous_userid
 from pdb import set_trace as A
@@ -1187,38 +1188,16 @@ class CognateAnalysis(graphene.Mutation):
             log.debug(
                 f'len(entry_id_list): {len(entry_id_list)}')
 
-        # Grouping lexical entries using stored PL/pgSQL function.
+        # Grouping lexical entries using entry groups.
 
-        entry_already_set = set()
-        group_list = []
-
-        sql_str = '''
-            select * from linked_group(
-                :field_client_id,
-                :field_object_id,
-                :client_id,
-                :object_id)'''
-
-        for entry_id in entry_id_list:
-
-            if entry_id in entry_already_set:
-                continue
-
-            row_list = (
-
-                DBSession.execute(sql_str, {
-                    'field_client_id': tag_field_id[0],
-                    'field_object_id': tag_field_id[1],
-                    'client_id': entry_id[0],
-                    'object_id': entry_id[1]})
+        group_list = (
 
-                .fetchall())
-
-            entry_id_set = set(
-                map(tuple, row_list))
+            linked_group_list(
+                tag_field_id,
+                entry_id_list))
 
-            entry_already_set.update(entry_id_set)
-            group_list.append(entry_id_set)
+        entry_already_set = set(
+            itertools.chain.from_iterable(group_list))
 
         return entry_already_set, group_list, time.time() - start_time
 
@@ -1987,111 +1966,113 @@ class CognateAnalysis(graphene.Mutation):
         return result
 
     @staticmethod
-    def graph_2d_embedding(d_ij, verbose = False):
+    def graph_embedding_stress(d_ij, dimension):
         """
-        Computes 2d embedding of a graph specified by non-negative simmetric distance matrix via stress
-        minimization.
+        Returns stress function and its gradient for embedding of a graph specified by non-negative
+        simmetric distance matrix into the space of a given dimension, see graph_2d_embedding.
 
-        Stress is based on relative strain for non-zero distances and absolute strain for zero distances.
+        Coordinates are given as a flat array of all first coordinates of the points, then all second
+        coordinates, and so on. Both stress and gradient are computed for all point pairs at once via
+        pairwise coordinate differences, with point pairs i > j selected by a lower triangle mask.
 
-        Let S_ij be source distances, D_ij be 2d distances, then stress is
+        Sums are accumulated sequentially in the order of i > j point pairs, and squares are computed via
+        float_power(), i.e. via pow() like scalar '** 2' does and not as multiplication, so that stress and
+        gradient values are exactly the same as when computed pair by pair, and minimization results do
+        not change.
+        """
 
-          Sum[D_ij^2] for S_ij == 0 +
-          Sum[D_ij^2 / S_ij^2 + S_ij^2 / D_ij^2] for S_ij > 0.
+        def square(value):
+            return numpy.float_power(value, 2)
 
-        Given D_ij^2 = (x_i - x_j)^2 + (y_i - y_j)^2, xy-gradient used for minimization can be computed
-        using following:
+        N = numpy.size(d_ij, 0)
 
-          d[D_ij^2, x_i] = 2 (x_i - x_j)
-          d[D_ij^2, x_j] = -2 (x_i - x_j)
-          d[D_ij^2, y_i] = 2 (y_i - y_j)
-          d[D_ij^2, y_j] = -2 (y_i - y_j)
+        triangle_mask = numpy.tri(N, k = -1, dtype = bool)
 
-        Obviously, d[D_ij^2 / S_ij^2, x_i] = 2 (x_i - x_j) / S_ij^2, and so on.
+        zero_mask = triangle_mask & (d_ij <= 0)
+        non_zero_mask = triangle_mask & (d_ij > 0)
 
-        And, with checking via WolframAlpha,
+        min_non_zero_d_ij = (
+            d_ij[non_zero_mask].min() if non_zero_mask.any() else 1)
 
-          d[S_ij^2 / D_ij^2, x_i] = -2 S_ij^2 (x_i - x_j) / D_ij^4, and so on.
+        zero_d_ij_scale = 1. / min(1, min_non_zero_d_ij)
 
-        """
+        # Squared source distances of point pairs in row-major order, with zero distance pairs marked.
 
-        N = numpy.size(d_ij, 0)
+        pair_zero_mask = zero_mask[triangle_mask]
+        pair_d2_ij = numpy.where(pair_zero_mask, 1.0, square(d_ij[triangle_mask]))
 
-        min_non_zero_d_ij = (
+        d2_ij = numpy.ones((N, N))
+        d2_ij[non_zero_mask] = square(d_ij[non_zero_mask])
 
-            min(
-                (d_ij[i,j]
-                    for i in range(1, N)
-                    for j in range(i)
-                    if d_ij[i,j] > 0),
+        def delta_matrix(xy):
+            """
+            Computes matrix of coordinate differences and matrix of squared distances between points.
+            """
 
-                default = 1))
+            xy = xy.reshape(dimension, N)
+            delta = xy[:, :, None] - xy[:, None, :]
 
-        zero_d_ij_scale = 1. / min(1, min_non_zero_d_ij)
+            return delta, square(delta).sum(axis = 0)
 
         def f(xy):
             """
-            Computes stress given xy-coordinates.
+            Computes stress given coordinates.
             """
 
-            x = xy[:N]
-            y = xy[N:]
+            delta, dr2 = delta_matrix(xy)
 
-            result = 0.0
+            pair_dr2 = dr2[triangle_mask]
 
-            for i in range(1, N):
-                for j in range(i):
+            with numpy.errstate(divide = 'ignore'):
 
-                    dr2 = (x[i] - x[j]) ** 2 + (y[i] - y[j]) ** 2
+                summand = (
 
-                    if d_ij[i,j] <= 0:
-                        result += 4 * dr2 * zero_d_ij_scale
+                    numpy.where(
+                        pair_zero_mask,
+                        4 * pair_dr2 * zero_d_ij_scale,
+                        pair_dr2 / pair_d2_ij + pair_d2_ij / pair_dr2))
 
-                    else:
-                        d2_ij = d_ij[i,j] ** 2
-                        result += dr2 / d2_ij + d2_ij / dr2
-
-            return result
+            return (
+                float(numpy.cumsum(summand)[-1]) if len(summand) else 0.0)
 
         def df(xy):
             """
-            Computes gradient at the given xy-coordinates.
-            """
-
-            x = xy[:N]
-            y = xy[N:]
+            Computes gradient at the given coordinates.
 
-            df_x = numpy.zeros(N)
-            df_y = numpy.zeros(N)
-
-            for i in range(1, N):
-                for j in range(i):
+            For each i > j point pair gradient summand of the i-th point is factor_ij (xy_i - xy_j), and of
+            the j-th point is factor_ij (xy_j - xy_i), so with simmetric factor matrix the gradient of the
+            i-th point is a sum of the i-th row of the factor_ij (xy_i - xy_j) matrix.
+            """
 
-                    dx = x[i] - x[j]
-                    dy = y[i] - y[j]
+            delta, dr2 = delta_matrix(xy)
 
-                    dr2 = dx ** 2 + dy ** 2
+            with numpy.errstate(divide = 'ignore'):
+                factor = 1 / d2_ij - d2_ij / square(dr2)
 
-                    if d_ij[i,j] <= 0:
+            factor[zero_mask] = 4 * zero_d_ij_scale
 
-                        df_x[i] += 4 * dx * zero_d_ij_scale
-                        df_x[j] -= 4 * dx * zero_d_ij_scale
+            factor = numpy.where(triangle_mask, factor, factor.T)
+            numpy.fill_diagonal(factor, 0.0)
 
-                        df_y[i] += 4 * dy * zero_d_ij_scale
-                        df_y[j] -= 4 * dy * zero_d_ij_scale
+            # Flattening to a contiguous copy, as a strided view would make BFGS vector operations sum
+            # in a different order.
 
-                    else:
+            return (
+                numpy.cumsum(delta * factor, axis = 2)[:, :, -1].flatten())
 
-                        d2_ij = d_ij[i,j] ** 2
-                        factor = (1 / d2_ij - d2_ij / dr2 ** 2)
+        return f, df
 
-                        df_x[i] += dx * factor
-                        df_x[j] -= dx * factor
+    @staticmethod
+    def graph_embedding(d_ij, dimension, verbose = False):
+        """
+        Computes embedding of a graph specified by non-negative simmetric distance matrix into the space
+        of a given dimension via stress minimization, see graph_2d_embedding.
+        """
 
-                        df_y[i] += dy * factor
-                        df_y[j] -= dy * factor
+        N = numpy.size(d_ij, 0)
 
-            return numpy.concatenate((df_x, df_y))
+        f, df = (
+            CognateAnalysis.graph_embedding_stress(d_ij, dimension))
 
         iter_count = 0
 
@@ -2104,7 +2085,10 @@ class CognateAnalysis(graphene.Mutation):
 
             log.debug(
                 '\niteration {0}:\nxy:\n{1}\nf:\n{2}\ndf:\n{3}'.format(
-                iter_count, xy, f(xy), df(xy)))
+                iter_count,
+                xy.reshape(dimension, N).T,
+                f(xy),
+                df(xy)))
 
             iter_count += 1
 
@@ -2125,156 +2109,56 @@ class CognateAnalysis(graphene.Mutation):
         result = (
 
             scipy.optimize.minimize(f,
-                rng.random(N * 2),
+                rng.random(N * dimension),
                 jac = df,
                 callback = f_callback if verbose else None,
                 options = {'disp': verbose}))
 
-        result_x = numpy.stack((result.x[:N], result.x[N:])).T
+        result_x = result.x.reshape(dimension, N).T
 
         return result_x, f(result.x)
 
     @staticmethod
-    def graph_3d_embedding(d_ij, verbose = False):
+    def graph_2d_embedding(d_ij, verbose = False):
         """
-        Computes 3d embedding of a graph specified by non-negative simmetric distance matrix via stress
+        Computes 2d embedding of a graph specified by non-negative simmetric distance matrix via stress
         minimization.
 
-        The same as with 2d embedding, see graph_2d_embedding.
-        """
-
-        N = numpy.size(d_ij, 0)
-        N2 = N * 2
-
-        min_non_zero_d_ij = (
-
-            min(
-                (d_ij[i,j]
-                    for i in range(1, N)
-                    for j in range(i)
-                    if d_ij[i,j] > 0),
-
-                default = 1))
-
-        zero_d_ij_scale = 1. / min(1, min_non_zero_d_ij)
-
-        def f(xyz):
-            """
-            Computes stress given xyz-coordinates.
-            """
-
-            x = xyz[:N]
-            y = xyz[N:N2]
-            z = xyz[N2:]
-
-            result = 0.0
-
-            for i in range(1, N):
-                for j in range(i):
-
-                    dr2 = (x[i] - x[j]) ** 2 + (y[i] - y[j]) ** 2 + (z[i] - z[j]) ** 2
-
-                    if d_ij[i,j] <= 0:
-                        result += 4 * dr2 * zero_d_ij_scale
-
-                    else:
-                        d2_ij = d_ij[i,j] ** 2
-                        result += dr2 / d2_ij + d2_ij / dr2
-
-            return result
-
-        def df(xyz):
-            """
-            Computes gradient at a given xyz-coordinates.
-            """
-
-            x = xyz[:N]
-            y = xyz[N:N2]
-            z = xyz[N2:]
-
-            df_x = numpy.zeros(N)
-            df_y = numpy.zeros(N)
-            df_z = numpy.zeros(N)
-
-            for i in range(1, N):
-                for j in range(i):
-
-                    dx = x[i] - x[j]
-                    dy = y[i] - y[j]
-                    dz = z[i] - z[j]
-
-                    dr2 = dx ** 2 + dy ** 2 + dz ** 2
-
-                    if d_ij[i,j] <= 0:
-
-                        df_x[i] += 4 * dx * zero_d_ij_scale
-                        df_x[j] -= 4 * dx * zero_d_ij_scale
-
-                        df_y[i] += 4 * dy * zero_d_ij_scale
-                        df_y[j] -= 4 * dy * zero_d_ij_scale
-
-                        df_z[i] += 4 * dz * zero_d_ij_scale
-                        df_z[j] -= 4 * dz * zero_d_ij_scale
-
-                    else:
-
-                        d2_ij = d_ij[i,j] ** 2
-                        factor = (1 / d2_ij - d2_ij / dr2 ** 2)
-
-                        df_x[i] += dx * factor
-                        df_x[j] -= dx * factor
-
-                        df_y[i] += dy * factor
-                        df_y[j] -= dy * factor
-
-                        df_z[i] += dz * factor
-                        df_z[j] -= dz * factor
-
-            return numpy.concatenate((df_x, df_y, df_z))
+        Stress is based on relative strain for non-zero distances and absolute strain for zero distances.
 
-        iter_count = 0
+        Let S_ij be source distances, D_ij be 2d distances, then stress is
 
-        def f_callback(xyz):
-            """
-            Shows minimization progress, if enabled.
-            """
+          Sum[D_ij^2] for S_ij == 0 +
+          Sum[D_ij^2 / S_ij^2 + S_ij^2 / D_ij^2] for S_ij > 0.
 
-            nonlocal iter_count
+        Given D_ij^2 = (x_i - x_j)^2 + (y_i - y_j)^2, xy-gradient used for minimization can be computed
+        using following:
 
-            log.debug(
-                '\niteration {0}:\nxyz:\n{1}\nf:\n{2}\ndf:\n{3}'.format(
-                iter_count,
-                numpy.stack((xyz[:N], xyz[N:N2], xyz[N2:])).T,
-                f(xyz),
-                df(xyz)))
+          d[D_ij^2, x_i] = 2 (x_i - x_j)
+          d[D_ij^2, x_j] = -2 (x_i - x_j)
+          d[D_ij^2, y_i] = 2 (y_i - y_j)
+          d[D_ij^2, y_j] = -2 (y_i - y_j)
 
-            iter_count += 1
+        Obviously, d[D_ij^2 / S_ij^2, x_i] = 2 (x_i - x_j) / S_ij^2, and so on.
 
-        # Performing minization, returning minimization results.
-        #
-        # To get deterministic results we use the source distance matrix to seed the initial pseudo-random
-        # coordinates we start optimization from.
+        And, with checking via WolframAlpha,
 
-        rng = (
+          d[S_ij^2 / D_ij^2, x_i] = -2 S_ij^2 (x_i - x_j) / D_ij^4, and so on.
 
-            numpy.random.Generator(
-                numpy.random.PCG64(
-                    
-                    tuple(
-                        hash(value)
-                        for value in d_ij.flat))))
+        """
 
-        result = (
+        return CognateAnalysis.graph_embedding(d_ij, 2, verbose)
 
-            scipy.optimize.minimize(f,
-                rng.random(N * 3),
-                jac = df,
-                callback = f_callback if verbose else None,
-                options = {'disp': verbose}))
+    @staticmethod
+    def graph_3d_embedding(d_ij, verbose = False):
+        """
+        Computes 3d embedding of a graph specified by non-negative simmetric distance matrix via stress
+        minimization.
 
-        result_x = numpy.stack((result.x[:N], result.x[N:N2], result.x[N2:])).T
+        The same as with 2d embedding, see graph_2d_embedding.
+        """
 
-        return result_x, f(result.x)
+        return CognateAnalysis.graph_embedding(d_ij, 3, verbose)
 
     @staticmethod
     def distance_graph(
@@ -2978,7 +2862,7 @@ class CognateAnalysis(graphene.Mutation):
             Cache initialization
             '''
             if not perspective_cache_dict.get(tuple(perspective_id)):
-                perspective_cache_dict[tuple(perspective_id)] = PickleCache(storage, perspective_id)
+                perspective_cache_dict[tuple(perspective_id)] = SqliteCache(storage, perspective_id)
 
             # Grouping transcriptions and translations by lexical entries.
 
@@ -3084,7 +2968,7 @@ class CognateAnalysis(graphene.Mutation):
         Writing cache to file if there is any change
         '''
         for cache in perspective_cache_dict.values():
-            cache.flush()
+            cache.close()
 
         # Showing some info on non-grouped entries, if required.
 
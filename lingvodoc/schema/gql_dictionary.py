@@ -33,6 +33,7 @@ from lingvodoc.cache.caching import CACHE
 
 from lingvodoc.models import (
     BaseGroup as dbBaseGroup,
+    bump_translation_version,
     Client as dbClient,
     DBSession,
     Dictionary as dbDictionary,
@@ -81,7 +82,7 @@ from lingvodoc.utils.creation import (
     update_metadata)
 
 from lingvodoc.utils.deletion import real_delete_dictionary
-from lingvodoc.utils.search import translation_gist_search
+from lingvodoc.utils.search import limited_access_gist_id, published_gist_id
 
 
 # Setting up logging.
@@ -331,15 +332,8 @@ class Dictionary(LingvodocObjectType):  # tested
         self,
         __debug_flag__ = False):
 
-        db_published_gist = translation_gist_search('Published')
-
-        published_client_id = db_published_gist.client_id
-        published_object_id = db_published_gist.object_id
-
-        db_limited_gist = translation_gist_search('Limited access')
-
-        limited_client_id = db_limited_gist.client_id
-        limited_object_id = db_limited_gist.object_id
+        published_client_id, published_object_id = published_gist_id()
+        limited_client_id, limited_object_id = limited_access_gist_id()
 
         if (
             (self.dbObject.state_translation_gist_client_id != published_client_id or
@@ -1306,15 +1300,10 @@ mutation up{
 
         if dbtranslationatom:
             if dbtranslationatom.locale_id == locale_id:
-                key = "translation:%s:%s:%s" % (
-                    str(dbtranslationatom.parent_client_id),
-                    str(dbtranslationatom.parent_object_id),
-                    str(dbtranslationatom.locale_id))
-                CACHE.rem(key)
-                key = "translations:%s:%s" % (
-                    str(dbtranslationatom.parent_client_id),
-                    str(dbtranslationatom.parent_object_id))
-                CACHE.rem(key)
+                bump_translation_version(
+                    dbtranslationatom.parent_client_id,
+                    dbtranslationatom.parent_object_id)
+
                 if content:
                     dbtranslationatom.content = content
             else:
@@ -1338,6 +1327,9 @@ mutation up{
                                                 content=content)
             DBSession.add(dbtranslationatom)
             DBSession.flush()
+            bump_translation_version(
+                dbtranslationatom.parent_client_id,
+                dbtranslationatom.parent_object_id)
             if not object_id:
                 basegroups = []
                 basegroups += [DBSession.query(dbBaseGroup).filter_by(name="Can edit translationatom").first()]
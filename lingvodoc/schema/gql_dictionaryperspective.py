@@ -21,6 +21,7 @@ from sqlalchemy import (
     column,
     desc,
     extract,
+    false,
     func,
     literal,
     or_,
@@ -41,6 +42,7 @@ from lingvodoc.cache.caching import CACHE
 
 from lingvodoc.models import (
     BaseGroup as dbBaseGroup,
+    bump_translation_version,
     Client as dbClient,
     DBSession,
     Dictionary as dbDictionary,
@@ -89,7 +91,10 @@ from lingvodoc.schema.gql_lexicalentry import LexicalEntry
 from lingvodoc.schema.gql_user import User
 
 from lingvodoc.utils import (
+    decode_cursor,
+    encode_cursor,
     ids_to_id_query,
+    keyset_condition,
     render_statement,
     statistics)
 
@@ -101,7 +106,7 @@ from lingvodoc.utils.creation import (
     update_metadata)
 
 from lingvodoc.utils.deletion import real_delete_perspective
-from lingvodoc.utils.search import translation_gist_search
+from lingvodoc.utils.search import limited_access_gist_id
 from pdb import set_trace as A
 
 
@@ -123,8 +128,36 @@ def graphene_track_multiple(
     created_entries = [],
     offset = None,
     limit = None,
+    after = None,
     check_perspective = True,
     debug_flag = False):
+    """
+    Gets entries with entities, possibly filtered, sorted and paginated, returns new entries with their
+    entities, query or list of other entries with their entities, total entry count and cursor of the
+    next page, if there can be one.
+
+    Pagination is either with offset, or with cursor given in 'after' as returned for the previous page,
+    in which case entries are selected via their sort keys instead of skipping offset entries.
+    """
+
+    page_limit = limit
+
+    # Sort keys for cursor pagination, as (expression, is_ascending, is_nulls_first), with their names and
+    # columns of the final data query with their values for the next page cursor.
+
+    key_list = []
+    key_name_list = []
+    key_column_list = []
+
+    end_cursor = None
+
+    def cursor_values():
+
+        try:
+            return decode_cursor(after, key_name_list)
+
+        except ValueError as error:
+            raise ResponseError(str(error))
 
     # Getting our base data query.
     #
@@ -288,6 +321,25 @@ def graphene_track_multiple(
 
     if not (sort_by_field or have_empty or filter):
 
+        key_list = [
+            (dbLexicalEntry.created_at, False, True),
+            (dbLexicalEntry.client_id, False, True),
+            (dbLexicalEntry.object_id, False, True)]
+
+        key_name_list = [
+            'created_at desc',
+            'client_id desc',
+            'object_id desc']
+
+        if after:
+
+            data_query = (
+
+                data_query.filter(
+                    keyset_condition(key_list, cursor_values())))
+
+            after = None
+
         data_query = (
 
             data_query
@@ -311,26 +363,73 @@ def graphene_track_multiple(
 
             limit = None
 
-        offset_limit_cte = (
+        # Getting a page, we select its entries first, so that the next page cursor is given by the last
+        # of them, regardless of the final ordering and of entries without entities.
 
-            data_query
+        if page_limit:
 
-                .with_entities(
+            page_row_list = (
+
+                data_query
+
+                    .with_entities(
+                        dbLexicalEntry.created_at,
+                        dbLexicalEntry.client_id,
+                        dbLexicalEntry.object_id)
+
+                    .all())
+
+            if len(page_row_list) >= page_limit:
+
+                end_cursor = (
+                    encode_cursor(key_name_list, page_row_list[-1]))
+
+            page_condition = (
+
+                tuple_(
                     dbLexicalEntry.client_id,
                     dbLexicalEntry.object_id)
 
-                .cte())
+                    .in_(
+                        ids_to_id_query(
+                            [(client_id, object_id) for _, client_id, object_id in page_row_list]))
 
-        data_query = (
+                    if page_row_list else
 
-            DBSession
+                    false())
 
-                .query(
-                    dbLexicalEntry)
+            data_query = (
 
-                .filter(
-                    dbLexicalEntry.client_id == offset_limit_cte.c.client_id,
-                    dbLexicalEntry.object_id == offset_limit_cte.c.object_id))
+                DBSession
+
+                    .query(
+                        dbLexicalEntry)
+
+                    .filter(
+                        page_condition))
+
+        else:
+
+            offset_limit_cte = (
+
+                data_query
+
+                    .with_entities(
+                        dbLexicalEntry.client_id,
+                        dbLexicalEntry.object_id)
+
+                    .cte())
+
+            data_query = (
+
+                DBSession
+
+                    .query(
+                        dbLexicalEntry)
+
+                    .filter(
+                        dbLexicalEntry.client_id == offset_limit_cte.c.client_id,
+                        dbLexicalEntry.object_id == offset_limit_cte.c.object_id))
 
     # If we are going to have empty entities and we need to sort, we'll need an emptiness check.
 
@@ -535,7 +634,7 @@ def graphene_track_multiple(
 
     # If we need to also offset and/or limit, we'll need an additional grouping step.
 
-    if offset or limit:
+    if offset or limit or after:
 
         if data_cte is None:
             data_cte = data_query.cte()
@@ -598,7 +697,51 @@ def graphene_track_multiple(
 
                 .group_by(
                     'entry_cid_ol',
-                    'entry_oid_ol')
+                    'entry_oid_ol'))
+
+        # Sort keys matching the ordering for cursor pagination.
+
+        if have_empty:
+
+            key_list.append(
+                (bool_f(data_cte.c.is_not_empty), True, False))
+
+            key_name_list.append(
+                'is_not_empty asc')
+
+        if sort_by_field:
+
+            key_list.extend([
+                (agg_f(sort_cte.c.sort_content), is_ascending, is_ascending),
+                (agg_f(sort_cte.c.sort_count), is_ascending, is_ascending)])
+
+            key_name_list.extend([
+                f'sort_content {sort_by_field[0]}/{sort_by_field[1]} ' + ('asc' if is_ascending else 'desc'),
+                'sort_count ' + ('asc' if is_ascending else 'desc')])
+
+        key_list.extend([
+            (agg_f(data_cte.c.lexicalentry_created_at), not is_ascending, is_ascending),
+            (data_cte.c.lexicalentry_client_id, not is_ascending, is_ascending),
+            (data_cte.c.lexicalentry_object_id, not is_ascending, is_ascending)])
+
+        reverse_str = (
+            'desc' if is_ascending else 'asc')
+
+        key_name_list.extend([
+            'created_at ' + reverse_str,
+            'client_id ' + reverse_str,
+            'object_id ' + reverse_str])
+
+        if after:
+
+            offset_limit_query = (
+
+                offset_limit_query.having(
+                    keyset_condition(key_list, cursor_values())))
+
+        offset_limit_query = (
+
+            offset_limit_query
 
                 .order_by(
                     *ol_order_by_list))
@@ -625,6 +768,22 @@ def graphene_track_multiple(
         offset_limit_cte = (
             offset_limit_query.cte())
 
+        if have_empty:
+
+            key_column_list.append(
+                offset_limit_cte.c.is_not_empty)
+
+        if sort_by_field:
+
+            key_column_list.extend([
+                offset_limit_cte.c.sort_content,
+                offset_limit_cte.c.sort_count])
+
+        key_column_list.extend([
+            offset_limit_cte.c.created_at,
+            offset_limit_cte.c.entry_cid_ol,
+            offset_limit_cte.c.entry_oid_ol])
+
         if sort_by_field:
 
             d_order_by_list.extend([
@@ -744,10 +903,35 @@ def graphene_track_multiple(
         '\ndata_query:\n' +
         render_statement(data_query.statement))
 
+    # If we have a page of entries, getting sort keys of its last entry for the next page cursor, if we
+    # didn't already.
+
+    if page_limit and key_column_list:
+
+        key_count = len(key_column_list)
+
+        row_list = (
+
+            data_query
+                .add_columns(*key_column_list)
+                .all())
+
+        entry_count = (
+            len(set(row[0].id for row in row_list)))
+
+        if entry_count >= page_limit:
+
+            end_cursor = (
+                encode_cursor(key_name_list, row_list[-1][-key_count:]))
+
+        data_query = [
+            row[:-key_count] for row in row_list]
+
     return (
         new_entities_result,
         data_query,
-        entry_total_count)
+        entry_total_count,
+        end_cursor)
 
 
 def entries_with_entities(
@@ -766,7 +950,7 @@ def entries_with_entities(
         query_args['accept'] = False
         query_args['delete'] = False
 
-    new_entities, old_entities, total_count = (
+    new_entities, old_entities, total_count, end_cursor = (
 
         graphene_track_multiple(
             lexes,
@@ -801,13 +985,14 @@ def entries_with_entities(
                 db_entry,
                 gql_Entities = gql_entity_list))
 
-    return result_list, total_count
+    return result_list, total_count, end_cursor
 
 
 class PerspectivePage(graphene.ObjectType):
 
     lexical_entries = graphene.List(LexicalEntry)
     entries_total = graphene.Int()
+    end_cursor = graphene.String()
 
 
 class DictionaryPerspective(LingvodocObjectType):
@@ -876,6 +1061,7 @@ class DictionaryPerspective(LingvodocObjectType):
         sort_by_field = LingvodocID(),
         offset = graphene.Int(),
         limit = graphene.Int(),
+        after = graphene.String(),
         created_entries = graphene.List(LingvodocID),
         debug_flag = graphene.Boolean())
 
@@ -1565,8 +1751,7 @@ class DictionaryPerspective(LingvodocObjectType):
         if end_date:
             lexes = lexes.filter(dbEntity.created_at <= end_date)
 
-        db_la_gist = translation_gist_search('Limited access')
-        limited_client_id, limited_object_id = db_la_gist.client_id, db_la_gist.object_id
+        limited_client_id, limited_object_id = limited_access_gist_id()
 
         if (self.dbObject.state_translation_gist_client_id == limited_client_id and
                 self.dbObject.state_translation_gist_object_id == limited_object_id and
@@ -1577,7 +1762,7 @@ class DictionaryPerspective(LingvodocObjectType):
 
                 lexes = lexes.limit(20)
 
-        lexical_entries, self.entries_total = (
+        lexical_entries, self.entries_total, self.end_cursor = (
             entries_with_entities(lexes, mode, accept=accept, delete=delete, publish=publish,
                                   check_perspective = False, **query_args))
 
@@ -1595,7 +1780,8 @@ class DictionaryPerspective(LingvodocObjectType):
 
         return PerspectivePage(
             lexical_entries = self.resolve_lexical_entries(info, **query_args),
-            entries_total = self.entries_total)
+            entries_total = self.entries_total,
+            end_cursor = self.end_cursor)
 
     @fetch_object()
     def resolve_authors(self, info):
@@ -2092,15 +2278,10 @@ class UpdatePerspectiveAtom(graphene.Mutation):
 
         if dbtranslationatom:
             if dbtranslationatom.locale_id == locale_id:
-                key = "translation:%s:%s:%s" % (
-                    str(dbtranslationatom.parent_client_id),
-                    str(dbtranslationatom.parent_object_id),
-                    str(dbtranslationatom.locale_id))
-                CACHE.rem(key)
-                key = "translations:%s:%s" % (
-                    str(dbtranslationatom.parent_client_id),
-                    str(dbtranslationatom.parent_object_id))
-                CACHE.rem(key)
+                bump_translation_version(
+                    dbtranslationatom.parent_client_id,
+                    dbtranslationatom.parent_object_id)
+
                 if content:
                     dbtranslationatom.content = content
             else:
@@ -2122,6 +2303,9 @@ class UpdatePerspectiveAtom(graphene.Mutation):
                                                 content=content)
             DBSession.add(dbtranslationatom)
             DBSession.flush()
+            bump_translation_version(
+                dbtranslationatom.parent_client_id,
+                dbtranslationatom.parent_object_id)
 
         perspective = DictionaryPerspective(id=[dbPerspective.client_id, dbPerspective.object_id])
         perspective.dbObject = dbPerspective
@@ -1,11 +1,8 @@
 
 # Standard library imports.
 
-import errno
-import hashlib
 import logging
 import os
-import shutil
 
 # Library imports.
 
@@ -64,10 +61,12 @@ from lingvodoc.schema.gql_holders import (
     SelfHolder,
     Upload)
 
-from lingvodoc.utils.creation import create_entity
+from lingvodoc.utils.blob_storage import Blob_Storage
+from lingvodoc.utils.creation import bulk_insert_entities, create_entity
 from lingvodoc.utils.deletion import real_delete_entity
 from lingvodoc.utils.elan_functions import eaf_wordlist
 from lingvodoc.utils.lexgraph_marker import marker_between_arith as marker_between
+from lingvodoc.utils.search import defer_entity_groups
 from lingvodoc.utils.verification import check_client_id, check_lingvodoc_id
 
 
@@ -84,19 +83,23 @@ def object_file_path(obj, base_path, folder_name, filename, create_dir=False):
     return storage_path, filename
 
 
-def create_object(content, obj, data_type, filename, folder_name, storage, json_input=True):
+def create_object(content, obj, data_type, filename, folder_name, storage, json_input=True, hash_dict=None):
+    """
+    Stores file contents, given either as bytes or as a binary file object, as an object file
+    referencing a content-addressed blob, see lingvodoc.utils.blob_storage, returns file path and URL.
+
+    If hash_dict is given, it is filled with hex digests of the contents by hash algorithm names of its
+    keys, computed in the same pass over the contents.
+    """
+
     storage_path, filename = object_file_path(obj, storage["path"], folder_name, filename, True)
-    directory = os.path.dirname(storage_path)  # TODO: find out, why object_file_path were not creating dir
-    try:
-        os.makedirs(directory)
-    except OSError as exception:
-        if exception.errno != errno.EEXIST:
-            raise
-    with open(str(storage_path), 'wb+') as f:
-        if json_input:
-            f.write(content)
-        else:
-            shutil.copyfileobj(content, f)
+
+    _, blob_hash_dict = (
+        Blob_Storage(storage).store(
+            content, storage_path, list(hash_dict or ())))
+
+    if hash_dict is not None:
+        hash_dict.update(blob_hash_dict)
 
     real_location = storage_path
     url = "".join((storage["prefix"],
@@ -178,6 +181,80 @@ class Entity(LingvodocObjectType):
         return self.dbObject.field.data_type
 
 
+def get_accept_flag(context, perspective_id):
+    """
+    Checks if entities created in the perspective by the current user should be automatically accepted,
+    i.e. if the user has the entity creation permission for the perspective.
+
+    Admin is assumed to have all permissions.
+    """
+
+    user_id = (
+        context.user_id)
+
+    if user_id == 1:
+
+        create_flag = True
+
+    elif user_id is not None:
+
+        # Not just calling acl.check_direct because ours is much more specific case.
+
+        user = context.user
+
+        if (create_flag := user.is_active):
+
+            group_query = (
+
+                DBSession
+
+                    .query(literal(1))
+
+                    .filter(
+                        dbBaseGroup.subject == 'lexical_entries_and_entities',
+                        dbBaseGroup.action == 'create',
+                        dbGroup.base_group_id == dbBaseGroup.id,
+                        or_(dbGroup.subject_override,
+                            dbGroup.subject_id == perspective_id),
+                        user_to_group_association.c.user_id == user_id,
+                        user_to_group_association.c.group_id == dbGroup.id))
+
+            create_flag = (
+
+                DBSession
+                    .query(group_query.exists())
+                    .scalar())
+
+            #
+            # NOTE: tests show that exists is faster than the current limit-count-based way from acl.py,
+            # which is like this:
+            #
+            # create_flag = (
+            #
+            #     DBSession
+            #
+            #         .query(user_to_group_association)
+            #
+            #         .filter(
+            #             dbBaseGroup.subject == 'lexical_entries_and_entities',
+            #             dbBaseGroup.action == 'create',
+            #             dbGroup.base_group_id == dbBaseGroup.id,
+            #             or_(dbGroup.subject_override,
+            #                 dbGroup.subject_id == perspective_id),
+            #             user_to_group_association.c.user_id == user_id,
+            #             user_to_group_association.c.group_id == dbGroup.id)
+            #
+            #         .limit(1)
+            #         .count())
+            #
+
+    else:
+
+        create_flag = False
+
+    return create_flag
+
+
 # Create
 class CreateEntity(graphene.Mutation):
 
@@ -307,70 +384,12 @@ class CreateEntity(graphene.Mutation):
                 additional_metadata = additional_metadata))
 
         # Acception permission check.
-        # Admin is assumed to have all permissions.
 
         user_id = (
             context.user_id)
 
-        if user_id == 1:
-
-            create_flag = True
-
-        elif user_id is not None:
-
-            # Not just calling acl.check_direct because ours is much more specific case.
-
-            user = context.user
-
-            if (create_flag := user.is_active):
-
-                group_query = (
-
-                    DBSession
-
-                        .query(literal(1))
-
-                        .filter(
-                            dbBaseGroup.subject == 'lexical_entries_and_entities',
-                            dbBaseGroup.action == 'create',
-                            dbGroup.base_group_id == dbBaseGroup.id,
-                            or_(dbGroup.subject_override,
-                                dbGroup.subject_id == perspective_id),
-                            user_to_group_association.c.user_id == user_id,
-                            user_to_group_association.c.group_id == dbGroup.id))
-
-                create_flag = (
-
-                    DBSession
-                        .query(group_query.exists())
-                        .scalar())
-
-                #
-                # NOTE: tests show that exists is faster than the current limit-count-based way from acl.py,
-                # which is like this:
-                #
-                # create_flag = (
-                #
-                #     DBSession
-                #
-                #         .query(user_to_group_association)
-                #
-                #         .filter(
-                #             dbBaseGroup.subject == 'lexical_entries_and_entities',
-                #             dbBaseGroup.action == 'create',
-                #             dbGroup.base_group_id == dbBaseGroup.id,
-                #             or_(dbGroup.subject_override,
-                #                 dbGroup.subject_id == perspective_id),
-                #             user_to_group_association.c.user_id == user_id,
-                #             user_to_group_association.c.group_id == dbGroup.id)
-                #
-                #         .limit(1)
-                #         .count())
-                #
-
-        else:
-
-            create_flag = False
+        create_flag = (
+            get_accept_flag(context, perspective_id))
 
         if create_flag:
 
@@ -387,9 +406,11 @@ class CreateEntity(graphene.Mutation):
         if data_type == 'image' or data_type == 'sound' or 'markup' in data_type:
             blob = info.context.request.POST.pop("1")
             filename=blob.filename
-            content = blob.file.read()
             #filename=
-            real_location, url = create_object(content, db_entity, data_type, filename, "graphql_files", info.context.request.registry.settings["storage"])
+            content_hash_dict = {'sha224': None}
+            real_location, url = create_object(blob.file, db_entity, data_type, filename, "graphql_files",
+                                               info.context.request.registry.settings["storage"],
+                                               json_input=False, hash_dict=content_hash_dict)
             db_entity.content = url
             old_meta = db_entity.additional_metadata
             need_hash = True
@@ -397,7 +418,7 @@ class CreateEntity(graphene.Mutation):
                 if old_meta.get('hash'):
                     need_hash = False
             if need_hash:
-                hash = hashlib.sha224(content).hexdigest()
+                hash = content_hash_dict['sha224']
                 hash_dict = {'hash': hash}
                 if old_meta:
                     old_meta.update(hash_dict)
@@ -416,6 +437,8 @@ class CreateEntity(graphene.Mutation):
             db_entity.additional_metadata['data_type'] = data_type
 
             if 'elan' in data_type:
+                with open(real_location, 'rb') as markup_file:
+                    content = markup_file.read()
                 bag_of_words = list(eaf_wordlist(content))
                 db_entity.additional_metadata['bag_of_words'] = bag_of_words
         elif data_type == 'link':
@@ -1001,92 +1024,281 @@ class DeleteEntity(graphene.Mutation):
 
 class BulkCreateEntity(graphene.Mutation):
     """
+    Creates multiple entities at once, with permissions checked once for each perspective and data
+    inserted in bulk, see bulk_insert_entities().
+
+    Each entity is specified by the same values as with create_entity, except that file-based entities
+    e.g. sound or markup are not supported.
+
+    Returns ids of created entities, created entities themselves are loaded only if requested.
+
     mutation {
-            bulk_create_entity(entities: [{id: [1199, 4], parent_id: [66, 69],  field_id:  [66, 6]}]) {
+            bulk_create_entity(entities: [
+              {parent_id: [66, 69], field_id: [66, 6], content: "test"},
+              {parent_id: [66, 70], field_id: [66, 6], content: "test 2"}]) {
+                   ids
                    triumph
         }
     }
     """
 
     class Arguments:
-        entities = graphene.List(ObjectVal)
+        entities = graphene.List(ObjectVal, required = True)
+        client_id = graphene.Int()
+
+    ids = graphene.List(LingvodocID)
     entities = graphene.List(Entity)
     triumph = graphene.Boolean()
 
+    def resolve_entities(self, info):
+
+        if not self.ids:
+            return []
+
+        client_id = self.ids[0][0]
+
+        entity_query = (
+
+            DBSession
+
+                .query(dbEntity)
+
+                .filter(
+                    dbEntity.client_id == client_id,
+                    dbEntity.object_id >= self.ids[0][1],
+                    dbEntity.object_id <= self.ids[-1][1])
+
+                .order_by(
+                    dbEntity.object_id))
+
+        return [
+            Entity(db_entity)
+            for db_entity in entity_query]
+
     @staticmethod
-    def mutate(root, info, entities = None):
+    def mutate(
+        root,
+        info,
+        entities,
+        client_id = None):
 
-        # No assurances that this even works, will need to be rewritten if we would need this.
+        context = info.context
 
-        raise NotImplementedError
+        client_id = (
 
-        client = Client.get(info.context.client_id)
-        if not client:
-            raise KeyError("Invalid client id (not registered on server). Try to logout and then login.",
-                           info.context.client_id)
-        request = info.context.request
+            context.effective_client_id(
+                client_id))
 
-        dbentities_list = []
+        # Checking ids.
 
         for entity_obj in entities:
-            ids = entity_obj.get("id")  # TODO: id check
 
-            if ids is None:
-                ids = (info.context.client_id, None)
-            else:
-                if not check_lingvodoc_id(ids):
-                    raise KeyError("Wrong id")
-                if not check_client_id(info.context.client_id, ids[0]):
-                    raise KeyError("Invalid client id (not registered on server). Try to logout and then login.",
-                                   ids[0])
-            parent_id = entity_obj.get("parent_id")
+            if not check_lingvodoc_id(entity_obj.get('parent_id')):
+                return ResponseError('Bad parent_id')
+
+            if not check_lingvodoc_id(entity_obj.get('field_id')):
+                return ResponseError('Bad field_id')
+
+            for key in ('self_id', 'link_id', 'link_perspective_id'):
+
+                value = entity_obj.get(key)
 
-            if not parent_id:
-                return ResponseError(message="Bad lexical_entry object")
-            if not check_lingvodoc_id(parent_id):
-                raise KeyError("Wrong parent_id")
+                if value and not check_lingvodoc_id(value):
+                    return ResponseError('Bad {0}'.format(key))
 
-            lexical_entry = dbLexicalEntry.get(parent_id)
+        def get_id_set(key):
+
+            return set(
+                tuple(entity_obj[key])
+                for entity_obj in entities
+                if entity_obj.get(key))
+
+        # Getting parent lexical entries and their perspectives.
+
+        parent_id_set = get_id_set('parent_id')
+
+        perspective_id_dict = {
+
+            (entry_cid, entry_oid): (perspective_cid, perspective_oid)
+
+            for entry_cid, entry_oid, perspective_cid, perspective_oid in
+
+                DBSession
+
+                    .query(
+                        dbLexicalEntry.client_id,
+                        dbLexicalEntry.object_id,
+                        dbLexicalEntry.parent_client_id,
+                        dbLexicalEntry.parent_object_id)
+
+                    .filter(
+                        tuple_(dbLexicalEntry.client_id, dbLexicalEntry.object_id)
+                            .in_(parent_id_set))
+
+                    .all()}
+
+        if len(perspective_id_dict) < len(parent_id_set):
+
+            return (
+                ResponseError("No such lexical entry in the system"))
+
+        # Checking permissions once for each perspective.
+
+        accept_flag_dict = {}
+
+        for perspective_id in set(perspective_id_dict.values()):
 
             info.context.acl_check(
                 'create',
                 'lexical_entries_and_entities',
-                lexical_entry.parent_id)
+                perspective_id)
 
-            additional_metadata = None
-            if 'additional_metadata' in entity_obj:
-                additional_metadata = entity_obj["additional_metadata"]
-            field_id = entity_obj.get('field_id')
-            if not check_lingvodoc_id(field_id):
-                raise ResponseError('no field_id provided')
-            self_id = entity_obj.get("self_id")
-            if self_id:
-                if not check_lingvodoc_id(self_id):
-                    raise KeyError("Wrong self_id")
-            link_id = entity_obj.get("link_id")
-            if link_id:
-                if not check_lingvodoc_id(link_id):
-                    raise KeyError("Wrong link_id")
-            locale_id = entity_obj.get("locale_id", 2)
-            filename = entity_obj.get("filename")
-            content = entity_obj.get("content")
-            registry = entity_obj.get("registry")
+            accept_flag_dict[perspective_id] = (
+                get_accept_flag(context, perspective_id))
 
-            dbentity = create_entity(ids, parent_id, additional_metadata, field_id, self_id, link_id, locale_id,
-                                     filename, content, registry, request, False)
+        # Getting field data types.
 
-            dbentities_list.append(dbentity)
+        field_id_set = get_id_set('field_id')
 
-        DBSession.bulk_save_objects(dbentities_list)
-        DBSession.flush()
+        data_type_dict = {
 
-        entity_list = (
-            list(map(Entity, dbentities_list)))
+            (field_cid, field_oid): data_type
+
+            for field_cid, field_oid, data_type in
+
+                DBSession
+
+                    .query(
+                        dbField.client_id,
+                        dbField.object_id,
+                        func.lower(dbTranslationAtom.content))
+
+                    .filter(
+                        dbTranslationAtom.locale_id == ENGLISH_LOCALE,
+                        dbTranslationAtom.parent_id == dbField.data_type_translation_gist_id,
+                        tuple_(dbField.client_id, dbField.object_id)
+                            .in_(field_id_set))
+
+                    .all()}
+
+        if len(data_type_dict) < len(field_id_set):
+
+            return (
+                ResponseError("No such field in the system"))
+
+        # Checking upper level entities and link perspectives.
+
+        self_id_set = get_id_set('self_id')
+
+        if self_id_set:
+
+            self_count = (
+
+                DBSession
+
+                    .query(func.count())
+
+                    .filter(
+                        tuple_(dbEntity.client_id, dbEntity.object_id)
+                            .in_(self_id_set))
+
+                    .scalar())
+
+            if self_count < len(self_id_set):
+                return ResponseError("No such upper level in the system")
+
+        link_perspective_id_set = get_id_set('link_perspective_id')
+
+        if link_perspective_id_set:
+
+            link_perspective_count = (
+
+                DBSession
+
+                    .query(func.count())
+
+                    .filter(
+                        tuple_(dbPerspective.client_id, dbPerspective.object_id)
+                            .in_(link_perspective_id_set))
+
+                    .scalar())
+
+            if link_perspective_count < len(link_perspective_id_set):
+                return ResponseError("link_perspective not found")
+
+        # Compiling entity data.
+
+        user_id = context.user_id
+
+        entity_list = []
+
+        for entity_obj in entities:
+
+            parent_id = tuple(entity_obj['parent_id'])
+            field_id = tuple(entity_obj['field_id'])
+
+            data_type = data_type_dict[field_id]
+
+            content = entity_obj.get('content')
+            link_id = None
+
+            additional_metadata = entity_obj.get('additional_metadata')
+
+            if data_type == 'image' or data_type == 'sound' or 'markup' in data_type:
+
+                return (
+                    ResponseError(
+                        "File-based entities can't be created in bulk, please use create_entity"))
+
+            elif data_type == 'link' or data_type == 'directed link':
+
+                content = None
+                link_id = entity_obj.get('link_id')
+
+                if not link_id:
+
+                    return (
+                        ResponseError(
+                            "The field is of link type. You should provide client_id and object id in the content"))
+
+                if data_type == 'directed link':
+
+                    link_perspective_id = entity_obj.get('link_perspective_id')
+
+                    if not link_perspective_id:
+
+                        return (
+                            ResponseError(
+                                "The field is of link type. You should provide link_perspective_id id in the content"))
+
+                    additional_metadata = dict(
+                        additional_metadata or {},
+                        link_perspective_id = link_perspective_id)
+
+            elif entity_obj.get('lexgraph_after') is not None:
+
+                content = marker_between(marker_after = entity_obj['lexgraph_after'])
+
+            entity_list.append({
+                'parent_id': parent_id,
+                'field_id': field_id,
+                'self_id': entity_obj.get('self_id'),
+                'link_id': link_id,
+                'locale_id': entity_obj.get('locale_id', ENGLISH_LOCALE),
+                'content': content,
+                'additional_metadata': additional_metadata,
+                'accepted': accept_flag_dict[perspective_id_dict[parent_id]],
+                'published': user_id == 1})
+
+        id_list = (
+
+            bulk_insert_entities(
+                client_id, entity_list))
 
         return (
 
             BulkCreateEntity(
-                entities = entity_list,
+                ids = id_list,
                 triumph = True))
 
 
@@ -1431,6 +1643,11 @@ class BulkUpdateEntityContent(graphene.Mutation):
             dbentities_new.append(dbentity)
 
         DBSession.bulk_save_objects(dbentities_new)
+
+        # Bulk saved entities bypass flush, where entry groups of grouping tags are scheduled for update.
+
+        defer_entity_groups(dbentities_new, DBSession)
+
         DBSession.flush()
 
         entities = list(map(Entity, dbentities_new))
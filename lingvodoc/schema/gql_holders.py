@@ -1,3 +1,4 @@
+import collections
 import json
 import datetime
 import graphene
@@ -7,6 +8,7 @@ import time
 
 from graphql.language.ast import ObjectValue, ListValue, IntValue
 from graphql.language import ast
+from graphql.execution.middleware import MiddlewareManager
 
 from graphene.types import Scalar
 from graphene.types.json import JSONString as JSONtype
@@ -23,7 +25,8 @@ from lingvodoc.models import (
     TranslationGist as dbTranslationGist,
     TranslationAtom as dbTranslationAtom,
     UnstructuredData as dbUnstructuredData,
-    User as dbUser
+    User as dbUser,
+    bump_translation_version
 )
 from lingvodoc.utils.verification import check_client_id
 from lingvodoc.cache.caching import CACHE
@@ -342,10 +345,9 @@ def undelete_message(*args, **kwargs):
 def delete_gist_with_atoms(
     deleted_by, gist, task_id, subject = None, reason = "Manually deleted", **kwargs):
 
-    key = "translations:%s:%s" % (
-        str(gist.client_id),
-        str(gist.object_id))
-    CACHE.rem(key)
+    bump_translation_version(
+        gist.client_id,
+        gist.object_id)
 
     atoms = DBSession.query(dbTranslationAtom).filter_by(parent=gist,
                                                          marked_for_deletion=False).all()
@@ -353,11 +355,6 @@ def delete_gist_with_atoms(
     atom_id_list = []
 
     for dbtranslationatom in atoms:
-        key = "translation:%s:%s:%s" % (
-            str(dbtranslationatom.parent_client_id),
-            str(dbtranslationatom.parent_object_id),
-            str(dbtranslationatom.locale_id))
-        CACHE.rem(key)
         atom_id_list.append(
             [dbtranslationatom.client_id, dbtranslationatom.object_id])
         dbtranslationatom.mark_deleted(
@@ -533,6 +530,276 @@ def undel_object(
 gql_none_value = object()
 
 
+class ObjectLoader(object):
+    """
+    Per-request batching loader of DB objects for GraphQL object resolution.
+
+    Lists of Lingvodoc GraphQL objects returned by resolvers are registered via ObjectLoaderMiddleware,
+    and then, when a first object of a list needs its DB object, the loader retrieves DB objects of all
+    registered siblings of the same type with a single query, instead of one query per object.
+
+    Same goes for users of the objects' creators (see CompositeIdHolder.resolve_created_by) and object
+    states (see StateHolder.resolve_status).
+    """
+
+    def __init__(self):
+
+        self.object_dict = {}
+        self.pending_dict = collections.defaultdict(set)
+
+        self.user_dict = {}
+        self.pending_client_id_set = set()
+
+        self.status_gist_id_set = set()
+        self.status_dict = collections.defaultdict(dict)
+
+    @staticmethod
+    def object_key(id):
+        """
+        Normalizes object id to a hashable key, composite ids become tuples.
+        """
+
+        if isinstance(id, list):
+            return tuple(id)
+
+        return id
+
+    def register_db_object(self, db_object):
+        """
+        Registers already retrieved DB object for subsequent batched retrieval of related data.
+        """
+
+        client_id = getattr(db_object, 'client_id', None)
+
+        if client_id is not None:
+            self.pending_client_id_set.add(client_id)
+
+        state_gist_client_id = (
+            getattr(db_object, 'state_translation_gist_client_id', None))
+
+        if state_gist_client_id is not None:
+
+            self.status_gist_id_set.add((
+                state_gist_client_id,
+                db_object.state_translation_gist_object_id))
+
+    def register(self, gql_object):
+        """
+        Registers a GraphQL object, either with already retrieved DB object or with only id, for
+        subsequent batched retrieval.
+        """
+
+        if gql_object.dbObject is not None:
+
+            self.register_db_object(gql_object.dbObject)
+            return
+
+        db_type = getattr(gql_object, 'dbType', None)
+        id = getattr(gql_object, 'id', None)
+
+        if db_type is None or id is None:
+            return
+
+        key = self.object_key(id)
+
+        if isinstance(key, tuple):
+
+            if len(key) != 2:
+                return
+
+            self.pending_client_id_set.add(key[0])
+
+        elif not isinstance(key, (int, str)):
+            return
+
+        if (db_type, key) not in self.object_dict:
+            self.pending_dict[db_type].add(key)
+
+    def load(self, db_type, id):
+        """
+        Gets DB object of a specified type by id, retrieving it together with all pending DB objects of
+        the same type.
+        """
+
+        key = self.object_key(id)
+
+        db_object = self.object_dict.get((db_type, key))
+
+        if db_object is not None:
+            return db_object
+
+        pending_set = self.pending_dict.pop(db_type, set())
+        pending_set.add(key)
+
+        composite_list = []
+        simple_list = []
+
+        for pending_key in pending_set:
+
+            if isinstance(pending_key, tuple):
+                composite_list.append(pending_key)
+
+            else:
+                simple_list.append(pending_key)
+
+        if composite_list:
+
+            db_object_list = (
+
+                DBSession
+
+                    .query(db_type)
+
+                    .filter(
+                        tuple_(db_type.client_id, db_type.object_id)
+                            .in_(composite_list))
+
+                    .all())
+
+            for db_object in db_object_list:
+
+                self.object_dict[
+                    (db_type, (db_object.client_id, db_object.object_id))] = db_object
+
+                self.register_db_object(db_object)
+
+        if simple_list:
+
+            db_object_list = (
+
+                DBSession
+
+                    .query(db_type)
+
+                    .filter(
+                        db_type.id.in_(simple_list))
+
+                    .all())
+
+            for db_object in db_object_list:
+
+                self.object_dict[(db_type, db_object.id)] = db_object
+                self.register_db_object(db_object)
+
+        return self.object_dict.get((db_type, key))
+
+    def load_user_by_client_id(self, client_id):
+        """
+        Gets user of a specified client, retrieving it together with users of all pending clients.
+        """
+
+        if client_id in self.user_dict:
+            return self.user_dict[client_id]
+
+        client_id_list = list(self.pending_client_id_set - self.user_dict.keys())
+        client_id_list.append(client_id)
+
+        self.pending_client_id_set.clear()
+
+        row_list = (
+
+            DBSession
+
+                .query(
+                    dbClient.id, dbUser)
+
+                .filter(
+                    dbClient.id.in_(client_id_list),
+                    dbUser.id == dbClient.user_id)
+
+                .all())
+
+        for client_id_value in client_id_list:
+            self.user_dict[client_id_value] = None
+
+        for client_id_value, db_user in row_list:
+            self.user_dict[client_id_value] = db_user
+
+        return self.user_dict[client_id]
+
+    def load_status(self, state_gist_id, locale_id):
+        """
+        Gets state translation of a specified locale, retrieving it together with translations of all
+        pending states.
+        """
+
+        locale_status_dict = self.status_dict[locale_id]
+
+        if state_gist_id in locale_status_dict:
+            return locale_status_dict[state_gist_id]
+
+        gist_id_list = list(self.status_gist_id_set - locale_status_dict.keys())
+        gist_id_list.append(state_gist_id)
+
+        row_list = (
+
+            DBSession
+
+                .query(
+                    dbTranslationAtom.parent_client_id,
+                    dbTranslationAtom.parent_object_id,
+                    dbTranslationAtom.content)
+
+                .filter(
+                    tuple_(
+                        dbTranslationAtom.parent_client_id,
+                        dbTranslationAtom.parent_object_id)
+                        .in_(gist_id_list),
+                    dbTranslationAtom.locale_id == locale_id,
+                    dbTranslationAtom.marked_for_deletion == False)
+
+                .all())
+
+        for gist_id in gist_id_list:
+            locale_status_dict[gist_id] = None
+
+        for parent_client_id, parent_object_id, content in row_list:
+            locale_status_dict[(parent_client_id, parent_object_id)] = content
+
+        return locale_status_dict[state_gist_id]
+
+
+def get_object_loader(context):
+    """
+    Returns ObjectLoader of the query execution context, or None if the context does not have it.
+    """
+
+    return getattr(context, 'object_loader', None)
+
+
+class ObjectLoaderMiddleware(object):
+    """
+    GraphQL middleware registering lists of Lingvodoc GraphQL objects returned by resolvers with the
+    request's ObjectLoader, should be used without wrapping in promises, see object_loader_middleware.
+    """
+
+    def resolve(self, next, root, info, **kwargs):
+
+        result = next(root, info, **kwargs)
+
+        if not isinstance(result, list):
+            return result
+
+        object_loader = get_object_loader(info.context)
+
+        if object_loader is None:
+            return result
+
+        for item in result:
+
+            if isinstance(item, LingvodocObjectType):
+                object_loader.register(item)
+
+        return result
+
+
+object_loader_middleware = (
+
+    MiddlewareManager(
+        ObjectLoaderMiddleware(),
+        wrap_in_promise = False))
+
+
 def fetch_object(attrib_name=None, ACLSubject=None, ACLKey=None):
     """
     This magic decorator, which the resolve_* functions have, sets the dbObject atribute
@@ -569,16 +836,23 @@ def fetch_object(attrib_name=None, ACLSubject=None, ACLKey=None):
                     pass
 
             if not cls.dbObject:
+                object_loader = get_object_loader(context)
                 if isinstance(cls.id, (int, str)):
                     # example: (id: 1),  (id: 'ihGLq')
-                    cls.dbObject = DBSession.query(cls.dbType).filter_by(id=cls.id).first()
+                    if object_loader is not None:
+                        cls.dbObject = object_loader.load(cls.dbType, cls.id)
+                    else:
+                        cls.dbObject = DBSession.query(cls.dbType).filter_by(id=cls.id).first()
                     if cls.dbObject is None:
                         #cls.ErrorHappened = True
                         raise ResponseError(message="%s was not found" % cls.__class__, self_object=cls)
                 elif isinstance(cls.id, (list, tuple)):
                     # example: (id: [2,3])
-                    cls.dbObject = DBSession.query(cls.dbType).filter_by(client_id=cls.id[0],
-                                                                         object_id=cls.id[1]).first()
+                    if object_loader is not None:
+                        cls.dbObject = object_loader.load(cls.dbType, cls.id)
+                    else:
+                        cls.dbObject = DBSession.query(cls.dbType).filter_by(client_id=cls.id[0],
+                                                                             object_id=cls.id[1]).first()
                     # cls.dbObject = CACHE.get(objects = {cls.dbType : (cls.id, )})
                     if cls.dbObject is None:
                         #cls.ErrorHappened = True
@@ -632,14 +906,23 @@ class CompositeIdHolder(graphene.Interface):
 
         from .gql_user import User
 
-        dbuser = (
+        object_loader = get_object_loader(info.context)
 
-            DBSession
-                .query(dbUser)
-                .filter(
-                    dbClient.id == self.dbObject.client_id,
-                    dbUser.id == dbClient.user_id)
-                .first())
+        if object_loader is not None:
+
+            dbuser = (
+                object_loader.load_user_by_client_id(self.dbObject.client_id))
+
+        else:
+
+            dbuser = (
+
+                DBSession
+                    .query(dbUser)
+                    .filter(
+                        dbClient.id == self.dbObject.client_id,
+                        dbUser.id == dbClient.user_id)
+                    .first())
 
         user = User(id = dbuser.id)
         user.dbObject = dbuser
@@ -755,6 +1038,17 @@ class StateHolder(graphene.Interface):
         if locale_id is None:
             locale_id = int(info.context.get('locale_id'))
 
+        object_loader = get_object_loader(info.context)
+
+        if object_loader is not None:
+
+            return (
+
+                object_loader.load_status(
+                    (self.dbObject.state_translation_gist_client_id,
+                        self.dbObject.state_translation_gist_object_id),
+                    locale_id))
+
         atom = DBSession.query(dbTranslationAtom.content).filter_by(
             parent_client_id=self.dbObject.state_translation_gist_client_id,
             parent_object_id=self.dbObject.state_translation_gist_object_id,
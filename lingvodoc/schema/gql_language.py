@@ -2,6 +2,9 @@
 # Standard library imports.
 
 import collections
+import hashlib
+import itertools
+import json
 import logging
 import pprint
 import types
@@ -11,18 +14,21 @@ import uuid
 
 import graphene
 
+from graphql.language import ast
+
 import sqlalchemy
 
 from sqlalchemy import (
     and_,
     Boolean,
     cast,
+    event,
     func,
     literal,
     or_,
     tuple_)
 
-from sqlalchemy.orm import aliased
+from sqlalchemy.orm import aliased, Session
 
 from sqlalchemy.orm.attributes import flag_modified
 from sqlalchemy.orm.util import identity_key
@@ -34,11 +40,15 @@ import lingvodoc.cache.caching as caching
 import lingvodoc.models as models
 
 from lingvodoc.models import (
+    bump_translation_version,
     DBSession,
     Dictionary as dbDictionary,
     DictionaryPerspective as dbPerspective,
     DictionaryPerspectiveToField as dbColumn,
+    Grant as dbGrant,
+    Group as dbGroup,
     Language as dbLanguage,
+    Organization as dbOrganization,
     SLBigInteger,
     TranslationAtom as dbTranslationAtom,
     ValencyAnnotationData as dbValencyAnnotationData,
@@ -81,8 +91,9 @@ from lingvodoc.utils.creation import (
 from lingvodoc.utils.deletion import real_delete_language
 
 from lingvodoc.utils.search import (
-    recursive_sort,
-    translation_gist_search)
+    limited_access_gist_id,
+    published_gist_id,
+    recursive_sort)
 
 
 # Setting up logging.
@@ -181,15 +192,8 @@ class Language(LingvodocObjectType):
 
         if published is not None:
 
-            db_published_gist = translation_gist_search('Published')
-
-            published_client_id = db_published_gist.client_id
-            published_object_id = db_published_gist.object_id
-
-            db_limited_gist = translation_gist_search('Limited access')
-
-            limited_client_id = db_limited_gist.client_id
-            limited_object_id = db_limited_gist.object_id
+            published_client_id, published_object_id = published_gist_id()
+            limited_client_id, limited_object_id = limited_access_gist_id()
 
             # If we need only published or limited dictionaries, we also filter dictionaries through their
             # perspectives.
@@ -858,15 +862,10 @@ class UpdateLanguageAtom(graphene.Mutation):
                                                             locale_id=locale_id).first()
         if dbtranslationatom:
             if dbtranslationatom.locale_id == locale_id:
-                key = "translation:%s:%s:%s" % (
-                    str(dbtranslationatom.parent_client_id),
-                    str(dbtranslationatom.parent_object_id),
-                    str(dbtranslationatom.locale_id))
-                caching.CACHE.rem(key)
-                key = "translations:%s:%s" % (
-                    str(dbtranslationatom.parent_client_id),
-                    str(dbtranslationatom.parent_object_id))
-                caching.CACHE.rem(key)
+                bump_translation_version(
+                    dbtranslationatom.parent_client_id,
+                    dbtranslationatom.parent_object_id)
+
                 if content:
                     dbtranslationatom.content = content
             else:
@@ -888,6 +887,9 @@ class UpdateLanguageAtom(graphene.Mutation):
                                                 content=content)
             DBSession.add(dbtranslationatom)
             DBSession.flush()
+            bump_translation_version(
+                dbtranslationatom.parent_client_id,
+                dbtranslationatom.parent_object_id)
 
         language = Language(id=[dblanguage.client_id, dblanguage.object_id])
         language.dbObject = dbLanguage
@@ -969,6 +971,298 @@ class LanguageTree(graphene.ObjectType):
     languages = graphene.List(Language)
 
 
+#: Classes of objects language trees are constructed from, changes of any of them make cached language tree
+#: snapshots invalid. Permission groups are included because of user-dependent data, e.g. if a perspective
+#: is hidden for the user.
+language_tree_class_tuple = (
+    dbColumn,
+    dbDictionary,
+    dbGrant,
+    dbGroup,
+    dbLanguage,
+    dbOrganization,
+    dbPerspective)
+
+
+#: Fields which can be selected by cached 'language_tree' queries, by GraphQL type, with types of their
+#: subselections. These depend only on language_tree_class_tuple objects and translations, queries with
+#: other fields, e.g. 'last_modified_at' depending on entities, are not cached.
+language_tree_field_dict = {
+
+    'LanguageTree': {
+        'languages': 'Language',
+        'tree': None},
+
+    'Language': {
+        'additional_metadata': None,
+        'created_at': None,
+        'dictionaries': 'Dictionary',
+        'dictionary_count': None,
+        'id': None,
+        'in_toc': None,
+        'marked_for_deletion': None,
+        'parent_id': None,
+        'translation': None,
+        'translation_gist_id': None,
+        'translations': None},
+
+    'Dictionary': {
+        'additional_metadata': None,
+        'category': None,
+        'created_at': None,
+        'domain': None,
+        'id': None,
+        'marked_for_deletion': None,
+        'parent_id': None,
+        'perspectives': 'Perspective',
+        'state_translation_gist_id': None,
+        'status': None,
+        'status_translations': None,
+        'translation': None,
+        'translation_gist_id': None,
+        'translations': None},
+
+    'Perspective': {
+        'additional_metadata': None,
+        'columns': 'Column',
+        'created_at': None,
+        'id': None,
+        'import_hash': None,
+        'import_source': None,
+        'marked_for_deletion': None,
+        'parent_id': None,
+        'state_translation_gist_id': None,
+        'status': None,
+        'status_translations': None,
+        'translation': None,
+        'translation_gist_id': None,
+        'translations': None},
+
+    'Column': {
+        'created_at': None,
+        'field_id': None,
+        'id': None,
+        'link_id': None,
+        'marked_for_deletion': None,
+        'parent_id': None,
+        'position': None,
+        'self_id': None}}
+
+#: Arguments making fields depend on other data, e.g. perspectives' 'with_verb_data' depending on valency
+#: data.
+language_tree_argument_set = {
+    'with_verb_data'}
+
+
+class Language_Tree_Cache(object):
+    """
+    Caches results of 'language_tree' queries in Redis as snapshots of query data, keyed by a digest of
+    the query hash, its variables, the locale, the user and current language tree and translation
+    generation stamps.
+
+    Language tree generation stamp is changed on any flush creating, changing or deleting languages,
+    dictionaries, perspectives, perspective columns, grants, organizations or permission groups, including
+    moves of languages in the tree, and then again on commit, see language_tree_after_flush(). Translation
+    generation stamp is changed when translations are changed, see Translation_Cache of lingvodoc.models.
+    So a snapshot is rebuilt by the first query after a relevant change, and the digest can be used as an
+    ETag of a query result. Only queries selecting data depending on nothing else are cached, see
+    language_tree_field_dict.
+
+    Snapshots are not cached and no digests are computed without Redis, e.g. with MockCache, as there are
+    no generation stamps then.
+    """
+
+    key_format_str = 'language_tree:%s'
+    generation_key_str = 'language_tree_generation'
+
+    def snapshot_selection(self, selection_set, type_name):
+        """
+        Checks if a selection set of a given type has only fields of language_tree_field_dict, recursively.
+        """
+
+        if selection_set is None:
+            return True
+
+        field_dict = language_tree_field_dict[type_name]
+
+        for selection in selection_set.selections:
+
+            # Fragments are not checked, so queries with them are not cached.
+
+            if not isinstance(selection, ast.Field):
+                return False
+
+            name_str = selection.name.value
+
+            if name_str == '__typename':
+                continue
+
+            if name_str not in field_dict:
+                return False
+
+            for argument in selection.arguments or ():
+
+                if argument.name.value in language_tree_argument_set:
+                    return False
+
+            subtype_name = field_dict[name_str]
+
+            if subtype_name is None:
+
+                if selection.selection_set is not None:
+                    return False
+
+            elif not self.snapshot_selection(selection.selection_set, subtype_name):
+                return False
+
+        return True
+
+    def snapshot_query(self, document):
+        """
+        Checks if a parsed query consists only of 'language_tree' fields selecting only data snapshots
+        are invalidated on changes of, see language_tree_field_dict.
+        """
+
+        if document is None or len(document.definitions) != 1:
+            return False
+
+        definition = (
+            document.definitions[0])
+
+        if (not isinstance(definition, ast.OperationDefinition) or
+            definition.operation != 'query'):
+
+            return False
+
+        for selection in definition.selection_set.selections:
+
+            if (not isinstance(selection, ast.Field) or
+                selection.name.value != 'language_tree' or
+                not self.snapshot_selection(selection.selection_set, 'LanguageTree')):
+
+                return False
+
+        return True
+
+    def digest(self, document, hash_str, variable_values, locale_id, context):
+        """
+        Computes snapshot digest for a query given its parsed document and query string hash, returns None
+        if the query is not a language tree query or if there are no generation stamps.
+
+        Digest includes the user of the query execution context, as query data can depend on the user,
+        e.g. perspectives' is_hidden_for_client.
+        """
+
+        if not self.snapshot_query(document):
+            return None
+
+        try:
+
+            generation_list = (
+
+                caching.CACHE.get([
+                    self.generation_key_str,
+                    models.translation_cache.generation_key_str]))
+
+            if generation_list[0] is None:
+
+                self.bump()
+
+                generation_list[0] = (
+                    caching.CACHE.get(self.generation_key_str))
+
+        except Exception as exception:
+
+            log.warning(f'Failed to get language tree generation: {exception}')
+            return None
+
+        if generation_list[0] is None:
+            return None
+
+        digest_str = (
+
+            json.dumps(
+                [hash_str, variable_values or {}, locale_id, context.user_id, generation_list],
+                sort_keys = True,
+                default = str))
+
+        return (
+
+            hashlib.sha256(
+                digest_str.encode('utf-8')).hexdigest())
+
+    def get(self, digest):
+
+        try:
+
+            return (
+                caching.CACHE.get(self.key_format_str % digest))
+
+        except Exception as exception:
+
+            log.warning(f'Failed to get language tree snapshot: {exception}')
+
+    def set(self, digest, data):
+
+        try:
+
+            caching.CACHE.set(
+                key = self.key_format_str % digest,
+                value = data)
+
+        except Exception as exception:
+
+            log.warning(f'Failed to set language tree snapshot: {exception}')
+
+    def bump(self):
+        """
+        Makes all cached language tree snapshots invalid.
+        """
+
+        try:
+
+            caching.CACHE.set(
+                key = self.generation_key_str,
+                value = str(uuid.uuid4()))
+
+        except Exception as exception:
+
+            log.warning(f'Failed to bump language tree generation: {exception}')
+
+
+language_tree_cache = Language_Tree_Cache()
+
+
+@event.listens_for(Session, 'after_flush')
+def language_tree_after_flush(session, flush_context):
+    """
+    Invalidates language tree snapshots if the flush changed language tree data, remembers to invalidate
+    them again on commit, as until then they can be rebuilt with the previous data by another transaction.
+    """
+
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+
+        if isinstance(obj, language_tree_class_tuple):
+
+            language_tree_cache.bump()
+            session.info['language_tree_flag'] = True
+
+            return
+
+
+@event.listens_for(Session, 'after_commit')
+def language_tree_after_commit(session):
+
+    if session.info.pop('language_tree_flag', False):
+        language_tree_cache.bump()
+
+
+@event.listens_for(Session, 'after_rollback')
+def language_tree_after_rollback(session):
+
+    session.info.pop('language_tree_flag', None)
+
+
 class Resolver_Selection(object):
     """
     Stores a set of selected fields together with columns required to resolve them.
@@ -984,6 +1278,7 @@ class Resolver_Selection(object):
         self.column_list = []
 
         self.object_flag = False
+        self.translation_flag = False
 
     def __call__(self, *args):
 
@@ -1415,6 +1710,10 @@ def toc_translations_cache(self, toc_list):
 
             .all())
 
+    models.warm_translations(
+        (gist_client_id, gist_object_id)
+        for client_id, object_id, gist_client_id, gist_object_id in gist_id_list)
+
     return {
 
         (client_id, object_id):
@@ -1870,6 +2169,9 @@ class Language_Resolver(object):
 
                 ds.object_flag = True
 
+                if name_str == 'translation':
+                    ds.translation_flag = True
+
         ds.translations_flag = (
             'translations' in ds.field_set)
 
@@ -1998,6 +2300,9 @@ class Language_Resolver(object):
 
                 ps.object_flag = True
 
+                if name_str == 'translation':
+                    ps.translation_flag = True
+
         ps.translations_flag = (
             'translations' in ps.field_set)
 
@@ -4083,6 +4388,15 @@ class Language_Resolver(object):
                 attribute_set.discard('status_translations')
                 attribute_set.discard('translations')
 
+                # Getting translations of all dictionaries at once, instead of one by one when they are
+                # resolved.
+
+                if ds.translation_flag:
+
+                    models.warm_translations(
+                        (result[0] if ds.join_flag else result).translation_gist_id
+                        for result in result_list)
+
                 for result in result_list:
 
                     dictionary = (
@@ -4456,6 +4770,15 @@ class Language_Resolver(object):
                 attribute_set.discard('status_translations')
                 attribute_set.discard('translations')
 
+                # Getting translations of all perspectives at once, instead of one by one when they are
+                # resolved.
+
+                if ps.translation_flag:
+
+                    models.warm_translations(
+                        (result[0] if ps.join_flag else result).translation_gist_id
+                        for result in result_list)
+
                 for result in result_list:
 
                     perspective = (
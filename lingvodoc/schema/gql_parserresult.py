@@ -21,8 +21,6 @@ import copy
 
 # Library imports.
 
-from bs4 import BeautifulSoup
-
 import graphene
 
 from graphql.language.ast import (
@@ -107,6 +105,7 @@ from lingvodoc.utils.creation import (
     async_create_parser_result)
 
 import lingvodoc.utils.doc_parser as ParseMethods
+import lingvodoc.utils.parser_result as parser_result_utils
 
 from lingvodoc.utils.elan_functions import tgt_to_eaf
 
@@ -314,110 +313,23 @@ def get_parser_result_for_text(text, parse_method, apertium_path):
     return result
 
 
-def get_max_id(soup):
-    max_id = 0
-    for span in soup.find_all("span"):
-        if "id" in span.attrs:
-            id = span.attrs["id"]
-            if id.isdecimal():
-                int_id = int(id)
-                if int_id > max_id:
-                    max_id = int_id
-    return max_id
+def parse_and_insert_element(old_result, element_id, parse_method, apertium_path):
 
+    return (
 
-def parse_and_insert_element(old_result, element_id, parse_method, apertium_path):
-    old_result_soup = BeautifulSoup(old_result, 'html.parser')
-    selector_arg = "span[id^=\"" + element_id + "\"]"
-    element_soup = old_result_soup.select(selector_arg)[0]
-    if not element_soup:
-        return old_result
-    element_text = ""
-    for child in element_soup.children:
-        if str(type(child)).find("NavigableString") != -1:
-            element_text = child
-    if not element_text:
-        return old_result
-    parser_result = get_parser_result_for_text(element_text, parse_method, apertium_path)
-    parser_result_soup = BeautifulSoup(parser_result, 'html.parser')
-    if not parser_result_soup.span:
-        return old_result
-    max_id = get_max_id(old_result_soup)
-    parser_result_soup.span["id"] = element_id
-    for span in parser_result_soup.span.find_all("span"):
-        span["id"] = str(max_id + 1)
-        max_id += 1
-    if "user" in element_soup["class"]:
-        parser_result_soup.span["class"].append("user")
-    if element_soup.span:
-        for span in element_soup.find_all("span"):
-            if ("user" in span["class"] or "approved" in span["class"]) and "result" in span["class"]:
-                parser_result_soup.span.append(span)
-                if "approved" in span["class"] and "verified" not in parser_result_soup.span["class"]:
-                    parser_result_soup.span["class"].append("verified")
-    old_result_soup.select(selector_arg)[0].replace_with(parser_result_soup)
-    return str(old_result_soup)
+        parser_result_utils.parse_and_insert_element(
+            old_result,
+            element_id,
+            lambda text: get_parser_result_for_text(text, parse_method, apertium_path)))
 
 
 def reexecute_parser(old_result, parse_method, apertium_path):
-    ESC_PAT = "$id$"
-    old_result_soup = BeautifulSoup(old_result, 'html.parser')
-    elements = old_result_soup.select('[class*="verified"]')
-    elements_to_skip = list()
-    index_skip = 0
-    for element in elements:
-        if "verified" in element["class"] or "user" in element["class"]:
-            element_to_skip = element.replace_with(ESC_PAT + str(index_skip) + ESC_PAT)
-            elements_to_skip.append(element_to_skip)
-            index_skip += 1
-
-    def extract_text_from_tag(tag):
-        result = ""
-        if str(type(tag)).find("NavigableString") != -1:
-            result = tag
-        elif str(type(tag)).find("Tag") != -1 and tag.name in ["strong", "head"]:
-            pass
-        elif str(type(tag)).find("Tag") != -1 and tag.name in ["html", "body"]:
-            for child in tag.children:
-                result += extract_text_from_tag(child)
-        elif str(type(tag)).find("Tag") != -1 and tag.name == "span":
-            if "class" in tag.attrs and "unverified" in tag["class"] and tag.children:
-                for child in tag.children:
-                    if str(type(child)).find("NavigableString") != -1:
-                        result = child
-        elif str(type(tag)).find("Tag") != -1:
-            if tag.children:
-                for child in tag.children:
-                    child.replace_with(extract_text_from_tag(child))
-            result = str(tag).replace("&lt;", "<").replace("&gt;", ">")
-        return result
-
-    text = ""
-    for child in old_result_soup.contents:
-        text += extract_text_from_tag(child)
-
-    new_result = get_parser_result_for_text(text, parse_method, apertium_path)
-    max_id = get_max_id(BeautifulSoup(new_result, "html.parser"))
-
-    def replace(match):
-        i = len(ESC_PAT)
-        index = int(match.group(0)[i:-i])
-        element = elements_to_skip[index]
-        nonlocal max_id
-        max_id += 1
-        element["id"] = str(max_id)
-        for child in element.children:
-            if str(type(child)).find("Tag") == -1 or "id" not in child.attrs:
-                continue
-            if child["id"].find('!') != -1:
-                child["id"] = element["id"] + '!'*child["id"].count('!')
-            else:
-                max_id += 1
-                child["id"] = str(max_id)
-        return str(element)
 
-    new_result = re.sub(r"\$id\$(\d*)\$id\$", replace, new_result)
-    return new_result
+    return (
+
+        parser_result_utils.reexecute_parser(
+            old_result,
+            lambda text: get_parser_result_for_text(text, parse_method, apertium_path)))
 
 
 @celery.task
@@ -77,8 +77,8 @@ from lingvodoc.schema.gql_lexicalentry import LexicalEntry
 from lingvodoc.scripts.save_dictionary import Save_Context
 
 from lingvodoc.utils.search import (
-    recursive_sort,
-    translation_gist_search
+    get_translation_gist_id,
+    recursive_sort
 )
 
 import lingvodoc.utils as utils
@@ -605,7 +605,7 @@ def search_mechanism(
 
             # Compiling search results.
 
-            result_lexical_entries, _ = (
+            result_lexical_entries, _, _ = (
 
                 entries_with_entities(
                     lexical_entry_id_list,
@@ -651,10 +651,10 @@ def search_mechanism(
         elif adopted:
             lexes = lexes.filter(func.lower(dbEntity.content).contains('заим.%'))
         if etymology is not None:
-            gist = translation_gist_search('Grouping Tag')
+            gist_id = get_translation_gist_id('Grouping Tag')
             fields = DBSession.query(dbField.client_id, dbField.object_id).filter(
                 tuple_(dbField.data_type_translation_gist_client_id,
-                       dbField.data_type_translation_gist_object_id) == (gist.client_id, gist.object_id))
+                       dbField.data_type_translation_gist_object_id) == gist_id)
             if etymology:
                 lexes = lexes.filter(not_(tuple_(dbEntity.field_client_id, dbEntity.field_object_id).in_(fields)))
             else:
@@ -1050,7 +1050,7 @@ def search_mechanism(
 
     if load_entities:
 
-        res_lexical_entries, _ = (
+        res_lexical_entries, _, _ = (
 
             # Don't need to check for perspective deletion, we explicitly look only in undeleted dictionaries
             # and undeleted perspectives.
@@ -1148,10 +1148,10 @@ def search_mechanism_simple(
         elif adopted:
             lexes = lexes.filter(func.lower(dbEntity.content).contains('заим.%'))
         if etymology is not None:
-            gist = translation_gist_search('Grouping Tag')
+            gist_id = get_translation_gist_id('Grouping Tag')
             fields = DBSession.query(dbField.client_id, dbField.object_id).filter(
                 tuple_(dbField.data_type_translation_gist_client_id,
-                       dbField.data_type_translation_gist_object_id) == (gist.client_id, gist.object_id))
+                       dbField.data_type_translation_gist_object_id) == gist_id)
             if etymology:
                 lexes = lexes.filter(not_(tuple_(dbEntity.field_client_id, dbEntity.field_object_id).in_(fields)))
             else:
@@ -22,12 +22,12 @@ from lingvodoc.models import (
     User as dbUser,
     BaseGroup as dbBaseGroup,
     Group as dbGroup,
-    DBSession
+    DBSession,
+    bump_translation_version
 )
 
 from lingvodoc.utils.creation import add_user_to_group
 from lingvodoc.utils.verification import check_client_id
-import lingvodoc.cache.caching as caching
 
 
 class TranslationAtom(LingvodocObjectType):
@@ -141,10 +141,9 @@ class CreateTranslationAtom(graphene.Mutation):
             DBSession.add(dbtranslationatom)
             DBSession.flush()
 
-            key = "translations:%s:%s" % (
-                str(dbtranslationatom.parent_client_id),
-                str(dbtranslationatom.parent_object_id))
-            caching.CACHE.rem(key)
+            bump_translation_version(
+                dbtranslationatom.parent_client_id,
+                dbtranslationatom.parent_object_id)
 
             if not object_id:
 
@@ -236,16 +235,9 @@ class UpdateTranslationAtom(graphene.Mutation):
         if not dbtranslationatom:
             raise ResponseError(message="Error: no such translationatom in the system")
 
-        key = "translation:%s:%s:%s" % (
-            str(dbtranslationatom.parent_client_id),
-            str(dbtranslationatom.parent_object_id),
-            str(dbtranslationatom.locale_id))
-        caching.CACHE.rem(key)
-
-        key = "translations:%s:%s" % (
-            str(dbtranslationatom.parent_client_id),
-            str(dbtranslationatom.parent_object_id))
-        caching.CACHE.rem(key)
+        bump_translation_version(
+            dbtranslationatom.parent_client_id,
+            dbtranslationatom.parent_object_id)
 
         if content:
             dbtranslationatom.content = content
@@ -305,15 +297,10 @@ class DeleteTranslationAtom(graphene.Mutation):
             filter_by(client_id=client_id, object_id=object_id, marked_for_deletion=False).first()
         if not dbtranslationatom:
             raise ResponseError(message="Error: no such translationatom in the system")
-        key = "translation:%s:%s:%s" % (
-            str(dbtranslationatom.parent_client_id),
-            str(dbtranslationatom.parent_object_id),
-            str(dbtranslationatom.locale_id))
-        caching.CACHE.rem(key)
-        key = "translations:%s:%s" % (
-            str(dbtranslationatom.parent_client_id),
-            str(dbtranslationatom.parent_object_id))
-        caching.CACHE.rem(key)
+        bump_translation_version(
+            dbtranslationatom.parent_client_id,
+            dbtranslationatom.parent_object_id)
+
         del_object(dbtranslationatom, "delete_translationatom", info.context.get('client_id'))
         return DeleteTranslationAtom(translationatom=dbtranslationatom, triumph=True)
 
@@ -1,6 +1,5 @@
 import io
 import logging
-from os import unlink
 
 import graphene
 
@@ -21,6 +20,7 @@ from lingvodoc.schema.gql_holders import (
     ResponseError,
     LingvodocID,
     Upload)
+from lingvodoc.utils.blob_storage import Blob_Storage
 from lingvodoc.utils.creation import create_object
 
 from lingvodoc.models import (
@@ -289,7 +289,7 @@ class DeleteUserBlob(graphene.Mutation):
         filelocation = blob.real_storage_path
         del_object(blob, "delete_userblob", info.context.get('client_id'))
         try:
-            unlink(filelocation)
+            Blob_Storage(info.context.request.registry.settings['storage']).release(filelocation)
         except:
             # NOTE: intentionally not an error
             raise ResponseError(message="File can not be deleted physically; deleting from DMBS only.")
@@ -210,6 +210,7 @@ from lingvodoc.schema.gql_holders import (
     get_published_translation_gist_id_cte_query,
     gql_none_value,
     LingvodocID,
+    ObjectLoader,
     ObjectVal,
     PermissionException,
     ResponseError,
@@ -317,6 +318,9 @@ from lingvodoc.scripts.save_dictionary import save_dictionary as sync_save_dicti
 import lingvodoc.utils as utils
 
 from lingvodoc.utils import (
+    decode_cursor,
+    encode_cursor,
+    keyset_condition,
     plain_text_converter,
     render_statement,
     starling_converter)
@@ -340,6 +344,9 @@ from lingvodoc.utils.proxy import try_proxy
 
 from lingvodoc.utils.search import (
     get_id_to_field_dict,
+    limited_access_gist_id,
+    linked_group_list,
+    published_gist_id,
     translation_gist_search)
 
 import lingvodoc.version
@@ -348,7 +355,7 @@ from lingvodoc.views.v2.phonology import (
     get_vowel_class,
     Phonology_Parameters,
     process_sound_markup,
-    PickleCache)
+    SqliteCache)
 
 from lingvodoc.views.v2.save_dictionary.core import async_save_dictionary
 
@@ -411,6 +418,12 @@ class MergeSuggestions(graphene.ObjectType):
     user_has_permissions = graphene.Boolean()
 
 
+class DictionariesPage(graphene.ObjectType):
+    dictionaries = graphene.List(Dictionary)
+    total_count = graphene.Int()
+    end_cursor = graphene.String()
+
+
 def get_dict_attributes(sqconn):
     dict_trav = sqconn.cursor()
     dict_trav.execute("""SELECT
@@ -428,12 +441,226 @@ def get_dict_attributes(sqconn):
     return req
 
 
+#: Sort keys of dictionaries for cursor pagination, newest first, see keyset_condition().
+dictionary_key_list = [
+    (dbDictionary.created_at, False, True),
+    (dbDictionary.client_id, False, True),
+    (dbDictionary.object_id, False, True)]
+
+dictionary_key_name_list = [
+    'created_at desc',
+    'client_id desc',
+    'object_id desc']
+
+
+def get_dictionaries_query(client_id, published = None, mode = None, category = None):
+    """
+    Builds unordered query of dictionaries for 'dictionaries' and 'dictionaries_page', with all filtering,
+    including by permissions for dictionaries available to the user, in SQL.
+    """
+
+    client = DBSession.query(Client).filter_by(id=client_id).first()
+
+    dbdicts = (
+
+        DBSession
+            .query(dbDictionary)
+            .filter_by(marked_for_deletion = False))
+
+    published_cte_query = (
+        get_published_translation_gist_id_cte_query())
+
+    if published:
+
+        dbdicts = (
+
+            dbdicts
+
+                .filter(
+                    tuple_(
+                        dbDictionary.state_translation_gist_client_id,
+                        dbDictionary.state_translation_gist_object_id)
+
+                        .in_(published_cte_query))
+
+                .join(dbPerspective)
+
+                .filter(
+                    dbPerspective.marked_for_deletion == False,
+
+                    tuple_(
+                        dbPerspective.state_translation_gist_client_id,
+                        dbPerspective.state_translation_gist_object_id)
+
+                        .in_(published_cte_query))
+
+                .group_by(dbDictionary))
+
+    if category is not None:
+        dbdicts = dbdicts.filter(dbDictionary.category == category)
+
+    if mode is not None and client:
+
+        if not mode:
+            # my dictionaries
+
+            client_query = (
+
+                DBSession
+                    .query(Client.id)
+                    .filter(Client.user_id == client.user_id)
+                    .subquery()) # user,id?
+
+            dbdicts = dbdicts.filter(dbDictionary.client_id.in_(client_query))
+
+        else:
+            # available dictionaries
+            #
+            # Dictionaries of the user's dictionary groups and dictionaries with perspectives of any of
+            # the user's groups, or all dictionaries if the user has a dictionary or perspective group
+            # overriding subjects.
+
+            group_query = (
+
+                DBSession
+
+                    .query(
+                        dbGroup.subject_client_id,
+                        dbGroup.subject_object_id)
+
+                    .filter(
+                        user_to_group_association.c.user_id == client.user_id,
+                        user_to_group_association.c.group_id == dbGroup.id))
+
+            admin_flag = (
+
+                DBSession
+
+                    .query(
+
+                        group_query
+
+                            .filter(
+                                dbGroup.subject_override == True,
+                                dbBaseGroup.id == dbGroup.base_group_id,
+
+                                or_(
+                                    dbBaseGroup.dictionary_default == True,
+                                    dbBaseGroup.perspective_default == True))
+
+                            .exists())
+
+                    .scalar())
+
+            if not admin_flag:
+
+                dictionary_group_query = (
+
+                    group_query
+
+                        .filter(
+                            dbBaseGroup.id == dbGroup.base_group_id,
+                            dbBaseGroup.dictionary_default == True))
+
+                perspective_dictionary_query = (
+
+                    DBSession
+
+                        .query(
+                            dbPerspective.parent_client_id,
+                            dbPerspective.parent_object_id)
+
+                        .filter(
+                            tuple_(
+                                dbPerspective.client_id,
+                                dbPerspective.object_id)
+
+                                .in_(group_query)))
+
+                dbdicts = (
+
+                    dbdicts.filter(
+
+                        or_(
+
+                            tuple_(
+                                dbDictionary.client_id,
+                                dbDictionary.object_id)
+
+                                .in_(dictionary_group_query),
+
+                            tuple_(
+                                dbDictionary.client_id,
+                                dbDictionary.object_id)
+
+                                .in_(perspective_dictionary_query))))
+
+    return dbdicts
+
+
+def get_dictionary_list(dbdict_list, translation_flag):
+    """
+    Creates GraphQL dictionary objects, if their translations are requested, getting them at once instead
+    of one by one.
+    """
+
+    if translation_flag:
+
+        dbdict_list = list(dbdict_list)
+
+        models.warm_translations(
+            dbdict.translation_gist_id for dbdict in dbdict_list)
+
+    dictionaries_list = list()
+    for dbdict in dbdict_list:
+        gql_dict = Dictionary(id=[dbdict.client_id, dbdict.object_id])
+        gql_dict.dbObject = dbdict
+        dictionaries_list.append(gql_dict)
+    return dictionaries_list
+
+
+def subfield_flag(field_asts, *name_list):
+    """
+    Checks if a field with a specified path of names, e.g. 'dictionaries', 'translation', is selected in
+    the query.
+    """
+
+    selection_list = [
+        subfield
+        for field in field_asts
+        if field.selection_set is not None
+        for subfield in field.selection_set.selections]
+
+    for index, name in enumerate(name_list):
+
+        selection_list = [
+            selection
+            for selection in selection_list
+            if getattr(selection, 'name', None) is not None and
+                selection.name.value == name]
+
+        if index < len(name_list) - 1:
+
+            selection_list = [
+                subfield
+                for selection in selection_list
+                if selection.selection_set is not None
+                for subfield in selection.selection_set.selections]
+
+    return bool(selection_list)
+
+
 class Query(graphene.ObjectType):
     client = graphene.String()
     dictionaries = graphene.List(Dictionary, published=graphene.Boolean(),
                                  mode=graphene.Int(),
                                  category=graphene.Int(),
                                  proxy=graphene.Boolean())
+    dictionaries_page = graphene.Field(DictionariesPage, published=graphene.Boolean(),
+                                       mode=graphene.Int(),
+                                       category=graphene.Int(),
+                                       limit=graphene.Int(),
+                                       after=graphene.String())
     dictionary = graphene.Field(Dictionary, id=LingvodocID())
     perspectives = graphene.List(Perspective,
         published=graphene.Boolean(),
@@ -2100,105 +2327,100 @@ class Query(graphene.ObjectType):
         if proxy:
             try_proxy(request)
 
-        client_id = info.context.client_id
-        client = DBSession.query(Client).filter_by(id=client_id).first()
+        dbdicts = (
+
+            get_dictionaries_query(
+                info.context.client_id, published, mode, category)
+
+                .order_by(
+                    dbDictionary.created_at.desc(),
+                    dbDictionary.client_id.desc(),
+                    dbDictionary.object_id.desc()))
+
+        return (
+
+            get_dictionary_list(
+                dbdicts,
+                subfield_flag(info.field_asts, 'translation')))
+
+    def resolve_dictionaries_page(self, info, published=None, mode=None, category=None, limit=None, after=None):
+        """
+        Dictionaries with cursor pagination, pages are selected by sort keys of the last dictionary of the
+        previous page given as 'after' cursor, not by offset, so that getting any page is equally fast.
+
+        example:
+
+        query DictionaryPage {
+            dictionaries_page(published: true, limit: 20) {
+                dictionaries {
+                    id
+                    translation
+                }
+                total_count
+                end_cursor
+            }
+        }
+
+        'end_cursor' is null if there are no more dictionaries.
+        """
 
         dbdicts = (
 
-            DBSession
-                .query(dbDictionary)
-                .filter_by(marked_for_deletion = False))
+            get_dictionaries_query(
+                info.context.client_id, published, mode, category))
 
-        published_cte_query = (
-            get_published_translation_gist_id_cte_query())
+        total_count = (
+            dbdicts.count())
 
-        if published:
+        if after:
 
-            dbdicts = (
+            try:
 
-                dbdicts
+                dbdicts = (
 
-                    .filter(
-                        tuple_(
-                            dbDictionary.state_translation_gist_client_id,
-                            dbDictionary.state_translation_gist_object_id)
+                    dbdicts.filter(
+                        keyset_condition(
+                            dictionary_key_list,
+                            decode_cursor(after, dictionary_key_name_list))))
+
+            except ValueError as error:
+                raise ResponseError(str(error))
 
-                            .in_(published_cte_query))
+        dbdicts = (
 
-                    .join(dbPerspective)
+            dbdicts.order_by(
+                dbDictionary.created_at.desc(),
+                dbDictionary.client_id.desc(),
+                dbDictionary.object_id.desc()))
 
-                    .filter(
-                        dbPerspective.marked_for_deletion == False,
+        if limit:
+            dbdicts = dbdicts.limit(limit)
 
-                        tuple_(
-                            dbPerspective.state_translation_gist_client_id,
-                            dbPerspective.state_translation_gist_object_id)
+        dbdict_list = dbdicts.all()
 
-                            .in_(published_cte_query))
+        end_cursor = None
 
-                    .group_by(dbDictionary))
+        if limit and len(dbdict_list) >= limit:
 
-        if category is not None:
-            dbdicts = dbdicts.filter(dbDictionary.category == category)
-        dbdicts = dbdicts.order_by(dbDictionary.created_at.desc())
-        if mode is not None and client:
-            user = DBSession.query(dbUser).filter_by(id=client.user_id).first()
+            last = dbdict_list[-1]
 
-            if not mode:
-                # my dictionaries
+            end_cursor = (
 
-                client_query = (
+                encode_cursor(
+                    dictionary_key_name_list,
+                    [last.created_at, last.client_id, last.object_id]))
 
-                    DBSession
-                        .query(Client.id)
-                        .filter(Client.user_id == user.id)
-                        .subquery()) # user,id?
+        return (
 
-                dbdicts = dbdicts.filter(dbDictionary.client_id.in_(client_query))
+            DictionariesPage(
 
-            else:
-                # available dictionaries
-
-                dictstemp_set = set()
-                group_tuples = []
-                isadmin = False
-                for group in user.groups: # todo: LOOK AT ME this is really bad. rewrite me from group point of view
-                    subject_id = (group.subject_client_id, group.subject_object_id)
-                    if group.parent.dictionary_default:
-                        if group.subject_override:
-                            isadmin = True
-                            break
-                        dictstemp_set.add(subject_id)
-                    if group.parent.perspective_default:
-                        if group.subject_override:
-                            isadmin = True
-                            break
-                    group_tuples.append(subject_id)
-
-                if not isadmin:
-
-                    for i in range(0, len(group_tuples), 1000):
-
-                        dictstemp_set.update(
-
-                            DBSession
-                                .query(dbDictionary.client_id, dbDictionary.object_id)
-                                .join(dbPerspective)
-                                .filter(
-                                    tuple_(
-                                        dbPerspective.client_id,
-                                        dbPerspective.object_id)
-                                        .in_(group_tuples[i : i + 1000]))
-                                .all())
-
-                    dbdicts = [o for o in dbdicts if (o.client_id, o.object_id) in dictstemp_set]
-
-        dictionaries_list = list()
-        for dbdict in dbdicts:
-            gql_dict = Dictionary(id=[dbdict.client_id, dbdict.object_id])
-            gql_dict.dbObject = dbdict
-            dictionaries_list.append(gql_dict)
-        return dictionaries_list
+                dictionaries =
+                    get_dictionary_list(
+                        dbdict_list,
+                        subfield_flag(info.field_asts, 'dictionaries', 'translation')),
+
+                total_count = total_count,
+                end_cursor = end_cursor))
 
     def resolve_dictionary(self, info, id):
         return Dictionary(id=id)
@@ -2237,11 +2459,8 @@ class Query(graphene.ObjectType):
 
         if published:
 
-            db_published_gist = translation_gist_search('Published')
-            state_translation_gist_client_id = db_published_gist.client_id
-            state_translation_gist_object_id = db_published_gist.object_id
-            db_la_gist = translation_gist_search('Limited access')
-            limited_client_id, limited_object_id = db_la_gist.client_id, db_la_gist.object_id
+            state_translation_gist_client_id, state_translation_gist_object_id = published_gist_id()
+            limited_client_id, limited_object_id = limited_access_gist_id()
 
             perspective_query = perspective_query.filter(
                 or_(and_(dbPerspective.state_translation_gist_object_id == state_translation_gist_object_id,
@@ -3674,11 +3893,7 @@ class Query(graphene.ObjectType):
             # So, we look in either published perspectives or perspectives we have nesessary permissions
             # for.
 
-            db_published_gist = translation_gist_search('Published')
-
-            published_id = (
-                db_published_gist.client_id,
-                db_published_gist.object_id)
+            published_id = published_gist_id()
 
             group_query = (
 
@@ -3744,7 +3959,7 @@ class Query(graphene.ObjectType):
             results_cursor = results_cursor.join(dbPerspective.dictionaryperspectivetofield).filter(
                 dbColumn.field == field)
 
-        entry_list, _ = (
+        entry_list, _, _ = (
 
             entries_with_entities(
                 results_cursor.distinct(),
@@ -3780,11 +3995,8 @@ class Query(graphene.ObjectType):
         """
 
         if not perspectives:
-            db_published_gist = translation_gist_search('Published')
-            state_translation_gist_client_id = db_published_gist.client_id
-            state_translation_gist_object_id = db_published_gist.object_id
-            db_la_gist = translation_gist_search('Limited access')
-            limited_client_id, limited_object_id = db_la_gist.client_id, db_la_gist.object_id
+            state_translation_gist_client_id, state_translation_gist_object_id = published_gist_id()
+            limited_client_id, limited_object_id = limited_access_gist_id()
 
             perspectives = [(persp.client_id, persp.object_id) for persp in DBSession.query(dbPerspective).filter(
                 dbPerspective.marked_for_deletion == False,
@@ -4687,31 +4899,13 @@ class Query(graphene.ObjectType):
 
             raise ResponseError(message = 'No such lexical entry in the system')
 
-        if publish is None and accept is None:
-
-            sql_str = '''
+        entry_id_set, = (
 
-                select * from linked_group_no_publishing(
-                    :field_client_id,
-                    :field_object_id,
-                    :client_id,
-                    :object_id)
-
-                '''
-
-        else:
-
-            sql_str = '''
-
-                select * from linked_group(
-                    :field_client_id,
-                    :field_object_id,
-                    :client_id,
-                    :object_id,
-                    :publish,
-                    :accept)
-
-                '''
+            linked_group_list(
+                (field_client_id, field_object_id),
+                [(client_id, object_id)],
+                publish = publish,
+                accept = accept))
 
         entry_query = (
 
@@ -4727,17 +4921,10 @@ class Query(graphene.ObjectType):
                         dbLexicalEntry.client_id,
                         dbLexicalEntry.object_id)
 
-                    .in_(sqlalchemy.text(sql_str)))
+                    .in_(
+                        utils.ids_to_id_query(entry_id_set))))
 
-                .params({
-                    'field_client_id': field_client_id,
-                    'field_object_id': field_object_id,
-                    'client_id': client_id,
-                    'object_id': object_id,
-                    'publish': publish,
-                    'accept': accept}))
-
-        entry_list, _ = (
+        entry_list, _, _ = (
 
             entries_with_entities(
                 entry_query,
@@ -5291,6 +5478,7 @@ class Phonology(graphene.Mutation):
         link_field_list=graphene.List(LingvodocID)
         link_perspective_list=graphene.List(graphene.List(LingvodocID))
         use_fast_track=graphene.Boolean()
+        worker_count=graphene.Int()
         synchronous=graphene.Boolean()
         debug_flag=graphene.Boolean()
 
@@ -5487,7 +5675,7 @@ class PhonologicalStatisticalDistance(graphene.Mutation):
             '''
             perspective_id = (perspective.client_id, perspective.object_id)
             if not perspective_cache_dict.get(perspective_id):
-                perspective_cache_dict[perspective_id] = PickleCache(storage, perspective_id)
+                perspective_cache_dict[perspective_id] = SqliteCache(storage, perspective_id)
 
             for row_index, row in enumerate(query.yield_per(100)):
 
@@ -5708,7 +5896,7 @@ class PhonologicalStatisticalDistance(graphene.Mutation):
         Writing cache to file if there is any change
         '''
         for cache in perspective_cache_dict.values():
-            cache.flush()
+            cache.close()
 
         # Preparing for compilation of modelling results.
 
@@ -7770,6 +7958,8 @@ class Context(dict):
 
         self.acl_cache = {}
 
+        self.object_loader = ObjectLoader()
+
     def acl_check_if(
         self,
         action,
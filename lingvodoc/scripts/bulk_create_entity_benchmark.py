@@ -0,0 +1,162 @@
+"""
+Compares performance of per-entity creation of text entities, as done by CreateEntity, and bulk entity
+creation, as done by BulkCreateEntity, see bulk_insert_entities().
+
+Creates lexical entries and entities in the specified perspective in a transaction which is then rolled
+back, so that the database is left unchanged.
+
+Usage:
+
+  python -m lingvodoc.scripts.bulk_create_entity_benchmark <config_file_path> <client_id>
+    <perspective_client_id> <perspective_object_id> <field_client_id> <field_object_id>
+    [<entity_count> [<single_entity_count>]]
+"""
+
+# Standard library imports.
+
+import logging
+import sys
+import time
+
+# External imports.
+
+import pyramid.paster as paster
+
+import transaction
+
+# Project imports.
+
+from lingvodoc.models import (
+    DBSession,
+    Entity,
+    LexicalEntry,
+)
+
+from lingvodoc.utils.creation import bulk_insert_entities
+
+
+# Setting up logging, if we are not being run as a script.
+
+if __name__ != '__main__':
+    log = logging.getLogger(__name__)
+
+
+def create_entries(client_id, perspective_id, entry_count):
+    """
+    Creates lexical entries for the benchmark entities.
+    """
+
+    entry_list = [
+        LexicalEntry(client_id = client_id, parent_id = perspective_id)
+        for i in range(entry_count)]
+
+    DBSession.add_all(entry_list)
+    DBSession.flush()
+
+    return [entry.id for entry in entry_list]
+
+
+def single_create(client_id, entry_id_list, field_id, entity_count):
+    """
+    Creates entities one by one via ORM as CreateEntity does, returns time in seconds.
+    """
+
+    start_time = time.time()
+
+    for i in range(entity_count):
+
+        entity = (
+
+            Entity(
+                client_id = client_id,
+                parent_id = entry_id_list[i % len(entry_id_list)],
+                field_id = field_id,
+                locale_id = 2,
+                content = 'single entity {0}'.format(i)))
+
+        entity.publishingentity.accepted = True
+
+        DBSession.add(entity)
+        DBSession.flush()
+
+    return time.time() - start_time
+
+
+def bulk_create(client_id, entry_id_list, field_id, entity_count):
+    """
+    Creates entities in bulk, returns time in seconds.
+    """
+
+    start_time = time.time()
+
+    entity_list = [
+
+        {'parent_id': entry_id_list[i % len(entry_id_list)],
+            'field_id': field_id,
+            'locale_id': 2,
+            'content': 'bulk entity {0}'.format(i),
+            'accepted': True}
+
+        for i in range(entity_count)]
+
+    id_list = (
+        bulk_insert_entities(client_id, entity_list))
+
+    assert len(id_list) == entity_count
+
+    return time.time() - start_time
+
+
+# If we are being run as a script.
+
+if __name__ == '__main__':
+
+    if len(sys.argv) < 7:
+
+        sys.exit(
+            'Please specify config file, client id, perspective id and text field id:\n'
+            '  python -m lingvodoc.scripts.bulk_create_entity_benchmark <config_file_path> <client_id> '
+            '<perspective_client_id> <perspective_object_id> <field_client_id> <field_object_id> '
+            '[<entity_count> [<single_entity_count>]]')
+
+    config_path = sys.argv[1]
+
+    pyramid_env = paster.bootstrap(config_path)
+    paster.setup_logging(config_path)
+
+    log = logging.getLogger(__name__)
+
+    client_id = int(sys.argv[2])
+    perspective_id = (int(sys.argv[3]), int(sys.argv[4]))
+    field_id = (int(sys.argv[5]), int(sys.argv[6]))
+
+    entity_count = int(sys.argv[7]) if len(sys.argv) > 7 else 100000
+    single_count = int(sys.argv[8]) if len(sys.argv) > 8 else 1000
+
+    try:
+
+        entry_id_list = (
+            create_entries(client_id, perspective_id, max(1, entity_count // 10)))
+
+        single_time = (
+            single_create(client_id, entry_id_list, field_id, single_count))
+
+        bulk_time = (
+            bulk_create(client_id, entry_id_list, field_id, entity_count))
+
+        log.info(
+            '\n{0} entities one by one: {1:.3f}s, {2:.3f}ms per entity'
+            '\n{3} entities in bulk: {4:.3f}s, {5:.3f}ms per entity'
+            '\nspeedup: {6:.1f}x'.format(
+                single_count,
+                single_time,
+                single_time * 1000 / single_count,
+                entity_count,
+                bulk_time,
+                bulk_time * 1000 / entity_count,
+                (single_time / single_count) / (bulk_time / entity_count)))
+
+    finally:
+
+        transaction.abort()
+        pyramid_env['closer']()
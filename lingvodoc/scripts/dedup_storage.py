@@ -0,0 +1,223 @@
+"""
+Moves existing uploaded object files of the storage, i.e. files of entities and user blobs, into the
+content-addressed blob store, see lingvodoc.utils.blob_storage, replacing files with identical contents
+with hard links to the same blob.
+
+The 'check' command only counts files and the space their deduplication would free, the 'dedup' command
+deduplicates them, and the 'collect' command removes blobs not referenced by any file, e.g. left after
+files were removed bypassing the blob store.
+
+Other storage files, e.g. phonology SQLite caches and xlsx / json results of analysis tasks, are not
+deduplicated, as they can be rewritten in place, and rewriting a hard link would change all files linked
+to the same blob. Uploaded object files are never modified after they are written, so the deduplication
+can be run on a live storage and re-run after an interruption, files are replaced atomically with hard
+links to blobs with the same contents.
+
+Blobs are referenced by hard links only, so with backups hard linking storage files 'collect' does not
+remove blobs still linked by backups, see Blob_Storage.collect().
+
+Usage:
+
+  python -m lingvodoc.scripts.dedup_storage <config_file_path> [check|dedup|collect]
+"""
+
+# Standard library imports.
+
+import logging
+import os
+import stat
+import sys
+import time
+
+# External imports.
+
+import pyramid.paster as paster
+
+# Project imports.
+
+from lingvodoc.utils.blob_storage import (
+    Blob_Storage,
+    file_sha256)
+
+
+# Setting up logging, if we are not being run as a script.
+
+if __name__ != '__main__':
+    log = logging.getLogger(__name__)
+
+
+#: Storage directories of uploaded object files, named after tables of their objects, see
+#: object_file_path() of lingvodoc.utils.creation.
+object_dir_name_list = [
+    'entity',
+    'userblobs']
+
+
+def storage_file_iter(storage_path):
+    """
+    Iterates over paths of regular files of the storage's object file directories, excluding temporary
+    files.
+    """
+
+    for object_dir_name in object_dir_name_list:
+
+        yield from object_file_iter(
+            os.path.join(storage_path, object_dir_name))
+
+
+def object_file_iter(object_dir_path):
+    """
+    Iterates over paths of regular files of an object file directory, excluding temporary files.
+    """
+
+    for dir_path, dir_name_list, file_name_list in os.walk(object_dir_path):
+
+        dir_name_list.sort()
+
+        for file_name in sorted(file_name_list):
+
+            if file_name.startswith('.') and file_name.endswith('.tmp'):
+                continue
+
+            file_path = os.path.join(dir_path, file_name)
+
+            if stat.S_ISREG(os.lstat(file_path).st_mode):
+                yield file_path
+
+
+def check_storage(storage_config):
+    """
+    Counts storage files and the space their deduplication would free, returns number of files, their
+    total size and total size of duplicates.
+    """
+
+    blob_storage = Blob_Storage(storage_config)
+
+    inode_set = set()
+    hash_set = set()
+
+    count = 0
+    size = 0
+    duplicate_size = 0
+
+    for file_path in storage_file_iter(blob_storage.path):
+
+        file_stat = os.stat(file_path)
+
+        count += 1
+
+        inode = (file_stat.st_dev, file_stat.st_ino)
+
+        if inode in inode_set:
+            continue
+
+        inode_set.add(inode)
+
+        size += file_stat.st_size
+
+        hash = file_sha256(file_path)
+
+        if hash in hash_set:
+            duplicate_size += file_stat.st_size
+
+        else:
+            hash_set.add(hash)
+
+    return count, size, duplicate_size
+
+
+def dedup_storage(storage_config):
+    """
+    Makes all storage files references to blobs of their contents, returns number of files and the
+    space freed.
+    """
+
+    blob_storage = Blob_Storage(storage_config)
+
+    count = 0
+    freed_size = 0
+
+    for file_path in storage_file_iter(blob_storage.path):
+
+        try:
+            freed_size += blob_storage.deduplicate(file_path)
+
+        except OSError as exception:
+
+            log.warning(
+                f'\nfailed to deduplicate \'{file_path}\': {exception}')
+
+            continue
+
+        count += 1
+
+        if count % 1000 == 0:
+
+            log.info(
+                f'\n{count} files, {freed_size} bytes freed')
+
+    return count, freed_size
+
+
+# If we are being run as a script.
+
+if __name__ == '__main__':
+
+    if len(sys.argv) < 2:
+
+        sys.exit(
+            'Please specify config file:\n'
+            '  python -m lingvodoc.scripts.dedup_storage <config_file_path> [check|dedup|collect]')
+
+    config_path = sys.argv[1]
+
+    pyramid_env = paster.bootstrap(config_path)
+    paster.setup_logging(config_path)
+
+    log = logging.getLogger(__name__)
+
+    command = sys.argv[2] if len(sys.argv) > 2 else 'check'
+
+    storage_config = (
+        pyramid_env['registry'].settings['storage'])
+
+    start_time = time.time()
+
+    try:
+
+        if command == 'check':
+
+            count, size, duplicate_size = (
+                check_storage(storage_config))
+
+            log.info(
+                f'\n{count} files, {size} bytes, {duplicate_size} bytes of duplicates')
+
+        elif command == 'dedup':
+
+            count, freed_size = (
+                dedup_storage(storage_config))
+
+            log.info(
+                f'\n{count} files, {freed_size} bytes freed')
+
+        elif command == 'collect':
+
+            count, size = (
+                Blob_Storage(storage_config).collect())
+
+            log.info(
+                f'\n{count} unreferenced blobs, {size} bytes removed')
+
+        else:
+
+            sys.exit(
+                f'Unknown command \'{command}\'.')
+
+    finally:
+
+        pyramid_env['closer']()
+
+    log.info(
+        '\nelapsed time: {:.3f}s'.format(
+            time.time() - start_time))
@@ -40,6 +40,7 @@ from lingvodoc.models import (
 
 )
 from lingvodoc.cache.caching import TaskStatus, initialize_cache
+from lingvodoc.utils.search import defer_entity_groups
 
 from sqlalchemy.orm import (
     sessionmaker,
@@ -609,7 +610,10 @@ def download(
     task_status.set(2, 30, "Got objects from server", "")
     session.bulk_save_objects(new_objects)
     task_status.set(3, 40, "Created objects until entities", "")
-    session.bulk_save_objects(create_new_entities(new_entities, storage=storage, session=session, cookies=cookies))
+    entity_objects = create_new_entities(new_entities, storage=storage, session=session, cookies=cookies)
+    session.bulk_save_objects(entity_objects)
+    # bulk saved entities bypass flush, where entry groups of grouping tags are scheduled for update
+    defer_entity_groups(entity_objects, session)
     task_status.set(4, 90, "Created entities", "")
     session.bulk_save_objects(publ_entities)
     log.error('dictionary %s %s downloaded' % (client_id, object_id))
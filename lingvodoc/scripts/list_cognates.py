@@ -25,10 +25,65 @@ from lingvodoc.models import (
     PublishingEntity
 )
 
+from lingvodoc.utils.search import linked_group_list
+
 from sqlalchemy.orm import aliased
 from pdb import set_trace as A
 
 
+# Number of lexical entries linked groups are found for at once.
+entry_batch_size = 1024
+
+
+class Json_Tree_Writer(object):
+    """
+    Writes a tree of nested JSON objects to a file incrementally, with the same formatting as json.dumps()
+    uses, so that the whole tree does not have to be kept in memory.
+
+    Objects are opened at a specified depth, with the root object at depth 0, closing any currently open
+    objects at this and deeper depths.
+    """
+
+    def __init__(self, file):
+
+        self.file = file
+        self.file.write('{')
+
+        # Numbers of items written to each currently open object.
+        self.count_list = [0]
+
+    def key(self, key):
+
+        if self.count_list[-1] > 0:
+            self.file.write(', ')
+
+        self.count_list[-1] += 1
+
+        self.file.write(json.dumps(key))
+        self.file.write(': ')
+
+    def item(self, key, value):
+
+        self.key(key)
+        self.file.write(json.dumps(value))
+
+    def open(self, depth, key):
+
+        self.close(depth)
+
+        self.key(key)
+        self.file.write('{')
+
+        self.count_list.append(0)
+
+    def close(self, depth = 0):
+
+        while len(self.count_list) > depth:
+
+            self.file.write('}')
+            self.count_list.pop()
+
+
 @celery.task
 def async_get_json_tree(
         task_key,
@@ -42,7 +97,6 @@ def async_get_json_tree(
         limit=10,
         debug_flag=False):
 
-    result_dict = {}
     language_list = []
     cur_language_id = None
     cur_dictionary_id = None
@@ -73,150 +127,167 @@ def async_get_json_tree(
     def id2str(id):
         return f'{id[0],id[1]}'
 
-    # Getting perspective_id and etymology fields ids and names in cycle
-    i = -1
-    j = 0
-    for i, current_perspective in enumerate(fields_getter(field_query)):
+    # JSON tree is written to the result file as we go, temporary files are removed however the task ends.
+    with tempfile.TemporaryDirectory() as tmp_dir_path:
 
-        if task_status:
-            task_status.set(
-                2, 10 + i * 85 // perspective_count,
-                f'Perspectives: {i-j}/{i}/{perspective_count} (result/processed/total) so far...')
+        tmp_json_file_path = (
+            os.path.join(tmp_dir_path, 'cognates_summary.json'))
+
+        with open(tmp_json_file_path, 'w') as json_file:
+
+            json_writer = Json_Tree_Writer(json_file)
 
-        if current_perspective is None:
-            j += 1
-            continue
+            # Linked groups of already processed lexical entries, groups often span several perspectives.
+            group_dict = {}
 
-        (
-            perspective_id,
-            (xcript_fid, xcript_fname),
-            (xlat_fid, xlat_fname)
+            # Getting perspective_id and etymology fields ids and names in cycle
+            i = -1
+            j = 0
+            for i, current_perspective in enumerate(fields_getter(field_query)):
 
-        ) = current_perspective
+                if task_status:
+                    task_status.set(
+                        2, 10 + i * 85 // perspective_count,
+                        f'Perspectives: {i-j}/{i}/{perspective_count} (result/processed/total) so far...')
 
-        # Init dictionary_id and language_id
-        dictionary_id = cur_dictionary_id
-        language_id = cur_language_id
+                if current_perspective is None:
+                    j += 1
+                    continue
 
-        # Getting next perspective_title and dictionary_id
-        if perspective_id != cur_perspective_id:
-            if next_perspective := perspective_getter(perspective_cte, perspective_id):
                 (
-                    perspective_title,
-                    dictionary_cid,
-                    dictionary_oid
+                    perspective_id,
+                    (xcript_fid, xcript_fname),
+                    (xlat_fid, xlat_fname)
 
-                ) = next_perspective
+                ) = current_perspective
 
-            else:
-                continue
+                # Init dictionary_id and language_id
+                dictionary_id = cur_dictionary_id
+                language_id = cur_language_id
 
-            dictionary_id = (dictionary_cid, dictionary_oid)
+                # Getting next perspective_title and dictionary_id
+                if perspective_id != cur_perspective_id:
+                    if next_perspective := perspective_getter(perspective_cte, perspective_id):
+                        (
+                            perspective_title,
+                            dictionary_cid,
+                            dictionary_oid
 
-        # Getting next dictionary_title and language_id
-        if dictionary_id != cur_dictionary_id:
-            if next_dictionary := dictionary_getter(dictionary_cte, dictionary_id):
-                (
-                    dictionary_title,
-                    language_cid,
-                    language_oid
+                        ) = next_perspective
 
-                ) = next_dictionary
+                    else:
+                        continue
 
-            else:
-                continue
+                    dictionary_id = (dictionary_cid, dictionary_oid)
 
-            language_id = (language_cid, language_oid)
+                # Getting next dictionary_title and language_id
+                if dictionary_id != cur_dictionary_id:
+                    if next_dictionary := dictionary_getter(dictionary_cte, dictionary_id):
+                        (
+                            dictionary_title,
+                            language_cid,
+                            language_oid
 
-        # Getting next language_title
-        if language_id != cur_language_id:
-            if next_language := language_getter(language_cte, language_id):
-                (
-                    language_title,
+                        ) = next_dictionary
 
-                ) = next_language
+                    else:
+                        continue
 
-            else:
-                continue
+                    language_id = (language_cid, language_oid)
 
-            lang_slot = result_dict[id2str(language_id)] = {}
-            lang_slot['__language__'] = language_title
+                # Getting next language_title
+                if language_id != cur_language_id:
+                    if next_language := language_getter(language_cte, language_id):
+                        (
+                            language_title,
 
-            # Logging processed languages
-            language_list.append(language_title)
+                        ) = next_language
 
-            cur_language_id = language_id
+                    else:
+                        continue
 
-            if debug_flag:
-                print(f"*** Language: {language_id} | {language_title}")
+                    json_writer.open(1, id2str(language_id))
+                    json_writer.item('__language__', language_title)
 
-        # Once again check conditions for dictionary and perspective
-        # and put the data into result_dict
+                    # Logging processed languages
+                    language_list.append(language_title)
 
-        if dictionary_id != cur_dictionary_id:
+                    cur_language_id = language_id
 
-            dict_slot = lang_slot[id2str(dictionary_id)] = {}
-            dict_slot['__dictionary__'] = dictionary_title
+                    if debug_flag:
+                        print(f"*** Language: {language_id} | {language_title}")
 
-            cur_dictionary_id = dictionary_id
+                # Once again check conditions for dictionary and perspective
+                # and write the data to the JSON file
 
-            if debug_flag:
-                print(f"** Dictionary: {dictionary_id} | {dictionary_title}")
+                if dictionary_id != cur_dictionary_id:
 
-        if perspective_id != cur_perspective_id:
+                    json_writer.open(2, id2str(dictionary_id))
+                    json_writer.item('__dictionary__', dictionary_title)
 
-            pers_slot = dict_slot[id2str(perspective_id)] = {}
-            pers_slot['__perspective__'] = perspective_title
-            pers_slot['__fields__'] = [
-                (xcript_fid, xcript_fname), (xlat_fid, xlat_fname)
-            ]
-            pers_slot['__entities__'] = {}
+                    cur_dictionary_id = dictionary_id
 
-            cur_perspective_id = perspective_id
+                    if debug_flag:
+                        print(f"** Dictionary: {dictionary_id} | {dictionary_title}")
 
-            if debug_flag:
-                print(f"* Perspective: {perspective_id} | {perspective_title}\n")
+                if perspective_id != cur_perspective_id:
 
-        for (
-            lex_id,
-            xcript_text,
-            xlat_text,
-            linked_group
+                    json_writer.open(3, id2str(perspective_id))
+                    json_writer.item('__perspective__', perspective_title)
+                    json_writer.item('__fields__', [
+                        (xcript_fid, xcript_fname), (xlat_fid, xlat_fname)
+                    ])
+                    json_writer.open(4, '__entities__')
 
-        ) in entities_getter(perspective_id, xcript_fid, xlat_fid):
+                    cur_perspective_id = perspective_id
 
-            pers_slot['__entities__'][id2str(lex_id)] = (
-                xcript_text, xlat_text, linked_group
-            )
+                    if debug_flag:
+                        print(f"* Perspective: {perspective_id} | {perspective_title}\n")
 
-            if debug_flag:
-                print(f"{xcript_fname}: {xcript_text}")
-                print(f"{xlat_fname}: {xlat_text}")
-                print(f"Cognate_groups: {str(linked_group)}\n")
+                for (
+                    lex_id,
+                    xcript_text,
+                    xlat_text,
+                    linked_group
 
-    result = (i + 1) - j
+                ) in entities_getter(perspective_id, xcript_fid, xlat_fid, group_dict):
 
-    if task_status:
-        task_status.set(3, 95, 'Writing result file...')
+                    json_writer.item(id2str(lex_id), (
+                        xcript_text, xlat_text, linked_group
+                    ))
 
-    file_name = (
-        f'cognates'
-        f'{"_" + group if group else ""}'
-        f'{"_" + title if title else ""}'
-        f'_got{result}from'
-        f'_{offset + 1}to{offset + limit}'
-        f'{"_onlyInToc" if only_in_toc else ""}.json')
+                    if debug_flag:
+                        print(f"{xcript_fname}: {xcript_text}")
+                        print(f"{xlat_fname}: {xlat_text}")
+                        print(f"Cognate_groups: {str(linked_group)}\n")
 
-    try:
-        url_list = write_json_file(
-            json.dumps(result_dict),
-            '\n'.join(str(title) for title in language_list),
-            file_name, storage, debug_flag)
+            json_writer.close()
+
+        group_dict = None
+
+        result = (i + 1) - j
 
-    except Exception as e:
         if task_status:
-            task_status.set(3, 100, "Finished (ERROR):\n" + "Result file can't be stored\n" + str(e))
-        return False
+            task_status.set(3, 95, 'Writing result file...')
+
+        file_name = (
+            f'cognates'
+            f'{"_" + group if group else ""}'
+            f'{"_" + title if title else ""}'
+            f'_got{result}from'
+            f'_{offset + 1}to{offset + limit}'
+            f'{"_onlyInToc" if only_in_toc else ""}.json')
+
+        try:
+            url_list = write_json_file(
+                tmp_json_file_path,
+                '\n'.join(str(title) for title in language_list),
+                file_name, storage, debug_flag)
+
+        except Exception as e:
+            if task_status:
+                task_status.set(3, 100, "Finished (ERROR):\n" + "Result file can't be stored\n" + str(e))
+            return False
 
     if task_status:
         task_status.set(
@@ -557,10 +628,13 @@ def fields_getter(field_query):
             yield None
 
 
-def entities_getter(perspective_id, xcript_fid, xlat_fid):
+def entities_getter(perspective_id, xcript_fid, xlat_fid, group_dict):
+    """
+    Gets transcriptions, translations and linked groups of perspective's lexical entries.
 
-    xcript_text = None
-    xlat_text = None
+    Linked groups are found for batches of entries at once, see linked_group_list(), and are stored in the
+    group dictionary, so that they are found only once for all entries of each group.
+    """
 
     entities = (
         DBSession
@@ -581,49 +655,77 @@ def entities_getter(perspective_id, xcript_fid, xlat_fid):
                 PublishingEntity.published == True,
                 PublishingEntity.accepted == True)
 
+            .order_by(
+                LexicalEntry.client_id,
+                LexicalEntry.object_id,
+                Entity.field_client_id,
+                Entity.field_object_id,
+                Entity.client_id,
+                Entity.object_id)
+
             .yield_per(100))
 
     entities_by_lex = itertools.groupby(entities, key=lambda x: (x[0], x[1]))
 
-    for lex_id, entities_group in entities_by_lex:
+    def process(entry_list):
 
-        linked_group = (
-            DBSession
-                .execute(
-                    f'select * from linked_group(66, 25, {lex_id[0]}, {lex_id[1]})')
-                .fetchall())
+        # Finding linked groups of entries not already found as parts of previous groups.
+
+        entry_id_list = [
+            lex_id for lex_id, _, _ in entry_list
+            if lex_id not in group_dict]
 
-        # Preparing of linked_group for json-serialization
-        linked_group = list(map(lambda x: tuple(x), linked_group))
+        for linked_group in linked_group_list((66, 25), entry_id_list):
 
-        entities_by_field = itertools.groupby(entities_group, key = lambda x: (x[2], x[3]))
+            # Preparing of linked_group for json-serialization
+            linked_group = sorted(linked_group)
+
+            for entry_id in linked_group:
+                group_dict[entry_id] = linked_group
+
+        for lex_id, xcript_text, xlat_text in entry_list:
+
+            # Return current found lexical entry with perspective_id
+
+            yield (
+                lex_id,
+                xcript_text,
+                xlat_text,
+                group_dict[lex_id])
+
+    entry_list = []
+
+    for lex_id, entities_group in entities_by_lex:
+
+        xcript_text = None
+        xlat_text = None
+
+        entities_by_field = itertools.groupby(entities_group, key = lambda x: x[2])
 
         for field_id, group in entities_by_field:
 
-            field_text = [x[4] for x in group]
+            field_text = [x[3] for x in group]
 
             if field_id == xcript_fid:
                 xcript_text = field_text
             elif field_id == xlat_fid:
                 xlat_text = field_text
 
-        # Return current found lexical entry with perspective_id
+        entry_list.append(
+            (lex_id, xcript_text, xlat_text))
 
-        yield (
-            lex_id,
-            xcript_text,
-            xlat_text,
-            linked_group)
+        if len(entry_list) >= entry_batch_size:
 
+            yield from process(entry_list)
+            entry_list = []
 
-def write_json_file(result_json, result_langs, file_name, storage, debug_flag):
+    if entry_list:
+        yield from process(entry_list)
 
-    with tempfile.TemporaryDirectory() as tmp_dir_path:
-        tmp_json_file_path = (
-            os.path.join(tmp_dir_path, 'cognates_summary.json'))
 
-        with open(tmp_json_file_path, 'w') as tmp_json_file:
-            tmp_json_file.write(result_json)
+def write_json_file(tmp_json_file_path, result_langs, file_name, storage, debug_flag):
+
+    with tempfile.TemporaryDirectory() as tmp_dir_path:
 
         tmp_txt_file_path = (
             os.path.join(tmp_dir_path, 'processed_languages.txt'))
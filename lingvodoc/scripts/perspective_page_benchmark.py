@@ -0,0 +1,153 @@
+"""
+Compares latency of getting the first and a deep page of perspective entries, as done by perspective_page,
+with offset pagination and with cursor pagination, see graphene_track_multiple().
+
+Usage:
+
+  python -m lingvodoc.scripts.perspective_page_benchmark <config_file_path> <perspective_client_id>
+    <perspective_object_id> [<page_number> [<page_size> [<sort_field_client_id> <sort_field_object_id>]]]
+"""
+
+# Standard library imports.
+
+import logging
+import sys
+import time
+
+# External imports.
+
+import pyramid.paster as paster
+
+import transaction
+
+# Project imports.
+
+from lingvodoc.models import (
+    DBSession,
+    LexicalEntry,
+)
+
+from lingvodoc.schema.gql_dictionaryperspective import graphene_track_multiple
+
+
+# Setting up logging, if we are not being run as a script.
+
+if __name__ != '__main__':
+    log = logging.getLogger(__name__)
+
+
+def get_page(perspective_id, page_size, offset = None, after = None, sort_by_field = None):
+    """
+    Gets a page of perspective entries with entities, as perspective_page in the 'all' mode does, returns
+    time in seconds, number of rows and the next page cursor.
+    """
+
+    start_time = time.time()
+
+    lexes = (
+
+        DBSession
+
+            .query(
+                LexicalEntry.client_id,
+                LexicalEntry.object_id)
+
+            .filter(
+                LexicalEntry.parent_client_id == perspective_id[0],
+                LexicalEntry.parent_object_id == perspective_id[1],
+                LexicalEntry.marked_for_deletion == False))
+
+    new_entities, old_entities, total_count, end_cursor = (
+
+        graphene_track_multiple(
+            lexes,
+            accept = True,
+            delete = False,
+            have_empty = True,
+            sort_by_field = sort_by_field,
+            offset = offset,
+            limit = page_size,
+            after = after,
+            check_perspective = False))
+
+    row_count = len(list(old_entities))
+
+    return time.time() - start_time, row_count, end_cursor
+
+
+# If we are being run as a script.
+
+if __name__ == '__main__':
+
+    if len(sys.argv) < 4:
+
+        sys.exit(
+            'Please specify config file and perspective id:\n'
+            '  python -m lingvodoc.scripts.perspective_page_benchmark <config_file_path> '
+            '<perspective_client_id> <perspective_object_id> '
+            '[<page_number> [<page_size> [<sort_field_client_id> <sort_field_object_id>]]]')
+
+    config_path = sys.argv[1]
+
+    pyramid_env = paster.bootstrap(config_path)
+    paster.setup_logging(config_path)
+
+    log = logging.getLogger(__name__)
+
+    perspective_id = (int(sys.argv[2]), int(sys.argv[3]))
+
+    page_number = int(sys.argv[4]) if len(sys.argv) > 4 else 1000
+    page_size = int(sys.argv[5]) if len(sys.argv) > 5 else 20
+
+    sort_by_field = (
+        (int(sys.argv[6]), int(sys.argv[7])) if len(sys.argv) > 7 else None)
+
+    try:
+
+        first_time, first_count, _ = (
+            get_page(perspective_id, page_size, sort_by_field = sort_by_field))
+
+        # Previous page via offset, to get the cursor of the deep page.
+
+        _, _, cursor = (
+
+            get_page(
+                perspective_id,
+                page_size,
+                offset = (page_number - 2) * page_size,
+                sort_by_field = sort_by_field))
+
+        if cursor is None:
+            sys.exit(f'Perspective has less than {page_number - 1} pages.')
+
+        offset_time, offset_count, _ = (
+
+            get_page(
+                perspective_id,
+                page_size,
+                offset = (page_number - 1) * page_size,
+                sort_by_field = sort_by_field))
+
+        cursor_time, cursor_count, _ = (
+
+            get_page(
+                perspective_id,
+                page_size,
+                after = cursor,
+                sort_by_field = sort_by_field))
+
+        assert offset_count == cursor_count
+
+        log.info(
+            '\npage 1: {0:.3f}s'
+            '\npage {1} via offset: {2:.3f}s'
+            '\npage {1} via cursor: {3:.3f}s'.format(
+                first_time,
+                page_number,
+                offset_time,
+                cursor_time))
+
+    finally:
+
+        transaction.abort()
+        pyramid_env['closer']()
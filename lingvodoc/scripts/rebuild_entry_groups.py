@@ -0,0 +1,109 @@
+"""
+Checks and rebuilds groups of lexical entries linked through grouping tag fields, e.g. etymology groups,
+see update_entry_groups() of lingvodoc.utils.search.
+
+Groups are only checked with the 'check' command, and are rebuilt from scratch with the 'rebuild' command,
+e.g. after tag entities were created bypassing ORM and entry group updates, or to split groups containing
+several actually disconnected groups after tags were deleted.
+
+Usage:
+
+  python -m lingvodoc.scripts.rebuild_entry_groups <config_file_path> [check|rebuild]
+    [<field_client_id> <field_object_id>]
+"""
+
+# Standard library imports.
+
+import logging
+import sys
+import time
+
+# External imports.
+
+import pyramid.paster as paster
+
+import transaction
+
+from zope.sqlalchemy import mark_changed
+
+# Project imports.
+
+from lingvodoc.models import DBSession
+
+from lingvodoc.utils.search import (
+    check_entry_groups,
+    rebuild_entry_groups)
+
+
+# Setting up logging, if we are not being run as a script.
+
+if __name__ != '__main__':
+    log = logging.getLogger(__name__)
+
+
+# If we are being run as a script.
+
+if __name__ == '__main__':
+
+    if len(sys.argv) < 2:
+
+        sys.exit(
+            'Please specify config file:\n'
+            '  python -m lingvodoc.scripts.rebuild_entry_groups <config_file_path> [check|rebuild] '
+            '[<field_client_id> <field_object_id>]')
+
+    config_path = sys.argv[1]
+
+    pyramid_env = paster.bootstrap(config_path)
+    paster.setup_logging(config_path)
+
+    log = logging.getLogger(__name__)
+
+    command = sys.argv[2] if len(sys.argv) > 2 else 'check'
+
+    field_id_list = (
+        [(int(sys.argv[3]), int(sys.argv[4]))] if len(sys.argv) > 4 else None)
+
+    start_time = time.time()
+
+    try:
+
+        if command == 'check':
+
+            error_count_dict = (
+                check_entry_groups(field_id_list))
+
+            for field_id, error_count in error_count_dict.items():
+
+                log.info(
+                    f'\nfield {field_id}: {error_count} connected groups not in a single entry group')
+
+            transaction.abort()
+
+        elif command == 'rebuild':
+
+            group_count_dict = (
+                rebuild_entry_groups(field_id_list))
+
+            for field_id, group_count in group_count_dict.items():
+
+                log.info(
+                    f'\nfield {field_id}: {group_count} entry groups')
+
+            mark_changed(DBSession())
+            transaction.commit()
+
+        else:
+
+            transaction.abort()
+
+            sys.exit(
+                f'Unknown command \'{command}\'.')
+
+    finally:
+
+        pyramid_env['closer']()
+
+    log.info(
+        '\nelapsed time: {:.3f}s'.format(
+            time.time() - start_time))
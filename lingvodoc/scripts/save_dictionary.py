@@ -20,6 +20,7 @@ import zipfile
 
 import collections
 from collections import defaultdict
+import concurrent.futures
 
 from pathvalidate import sanitize_filename
 
@@ -54,7 +55,7 @@ from lingvodoc.models import (
 )
 
 from lingvodoc.cache.caching import TaskStatus, initialize_cache
-from lingvodoc.utils import explain_analyze, sanitize_worksheet_name
+from lingvodoc.utils import explain_analyze, ids_to_id_query, sanitize_worksheet_name
 from lingvodoc.utils.search import recursive_sort, translation_gist_id_search
 from lingvodoc.utils.static_fields import fields_static
 from lingvodoc.views.v2.utils import as_storage_file, storage_file
@@ -89,6 +90,18 @@ import uuid
 
 log = logging.getLogger(__name__)
 
+# Number of threads downloading media files for the zip archive.
+media_worker_count = 8
+
+# Number of upcoming lexical entries media files are downloaded for in advance.
+media_entry_window = 64
+
+# Size of chunks media files are read, hashed and written in.
+media_chunk_size = 1 << 20
+
+# Minimal interval in seconds between task status updates with media export throughput.
+media_status_interval = 5
+
 EAF_TIERS = {
     "literary translation": "Translation of Paradigmatic forms",
     "text": "Transcription of Paradigmatic forms",
@@ -708,6 +721,145 @@ def generate_massive_cell_plpgsql(
         row[0] for row in row_list)
 
 
+Media_File = (
+
+    collections.namedtuple(
+        'Media_File',
+        ['path', 'hash', 'size', 'header']))
+
+
+class Media_Prefetcher(object):
+    """
+    Downloads media files of upcoming lexical entries concurrently with a bounded thread pool.
+
+    Lexical entries with their media file URLs are given in the order they are to be saved, and media files
+    are downloaded for a window of entries ahead of the current one. Files of entries left behind are
+    discarded, files not known in advance are downloaded when required.
+    """
+
+    def __init__(
+        self,
+        fetch_f,
+        discard_f,
+        worker_count = media_worker_count,
+        entry_window = media_entry_window):
+
+        self.fetch_f = fetch_f
+        self.discard_f = discard_f
+        self.entry_window = entry_window
+
+        self.executor = (
+            concurrent.futures.ThreadPoolExecutor(worker_count))
+
+        # Entries not yet submitted, and submitted entries with futures of their files.
+
+        self.entry_deque = collections.deque()
+
+        self.future_deque = collections.deque()
+        self.future_dict = {}
+
+        self.current_entry_id = None
+
+    def discard(self, future_list):
+
+        for future in future_list:
+
+            if not future.cancel():
+                future.add_done_callback(self.discard_future)
+
+    def discard_future(self, future):
+
+        if future.exception() is None:
+            self.discard_f(future.result())
+
+    def set_entries(self, entry_url_list):
+        """
+        Sets lexical entries to be saved, as a list of entry ids with lists of media file URLs.
+        """
+
+        self.clear()
+
+        self.entry_deque.extend(
+            (entry_id, url_list)
+            for entry_id, url_list in entry_url_list
+            if url_list)
+
+    def advance(self, entry_id):
+        """
+        Called when a lexical entry is saved, discards files of previous entries.
+        """
+
+        self.current_entry_id = entry_id
+
+        if entry_id in self.future_dict:
+
+            while self.future_deque[0] != entry_id:
+
+                self.discard(
+                    itertools.chain.from_iterable(
+                        self.future_dict.pop(
+                            self.future_deque.popleft()).values()))
+
+        elif any(
+            entry_id == next_entry_id
+            for next_entry_id, _ in self.entry_deque):
+
+            self.clear(keep_entries = True)
+
+            while self.entry_deque[0][0] != entry_id:
+                self.entry_deque.popleft()
+
+        # Downloading files of the next entries.
+
+        while (
+            self.entry_deque and
+            len(self.future_deque) < self.entry_window):
+
+            next_entry_id, url_list = self.entry_deque.popleft()
+
+            url_future_dict = collections.defaultdict(list)
+
+            for url in url_list:
+
+                url_future_dict[url].append(
+                    self.executor.submit(self.fetch_f, url))
+
+            self.future_deque.append(next_entry_id)
+            self.future_dict[next_entry_id] = url_future_dict
+
+    def get(self, url):
+        """
+        Gets a file of the current lexical entry, if it is being downloaded, or None.
+        """
+
+        url_future_dict = (
+            self.future_dict.get(self.current_entry_id))
+
+        if not url_future_dict or not url_future_dict.get(url):
+            return None
+
+        return url_future_dict[url].pop(0).result()
+
+    def clear(self, keep_entries = False):
+
+        for url_future_dict in self.future_dict.values():
+
+            self.discard(
+                itertools.chain.from_iterable(
+                    url_future_dict.values()))
+
+        self.future_deque.clear()
+        self.future_dict.clear()
+
+        if not keep_entries:
+            self.entry_deque.clear()
+
+    def close(self):
+
+        self.clear()
+        self.executor.shutdown(wait = True)
+
+
 class Save_Context(object):
     """
     Holds data of the saving of dictionary/dictionaries into an XLSX workbook.
@@ -734,6 +886,9 @@ class Save_Context(object):
         self.sound_flag = sound_flag
         self.markup_flag = markup_flag
 
+        self.media_prefetcher = None
+        self.task_status = None
+
         self.stream = io.BytesIO()
         self.workbook = xlsxDocument(self.stream, {'in_memory': True}) if f_type == 'xlsx' else None
         self.document = docxDocument() if f_type == 'docx' else None
@@ -1285,6 +1440,14 @@ class Save_Context(object):
             self.storage_f = (
                 as_storage_file if __debug_flag__ else storage_file)
 
+            # Media export throughput statistics.
+
+            self.media_count = 0
+            self.media_size = 0
+
+            self.media_start_time = time.time()
+            self.media_status_time = self.media_start_time
+
         self.ordering_type_id = (
             translation_gist_id_search('Ordering', self.session))
 
@@ -2362,6 +2525,11 @@ class Save_Context(object):
 
         rows_to_write = [[] for _ in self.fields]
 
+        if self.media_prefetcher:
+
+            self.media_prefetcher.advance(
+                (entry.client_id, entry.object_id))
+
         entities = (
             self.session.query(Entity).filter(
                 Entity.parent_id == (entry.client_id, entry.object_id),
@@ -2678,6 +2846,179 @@ class Save_Context(object):
 
         return zipfile.ZipInfo(zip_name, zip_date)
 
+    def fetch_media(
+        self,
+        url):
+        """
+        Downloads media file into a temporary file, hashing it in chunks on the way, returns Media_File.
+        """
+
+        hash = hashlib.sha256()
+        header = b''
+        size = 0
+
+        media_file = (
+            tempfile.NamedTemporaryFile(delete = False))
+
+        try:
+
+            with media_file, self.storage_f(
+                self.storage, url) as media_stream:
+
+                while True:
+
+                    chunk = media_stream.read(media_chunk_size)
+
+                    if not chunk:
+                        break
+
+                    hash.update(chunk)
+
+                    if len(header) < 512:
+                        header += chunk[:512 - len(header)]
+
+                    media_file.write(chunk)
+                    size += len(chunk)
+
+        except:
+
+            os.remove(media_file.name)
+            raise
+
+        return Media_File(media_file.name, hash.digest(), size, header)
+
+    @staticmethod
+    def discard_media(media):
+
+        try:
+            os.remove(media.path)
+
+        except FileNotFoundError:
+            pass
+
+    def prefetch_media(
+        self,
+        lex_list,
+        published = None,
+        accepted = True):
+        """
+        Starts downloading sound / markup files of lexical entries of the current perspective, given in
+        the order they are to be saved.
+        """
+
+        field_id_set = set()
+
+        if self.sound_flag:
+            field_id_set.update(self.sound_field_id_set)
+
+        if self.markup_flag:
+            field_id_set.update(self.markup_field_id_set)
+
+        if self.media_prefetcher is None:
+
+            self.media_prefetcher = (
+                Media_Prefetcher(self.fetch_media, self.discard_media))
+
+        if not field_id_set or not lex_list:
+
+            self.media_prefetcher.set_entries([])
+            return
+
+        entity_query = (
+
+            self.session
+
+                .query(
+                    Entity.parent_client_id,
+                    Entity.parent_object_id,
+                    Entity.content)
+
+                .filter(
+                    tuple_(
+                        Entity.parent_client_id,
+                        Entity.parent_object_id)
+
+                        .in_(
+                            ids_to_id_query(
+                                [(lex.client_id, lex.object_id) for lex in lex_list])),
+
+                    Entity.field_id.in_(field_id_set),
+                    Entity.marked_for_deletion == False,
+                    Entity.content != None)
+
+                .join(PublishingEntity))
+
+        if published is not None:
+            entity_query = entity_query.filter(PublishingEntity.published == published)
+
+        if accepted is not None:
+            entity_query = entity_query.filter(PublishingEntity.accepted == accepted)
+
+        url_dict = collections.defaultdict(list)
+
+        for entry_client_id, entry_object_id, url in entity_query:
+            url_dict[(entry_client_id, entry_object_id)].append(url)
+
+        self.media_prefetcher.set_entries([
+            ((lex.client_id, lex.object_id), url_dict.get((lex.client_id, lex.object_id)))
+            for lex in lex_list])
+
+    def close_media(self):
+
+        if self.media_prefetcher:
+
+            self.media_prefetcher.close()
+            self.media_prefetcher = None
+
+    def get_media(
+        self,
+        url):
+        """
+        Gets media file, already downloaded or being downloaded in advance, or downloads it.
+        """
+
+        media = (
+            self.media_prefetcher.get(url) if self.media_prefetcher else None)
+
+        if media is None:
+            media = self.fetch_media(url)
+
+        return media
+
+    def write_media(
+        self,
+        zip_info,
+        media):
+        """
+        Writes media file into the zip archive in chunks, updates task status with media export
+        throughput from time to time.
+        """
+
+        zip_info.file_size = media.size
+
+        with open(media.path, 'rb') as media_file, self.zip_file.open(
+            zip_info, 'w') as zip_stream:
+
+            copyfileobj(media_file, zip_stream, media_chunk_size)
+
+        self.media_count += 1
+        self.media_size += media.size
+
+        current_time = time.time()
+
+        if (self.task_status and
+            current_time - self.media_status_time >= media_status_interval):
+
+            self.media_status_time = current_time
+
+            size_mb = self.media_size / 1048576
+
+            self.task_status.set(3, 20,
+                'Saving sound / markup files: {} files, {:.1f} MB, {:.2f} MB/s'.format(
+                    self.media_count,
+                    size_mb,
+                    size_mb / max(current_time - self.media_start_time, 1e-3)))
+
     def get_sound_link(
         self,
         sound_url,
@@ -2686,40 +3027,44 @@ class Save_Context(object):
         Processes linked sound file, adding it to the archive if necessary.
         """
 
-        with self.storage_f(
-            self.storage, sound_url) as sound_stream:
+        media = self.get_media(sound_url)
 
-            sound_bytes = sound_stream.read()
+        try:
 
-        # Checking if we need to save the file, and if we need to rename it to avoid duplicate
-        # names.
+            # Checking if we need to save the file, and if we need to rename it to avoid duplicate
+            # names.
 
-        zip_info = (
-                
-            self.get_zip_info(
+            zip_info = (
 
-                path.basename(
-                    urllib.parse.urlparse(sound_url).path),
+                self.get_zip_info(
 
-                hashlib.sha256(
-                    sound_bytes).digest(),
+                    path.basename(
+                        urllib.parse.urlparse(sound_url).path),
 
-                datetime.datetime.utcfromtimestamp(
-                    created_at)))
+                    media.hash,
 
-        # Saving sound file to the archive, if required.
+                    datetime.datetime.utcfromtimestamp(
+                        created_at)))
 
-        if isinstance(zip_info, str):
-            return zip_info
+            # Saving sound file to the archive, if required.
 
-        if sndhdr.test_wav(
-            sound_bytes, io.BytesIO(sound_bytes)):
+            if isinstance(zip_info, str):
+                return zip_info
 
-            zip_info.compress_type = zipfile.ZIP_DEFLATED
+            with open(media.path, 'rb') as media_file:
+
+                if sndhdr.test_wav(
+                    media.header, media_file):
+
+                    zip_info.compress_type = zipfile.ZIP_DEFLATED
 
-        self.zip_file.writestr(zip_info, sound_bytes)
+            self.write_media(zip_info, media)
 
-        return zip_info.filename
+            return zip_info.filename
+
+        finally:
+
+            self.discard_media(media)
 
     def get_markup_link(
         self,
@@ -2729,37 +3074,39 @@ class Save_Context(object):
         Processes linked markup file, adding it to the archive if necessary.
         """
 
-        with self.storage_f(
-            self.storage, markup_url) as markup_stream:
+        media = self.get_media(markup_url)
 
-            markup_bytes = markup_stream.read()
+        try:
 
-        # Checking if we need to save the file, and if we need to rename it to avoid duplicate
-        # names.
+            # Checking if we need to save the file, and if we need to rename it to avoid duplicate
+            # names.
 
-        zip_info = (
-                
-            self.get_zip_info(
+            zip_info = (
+
+                self.get_zip_info(
 
-                path.basename(
-                    urllib.parse.urlparse(markup_url).path),
+                    path.basename(
+                        urllib.parse.urlparse(markup_url).path),
 
-                hashlib.sha256(
-                    markup_bytes).digest(),
+                    media.hash,
 
-                datetime.datetime.utcfromtimestamp(
-                    created_at)))
+                    datetime.datetime.utcfromtimestamp(
+                        created_at)))
 
-        # Saving markup file to the archive, if required.
+            # Saving markup file to the archive, if required.
 
-        if isinstance(zip_info, str):
-            return zip_info
+            if isinstance(zip_info, str):
+                return zip_info
 
-        zip_info.compress_type = zipfile.ZIP_DEFLATED
+            zip_info.compress_type = zipfile.ZIP_DEFLATED
+
+            self.write_media(zip_info, media)
+
+            return zip_info.filename
 
-        self.zip_file.writestr(zip_info, markup_bytes)
+        finally:
 
-        return zip_info.filename
+            self.discard_media(media)
 
 def write_xlsx(
     context,
@@ -2933,6 +3280,14 @@ def compile_document(
 
         lex_dict = lex_by_order if lex_by_order else lex_by_id
 
+        # Downloading sound / markup files of entries in advance, if required.
+
+        if context.sound_flag or context.markup_flag:
+
+            context.prefetch_media(
+                [lex for _, lex in sorted(lex_dict.items())],
+                published)
+
         if context.workbook:
             write_xlsx(context, lex_dict, published, __debug_flag__)
         elif context.document:
@@ -2944,6 +3299,8 @@ def compile_document(
             wrapper_file = codecs.getwriter('utf-8')(context.stream)
             context.richtext.write(wrapper_file)
 
+    context.close_media()
+
     if context.workbook:
         context.workbook.close()
 
@@ -2977,6 +3334,8 @@ def save_dictionary(
     if task_status:
         task_status.set(3, 20, 'Running async process')
 
+    save_context = None
+
     try:
 
         # Creating saving context, compiling dictionary data to a workbook.
@@ -2993,6 +3352,8 @@ def save_dictionary(
                 f_type,
                 __debug_flag__))
 
+        save_context.task_status = task_status
+
         if sound_flag or markup_flag:
 
             temporary_zip_file = (
@@ -3220,6 +3581,9 @@ def save_dictionary(
 
     except Exception as exception:
 
+        if save_context:
+            save_context.close_media()
+
         traceback_string = ''.join(traceback.format_exception(
             exception, exception, exception.__traceback__))[:-1]
 
@@ -0,0 +1,125 @@
+"""
+Measures time of lexical entry / entity tree construction of LexicalEntry.track_multiple(), see
+LexicalEntry.group_entities(), on synthetic perspectives of increasing size, to check that the time grows
+roughly linearly with the number of entries.
+
+Does not require DB or config file.
+
+Usage:
+
+  python -m lingvodoc.scripts.track_multiple_benchmark [<entry_count> ...]
+"""
+
+# Standard library imports.
+
+import datetime
+import logging
+import random
+import sys
+import time
+
+# Project imports.
+
+from lingvodoc.models import LexicalEntry
+
+
+# Setting up logging, if we are not being run as a script.
+
+if __name__ != '__main__':
+    log = logging.getLogger(__name__)
+
+
+def synthetic_perspective(entry_count, seed = 0):
+    """
+    Generates synthetic lexical entry info tuples and entity rows, sorted as in track_multiple() query
+    results, with each lexical entry having 0-4 entities, some of them with a child entity.
+    """
+
+    rng = random.Random(seed)
+
+    created_at = datetime.datetime(2020, 1, 1)
+
+    lexes = []
+    entries = []
+
+    for order in range(entry_count):
+
+        lex_id = (1, order + 1)
+
+        lexes.append((
+            created_at, lex_id[0], lex_id[1], 2, 3, False,
+            {'came_from': None, 'merged': [1, None]} if order % 7 == 0 else None,
+            None))
+
+        for numbering in range(1, rng.randint(0, 4) + 1):
+
+            for level in range(1, rng.randint(1, 2) + 1):
+
+                entries.append({
+                    'client_id': 4,
+                    'object_id': len(entries) + 1,
+                    'parent_client_id': lex_id[0],
+                    'parent_object_id': lex_id[1],
+                    'self_client_id': None if level == 1 else 4,
+                    'self_object_id': None if level == 1 else len(entries),
+                    'content': 'word {0}'.format(len(entries)),
+                    'locale_id': None if level == 1 else 2,
+                    'additional_metadata': None,
+                    'created_at': created_at,
+                    'marked_for_deletion': False,
+                    'published': True,
+                    'accepted': True,
+                    'traversal_lexical_order': order,
+                    'tree_level': level,
+                    'tree_numbering_scheme': numbering})
+
+    return lexes, entries
+
+
+def group_entities_time(entry_count):
+    """
+    Constructs lexical entry / entity trees of a synthetic perspective, returns number of entities and
+    time in seconds.
+    """
+
+    lexes, entries = synthetic_perspective(entry_count)
+
+    start_time = time.perf_counter()
+    LexicalEntry.group_entities(lexes, entries)
+
+    return len(entries), time.perf_counter() - start_time
+
+
+# If we are being run as a script.
+
+if __name__ == '__main__':
+
+    logging.basicConfig(level = logging.INFO, format = '%(message)s')
+    log = logging.getLogger(__name__)
+
+    entry_count_list = (
+        [int(arg) for arg in sys.argv[1:]] or [10000, 50000])
+
+    base_count, base_time = None, None
+
+    for entry_count in entry_count_list:
+
+        entity_count, entry_time = group_entities_time(entry_count)
+
+        # Quadratic implementation would give time ratio about the square of the entry count ratio.
+
+        ratio_str = (
+            '' if base_time is None else
+            ', {0:.1f}x time for {1:.1f}x entries'.format(
+                entry_time / base_time, entry_count / base_count))
+
+        log.info(
+            '{0} entries, {1} entities: {2:.3f}s, {3:.3f}ms per entry{4}'.format(
+                entry_count,
+                entity_count,
+                entry_time,
+                entry_time * 1000 / entry_count,
+                ratio_str))
+
+        if base_time is None:
+            base_count, base_time = entry_count, entry_time
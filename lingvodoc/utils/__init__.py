@@ -2,6 +2,9 @@
 __author__ = 'student'
 
 
+import base64
+import binascii
+import datetime
 import json
 import os
 import re
@@ -12,7 +15,7 @@ except:
     pass
 
 
-from sqlalchemy import cast
+from sqlalchemy import and_, cast, false, literal, or_
 from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.dialects import postgresql
 from sqlalchemy.sql import column
@@ -230,6 +233,96 @@ def ids_to_id_cte_query(ids):
     return DBSession.query(ids_to_id_cte(ids))
 
 
+def encode_cursor(key_name_list, value_list):
+    """
+    Encodes values of sort keys of the last item of a page as an opaque cursor for keyset pagination,
+    together with names of the keys, so that a cursor can't be used with a different ordering, see
+    decode_cursor() and keyset_condition().
+    """
+
+    return (
+
+        base64.urlsafe_b64encode(
+            json.dumps([
+                key_name_list,
+                [{'datetime': value.isoformat()} if isinstance(value, datetime.datetime) else value
+                    for value in value_list]])
+                .encode('utf-8'))
+
+            .decode('ascii'))
+
+
+def decode_cursor(cursor, key_name_list):
+    """
+    Decodes cursor encoded by encode_cursor() for the same sort key names, raises ValueError if the
+    cursor is invalid or is for a different ordering.
+    """
+
+    try:
+
+        cursor_name_list, value_list = (
+            json.loads(base64.urlsafe_b64decode(cursor.encode('ascii'))))
+
+        value_list = [
+            datetime.datetime.fromisoformat(value['datetime']) if isinstance(value, dict) else value
+            for value in value_list]
+
+    except (binascii.Error, UnicodeError, TypeError, KeyError, ValueError):
+        raise ValueError('Invalid cursor.')
+
+    if (cursor_name_list != list(key_name_list) or
+        len(value_list) != len(key_name_list)):
+
+        raise ValueError('Cursor is for a different ordering.')
+
+    return value_list
+
+
+def keyset_condition(key_list, value_list):
+    """
+    Condition selecting rows following the row with specified sort key values, for keyset pagination.
+
+    Sort keys are (expression, is_ascending, is_nulls_first) triples, and are compared lexicographically,
+    as ORDER BY expression ASC|DESC NULLS FIRST|LAST, ... would order them.
+    """
+
+    condition_list = []
+    equal_list = []
+
+    for (expression, is_ascending, is_nulls_first), value in zip(key_list, value_list):
+
+        if value is None:
+
+            after = (
+                expression != None if is_nulls_first else false())
+
+            equal = (
+                expression == None)
+
+        else:
+
+            # Booleans, e.g. entry non-emptiness, can be compared only as bound parameters.
+
+            if isinstance(value, bool):
+                value = literal(value)
+
+            after = (
+                expression > value if is_ascending else expression < value)
+
+            if not is_nulls_first:
+                after = or_(after, expression == None)
+
+            equal = (
+                expression == value)
+
+        condition_list.append(
+            and_(*equal_list, after))
+
+        equal_list.append(equal)
+
+    return or_(*condition_list)
+
+
 def render_statement(statement):
     """
     Renders SQLAlchemy query as a string with any parameters substituted, including proper handling of any JSONB
@@ -0,0 +1,322 @@
+"""
+Running Apertium pipelines for apertium_parser() of lingvodoc.utils.doc_parser.
+
+Texts are processed by long-lived 'apertium -z -d <package_path> <mode>' child processes, which run their
+pipelines in null-flush mode: a text terminated by a null character is written to the process' stdin, and
+the process writes the text's analysis terminated by a null character to its stdout, keeping its
+pipeline programs and loaded transducers in memory for the next text.
+
+Idle processes are kept in a pool by package path and mode. If a persistent process can't be started or
+fails, the text is processed by a one-time 'apertium' run via temporary files, as was done before. New
+processes are checked with an empty text and a short timeout, as some modes never output null flushes,
+and pipelines whose processes fail the check are then always processed with one-time runs.
+"""
+
+# Standard library imports.
+
+import atexit
+import collections
+import concurrent.futures
+import logging
+import os
+import select
+import shlex
+import subprocess
+import tempfile
+import threading
+import time
+
+
+# Setting up logging.
+log = logging.getLogger(__name__)
+
+
+#: Apertium executable.
+apertium_command = 'apertium'
+
+#: Maximum number of idle processes kept for each pipeline.
+worker_pool_size = 4
+
+#: Number of seconds to wait for the analysis of a single text.
+worker_timeout = 600
+
+#: Number of seconds to wait for the analysis of an empty text by a new process.
+worker_check_timeout = 10
+
+
+class Apertium_Worker(object):
+    """
+    Apertium pipeline child process in null-flush mode.
+    """
+
+    def __init__(self, package_path, mode):
+
+        self.package_path = package_path
+        self.mode = mode
+
+        self.process = (
+
+            subprocess.Popen(
+                [apertium_command, '-z', '-d', package_path, mode],
+                stdin = subprocess.PIPE,
+                stdout = subprocess.PIPE,
+                stderr = subprocess.DEVNULL))
+
+        # Checking that the process does null flushes.
+
+        try:
+            self.run('', worker_check_timeout)
+
+        except:
+
+            self.close()
+            raise
+
+    def run(self, text, timeout = None):
+        """
+        Processes a text, returns its analysis, by default waiting for it for worker_timeout seconds.
+
+        Input is written from a separate thread, so that the process is not blocked on a full stdout pipe
+        while we are writing a large text.
+        """
+
+        data = (
+            text.replace('\0', '').encode('utf-8') + b'\0')
+
+        error_list = []
+
+        def write():
+
+            try:
+
+                self.process.stdin.write(data)
+                self.process.stdin.flush()
+
+            except Exception as exception:
+                error_list.append(exception)
+
+        writer = threading.Thread(target = write, daemon = True)
+        writer.start()
+
+        fd = self.process.stdout.fileno()
+
+        chunk_list = []
+
+        deadline = (
+            time.monotonic() + (worker_timeout if timeout is None else timeout))
+
+        while True:
+
+            timeout = deadline - time.monotonic()
+
+            if timeout <= 0 or not select.select([fd], [], [], timeout)[0]:
+                raise RuntimeError(f'timeout processing text with \'{self.mode}\'')
+
+            chunk = os.read(fd, 65536)
+
+            if not chunk:
+
+                raise RuntimeError(
+                    f'\'{self.mode}\' process exited with code {self.process.poll()}'
+                    f'{"" if not error_list else ": " + str(error_list[0])}')
+
+            index = chunk.find(b'\0')
+
+            if index < 0:
+
+                chunk_list.append(chunk)
+                continue
+
+            if index < len(chunk) - 1:
+                raise RuntimeError(f'unexpected output after null flush from \'{self.mode}\'')
+
+            chunk_list.append(chunk[:index])
+            break
+
+        writer.join()
+
+        if error_list:
+            raise error_list[0]
+
+        return b''.join(chunk_list).decode('utf-8')
+
+    def close(self):
+
+        try:
+
+            self.process.kill()
+            self.process.wait()
+
+            self.process.stdin.close()
+            self.process.stdout.close()
+
+        except Exception as exception:
+            log.warning(f'Failed to close \'{self.mode}\' process: {exception}')
+
+
+class Apertium_Pool(object):
+    """
+    Pool of idle Apertium pipeline processes by package path and mode, with a set of package paths and
+    modes of pipelines whose new processes failed.
+    """
+
+    def __init__(self):
+
+        self.lock = threading.Lock()
+
+        self.pid = os.getpid()
+        self.worker_dict = collections.defaultdict(list)
+
+        self.failed_set = set()
+
+    def is_failed(self, package_path, mode):
+
+        return (package_path, mode) in self.failed_set
+
+    def run(self, package_path, mode, text):
+
+        key = (package_path, mode)
+
+        with self.lock:
+
+            # Processes of a parent process are not ours to use, e.g. after a fork of a Celery worker.
+
+            if self.pid != os.getpid():
+
+                self.pid = os.getpid()
+                self.worker_dict = collections.defaultdict(list)
+
+            worker_list = self.worker_dict[key]
+            worker = worker_list.pop() if worker_list else None
+
+        if worker is None:
+
+            try:
+                worker = Apertium_Worker(package_path, mode)
+
+            except:
+
+                with self.lock:
+                    self.failed_set.add(key)
+
+                raise
+
+        try:
+            result = worker.run(text)
+
+        except:
+
+            worker.close()
+            raise
+
+        with self.lock:
+
+            worker_list = self.worker_dict[key]
+
+            if len(worker_list) < worker_pool_size:
+
+                worker_list.append(worker)
+                worker = None
+
+        if worker is not None:
+            worker.close()
+
+        return result
+
+    def close(self):
+
+        with self.lock:
+
+            worker_dict = self.worker_dict
+            self.worker_dict = collections.defaultdict(list)
+
+            if self.pid != os.getpid():
+                return
+
+        for worker_list in worker_dict.values():
+            for worker in worker_list:
+                worker.close()
+
+
+apertium_pool = Apertium_Pool()
+
+atexit.register(apertium_pool.close)
+
+
+def run_once(package_path, mode, text):
+    """
+    Processes a text with a one-time Apertium run via temporary files.
+    """
+
+    input_file_id, input_filename = (
+        tempfile.mkstemp(text = True))
+
+    output_file_id, output_filename = (
+        tempfile.mkstemp())
+
+    os.close(input_file_id)
+    os.close(output_file_id)
+
+    try:
+
+        with open(input_filename, 'w', encoding = 'utf-8') as input_file:
+            input_file.write(text)
+
+        status = (
+
+            os.system(
+                f'cat {shlex.quote(input_filename)} | '
+                f'{apertium_command} -d {shlex.quote(package_path)} {shlex.quote(mode)} '
+                f'>> {shlex.quote(output_filename)}'))
+
+        if status != 0:
+            raise ValueError("An error occured during Apertium parser process running")
+
+        with open(output_filename, 'r', encoding = 'utf-8') as output_file:
+            return output_file.read()
+
+    finally:
+
+        os.remove(input_filename)
+        os.remove(output_filename)
+
+
+def run(package_path, mode, text):
+    """
+    Processes a text with a persistent Apertium process, falling back to a one-time run.
+    """
+
+    if not apertium_pool.is_failed(package_path, mode):
+
+        try:
+            return apertium_pool.run(package_path, mode, text)
+
+        except Exception as exception:
+
+            log.warning(
+                f'Persistent Apertium \'{mode}\' process failed, using one-time run: {exception}')
+
+    return run_once(package_path, mode, text)
+
+
+def run_modes(package_path, mode_list, text):
+    """
+    Processes a text with several pipelines of the same Apertium package concurrently, returns list of
+    results.
+    """
+
+    if len(mode_list) <= 1:
+
+        return [
+            run(package_path, mode, text)
+            for mode in mode_list]
+
+    with concurrent.futures.ThreadPoolExecutor(len(mode_list)) as executor:
+
+        future_list = [
+            executor.submit(run, package_path, mode, text)
+            for mode in mode_list]
+
+        return [
+            future.result()
+            for future in future_list]
@@ -0,0 +1,432 @@
+"""
+Content-addressed storage of uploaded files.
+
+File contents are stored once under '<storage path>/blobs/<h[0:2]>/<h[2:4]>/<h>', where <h> is the hex
+SHA-256 digest of the contents. Uploads are streamed in chunks into a temporary file in the same
+filesystem while being hashed, and then are atomically moved into their blob path, unless a blob with
+the same contents is already present.
+
+Object files, e.g. 'entity/graphql_files/<client_id>/<object_id>/<filename>', are hard links to their
+blobs, so that their URLs and serving of them as static files do not change, while identical files
+uploaded for several objects are stored once. Number of hard links of a blob is its reference count: a
+blob with a single link is not referenced by any object, and is removed when the last object file linked
+to it is released.
+
+Blob's digest is stored in its extended attribute, shared by all hard links to it, so that the blob of an
+object file is found without reading the file, with hashing of its contents as a fallback.
+
+If hard links are not supported, object files are written as copies of their blobs, as before.
+"""
+
+# Standard library imports.
+
+import errno
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+
+# Setting up logging.
+log = logging.getLogger(__name__)
+
+
+#: Name of the blob directory in the storage.
+blob_dir_name = 'blobs'
+
+#: Size of chunks files are read and hashed by.
+blob_chunk_size = 1 << 20
+
+#: Minimum age in seconds of temporary files and unreferenced blobs removed by garbage collection, so
+#: that files of uploads in progress are not removed.
+collect_min_age = 86400
+
+#: URL prefix of files from the storage of the production Lingvodoc server.
+ispras_url_prefix = 'http://lingvodoc.ispras.ru/objects/'
+
+#: Name of the extended attribute with the hex SHA-256 digest of a blob.
+hash_xattr_name = 'user.lingvodoc.sha256'
+
+
+def file_sha256(file_path):
+    """
+    Hex SHA-256 digest of a file's contents, read in chunks.
+    """
+
+    sha256 = hashlib.sha256()
+
+    with open(file_path, 'rb') as file:
+
+        for chunk in iter(lambda: file.read(blob_chunk_size), b''):
+            sha256.update(chunk)
+
+    return sha256.hexdigest()
+
+
+def set_file_hash(file_path, hash):
+    """
+    Stores hex SHA-256 digest of a file's contents in its extended attribute, if extended attributes are
+    supported.
+    """
+
+    try:
+        os.setxattr(file_path, hash_xattr_name, hash.encode('ascii'))
+
+    except (AttributeError, OSError) as exception:
+        log.debug(f'Failed to store hash of \'{file_path}\': {exception}')
+
+
+def file_hash(file_path):
+    """
+    Hex SHA-256 digest of a file's contents, stored by set_file_hash() or computed if there is none.
+    """
+
+    try:
+        return os.getxattr(file_path, hash_xattr_name).decode('ascii')
+
+    except (AttributeError, OSError):
+        return file_sha256(file_path)
+
+
+class Blob_Storage(object):
+    """
+    Content-addressed blob store in a storage directory, see module docstring.
+    """
+
+    def __init__(self, storage_config):
+
+        self.storage_config = storage_config
+
+        self.path = storage_config['path']
+
+        self.blob_path = os.path.join(self.path, blob_dir_name)
+        self.tmp_path = os.path.join(self.blob_path, 'tmp')
+
+    def hash_blob_path(self, hash):
+        """
+        Path of a blob by the hex SHA-256 digest of its contents.
+        """
+
+        return (
+            os.path.join(self.blob_path, hash[0:2], hash[2:4], hash))
+
+    def url_path(self, url):
+        """
+        Given a URL of a file from the storage, returns its path in the local storage, or None if the URL
+        is not a storage URL.
+        """
+
+        if url.startswith(ispras_url_prefix):
+
+            return os.path.join(
+                self.path,
+                url[len(ispras_url_prefix):])
+
+        local_url_prefix = (
+            self.storage_config['prefix'] +
+            self.storage_config['static_route'])
+
+        if url.startswith(local_url_prefix):
+
+            return os.path.join(
+                self.path,
+                url[len(local_url_prefix):])
+
+        return None
+
+    def put(self, content, hash_name_list = (), file_path = None):
+        """
+        Stores contents, given either as bytes or as a binary file object, as a blob, returns its hex
+        SHA-256 digest and a dictionary of hex digests by additional hash algorithm names computed in the
+        same pass, e.g. 'sha224'.
+
+        If file path is given, makes the file a reference of the blob, see link().
+        """
+
+        os.makedirs(self.tmp_path, exist_ok = True)
+
+        sha256 = hashlib.sha256()
+
+        hash_list = [
+            (hash_name, hashlib.new(hash_name))
+            for hash_name in hash_name_list]
+
+        tmp_file_id, tmp_file_path = (
+            tempfile.mkstemp(dir = self.tmp_path))
+
+        try:
+
+            with os.fdopen(tmp_file_id, 'wb') as tmp_file:
+
+                if isinstance(content, (bytes, bytearray, memoryview)):
+                    chunk_iter = [content]
+
+                else:
+                    chunk_iter = iter(lambda: content.read(blob_chunk_size), b'')
+
+                for chunk in chunk_iter:
+
+                    sha256.update(chunk)
+
+                    for _, hash_object in hash_list:
+                        hash_object.update(chunk)
+
+                    tmp_file.write(chunk)
+
+                tmp_file.flush()
+                os.fsync(tmp_file.fileno())
+
+            hash = sha256.hexdigest()
+            blob_path = self.hash_blob_path(hash)
+
+            set_file_hash(tmp_file_path, hash)
+
+            os.makedirs(os.path.dirname(blob_path), exist_ok = True)
+
+            # Linking instead of renaming does not replace a blob another upload of the same contents
+            # could have created concurrently, which would split its references between two files.
+
+            try:
+                os.link(tmp_file_path, blob_path)
+
+            except FileExistsError:
+                pass
+
+            except OSError:
+
+                if not os.path.exists(blob_path):
+                    os.replace(tmp_file_path, blob_path)
+
+            # Linking while we still have the temporary file, in case the blob is concurrently removed
+            # as its last reference is released.
+
+            if file_path is not None:
+
+                try:
+                    self.link(hash, file_path)
+
+                except FileNotFoundError:
+
+                    if not os.path.exists(tmp_file_path):
+                        raise
+
+                    os.replace(tmp_file_path, blob_path)
+                    self.link(hash, file_path)
+
+        finally:
+
+            if os.path.exists(tmp_file_path):
+                os.remove(tmp_file_path)
+
+        return (
+            hash,
+            {hash_name: hash_object.hexdigest() for hash_name, hash_object in hash_list})
+
+    def link(self, hash, file_path):
+        """
+        Makes a file a reference of a blob, atomically replacing the file if it already exists.
+        """
+
+        blob_path = self.hash_blob_path(hash)
+
+        os.makedirs(os.path.dirname(file_path), exist_ok = True)
+
+        # Temporary link is unique for each process and thread linking the same file.
+
+        tmp_file_path = (
+            os.path.join(
+                os.path.dirname(file_path),
+                '.{}.{}.{}.tmp'.format(
+                    os.path.basename(file_path), os.getpid(), threading.get_ident())))
+
+        try:
+            os.link(blob_path, tmp_file_path)
+
+        except FileNotFoundError:
+            raise
+
+        except OSError as exception:
+
+            if exception.errno == errno.EEXIST:
+
+                os.remove(tmp_file_path)
+                os.link(blob_path, tmp_file_path)
+
+            else:
+
+                log.warning(
+                    f'Failed to link blob {hash} to \'{file_path}\', copying: {exception}')
+
+                shutil.copyfile(blob_path, tmp_file_path)
+
+        os.replace(tmp_file_path, file_path)
+
+        # Renaming does nothing if the file already is a link to the blob.
+
+        if os.path.lexists(tmp_file_path):
+            os.remove(tmp_file_path)
+
+    def store(self, content, file_path, hash_name_list = ()):
+        """
+        Stores contents, given either as bytes or as a binary file object, as a file referencing its blob,
+        returns hex SHA-256 digest of contents and dictionary of additional hex digests, see put().
+        """
+
+        # If we are replacing a file, the blob it referenced is removed if the file was its last
+        # reference.
+
+        old_blob_path = None
+
+        if (os.path.exists(file_path) and
+            os.stat(file_path).st_nlink == 2):
+
+            old_blob_path = self.file_blob_path(file_path)
+
+        hash, hash_dict = (
+            self.put(content, hash_name_list, file_path))
+
+        if old_blob_path is not None:
+            self.remove_unreferenced(old_blob_path)
+
+        return hash, hash_dict
+
+    def file_blob_path(self, file_path):
+        """
+        Returns path of a blob a file references, or None if the file does not reference a blob.
+        """
+
+        stat = os.stat(file_path)
+
+        if stat.st_nlink < 2:
+            return None
+
+        blob_path = self.hash_blob_path(file_hash(file_path))
+
+        try:
+            blob_stat = os.stat(blob_path)
+
+        except FileNotFoundError:
+            return None
+
+        if (blob_stat.st_dev, blob_stat.st_ino) != (stat.st_dev, stat.st_ino):
+            return None
+
+        return blob_path
+
+    def release(self, file_path):
+        """
+        Removes a file, and removes the blob it references if it was its last reference.
+
+        An object file created concurrently as a reference to a blob being removed still has the blob's
+        contents through its own hard link, and just is not deduplicated with future uploads.
+        """
+
+        blob_path = None
+
+        if os.stat(file_path).st_nlink == 2:
+            blob_path = self.file_blob_path(file_path)
+
+        os.remove(file_path)
+
+        if blob_path is not None:
+            self.remove_unreferenced(blob_path)
+
+    def remove_unreferenced(self, blob_path):
+        """
+        Removes a blob if it is not referenced by any file.
+        """
+
+        try:
+
+            if os.stat(blob_path).st_nlink == 1:
+                os.remove(blob_path)
+
+        except FileNotFoundError:
+            pass
+
+    def collect(self):
+        """
+        Removes blobs not referenced by any file and stale temporary files, returns number of removed
+        blobs and their total size.
+
+        Number of hard links is the only reference count, there is no index of references. So hard links
+        to object files or blobs from outside of the storage, e.g. made by backups, also count as
+        references, and blobs linked by them are kept until these links are removed. And if an external
+        tool replaces object files with hard links to other files, blobs of the replaced files become
+        unreferenced and are removed, while object files keep their contents via their new inodes.
+        """
+
+        count = 0
+        size = 0
+
+        # Files of uploads which could still be in progress are kept, blob's ctime is updated each time
+        # a link to it is created or removed.
+
+        min_time = time.time() - collect_min_age
+
+        if os.path.isdir(self.tmp_path):
+
+            for name in os.listdir(self.tmp_path):
+
+                tmp_file_path = os.path.join(self.tmp_path, name)
+
+                if os.stat(tmp_file_path).st_ctime < min_time:
+                    os.remove(tmp_file_path)
+
+        for dir_path, dir_name_list, file_name_list in os.walk(self.blob_path):
+
+            if dir_path == self.blob_path and 'tmp' in dir_name_list:
+                dir_name_list.remove('tmp')
+
+            for file_name in file_name_list:
+
+                blob_path = os.path.join(dir_path, file_name)
+                stat = os.stat(blob_path)
+
+                if stat.st_nlink == 1 and stat.st_ctime < min_time:
+
+                    os.remove(blob_path)
+
+                    count += 1
+                    size += stat.st_size
+
+        return count, size
+
+    def deduplicate(self, file_path):
+        """
+        Makes an existing storage file a reference to the blob of its contents, creating the blob from
+        the file if there is none, returns file size if the file's contents were already stored in a
+        blob, i.e. how much space was freed, and 0 otherwise.
+        """
+
+        stat = os.stat(file_path)
+
+        hash = file_sha256(file_path)
+        blob_path = self.hash_blob_path(hash)
+
+        os.makedirs(os.path.dirname(blob_path), exist_ok = True)
+
+        try:
+
+            os.link(file_path, blob_path)
+            set_file_hash(blob_path, hash)
+
+            return 0
+
+        except FileExistsError:
+            pass
+
+        blob_stat = os.stat(blob_path)
+
+        if (blob_stat.st_dev, blob_stat.st_ino) == (stat.st_dev, stat.st_ino):
+            return 0
+
+        set_file_hash(blob_path, hash)
+        self.link(hash, file_path)
+
+        # Space is freed only if there were no other links to the file.
+
+        return stat.st_size if stat.st_nlink == 1 else 0
@@ -58,7 +58,7 @@ from lingvodoc.scripts import elan_parser
 from lingvodoc.utils import ids_to_id_query
 from lingvodoc.utils.elan_functions import tgt_to_eaf
 
-from lingvodoc.utils.search import get_id_to_field_dict, field_search
+from lingvodoc.utils.search import get_field_id, get_id_to_field_dict
 
 from lingvodoc.views.v2.utils import storage_file
 from lingvodoc.utils.creation import (
@@ -318,15 +318,15 @@ def get_field_tracker(client_id, data_type="Text", DBSession=DBSession):
             return static_field_id
 
         # Search field in db
-        field = field_search(searchstring, data_type, DBSession=DBSession)
+        field_id = get_field_id(searchstring, data_type, DBSession=DBSession)
 
         # Create new field if not found
-        if not field:
-            field = create_field([{
+        if not field_id:
+            field_id = create_field([{
                 "locale_id": ENGLISH_LOCALE,
-                "content": searchstring}], client_id, data_type, DBSession=DBSession)
+                "content": searchstring}], client_id, data_type, DBSession=DBSession).id
 
-        return field.id
+        return field_id
     return f
 
 
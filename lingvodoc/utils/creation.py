@@ -3,6 +3,7 @@
 
 import base64
 import collections
+import datetime
 import hashlib
 import json
 import logging
@@ -24,12 +25,16 @@ from pathvalidate import sanitize_filename
 from sqlalchemy import (
     and_,
     create_engine,
+    null,
 )
 
+from sqlalchemy.orm import scoped_session
 from sqlalchemy.orm.attributes import flag_modified
 
 import transaction
 
+from zope.sqlalchemy import mark_changed
+
 # Project imports.
 
 import lingvodoc.cache.caching as caching
@@ -50,9 +55,11 @@ from lingvodoc.models import (
     LexicalEntry,
     Entity,
     Field,
+    ObjectTOC,
     PublishingEntity,
     Organization as dbOrganization, Parser, ParserResult,
     get_client_counter,
+    reserve_client_ids,
     ENGLISH_LOCALE)
 
 from lingvodoc.queue.celery import celery
@@ -60,8 +67,13 @@ from lingvodoc.queue.celery import celery
 from lingvodoc.schema.gql_holders import ResponseError
 
 import lingvodoc.utils.doc_parser as ParseMethods
+from lingvodoc.utils.blob_storage import Blob_Storage
 from lingvodoc.utils.elan_functions import eaf_wordlist
-from lingvodoc.utils.search import translation_gist_search
+from lingvodoc.utils.search import (
+    defer_entry_groups,
+    grouping_field_id_set,
+    translation_gist_id_search,
+    wip_gist_id)
 
 from lingvodoc.views.v2.utils import storage_file
 from pdb import set_trace as A
@@ -137,8 +149,7 @@ def create_perspective(id = (None, None),
     parent = DBSession.query(Dictionary).filter_by(client_id=parent_client_id, object_id=parent_object_id).first()
     if not parent:
         raise ResponseError(message="No such dictionary in the system")
-    resp = translation_gist_search("WiP")
-    state_translation_gist_object_id, state_translation_gist_client_id = resp.object_id, resp.client_id
+    state_translation_gist_client_id, state_translation_gist_object_id = wip_gist_id()
 
     dbperspective = Perspective(client_id=client_id,
                                   object_id=object_id,
@@ -193,8 +204,7 @@ def create_dbdictionary(id=None,
     if not parent:
         raise ResponseError(message="No such language in the system")
 
-    resp = translation_gist_search("WiP")
-    state_translation_gist_object_id, state_translation_gist_client_id = resp.object_id, resp.client_id
+    state_translation_gist_client_id, state_translation_gist_object_id = wip_gist_id()
     dbdictionary_obj = Dictionary(client_id=client_id,
                                     object_id=object_id,
                                     state_translation_gist_object_id=state_translation_gist_object_id,
@@ -466,6 +476,120 @@ def create_entity(id=None,
         # DBSession.flush()
     return dbentity
 
+#: Number of rows inserted by a single statement in bulk_insert_entities().
+bulk_insert_chunk_size = 4096
+
+
+def bulk_insert_entities(
+    client_id,
+    entity_list,
+    session = DBSession):
+    """
+    Creates entities with their ObjectTOC and PublishingEntity rows via multi-row INSERT statements,
+    bypassing ORM, returns list of ids of created entities.
+
+    Each element of the entity list is a dict with 'parent_id', 'field_id', 'self_id', 'link_id',
+    'locale_id', 'content', 'additional_metadata', 'accepted' and 'published' values. Entities are
+    assumed to be already checked, e.g. for parent and field existence and for permissions, see
+    BulkCreateEntity.
+
+    Ids are allocated as a single range of client's object ids, see reserve_client_ids().
+    """
+
+    if not entity_list:
+        return []
+
+    # Pending ORM changes, e.g. new lexical entries, should be in the DB before entities referencing them.
+
+    session.flush()
+
+    first_id = (
+
+        reserve_client_ids(
+            client_id, len(entity_list), session))
+
+    created_at = (
+
+        datetime.datetime.utcnow()
+            .replace(tzinfo = datetime.timezone.utc)
+            .timestamp())
+
+    toc_table = ObjectTOC.__table__
+    entity_table = Entity.__table__
+    publish_table = PublishingEntity.__table__
+
+    for index in range(0, len(entity_list), bulk_insert_chunk_size):
+
+        chunk_list = entity_list[index : index + bulk_insert_chunk_size]
+
+        toc_insert_list = []
+        entity_insert_list = []
+        publish_insert_list = []
+
+        for object_id, entity in enumerate(chunk_list, first_id + index):
+
+            # Every row should have the same set of keys so that the VALUES statement emitted by
+            # SQLAlchemy is consistent.
+
+            toc_insert_list.append({
+                'client_id': client_id,
+                'object_id': object_id,
+                'table_name': 'entity',
+                'marked_for_deletion': False})
+
+            self_id = entity.get('self_id') or (None, None)
+            link_id = entity.get('link_id') or (None, None)
+
+            additional_metadata = entity.get('additional_metadata')
+
+            entity_insert_list.append({
+                'created_at': created_at,
+                'client_id': client_id,
+                'object_id': object_id,
+                'parent_client_id': entity['parent_id'][0],
+                'parent_object_id': entity['parent_id'][1],
+                'field_client_id': entity['field_id'][0],
+                'field_object_id': entity['field_id'][1],
+                'self_client_id': self_id[0],
+                'self_object_id': self_id[1],
+                'link_client_id': link_id[0],
+                'link_object_id': link_id[1],
+                'locale_id': entity.get('locale_id'),
+                'content': entity.get('content'),
+                'marked_for_deletion': False,
+                'additional_metadata':
+                    null() if additional_metadata is None else additional_metadata})
+
+            publish_insert_list.append({
+                'created_at': created_at,
+                'client_id': client_id,
+                'object_id': object_id,
+                'published': bool(entity.get('published')),
+                'accepted': bool(entity.get('accepted'))})
+
+        session.execute(toc_table.insert().values(toc_insert_list))
+        session.execute(entity_table.insert().values(entity_insert_list))
+        session.execute(publish_table.insert().values(publish_insert_list))
+
+    # Entry groups of grouping tags are scheduled for update on flush, which these entities bypass.
+
+    field_id_set = (
+        grouping_field_id_set(session))
+
+    defer_entry_groups(
+        [(tuple(entity['field_id']), tuple(entity['parent_id']))
+            for entity in entity_list
+            if tuple(entity['field_id']) in field_id_set],
+        session)
+
+    mark_changed(
+        session() if isinstance(session, scoped_session) else session)
+
+    return [
+        (client_id, object_id)
+        for object_id in range(first_id, first_id + len(entity_list))]
+
+
 def create_lexicalentry(id, perspective_id, save_object=False):
     client_id, object_id = id
 
@@ -707,7 +831,6 @@ def create_parser_result(
 # Json_input point to the method of file getting: if it's embedded in json, we need to decode it. If
 # it's uploaded via multipart form, it's just saved as-is.
 def create_object(request, content, obj, data_type, filename, json_input=True):
-    import errno
     # here will be object storage write as an option. Fallback (default) is filesystem write
     settings = request.registry.settings
     storage = settings['storage']
@@ -718,18 +841,10 @@ def create_object(request, content, obj, data_type, filename, json_input=True):
     else:
         filename = filename or 'noname.noext'
         storage_path, filename = object_file_path(obj, settings, data_type, filename, True)
-        directory = os.path.dirname(storage_path)  # TODO: find out, why object_file_path were not creating dir
-        try:
-            os.makedirs(directory)
-        except OSError as exception:
-            if exception.errno != errno.EEXIST:
-                raise
-        with open(storage_path, 'wb+') as f:
-            # set_trace()
-            if json_input:
-                f.write(content)
-            else:
-                shutil.copyfileobj(content, f)
+
+        # Stored as a reference of a content-addressed blob, streaming file contents.
+
+        Blob_Storage(storage).store(content, storage_path)
 
         real_location = storage_path
 
@@ -1039,9 +1154,10 @@ def create_group_entity(request, client, user, obj_id):  # tested
 def create_field(translation_atoms, client_id, data_type="Text", DBSession=DBSession):
 
     # Find or create translation_gist for field
-    if f_tg := translation_gist_search(translation_atoms[0].get('content'), gist_type="Field"):
-        field_translation_gist_id = (f_tg.client_id, f_tg.object_id)
-    else:
+    field_translation_gist_id = translation_gist_id_search(
+        translation_atoms[0].get('content'), DBSession, gist_type="Field")
+
+    if not field_translation_gist_id:
         field_translation_gist_id = create_gists_with_atoms(
             translation_atoms,
             None,
@@ -1051,9 +1167,10 @@ def create_field(translation_atoms, client_id, data_type="Text", DBSession=DBSes
         )
 
     # Find or create translation_gist for data_type
-    if dt_tg := translation_gist_search(data_type, gist_type="Service"):
-        data_type_translation_gist_id = (dt_tg.client_id, dt_tg.object_id)
-    else:
+    data_type_translation_gist_id = translation_gist_id_search(
+        data_type, DBSession, gist_type="Service")
+
+    if not data_type_translation_gist_id:
         data_type_translation_gist_id = create_gists_with_atoms(
             [{"locale_id": ENGLISH_LOCALE, "content": data_type}],
             None,
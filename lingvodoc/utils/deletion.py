@@ -4,6 +4,7 @@ from lingvodoc.models import (
     ObjectTOC,
     PublishingEntity
 )
+from lingvodoc.utils.blob_storage import Blob_Storage
 
 
 def real_delete_object(obj):
@@ -53,7 +54,7 @@ def real_delete_entity(entity, settings):
             split_path = path.split('/')
             path = os.path.join(storage_dir, split_path[len(split_path) - 1])
             # todo: make path in windows
-            os.remove(path)
+            Blob_Storage(settings['storage']).release(path)
         except:
             print('fail with entity', entity.client_id, entity.object_id)
 
@@ -13,10 +13,13 @@ from pdb import set_trace as A
 import csv
 import os
 import tempfile
+import threading
 import bs4
 import requests
 import io
 
+from lingvodoc.utils import apertium
+
 def print_to_str(*args, **kwargs):
 
     output = io.StringIO()
@@ -81,6 +84,86 @@ def insert_parser_output_to_text(text, parser_output, lang=""):
     return result
 
 
+# Uniparser analyzer classes by language.
+uniparser_analyzer_dict = {
+    'udm': UdmurtAnalyzer,
+    'erzya': ErzyaAnalyzer,
+    'moksha': MokshaAnalyzer,
+    'komi_zyryan': KomiZyrianAnalyzer,
+    'meadow_mari': MeadowMariAnalyzer}
+
+# Maximum number of memoized word analyses kept for each analyzer.
+uniparser_memo_size = 131072
+
+# Analyzers are loaded once per process, with their locks and memos of word analyses.
+uniparser_cache_lock = threading.Lock()
+uniparser_cache_dict = {}
+
+def uniparser_analyzer(lang, mode='strict'):
+
+    key = (lang, mode)
+
+    with uniparser_cache_lock:
+
+        entry = uniparser_cache_dict.get(key)
+
+        if entry is None:
+
+            entry = uniparser_cache_dict[key] = (
+                uniparser_analyzer_dict[lang](mode=mode), threading.Lock(), {})
+
+    return entry
+
+def uniparser_analyze(lang, word_list, has_disamb=False, disambiguate=False):
+    """
+    Analyzes words, returns list of XML analyses, one per word, empty for words without analyses.
+
+    Without disambiguation, which depends on word context, each unique word is analyzed only once and its
+    analysis is memoized for subsequent calls, e.g. for other documents of the same parse job.
+    """
+
+    analyzer, lock, memo = uniparser_analyzer(lang)
+
+    def xml_str(output):
+        return output if isinstance(output, str) else ''
+
+    if has_disamb and disambiguate:
+
+        with lock:
+            output_list = analyzer.analyze_words(word_list, format="xml", disambiguate=True)
+
+        return [xml_str(output) for output in output_list]
+
+    word_dict = {}
+    new_word_list = []
+
+    for word in word_list:
+
+        if word in word_dict:
+            continue
+
+        word_dict[word] = output = memo.get(word)
+
+        if output is None:
+            new_word_list.append(word)
+
+    if new_word_list:
+
+        with lock:
+
+            if has_disamb:
+                output_list = analyzer.analyze_words(new_word_list, format="xml", disambiguate=False)
+            else:
+                output_list = analyzer.analyze_words(new_word_list, format="xml")
+
+            if len(memo) + len(new_word_list) > uniparser_memo_size:
+                memo.clear()
+
+            for word, output in zip(new_word_list, output_list):
+                word_dict[word] = memo[word] = xml_str(output)
+
+    return [word_dict[word] for word in word_list]
+
 def timarkh_uniparser(dedoc_output, lang, has_disamb=False, disambiguate=False):
 
     wordlist = list()
@@ -93,43 +176,34 @@ def timarkh_uniparser(dedoc_output, lang, has_disamb=False, disambiguate=False):
             composite_words[i] = word
         i += 1
 
-    if lang == 'udm':
-        analyzer = UdmurtAnalyzer(mode='strict')
-    if lang == 'erzya':
-        analyzer = ErzyaAnalyzer(mode='strict')
-    if lang == 'moksha':
-        analyzer = MokshaAnalyzer(mode='strict')
-    if lang == 'komi_zyryan':
-        analyzer = KomiZyrianAnalyzer(mode='strict')
-    if lang == 'meadow_mari':
-        analyzer = MeadowMariAnalyzer(mode='strict')
-
-    composite_words_values = list(composite_words.values())
-    if has_disamb:
-        composite_words_output = analyzer.analyze_words(composite_words_values, format="xml", disambiguate=disambiguate)
-    else:
-        composite_words_output = analyzer.analyze_words(composite_words_values, format="xml")
-    composite_words_output_str = print_to_str(composite_words_output)
+    # Composite words without analyses are split into parts.
+
+    composite_words_output = uniparser_analyze(
+        lang, list(composite_words.values()), has_disamb=has_disamb, disambiguate=disambiguate)
 
     offset = 0
-    for key in composite_words.keys():
-        search_pattern = '<w><ana lex="" gr="" parts="" gloss=""></ana>' + composite_words[key] + '</w>'
-        if composite_words_output_str.find(search_pattern) != -1:
+    for key, word_output in zip(composite_words.keys(), composite_words_output):
+        if word_output == '<w><ana lex="" gr="" parts="" gloss=""></ana>' + composite_words[key] + '</w>':
             parts = composite_words[key].split("-")
             wordlist = wordlist[0:key+offset] + parts + wordlist[key+1+offset:]
             offset += len(parts) - 1
 
-    if has_disamb:
-        parser_output = analyzer.analyze_words(wordlist, format="xml", disambiguate=disambiguate)
-    else:
-        parser_output = analyzer.analyze_words(wordlist, format="xml")
-    parser_output_str = print_to_str(parser_output)
+    parser_output = uniparser_analyze(
+        lang, wordlist, has_disamb=has_disamb, disambiguate=disambiguate)
+    parser_output_str = "\n".join(parser_output)
 
     return insert_parser_output_to_text(dedoc_output, parser_output_str, lang=lang)
 
+# Apertium package and pipeline modes used for each language, as biltrans, morph and multi modes.
+apertium_mode_dict = {
+    'tat': ('apertium-tat-rus', 'tat-rus-biltrans', 'tat-rus-morph', None),
+    'kaz': ('apertium-kaz-rus', 'kaz-rus-biltrans', 'kaz-rus-morph', None),
+    'bak-tat': ('apertium-tat-bak', 'bak-tat-biltrans', 'bak-tat-morph', None),
+    'sah': ('apertium-sah', None, 'sah-morph', 'sah-multi')}
+
 def apertium_parser(dedoc_output, apertium_path, lang):
 
-    def reformat(biltrans_filename="", morph_filename="", multi_filename="", bilingual=False, multi=False):
+    def reformat(biltrans_output="", morph_output="", multi_output="", bilingual=False, multi=False):
 
         skip_list = ["guio", "cm", "sent", "lpar", "rpar", "lquot", "rquot"]
 
@@ -168,16 +242,12 @@ def apertium_parser(dedoc_output, apertium_path, lang):
 
         parsed = ""
 
-        morph_file = open(morph_filename, "r", encoding="UTF-8")
-        morph = morph_file.read()
-        morph_elements = re.findall(r"\^(.+?)\$", morph)
+        morph_elements = re.findall(r"\^(.+?)\$", morph_output)
 
         if not bilingual:
 
             if multi:
-                multi_file = open(multi_filename, "r", encoding="UTF-8")
-                multi = multi_file.read()
-                multi_elements = re.findall(r"\^(.+?)\$", multi)
+                multi_elements = re.findall(r"\^(.+?)\$", multi_output)
 
             i = -1
             for morph_element in morph_elements:
@@ -216,9 +286,7 @@ def apertium_parser(dedoc_output, apertium_path, lang):
 
             return parsed
 
-        biltrans_file = open(biltrans_filename, "r", encoding="UTF-8")
-        biltrans = biltrans_file.read()
-        biltrans_elements = re.findall(r"\^(.+?)\$", biltrans)
+        biltrans_elements = re.findall(r"\^(.+?)\$", biltrans_output)
 
         def is_conform(lex_1, lex_2):
             if lex_1.lower().find(lex_2.lower()) == -1 and lex_2.lower().find(lex_1.lower()) == -1:
@@ -295,75 +363,152 @@ def apertium_parser(dedoc_output, apertium_path, lang):
 
             parsed += new
 
-        biltrans_file.close()
-        morph_file.close()
-
         return parsed
 
-    if lang in ['kaz', 'tat', 'bak-tat']:
-        bilingual = True
-    else:
-        bilingual = False
+    package, biltrans_mode, morph_mode, multi_mode = (
+        apertium_mode_dict.get(lang, (f'apertium-{lang}', None, f'{lang}-morph', None)))
 
-    if lang in ['sah']:
-        multi = True
-    else:
-        multi = False
+    bilingual = biltrans_mode is not None
+    multi = multi_mode is not None
+
+    dedoc_output_without_tags = re.sub(r"(<.*?>)|&nbsp", "", dedoc_output)
+
+    # Running all required pipelines at once.
+
+    mode_list = [
+        mode for mode in (biltrans_mode, morph_mode, multi_mode)
+        if mode is not None]
+
+    output_dict = dict(zip(
+        mode_list,
+        apertium.run_modes(
+            os.path.join(apertium_path, package),
+            mode_list,
+            dedoc_output_without_tags)))
 
     if bilingual:
-        biltrans_file_id, biltrans_filename = tempfile.mkstemp()
+        parser_output = reformat(biltrans_output=output_dict[biltrans_mode], morph_output=output_dict[morph_mode], bilingual=True)
+    elif multi:
+        parser_output = reformat(multi_output=output_dict[multi_mode], morph_output=output_dict[morph_mode], multi=True)
+    else:
+        parser_output = reformat(morph_output=output_dict[morph_mode])
 
-    if multi:
-        multi_file_id, multi_filename = tempfile.mkstemp()
+    return insert_parser_output_to_text(dedoc_output, parser_output, lang=lang)
 
-    morph_file_id, morph_filename = tempfile.mkstemp()
+def hfst_translation(comment):
+    """
+    Gets translation from the rest of a lexicon line, i.e. text after the last '!' not followed by '0'.
+    """
 
-    dedoc_output_without_tags = re.sub(r"(<.*?>)|&nbsp", "", dedoc_output)
+    index = comment.rfind('!')
+    while index >= 0:
+        if index + 1 < len(comment) and comment[index + 1] != '0':
+            return comment[index + 1:]
+        index = comment.rfind('!', 0, index)
+    return None
 
-    input_file_id, input_filename = (
-        tempfile.mkstemp(text = True))
+def hfst_lexicon_index(lexicon):
+    """
+    Indexes translations of 'lex:surface CONTINUATION ; ! translation' lexicon lines, returns dictionary
+    of translations by (lex, surface) pairs and dictionary of translations by lex, both containing first
+    translations found in the lexicon.
 
-    with open(input_filename, 'w') as input_file:
-        input_file.write(dedoc_output_without_tags)
+    Gives the same results as searching the lexicon text for lines starting with 'lex:surface ' or with
+    'lex:', with the first and the last lines, not both preceded and followed by a line break, skipped.
+    """
 
-    s1 = 0
-    s2 = 0
-    if lang == 'tat':
-        s1 = os.system("cat \"" + input_filename + "\" | apertium -d " + apertium_path + "/apertium-tat-rus tat-rus-biltrans >> " +  biltrans_filename)
-        s2 = os.system("cat \"" + input_filename + "\" | apertium -d " + apertium_path + "/apertium-tat-rus tat-rus-morph >> " +  morph_filename)
+    surface_dict = {}
+    lex_dict = {}
 
-    elif lang == 'kaz':
-        s1 = os.system("cat \"" + input_filename + "\" | apertium -d " + apertium_path + "/apertium-kaz-rus kaz-rus-biltrans >> " + biltrans_filename)
-        s2 = os.system("cat \"" + input_filename + "\" | apertium -d " + apertium_path + "/apertium-kaz-rus kaz-rus-morph >> " + morph_filename)
+    for line in lexicon.split('\n')[1:-1]:
 
-    elif lang == 'bak-tat':
-        s1 = os.system("cat \"" + input_filename + "\" | apertium -d " + apertium_path + "/apertium-tat-bak bak-tat-biltrans >> " + biltrans_filename)
-        s2 = os.system("cat \"" + input_filename + "\" | apertium -d " + apertium_path + "/apertium-tat-bak bak-tat-morph >> " + morph_filename)
+        colon_index = line.find(':')
+        if colon_index < 0:
+            continue
 
-    elif lang == 'sah':
-        s1 = os.system("cat \"" + input_filename + "\" | apertium -d " + apertium_path + "/apertium-sah sah-morph >> " + morph_filename)
-        s2 = os.system("cat \"" + input_filename + "\" | apertium -d " + apertium_path + "/apertium-sah sah-multi >> " + multi_filename)
+        lex = line[:colon_index]
 
-    else:
-        s1 = os.system(f"cat '{input_filename}' | apertium -d {apertium_path}/apertium-{lang} {lang}-morph >> {morph_filename}")
-        s2 = s1
+        xln = hfst_translation(line[colon_index + 1:])
+        if xln is None:
+            continue
 
-    if s1 != 0 or s2 != 0:
-        raise ValueError("An error occured during Apertium parser process running")
+        lex_dict.setdefault(lex, xln)
 
-    if bilingual:
-        parser_output = reformat(biltrans_filename=biltrans_filename, morph_filename=morph_filename, bilingual=True)
-        os.remove(biltrans_filename)
-    elif multi:
-        parser_output = reformat(multi_filename=multi_filename, morph_filename=morph_filename, multi=True)
-        os.remove(multi_filename)
-    else:
-        parser_output = reformat(morph_filename=morph_filename)
+        space_index = line.find(' ', colon_index + 1)
+        if space_index < 0:
+            continue
 
-    os.remove(morph_filename)
-    os.remove(input_filename)
+        xln = hfst_translation(line[space_index + 1:])
+        if xln is not None:
+            surface_dict.setdefault((lex, line[colon_index + 1:space_index]), xln)
 
-    return insert_parser_output_to_text(dedoc_output, parser_output, lang=lang)
+    return surface_dict, lex_dict
+
+# Directory with lexicon and rules files of HFST parsers by language.
+
+hfst_dir_path = "/opt/hfst"
+
+# Per-process cache of inverted transducers and lexicon indices, lazily loaded for each language and
+# reloaded if either the lexicon or the rules file is modified.
+
+hfst_cache_dict = {}
+hfst_cache_lock = threading.Lock()
+
+def hfst_load(lang):
+
+    parser_path = f"{hfst_dir_path}/{lang}"
+
+    lexicon_path = f"{parser_path}/lexicon.lexc"
+    rules_path = f"{parser_path}/rules.xfst.hfst"
+
+    mtime_key = (os.path.getmtime(lexicon_path), os.path.getmtime(rules_path))
+
+    with hfst_cache_lock:
+
+        cache_entry = hfst_cache_dict.get(lang)
+        if cache_entry is not None and cache_entry[0] == mtime_key:
+            return cache_entry[1:]
+
+        with open(lexicon_path, 'r') as f:
+            lexicon = f.read()
+
+        xfst = HfstTransducer.read_from_file(rules_path)
+        xfst.invert()
+
+        surface_dict, lex_dict = hfst_lexicon_index(lexicon)
+
+        hfst_cache_dict[lang] = (mtime_key, xfst, surface_dict, lex_dict)
+        return xfst, surface_dict, lex_dict
+
+def hfst_analyze(xfst, surface_dict, lex_dict, w):
+
+    lookup = xfst.lookup(w)
+    if len(lookup) == 0:
+        lookup = xfst.lookup(w.lower())
+    if len(lookup) == 0:
+        return False, f'\'<w><ana lex="" gr="" parts="" gloss=""></ana>{w}</w>\''
+
+    section = "'<w>"
+    for lkp in map(lambda l: l[0], lookup):
+
+        if '+' in lkp:
+            plus_pos = lkp.index('+')
+            lex = lkp[:plus_pos]
+            gr = lkp[plus_pos + 1:].replace('+', ',')
+        else:
+            lex = lkp
+            gr = "Unknown"
+
+        # Get translation
+        xln = (
+            surface_dict.get((lex, w)) or
+            surface_dict.get((lex, w.lower())) or
+            lex_dict.get(lex) or
+            "Unknown")
+
+        section += f'<ana lex={lex} gr={gr} parts="" gloss="" trans_ru={xln}></ana>'
+    section += f"{w}</w>'"
+    return True, section
 
 def hfst_parser(dedoc_output, lang, debug_flag=False):
 
@@ -371,13 +516,10 @@ def hfst_parser(dedoc_output, lang, debug_flag=False):
         with open("dedoc_output", 'w') as f:
             print(dedoc_output, file=f)
 
-    parser_path = f"/opt/hfst/{lang}"
+    xfst, surface_dict, lex_dict = hfst_load(lang)
 
-    with open(f"{parser_path}/lexicon.lexc", 'r') as f:
-        lexicon = f.read()
-
-    xfst = HfstTransducer.read_from_file(f"{parser_path}/rules.xfst.hfst")
-    xfst.invert()
+    # Repeated words of a document are analyzed once.
+    section_dict = {}
 
     sent_regex = re.compile(r'[.|!|?|...]')
     word_regex = re.compile(r'[,| |:|"|-|*]')
@@ -393,35 +535,12 @@ def hfst_parser(dedoc_output, lang, debug_flag=False):
         wordlist = filter(lambda t: t, [t.strip() for t in word_regex.split(s)])
         for w in wordlist:
             words = words + 1
-            lookup = xfst.lookup(w)
-            if len(lookup) == 0:
-                lookup = xfst.lookup(w.lower())
-            if len(lookup) > 0:
+            if w not in section_dict:
+                section_dict[w] = hfst_analyze(xfst, surface_dict, lex_dict, w)
+            is_analyzed, section = section_dict[w]
+            if is_analyzed:
                 analyzed = analyzed + 1
-                section = "'<w>"
-                for lkp in map(lambda l: l[0], lookup):
-
-                    if '+' in lkp:
-                        plus_pos = lkp.index('+')
-                        lex = lkp[:plus_pos]
-                        gr = lkp[plus_pos + 1:].replace('+', ',')
-                    else:
-                        lex = lkp
-                        gr = "Unknown"
-
-                    # Get translation
-                    if ((xln := re.search(f"[\r\n]{lex}:{w} .*!([^0].*)[\r\n]", lexicon)) or
-                        (xln := re.search(f"[\r\n]{lex}:{w.lower()} .*!([^0].*)[\r\n]", lexicon)) or
-                        (xln := re.search(f"[\r\n]{lex}:.*!([^0].*)[\r\n]", lexicon))):
-                        xln = xln.group(1)
-                    else:
-                        xln = "Unknown"
-
-                    section += f'<ana lex={lex} gr={gr} parts="" gloss="" trans_ru={xln}></ana>'
-                section += f"{w}</w>'"
-                parser_list.append(section)
-            else:
-                parser_list.append(f'\'<w><ana lex="" gr="" parts="" gloss=""></ana>{w}</w>\'')
+            parser_list.append(section)
 
     parser_output = ", ".join(parser_list)
 
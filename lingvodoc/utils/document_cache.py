@@ -0,0 +1,268 @@
+"""
+Cache of parsed and validated GraphQL documents and storage of persisted queries, used by the graphql()
+view.
+
+Documents are cached in-process in an LRU cache by sha256 hashes of query strings, together with their
+validation errors, so that repeated queries are neither parsed nor validated again.
+
+Persisted queries follow Apollo's automatic persisted queries protocol: a client sends sha256 hash of a
+query as 'sha256Hash' of 'persistedQuery' request extension instead of query text; if the query is unknown,
+the client gets 'PersistedQueryNotFound' error and sends the query text together with its hash, and the
+query is then stored. Persisted query texts are stored in Redis under 'persisted_query:<hash>' keys and in
+the in-process cache.
+"""
+
+# Standard library imports.
+
+import collections
+import hashlib
+import logging
+import threading
+import time
+
+# External imports.
+
+from graphql.error import GraphQLError
+from graphql.execution import ExecutionResult, execute
+from graphql.language.parser import parse
+from graphql.language.source import Source
+from graphql.validation import validate
+
+# Project imports.
+
+import lingvodoc.cache.caching as caching
+
+
+# Setting up logging.
+log = logging.getLogger(__name__)
+
+
+#: Maximum number of documents cached in-process.
+document_cache_size = 1024
+
+
+def query_hash(query_str):
+
+    return (
+
+        hashlib.sha256(
+            query_str.encode('utf-8')).hexdigest())
+
+
+class Document_Cache(object):
+    """
+    LRU cache of parsed and validated GraphQL documents by hashes of query strings.
+    """
+
+    persisted_key_format_str = 'persisted_query:%s'
+
+    def __init__(self, size = document_cache_size):
+
+        self.size = size
+
+        self.lock = threading.Lock()
+        self.document_dict = collections.OrderedDict()
+
+        self.counter = collections.Counter()
+
+    def get_query(self, query_dict):
+        """
+        Gets query text and its hash from a request dictionary with 'query' and / or 'extensions' keys.
+
+        Returns query string, query hash and error message, query string and hash are None in case of an
+        error.
+        """
+
+        query_str = query_dict.get('query')
+
+        persisted_dict = (
+            (query_dict.get('extensions') or {}).get('persistedQuery'))
+
+        if not persisted_dict:
+
+            if query_str is None:
+                return None, None, 'query key not found'
+
+            return query_str, query_hash(query_str), None
+
+        hash_str = persisted_dict.get('sha256Hash')
+
+        if not isinstance(hash_str, str):
+            return None, None, 'persisted query sha256Hash not found'
+
+        hash_str = hash_str.lower()
+
+        # Persisting a new query.
+
+        if query_str is not None:
+
+            if query_hash(query_str) != hash_str:
+                return None, None, 'provided sha256Hash does not match query'
+
+            try:
+
+                caching.CACHE.set(
+                    key = self.persisted_key_format_str % hash_str,
+                    value = query_str)
+
+            except Exception as exception:
+                log.warning(f'Failed to store persisted query: {exception}')
+
+            return query_str, hash_str, None
+
+        # Getting a known query.
+
+        with self.lock:
+
+            entry = (
+                self.document_dict.get(hash_str))
+
+        if entry is not None:
+            return entry[0], hash_str, None
+
+        try:
+
+            query_str = (
+
+                caching.CACHE.get(
+                    self.persisted_key_format_str % hash_str))
+
+        except Exception as exception:
+            log.warning(f'Failed to get persisted query: {exception}')
+
+        if query_str is None:
+            return None, None, 'PersistedQueryNotFound'
+
+        return query_str, hash_str, None
+
+    def get(self, schema, query_str, hash_str = None, timing_dict = None):
+        """
+        Gets parsed document and its validation errors, if any, with parsing and validation time added to
+        'parse' and 'validate' keys of the timing dictionary, if it is provided.
+
+        Document is None in case of a syntax error.
+        """
+
+        if hash_str is None:
+            hash_str = query_hash(query_str)
+
+        with self.lock:
+
+            entry = (
+                self.document_dict.get(hash_str))
+
+            if entry is not None:
+
+                self.document_dict.move_to_end(hash_str)
+                self.counter['hit'] += 1
+
+                return entry[1], entry[2]
+
+            self.counter['miss'] += 1
+
+        start_time = time.perf_counter()
+
+        try:
+
+            document = (
+                parse(Source(query_str, 'GraphQL request')))
+
+        except GraphQLError as error:
+
+            # Syntax errors are not cached, there are not supposed to be many of them.
+
+            if timing_dict is not None:
+                timing_dict['parse'] += time.perf_counter() - start_time
+
+            return None, [error]
+
+        parse_time = time.perf_counter()
+
+        error_list = (
+            validate(schema, document))
+
+        validate_time = time.perf_counter()
+
+        if timing_dict is not None:
+
+            timing_dict['parse'] += parse_time - start_time
+            timing_dict['validate'] += validate_time - parse_time
+
+        with self.lock:
+
+            self.document_dict[hash_str] = (
+                query_str, document, error_list)
+
+            self.document_dict.move_to_end(hash_str)
+
+            while len(self.document_dict) > self.size:
+                self.document_dict.popitem(last = False)
+
+        return document, error_list
+
+    def metrics(self):
+
+        with self.lock:
+
+            return {
+                'size': len(self.document_dict),
+                'hit': self.counter['hit'],
+                'miss': self.counter['miss']}
+
+
+document_cache = Document_Cache()
+
+
+def execute_query(
+    schema,
+    query_str,
+    hash_str = None,
+    timing_dict = None,
+    document_tuple = None,
+    **execute_args):
+    """
+    Executes query using cached parsed and validated document, as graphql.graphql() does, with execution
+    time added to 'execute' key of the timing dictionary, if it is provided.
+
+    Document and its validation errors already got from the document cache can be provided as
+    'document_tuple', then the cache is not looked up again.
+    """
+
+    try:
+
+        if document_tuple is None:
+
+            document_tuple = (
+
+                document_cache.get(
+                    schema, query_str, hash_str, timing_dict))
+
+        document, error_list = document_tuple
+
+        if error_list:
+
+            return (
+
+                ExecutionResult(
+                    errors = error_list,
+                    invalid = True))
+
+        start_time = time.perf_counter()
+
+        try:
+
+            return (
+                execute(schema, document, **execute_args))
+
+        finally:
+
+            if timing_dict is not None:
+                timing_dict['execute'] += time.perf_counter() - start_time
+
+    except Exception as exception:
+
+        return (
+
+            ExecutionResult(
+                errors = [exception],
+                invalid = True))
@@ -0,0 +1,262 @@
+"""
+Updating HTML content of parser results, see UpdateParserResult mutation: re-parsing a single element of a
+parser result and re-executing a parser on a whole parser result while keeping verified and user-modified
+elements.
+
+Parser result content is parsed with BeautifulSoup only once and is serialized only once. Each tree node
+is processed a constant number of times, instead of per-element tree searches and Tag.replace_with()
+calls, each of which scans all siblings of the replaced node. Span ids of new parser output are gathered
+with lxml, if it is available, or with the standard library HTML parser, without building another soup.
+"""
+
+# Standard library imports.
+
+import html.parser
+import logging
+import re
+
+# External imports.
+
+from bs4 import BeautifulSoup, NavigableString
+
+try:
+    import lxml.etree
+
+except ImportError:
+    lxml = None
+
+
+# Setting up logging.
+log = logging.getLogger(__name__)
+
+
+ESC_PAT = "$id$"
+
+
+def is_string(node):
+    return str(type(node)).find("NavigableString") != -1
+
+
+def is_tag(node):
+    return str(type(node)).find("Tag") != -1
+
+
+def get_max_id(soup):
+    max_id = 0
+    for span in soup.find_all("span"):
+        if "id" in span.attrs:
+            id = span.attrs["id"]
+            if id.isdecimal():
+                int_id = int(id)
+                if int_id > max_id:
+                    max_id = int_id
+    return max_id
+
+
+class Span_Id_Parser(html.parser.HTMLParser):
+    """
+    Gathers maximum decimal id of span elements, seeing the same start tags as BeautifulSoup's html.parser
+    tree builder does.
+    """
+
+    def __init__(self):
+
+        super().__init__(convert_charrefs = False)
+
+        self.max_id = 0
+
+    def handle_starttag(self, tag, attrs):
+
+        if tag != "span":
+            return
+
+        id = dict(attrs).get("id")
+
+        if id is not None and id.isdecimal():
+            self.max_id = max(self.max_id, int(id))
+
+    handle_startendtag = handle_starttag
+
+
+def get_max_span_id(html_str, backend = None):
+    """
+    Gets maximum decimal id of span elements of an HTML string, as get_max_id() does for its soup, using
+    lxml, if available, or the standard library HTML parser.
+    """
+
+    if backend is None:
+        backend = 'lxml' if lxml is not None else 'html.parser'
+
+    if backend == 'lxml':
+
+        try:
+
+            root = (
+
+                lxml.etree.fromstring(
+                    html_str, lxml.etree.HTMLParser()))
+
+            max_id = 0
+
+            if root is not None:
+
+                for span in root.iter("span"):
+
+                    id = span.get("id")
+
+                    if id is not None and id.isdecimal():
+                        max_id = max(max_id, int(id))
+
+            return max_id
+
+        except Exception as exception:
+            log.warning(f'Failed to get span ids with lxml: {exception}')
+
+    parser = Span_Id_Parser()
+
+    parser.feed(html_str)
+    parser.close()
+
+    return parser.max_id
+
+
+def parse_and_insert_element(old_result, element_id, parse):
+    """
+    Re-parses text of an element of a parser result with a parse function, keeping user and approved
+    results of the element.
+    """
+
+    old_result_soup = BeautifulSoup(old_result, 'html.parser')
+
+    # Finding the element, the first span with id starting with element id, as 'span[id^="..."]'
+    # selector does, and maximum span id in the same pass.
+
+    element_soup = None
+    max_id = 0
+
+    for span in old_result_soup.find_all("span"):
+
+        id = span.attrs.get("id")
+
+        if id is None:
+            continue
+
+        if element_soup is None and element_id and id.startswith(element_id):
+            element_soup = span
+
+        if id.isdecimal():
+            max_id = max(max_id, int(id))
+
+    if not element_soup:
+        return old_result
+    element_text = ""
+    for child in element_soup.children:
+        if is_string(child):
+            element_text = child
+    if not element_text:
+        return old_result
+    parser_result = parse(element_text)
+    parser_result_soup = BeautifulSoup(parser_result, 'html.parser')
+    if not parser_result_soup.span:
+        return old_result
+    parser_result_soup.span["id"] = element_id
+    for span in parser_result_soup.span.find_all("span"):
+        span["id"] = str(max_id + 1)
+        max_id += 1
+    if "user" in element_soup["class"]:
+        parser_result_soup.span["class"].append("user")
+    if element_soup.span:
+        for span in element_soup.find_all("span"):
+            if ("user" in span["class"] or "approved" in span["class"]) and "result" in span["class"]:
+                parser_result_soup.span.append(span)
+                if "approved" in span["class"] and "verified" not in parser_result_soup.span["class"]:
+                    parser_result_soup.span["class"].append("verified")
+    element_soup.replace_with(parser_result_soup)
+    return str(old_result_soup)
+
+
+def reexecute_parser(old_result, parse):
+    """
+    Re-executes a parse function on text of a parser result, keeping verified and user-modified elements.
+
+    Verified and user elements are replaced in the text given to the parser with '$id$<index>$id$'
+    placeholders, which are then substituted in the parser output with these elements with new ids.
+    """
+
+    old_result_soup = BeautifulSoup(old_result, 'html.parser')
+    elements = old_result_soup.select('[class*="verified"]')
+
+    # Elements to skip are not replaced in the tree, extraction of text just does not descend into them,
+    # except for elements nested into other elements to skip, which are replaced inside them.
+
+    elements_to_skip = list()
+    skip_index_dict = {}
+
+    for element in elements:
+        if "verified" in element["class"] or "user" in element["class"]:
+
+            index_skip = len(elements_to_skip)
+            elements_to_skip.append(element)
+
+            if any(id(parent) in skip_index_dict for parent in element.parents):
+                element.replace_with(ESC_PAT + str(index_skip) + ESC_PAT)
+
+            else:
+                skip_index_dict[id(element)] = index_skip
+
+    def extract_text_from_tag(tag):
+
+        index_skip = skip_index_dict.get(id(tag))
+
+        if index_skip is not None:
+            return ESC_PAT + str(index_skip) + ESC_PAT
+
+        result = ""
+        if is_string(tag):
+            result = tag
+        elif is_tag(tag) and tag.name in ["strong", "head"]:
+            pass
+        elif is_tag(tag) and tag.name in ["html", "body"]:
+            result = "".join(extract_text_from_tag(child) for child in tag.contents)
+        elif is_tag(tag) and tag.name == "span":
+            if "class" in tag.attrs and "unverified" in tag["class"]:
+                for child in tag.contents:
+                    if id(child) in skip_index_dict or is_string(child):
+                        result = extract_text_from_tag(child)
+        elif is_tag(tag):
+
+            # Replacing all children with a single string of their texts, serialized the same as a
+            # sequence of strings.
+
+            text = "".join(extract_text_from_tag(child) for child in tag.contents)
+
+            tag.clear()
+            if text:
+                tag.append(NavigableString(text))
+
+            result = str(tag).replace("&lt;", "<").replace("&gt;", ">")
+        return result
+
+    text = "".join(extract_text_from_tag(child) for child in old_result_soup.contents)
+
+    new_result = parse(text)
+    max_id = get_max_span_id(new_result)
+
+    def replace(match):
+        i = len(ESC_PAT)
+        index = int(match.group(0)[i:-i])
+        element = elements_to_skip[index]
+        nonlocal max_id
+        max_id += 1
+        element["id"] = str(max_id)
+        for child in element.children:
+            if not is_tag(child) or "id" not in child.attrs:
+                continue
+            if child["id"].find('!') != -1:
+                child["id"] = element["id"] + '!'*child["id"].count('!')
+            else:
+                max_id += 1
+                child["id"] = str(max_id)
+        return str(element)
+
+    return re.sub(r"\$id\$(\d*)\$id\$", replace, new_result)
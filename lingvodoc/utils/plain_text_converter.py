@@ -32,7 +32,7 @@ from lingvodoc.utils.creation import (create_perspective,
                                       create_dbdictionary,
                                       create_dictionary_persp_to_field)
 
-from lingvodoc.utils.search import translation_gist_search
+from lingvodoc.utils.search import translation_gist_id_search
 from lingvodoc.utils.corpus_converter import get_field_tracker
 
 # Setting up logging.
@@ -312,11 +312,9 @@ class ObjectId:
 
 
 def get_translation_gist_id(translation_atoms, client_id, gist_type):
-    if (translation_gist := translation_gist_search(translation_atoms[0].get('content'),
-                                                    gist_type=gist_type)):
-        translation_gist_id = translation_gist.id
-        #print(f"Found {gist_type} gist: {translation_gist_id}")
-    else:
+    translation_gist_id = translation_gist_id_search(translation_atoms[0].get('content'),
+                                                     gist_type=gist_type)
+    if not translation_gist_id:
         translation_gist_id = create_gists_with_atoms(translation_atoms,
                                                       None,
                                                       (client_id, None),
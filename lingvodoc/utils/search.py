@@ -1,11 +1,18 @@
+import collections
 import errno
+import itertools
 import json
+import logging
 import urllib
 import os
+import threading
+import time
 import pympi
 from pathvalidate import sanitize_filename
-from sqlalchemy import and_
-from sqlalchemy.orm import aliased
+from sqlalchemy import and_, event, func, select, tuple_
+from sqlalchemy.orm import aliased, scoped_session, Session
+
+import lingvodoc.cache.caching as caching
 
 from lingvodoc.models import (
     TranslationAtom as dbTranslationAtom,
@@ -15,18 +22,141 @@ from lingvodoc.models import (
     PublishingEntity as dbPublishingEntity,
     Field as dbField,
     DBSession,
-    ENGLISH_LOCALE
+    ENGLISH_LOCALE,
+    EntryGroupData as dbEntryGroupData,
+    EntryGroupIdSequence,
+    Translation_Cache
 )
 
+from lingvodoc.utils import ids_to_id_query
 from lingvodoc.utils.static_fields import fields_static
 
 #from lingvodoc.views.v2.translations import translationgist_contents
 
 
-def translation_gist_search(searchstring, session=DBSession, gist_type='Service'):
+# Setting up logging.
+log = logging.getLogger(__name__)
+
+
+#: Interval in seconds between checks if the service registry should be refreshed.
+service_registry_check_interval = 5.0
+
+#: Maximum number of rows inserted by a single statement when updating entry groups.
+entry_group_chunk_size = 1024
+
+#: Key of the transaction-level advisory lock serializing updates of entry groups.
+entry_group_lock_key = 7386120316
+
+
+class Service_Registry(object):
+    """
+    Process-wide registry of ids of translation gists and fields found by their English names, e.g. of
+    'Published' or 'Limited access' state gists, so that they are searched in the database only once.
+
+    Found ids are forgotten when the shared translation generation stamp changes, i.e. after translations
+    were changed anywhere, see Translation_Cache.bump(), and ids found in a transaction are forgotten if
+    it is rolled back, as they can be ids of gists and fields created in it which are no longer valid.
+    Names which are not found are not remembered.
+    """
+
+    def __init__(self):
+
+        self.lock = threading.Lock()
+        self.id_dict = {}
+
+        self.generation = None
+        self.generation_time = None
+
+    def check_generation(self):
+
+        current_time = time.monotonic()
+
+        if (self.generation_time is not None and
+            current_time - self.generation_time < service_registry_check_interval):
+            return
+
+        generation = (
+            caching.CACHE.get(Translation_Cache.generation_key_str)
+                if caching.CACHE is not None else None)
+
+        with self.lock:
+
+            if generation != self.generation:
+
+                self.id_dict.clear()
+                self.generation = generation
+
+            self.generation_time = current_time
+
+    def clear(self):
+
+        with self.lock:
+            self.id_dict.clear()
+
+    def forget(self, key_set):
+
+        with self.lock:
+
+            for key in key_set:
+                self.id_dict.pop(key, None)
+
+    def get(self, key, search_f, session = None):
+        """
+        Gets id by a key, if it's not known, finds it with search_f, which should return id or None.
+
+        If search_f uses a session, it should be given, so that the found id is forgotten if the session's
+        transaction is rolled back.
+        """
+
+        self.check_generation()
+
+        id = self.id_dict.get(key)
+
+        if id is not None:
+            return id
+
+        id = search_f()
+
+        if id is not None:
+
+            with self.lock:
+                self.id_dict[key] = id
+
+            if session is not None:
+
+                if isinstance(session, scoped_session):
+                    session = session()
+
+                session.info.setdefault(
+                    'service_registry_key_set', set()).add(key)
+
+        return id
+
+
+service_registry = Service_Registry()
+
+
+@event.listens_for(Session, 'after_commit')
+def service_registry_after_commit(session):
+
+    session.info.pop('service_registry_key_set', None)
+
+
+@event.listens_for(Session, 'after_rollback')
+def service_registry_after_rollback(session):
+
+    key_set = (
+        session.info.pop('service_registry_key_set', None))
+
+    if key_set:
+        service_registry.forget(key_set)
+
+
+def translation_gist_id_query(searchstring, session, gist_type):
+
     return (
         session
-            .query(dbTranslationGist)
+            .query(dbTranslationGist.client_id, dbTranslationGist.object_id)
             .join(dbTranslationAtom)
             .filter(
                 dbTranslationAtom.marked_for_deletion == False,
@@ -37,61 +167,111 @@ def translation_gist_search(searchstring, session=DBSession, gist_type='Service'
             .order_by(
                 dbTranslationGist.created_at,
                 dbTranslationGist.client_id,
-                dbTranslationGist.object_id)
-            .one_or_none())
+                dbTranslationGist.object_id))
+
+
+def get_translation_gist_id(searchstring, session=DBSession, gist_type='Service'):
+    """
+    Gets id of a translation gist by its English name and type as (client_id, object_id) tuple, or None
+    if there is no such gist, via the service registry.
+    """
+
+    def f():
+
+        result = (
+            translation_gist_id_query(searchstring, session, gist_type).one_or_none())
+
+        return tuple(result) if result is not None else None
+
+    return (
+
+        service_registry.get(
+            ('gist', searchstring, gist_type), f, session))
+
+
+def published_gist_id(session=DBSession):
+    return get_translation_gist_id('Published', session)
+
+def limited_access_gist_id(session=DBSession):
+    return get_translation_gist_id('Limited access', session)
+
+def wip_gist_id(session=DBSession):
+    return get_translation_gist_id('WiP', session)
+
+
+def translation_gist_search(searchstring, session=DBSession, gist_type='Service'):
+
+    gist_id = get_translation_gist_id(searchstring, session, gist_type)
+
+    if gist_id is None:
+        return None
 
-def translation_gist_id_search(searchstring, session=DBSession, gist_type='Service'):
     return (
         session
-            .query(dbTranslationGist.id)
-            .join(dbTranslationAtom)
-            .filter(
-                dbTranslationAtom.marked_for_deletion == False,
-                dbTranslationAtom.content == searchstring,
-                dbTranslationAtom.locale_id == ENGLISH_LOCALE,
-                dbTranslationGist.marked_for_deletion == False,
-                dbTranslationGist.type == gist_type)
-            .order_by(
-                dbTranslationGist.created_at,
-                dbTranslationGist.client_id,
-                dbTranslationGist.object_id)
-            .one_or_none())
+            .query(dbTranslationGist)
+            .get(gist_id))
+
+def translation_gist_id_search(searchstring, session=DBSession, gist_type='Service'):
+    return get_translation_gist_id(searchstring, session, gist_type)
+
+def get_field_id(searchstring, data_type='Text', DBSession=DBSession):
+    """
+    Gets id of a field by its English name and English name of its data type as (client_id, object_id)
+    tuple, or None if there is no such field, via the service registry.
+    """
+
+    def f():
+
+        dbTranslationGistF = aliased(dbTranslationGist)
+        dbTranslationGistD = aliased(dbTranslationGist)
+
+        dbTranslationAtomF = aliased(dbTranslationAtom)
+        dbTranslationAtomD = aliased(dbTranslationAtom)
+
+        result = (
+            DBSession
+                .query(dbField.client_id, dbField.object_id)
+                .filter(
+                    dbTranslationGistF.id == dbField.translation_gist_id,
+                    dbTranslationGistD.id == dbField.data_type_translation_gist_id,
+                    dbTranslationAtomF.parent_id == dbTranslationGistF.id,
+                    dbTranslationAtomD.parent_id == dbTranslationGistD.id,
+
+                    dbTranslationGistF.marked_for_deletion == False,
+                    dbTranslationGistF.type == 'Field',
+                    dbTranslationAtomF.content == searchstring,
+                    dbTranslationAtomF.locale_id == ENGLISH_LOCALE,
+                    dbTranslationAtomF.marked_for_deletion == False,
+
+                    dbTranslationGistD.marked_for_deletion == False,
+                    dbTranslationGistD.type == 'Service',
+                    dbTranslationAtomD.content == data_type,
+                    dbTranslationAtomD.locale_id == ENGLISH_LOCALE,
+                    dbTranslationAtomD.marked_for_deletion == False)
+                .order_by(
+                    dbTranslationGistF.created_at,
+                    dbTranslationGistF.client_id,
+                    dbTranslationGistF.object_id)
+                .first())
+
+        return tuple(result) if result is not None else None
+
+    return (
+
+        service_registry.get(
+            ('field', searchstring, data_type), f, DBSession))
 
 def field_search(searchstring, data_type='Text', DBSession=DBSession):
 
-    dbTranslationGistF = aliased(dbTranslationGist)
-    dbTranslationGistD = aliased(dbTranslationGist)
+    field_id = get_field_id(searchstring, data_type, DBSession)
 
-    dbTranslationAtomF = aliased(dbTranslationAtom)
-    dbTranslationAtomD = aliased(dbTranslationAtom)
+    if field_id is None:
+        return None
 
-    field = (
+    return (
         DBSession
             .query(dbField)
-            .filter(
-                dbTranslationGistF.id == dbField.translation_gist_id,
-                dbTranslationGistD.id == dbField.data_type_translation_gist_id,
-                dbTranslationAtomF.parent_id == dbTranslationGistF.id,
-                dbTranslationAtomD.parent_id == dbTranslationGistD.id,
-
-                dbTranslationGistF.marked_for_deletion == False,
-                dbTranslationGistF.type == 'Field',
-                dbTranslationAtomF.content == searchstring,
-                dbTranslationAtomF.locale_id == ENGLISH_LOCALE,
-                dbTranslationAtomF.marked_for_deletion == False,
-
-                dbTranslationGistD.marked_for_deletion == False,
-                dbTranslationGistD.type == 'Service',
-                dbTranslationAtomD.content == data_type,
-                dbTranslationAtomD.locale_id == ENGLISH_LOCALE,
-                dbTranslationAtomD.marked_for_deletion == False)
-            .order_by(
-                dbTranslationGistF.created_at,
-                dbTranslationGistF.client_id,
-                dbTranslationGistF.object_id)
-            .first())
-
-    return field
+            .get(field_id))
 
 def recursive_sort(
     langs,
@@ -221,6 +401,14 @@ def find_lexical_entries_by_tags(tags, field_client_id, field_object_id, accepte
 
 
 def find_all_tags(lexical_entry, field_client_id, field_object_id, accepted, published=None):
+    """
+    Finds all tags of the group of lexical entries linked to a given entry through a grouping tag field,
+    starting from the first of the entry's tags.
+
+    If the field's entry groups are maintained, see update_entry_groups(), gets all tags of the entry's
+    group with a single query, otherwise gathers tags iteratively, see find_all_tags_iterative().
+    """
+
     tag = None
     for entity in lexical_entry.entity:
         if not entity.marked_for_deletion and entity.field_client_id == field_client_id and entity.field_object_id == field_object_id:
@@ -234,31 +422,871 @@ def find_all_tags(lexical_entry, field_client_id, field_object_id, accepted, pub
             break
     if not tag:
         return set()
-    else:
-        tags = {tag}
-        new_tags =  {tag}
-        while new_tags:
-            lexical_entries = find_lexical_entries_by_tags(new_tags, field_client_id, field_object_id, accepted, published)
-            new_tags = set()
-            for lex in lexical_entries:
-                entities = DBSession.query(dbEntity) \
-                    .join(dbEntity.field) \
-                    .join(dbEntity.publishingentity) \
-                    .filter(dbEntity.parent == lex,
-                            dbField.client_id == field_client_id,
-                            dbField.object_id == field_object_id,
-                            dbEntity.marked_for_deletion==False)
-                if accepted:
-                    entities = entities.filter(dbPublishingEntity.accepted == True)
-                if published:
-                    entities = entities.filter(dbPublishingEntity.published == True)
-
-                entities = entities.all()
-                for entity in entities:
-                    if entity.content not in tags:
-                        tags.add(entity.content)
-                        new_tags.add(entity.content)
-        return tags
+
+    field_id = (field_client_id, field_object_id)
+
+    if field_id in grouping_field_id_set():
+
+        found_id_set, entry_tag_dict, tag_entry_dict = (
+
+            entry_group_data(
+                field_id,
+                [lexical_entry.id],
+                accept = True if accepted else None,
+                publish = True if published else None,
+                check_entry = False))
+
+        if found_id_set:
+
+            tag_set, _ = (
+                linked_tags({tag}, entry_tag_dict, tag_entry_dict))
+
+            return tag_set
+
+    return (
+        find_all_tags_iterative(tag, field_client_id, field_object_id, accepted, published))
+
+
+def find_all_tags_iterative(tag, field_client_id, field_object_id, accepted, published=None):
+    """
+    Gathers tags linked to a given tag through lexical entries with a query per entry.
+    """
+
+    tags = {tag}
+    new_tags =  {tag}
+    while new_tags:
+        lexical_entries = find_lexical_entries_by_tags(new_tags, field_client_id, field_object_id, accepted, published)
+        new_tags = set()
+        for lex in lexical_entries:
+            entities = DBSession.query(dbEntity) \
+                .join(dbEntity.field) \
+                .join(dbEntity.publishingentity) \
+                .filter(dbEntity.parent == lex,
+                        dbField.client_id == field_client_id,
+                        dbField.object_id == field_object_id,
+                        dbEntity.marked_for_deletion==False)
+            if accepted:
+                entities = entities.filter(dbPublishingEntity.accepted == True)
+            if published:
+                entities = entities.filter(dbPublishingEntity.published == True)
+
+            entities = entities.all()
+            for entity in entities:
+                if entity.content not in tags:
+                    tags.add(entity.content)
+                    new_tags.add(entity.content)
+    return tags
+
+
+class Union_Find(object):
+    """
+    Disjoint set forest with path compression and union by size.
+    """
+
+    def __init__(self):
+
+        self.parent_dict = {}
+        self.size_dict = {}
+
+    def find(self, x):
+
+        parent_dict = self.parent_dict
+
+        if x not in parent_dict:
+
+            parent_dict[x] = x
+            self.size_dict[x] = 1
+
+            return x
+
+        root = x
+
+        while parent_dict[root] != root:
+            root = parent_dict[root]
+
+        while parent_dict[x] != root:
+            parent_dict[x], x = root, parent_dict[x]
+
+        return root
+
+    def union(self, x, y):
+
+        x = self.find(x)
+        y = self.find(y)
+
+        if x == y:
+            return x
+
+        if self.size_dict[x] < self.size_dict[y]:
+            x, y = y, x
+
+        self.parent_dict[y] = x
+        self.size_dict[x] += self.size_dict[y]
+
+        return x
+
+    def groups(self):
+        """
+        Returns dictionary of lists of elements of disjoint sets by their representatives.
+        """
+
+        group_dict = collections.defaultdict(list)
+
+        for x in self.parent_dict:
+            group_dict[self.find(x)].append(x)
+
+        return group_dict
+
+
+def grouping_field_id_list(session=DBSession):
+    """
+    Gets ids of all fields of the 'Grouping Tag' data type, without the service registry.
+    """
+
+    gist_id_query = (
+        translation_gist_id_query('Grouping Tag', session, 'Service')
+            .limit(1)
+            .subquery())
+
+    return [
+
+        tuple(field_id)
+
+        for field_id in session
+
+            .query(
+                dbField.client_id,
+                dbField.object_id)
+
+            .filter(
+                dbField.data_type_translation_gist_client_id == gist_id_query.c.client_id,
+                dbField.data_type_translation_gist_object_id == gist_id_query.c.object_id)
+
+            .all()]
+
+
+def grouping_field_id_set(session=DBSession):
+    """
+    Gets set of ids of fields of the 'Grouping Tag' data type, e.g. of the etymology field, via the service
+    registry.
+    """
+
+    def f():
+
+        return (
+            frozenset(grouping_field_id_list(session)) or None)
+
+    return (
+
+        service_registry.get(
+            ('grouping_field_set',), f, session) or frozenset())
+
+
+def entry_group_lock(session):
+    """
+    Locks entry groups until the end of the transaction, so that concurrent group updates do not
+    interleave.
+    """
+
+    session.execute(
+        select([func.pg_advisory_xact_lock(entry_group_lock_key)]))
+
+
+def update_entry_groups(field_entry_id_list, session=DBSession):
+    """
+    Updates entry groups of grouping tag fields after tag entities of lexical entries are created or
+    restored, given a list of (field_id, entry_id) pairs.
+
+    Entries connected through tags of the given entries are merged into a single group together with
+    all groups they belong to: entries without a group are added to the largest of the groups, and the
+    rest of the groups are relabelled with its id, i.e. the entry group table is a union-find forest with
+    union by size and fully compressed paths.
+
+    Groups are not split when tags are deleted, so a group can contain several actually disconnected
+    groups, and connected groups are always found through tags in group data, see entry_group_data().
+    """
+
+    field_dict = collections.defaultdict(set)
+
+    for field_id, entry_id in field_entry_id_list:
+        field_dict[tuple(field_id)].add(tuple(entry_id))
+
+    if not field_dict:
+        return
+
+    entry_group_lock(session)
+
+    for field_id, entry_id_set in field_dict.items():
+
+        # Entries with the tags of the given entries.
+
+        field_condition = (
+
+            and_(
+                dbEntity.field_client_id == field_id[0],
+                dbEntity.field_object_id == field_id[1],
+                dbEntity.marked_for_deletion == False))
+
+        tag_query = (
+
+            session
+
+                .query(
+                    dbEntity.content)
+
+                .filter(
+                    field_condition,
+
+                    tuple_(
+                        dbEntity.parent_client_id,
+                        dbEntity.parent_object_id)
+
+                        .in_(
+                            ids_to_id_query(entry_id_set))))
+
+        tag_row_list = (
+
+            session
+
+                .query(
+                    dbEntity.parent_client_id,
+                    dbEntity.parent_object_id,
+                    dbEntity.content)
+
+                .filter(
+                    field_condition,
+                    dbEntity.content.in_(tag_query))
+
+                .all())
+
+        union_find = Union_Find()
+
+        for entry_id in entry_id_set:
+            union_find.find(entry_id)
+
+        for entry_client_id, entry_object_id, tag in tag_row_list:
+            union_find.union((entry_client_id, entry_object_id), tag)
+
+        entry_id_list = [
+            x for x in union_find.parent_dict
+            if isinstance(x, tuple)]
+
+        # Current groups of the entries, joined in the union-find forest as ('group', id) elements.
+
+        group_condition = (
+
+            and_(
+                dbEntryGroupData.field_client_id == field_id[0],
+                dbEntryGroupData.field_object_id == field_id[1]))
+
+        group_row_list = (
+
+            session
+
+                .query(
+                    dbEntryGroupData.entry_client_id,
+                    dbEntryGroupData.entry_object_id,
+                    dbEntryGroupData.group_id)
+
+                .filter(
+                    group_condition,
+
+                    tuple_(
+                        dbEntryGroupData.entry_client_id,
+                        dbEntryGroupData.entry_object_id)
+
+                        .in_(
+                            ids_to_id_query(entry_id_list)))
+
+                .all())
+
+        grouped_id_set = set()
+
+        for entry_client_id, entry_object_id, group_id in group_row_list:
+
+            entry_id = (entry_client_id, entry_object_id)
+
+            grouped_id_set.add(entry_id)
+            union_find.union(entry_id, ('group', group_id))
+
+        group_size_dict = {}
+
+        if group_row_list:
+
+            group_size_dict = dict(
+
+                session
+
+                    .query(
+                        dbEntryGroupData.group_id,
+                        func.count())
+
+                    .filter(
+                        group_condition,
+                        dbEntryGroupData.group_id.in_(
+                            set(group_id for _, _, group_id in group_row_list)))
+
+                    .group_by(
+                        dbEntryGroupData.group_id)
+
+                    .all())
+
+        # Merging groups.
+
+        for element_list in union_find.groups().values():
+
+            group_id_list = [
+                x[1] for x in element_list
+                if isinstance(x, tuple) and x[0] == 'group']
+
+            new_id_list = [
+                x for x in element_list
+                if isinstance(x, tuple) and x[0] != 'group' and x not in grouped_id_set]
+
+            if group_id_list:
+
+                group_id = max(
+                    group_id_list,
+                    key = lambda group_id: (group_size_dict[group_id], -group_id))
+
+                relabel_id_list = [
+                    x for x in group_id_list
+                    if x != group_id]
+
+                if relabel_id_list:
+
+                    session.execute(
+
+                        dbEntryGroupData.__table__
+                            .update()
+                            .where(and_(
+                                group_condition,
+                                dbEntryGroupData.group_id.in_(relabel_id_list)))
+                            .values(group_id = group_id))
+
+            elif new_id_list:
+
+                group_id = (
+                    session.execute(EntryGroupIdSequence))
+
+            else:
+                continue
+
+            for index in range(0, len(new_id_list), entry_group_chunk_size):
+
+                session.execute(
+
+                    dbEntryGroupData.__table__
+                        .insert()
+                        .values([
+
+                            {'field_client_id': field_id[0],
+                                'field_object_id': field_id[1],
+                                'entry_client_id': entry_id[0],
+                                'entry_object_id': entry_id[1],
+                                'group_id': group_id}
+
+                            for entry_id in new_id_list[index : index + entry_group_chunk_size]]))
+
+
+def defer_entry_groups(field_entry_id_list, session=DBSession):
+    """
+    Schedules update of entry groups, see update_entry_groups(), until the end of the session's
+    transaction or until entry groups are read in it, see flush_entry_groups(), so that the entry group
+    lock is held only briefly and not for the rest of the transaction.
+    """
+
+    if not field_entry_id_list:
+        return
+
+    if isinstance(session, scoped_session):
+        session = session()
+
+    session.info.setdefault(
+        'entry_group_list', []).extend(field_entry_id_list)
+
+
+def defer_entity_groups(entity_list, session=DBSession):
+    """
+    Schedules update of entry groups for non-deleted tag entities of grouping tag fields among the given
+    objects, used on flush and for entities saved bypassing flush, e.g. via bulk_save_objects().
+    """
+
+    entity_list = [
+
+        obj
+        for obj in entity_list
+
+        if isinstance(obj, dbEntity) and
+            not obj.marked_for_deletion and
+            obj.parent_client_id is not None]
+
+    if not entity_list:
+        return
+
+    field_id_set = (
+        grouping_field_id_set(session))
+
+    defer_entry_groups(
+
+        [((entity.field_client_id, entity.field_object_id),
+            (entity.parent_client_id, entity.parent_object_id))
+
+            for entity in entity_list
+            if (entity.field_client_id, entity.field_object_id) in field_id_set],
+
+        session)
+
+
+def flush_entry_groups(session=DBSession):
+    """
+    Performs entry group updates scheduled in the session's transaction, if there are any.
+    """
+
+    if isinstance(session, scoped_session):
+        session = session()
+
+    if 'entry_group_list' not in session.info:
+        return
+
+    # Pending tag entities, if any, are scheduled on flush too.
+
+    session.flush()
+
+    field_entry_id_list = (
+        session.info.pop('entry_group_list', None))
+
+    if field_entry_id_list:
+
+        update_entry_groups(
+            field_entry_id_list, session)
+
+
+@event.listens_for(Session, 'after_flush')
+def entry_group_after_flush(session, flush_context):
+    """
+    Schedules update of entry groups after tag entities are created, changed or restored.
+    """
+
+    defer_entity_groups(
+        itertools.chain(session.new, session.dirty),
+        session)
+
+
+@event.listens_for(Session, 'before_commit')
+def entry_group_before_commit(session):
+
+    session.flush()
+    flush_entry_groups(session)
+
+
+@event.listens_for(Session, 'after_rollback')
+def entry_group_after_rollback(session):
+
+    session.info.pop('entry_group_list', None)
+
+
+def entry_group_data(
+    field_id,
+    entry_id_list,
+    accept = True,
+    publish = True,
+    check_entry = True,
+    session = DBSession):
+    """
+    Gets tags of all entries of entry groups of the given entries, see update_entry_groups(), with
+    accept / publish conditions on tag entities, if they are not None, and with a condition on entries not
+    being deleted, if required.
+
+    Returns set of ids of the given entries which have entry groups, dictionary of tag sets by entry ids
+    and dictionary of entry id sets by tags.
+    """
+
+    flush_entry_groups(session)
+
+    entry_tag_dict = collections.defaultdict(set)
+    tag_entry_dict = collections.defaultdict(set)
+
+    group_condition = (
+
+        and_(
+            dbEntryGroupData.field_client_id == field_id[0],
+            dbEntryGroupData.field_object_id == field_id[1]))
+
+    group_row_list = (
+
+        session
+
+            .query(
+                dbEntryGroupData.entry_client_id,
+                dbEntryGroupData.entry_object_id,
+                dbEntryGroupData.group_id)
+
+            .filter(
+                group_condition,
+
+                tuple_(
+                    dbEntryGroupData.entry_client_id,
+                    dbEntryGroupData.entry_object_id)
+
+                    .in_(
+                        ids_to_id_query(entry_id_list)))
+
+            .all())
+
+    if not group_row_list:
+        return set(), entry_tag_dict, tag_entry_dict
+
+    found_id_set = set(
+        (entry_client_id, entry_object_id)
+        for entry_client_id, entry_object_id, _ in group_row_list)
+
+    tag_query = (
+
+        session
+
+            .query(
+                dbEntity.parent_client_id,
+                dbEntity.parent_object_id,
+                dbEntity.content)
+
+            .filter(
+                group_condition,
+
+                dbEntryGroupData.group_id.in_(
+                    set(group_id for _, _, group_id in group_row_list)),
+
+                dbEntity.parent_client_id == dbEntryGroupData.entry_client_id,
+                dbEntity.parent_object_id == dbEntryGroupData.entry_object_id,
+                dbEntity.field_client_id == field_id[0],
+                dbEntity.field_object_id == field_id[1],
+                dbEntity.marked_for_deletion == False))
+
+    if accept is not None or publish is not None:
+
+        tag_query = tag_query.filter(
+            dbPublishingEntity.client_id == dbEntity.client_id,
+            dbPublishingEntity.object_id == dbEntity.object_id)
+
+        if accept is not None:
+            tag_query = tag_query.filter(dbPublishingEntity.accepted == accept)
+
+        if publish is not None:
+            tag_query = tag_query.filter(dbPublishingEntity.published == publish)
+
+    if check_entry:
+
+        tag_query = tag_query.filter(
+            dbLexicalEntry.client_id == dbEntity.parent_client_id,
+            dbLexicalEntry.object_id == dbEntity.parent_object_id,
+            dbLexicalEntry.marked_for_deletion == False)
+
+    for entry_client_id, entry_object_id, tag in tag_query.all():
+
+        entry_id = (entry_client_id, entry_object_id)
+
+        entry_tag_dict[entry_id].add(tag)
+        tag_entry_dict[tag].add(entry_id)
+
+    return found_id_set, entry_tag_dict, tag_entry_dict
+
+
+def linked_tags(tag_set, entry_tag_dict, tag_entry_dict):
+    """
+    Gathers tags and entries linked to the given tags, using data from entry_group_data().
+    """
+
+    tag_set = set(tag_set)
+    entry_set = set()
+
+    tag_list = list(tag_set)
+
+    while tag_list:
+
+        for entry_id in tag_entry_dict.get(tag_list.pop(), ()):
+
+            if entry_id in entry_set:
+                continue
+
+            entry_set.add(entry_id)
+
+            for tag in entry_tag_dict[entry_id]:
+
+                if tag not in tag_set:
+
+                    tag_set.add(tag)
+                    tag_list.append(tag)
+
+    return tag_set, entry_set
+
+
+def linked_group_list(
+    field_id,
+    entry_id_list,
+    publish = True,
+    accept = True,
+    session = DBSession):
+    """
+    Finds groups of lexical entries linked through a grouping tag field, as linked_group() PL/pgSQL
+    function does, for each of the given entries not already included in a previously found group.
+
+    Returns list of sets of entry ids.
+
+    Groups of all entries with entry groups are found with a single query, see entry_group_data(), groups
+    of other entries with tags, if any, with linked_group() calls.
+    """
+
+    entry_id_list = [
+        tuple(entry_id) for entry_id in entry_id_list]
+
+    if not entry_id_list:
+        return []
+
+    found_id_set, entry_tag_dict, tag_entry_dict = (
+
+        entry_group_data(
+            field_id,
+            entry_id_list,
+            accept = accept,
+            publish = publish,
+            session = session))
+
+    # Entries without entry groups usually just don't have tags.
+
+    tagged_id_set = set()
+
+    other_id_list = [
+        entry_id for entry_id in entry_id_list
+        if entry_id not in found_id_set]
+
+    if other_id_list:
+
+        tagged_id_set = set(
+
+            tuple(entry_id)
+
+            for entry_id in session
+
+                .query(
+                    dbEntity.parent_client_id,
+                    dbEntity.parent_object_id)
+
+                .filter(
+                    dbEntity.field_client_id == field_id[0],
+                    dbEntity.field_object_id == field_id[1],
+                    dbEntity.marked_for_deletion == False,
+
+                    tuple_(
+                        dbEntity.parent_client_id,
+                        dbEntity.parent_object_id)
+
+                        .in_(
+                            ids_to_id_query(other_id_list)))
+
+                .distinct()
+                .all())
+
+    entry_already_set = set()
+    group_list = []
+
+    for entry_id in entry_id_list:
+
+        if entry_id in entry_already_set:
+            continue
+
+        if entry_id not in found_id_set and entry_id not in tagged_id_set:
+
+            entry_id_set = {entry_id}
+
+        elif entry_id in found_id_set:
+
+            _, entry_id_set = (
+                linked_tags(entry_tag_dict.get(entry_id, ()), entry_tag_dict, tag_entry_dict))
+
+            entry_id_set.add(entry_id)
+
+        else:
+
+            row_list = (
+
+                session.execute(
+                    'select * from linked_group('
+                    ':field_client_id, :field_object_id, :client_id, :object_id, :publish, :accept)', {
+                        'field_client_id': field_id[0],
+                        'field_object_id': field_id[1],
+                        'client_id': entry_id[0],
+                        'object_id': entry_id[1],
+                        'publish': publish,
+                        'accept': accept})
+
+                .fetchall())
+
+            entry_id_set = set(
+                map(tuple, row_list))
+
+        entry_already_set.update(entry_id_set)
+        group_list.append(entry_id_set)
+
+    return group_list
+
+
+def rebuild_entry_groups(field_id_list=None, session=DBSession):
+    """
+    Rebuilds entry groups of grouping tag fields, by default of all of them, from scratch, so that each
+    group is exactly a group of entries connected through tags, returns number of groups by field ids.
+    """
+
+    if field_id_list is None:
+        field_id_list = grouping_field_id_list(session)
+
+    entry_group_lock(session)
+
+    group_count_dict = {}
+
+    for field_id in field_id_list:
+
+        union_find = Union_Find()
+
+        tag_query = (
+
+            session
+
+                .query(
+                    dbEntity.parent_client_id,
+                    dbEntity.parent_object_id,
+                    dbEntity.content)
+
+                .filter(
+                    dbEntity.field_client_id == field_id[0],
+                    dbEntity.field_object_id == field_id[1],
+                    dbEntity.marked_for_deletion == False)
+
+                .yield_per(
+                    entry_group_chunk_size))
+
+        for entry_client_id, entry_object_id, tag in tag_query:
+            union_find.union((entry_client_id, entry_object_id), tag)
+
+        session.execute(
+
+            dbEntryGroupData.__table__
+                .delete()
+                .where(and_(
+                    dbEntryGroupData.field_client_id == field_id[0],
+                    dbEntryGroupData.field_object_id == field_id[1])))
+
+        insert_list = []
+
+        group_list = [
+            [x for x in element_list if isinstance(x, tuple)]
+            for element_list in union_find.groups().values()]
+
+        for entry_id_list in group_list:
+
+            group_id = (
+                session.execute(EntryGroupIdSequence))
+
+            for entry_id in entry_id_list:
+
+                insert_list.append({
+                    'field_client_id': field_id[0],
+                    'field_object_id': field_id[1],
+                    'entry_client_id': entry_id[0],
+                    'entry_object_id': entry_id[1],
+                    'group_id': group_id})
+
+            if len(insert_list) >= entry_group_chunk_size:
+
+                session.execute(
+                    dbEntryGroupData.__table__.insert().values(insert_list))
+
+                insert_list = []
+
+        if insert_list:
+
+            session.execute(
+                dbEntryGroupData.__table__.insert().values(insert_list))
+
+        group_count_dict[field_id] = len(group_list)
+
+        log.debug(
+            f'\nentry groups of field {field_id}: {len(group_list)}')
+
+    return group_count_dict
+
+
+def check_entry_groups(field_id_list=None, session=DBSession):
+    """
+    Checks that each group of entries connected through tags of grouping tag fields, by default of all
+    of them, is included in a single entry group, returns number of inconsistent connected groups by
+    field ids.
+    """
+
+    if field_id_list is None:
+        field_id_list = grouping_field_id_list(session)
+
+    flush_entry_groups(session)
+
+    error_count_dict = {}
+
+    for field_id in field_id_list:
+
+        union_find = Union_Find()
+
+        tag_query = (
+
+            session
+
+                .query(
+                    dbEntity.parent_client_id,
+                    dbEntity.parent_object_id,
+                    dbEntity.content)
+
+                .filter(
+                    dbEntity.field_client_id == field_id[0],
+                    dbEntity.field_object_id == field_id[1],
+                    dbEntity.marked_for_deletion == False)
+
+                .yield_per(
+                    entry_group_chunk_size))
+
+        for entry_client_id, entry_object_id, tag in tag_query:
+            union_find.union((entry_client_id, entry_object_id), tag)
+
+        group_dict = {
+
+            (entry_client_id, entry_object_id): group_id
+
+            for entry_client_id, entry_object_id, group_id in session
+
+                .query(
+                    dbEntryGroupData.entry_client_id,
+                    dbEntryGroupData.entry_object_id,
+                    dbEntryGroupData.group_id)
+
+                .filter(
+                    dbEntryGroupData.field_client_id == field_id[0],
+                    dbEntryGroupData.field_object_id == field_id[1])
+
+                .yield_per(
+                    entry_group_chunk_size)}
+
+        error_count = 0
+
+        for element_list in union_find.groups().values():
+
+            group_id_set = set(
+                group_dict.get(x)
+                for x in element_list
+                if isinstance(x, tuple))
+
+            if len(group_id_set) != 1 or None in group_id_set:
+                error_count += 1
+
+        error_count_dict[field_id] = error_count
+
+    return error_count_dict
+
 
 def get_id_to_field_dict():
     dict_with_tuples = {k: tuple(v) for k, v in fields_static.items()}
@@ -36,6 +36,7 @@ from pyramid.view import view_config
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import joinedload
 from lingvodoc.views.v2.delete import real_delete_lexical_entry
+from lingvodoc.utils.search import find_all_tags, find_lexical_entries_by_tags
 from lingvodoc.utils.verification import check_client_id
 
 import logging
@@ -92,57 +93,6 @@ def have_tag(lex, tags, field_client_id, field_object_id):
     return bool([x for x in lex['contains'] if x['field_client_id'] == field_client_id and x['field_object_id'] == field_object_id and x['content'] in tags and x['published'] and x['accepted']])
 
 
-def find_lexical_entries_by_tags(tags, field_client_id, field_object_id, accepted):
-    result = DBSession.query(LexicalEntry) \
-        .join(LexicalEntry.entity) \
-        .join(Entity.publishingentity) \
-        .join(Entity.field) \
-        .filter(Entity.content.in_(tags),
-                Entity.marked_for_deletion == False,
-                Field.client_id == field_client_id,
-                Field.object_id == field_object_id)
-    if accepted:
-        result = result.filter(PublishingEntity.accepted == True)
-    result = result.all()
-    return result
-
-
-def find_all_tags(lexical_entry, field_client_id, field_object_id, accepted):
-    tag = None
-    for entity in lexical_entry.entity:
-        if not entity.marked_for_deletion and entity.field_client_id == field_client_id and entity.field_object_id == field_object_id:
-            if accepted:
-                if not entity.publishingentity.accepted:
-                    continue
-            tag = entity.content
-            break
-    if not tag:
-        return set()
-    else:
-        tags = {tag}
-        new_tags =  {tag}
-        while new_tags:
-            lexical_entries = find_lexical_entries_by_tags(new_tags, field_client_id, field_object_id, accepted)
-            new_tags = set()
-            for lex in lexical_entries:
-                entities = DBSession.query(Entity) \
-                    .join(Entity.field) \
-                    .join(Entity.publishingentity) \
-                    .filter(Entity.parent == lex,
-                            Field.client_id == field_client_id,
-                            Field.object_id == field_object_id,
-                            Entity.marked_for_deletion==False)
-                if accepted:
-                    entities = entities.filter(PublishingEntity.accepted == True)
-
-                entities = entities.all()
-                for entity in entities:
-                    if entity.content not in tags:
-                        tags.add(entity.content)
-                        new_tags.add(entity.content)
-        return tags
-
-
 @view_config(route_name='bulk_group_entities', renderer='json', request_method='POST')
 def bulk_group_entities(request):  # tested
     try:
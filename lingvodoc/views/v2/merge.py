@@ -22,8 +22,6 @@ from pyramid.httpexceptions import (
 
 # External imports.
 
-import pylev
-
 from pyramid.request import Request
 from pyramid.security import authenticated_userid
 from pyramid.view import view_config
@@ -738,28 +736,6 @@ def match_fields(entry_data_list, field_selection_list, threshold):
             if maybe_field_data is not None:
                 maybe_field_data[1].append(entity_data)
 
-    # Memoized computation of Levenshtein distance.
-
-    levenshtein_cache = {}
-
-    def levenshtein(string_a, string_b):
-        """
-        Computes Levenshtein distances with memoization.
-        """
-
-        if string_a > string_b:
-            string_a, string_b = string_b, string_a
-
-        result = levenshtein_cache.get((string_a, string_b))
-
-        if result is not None:
-            return result
-
-        result = pylev.levenshtein(string_a, string_b)
-        levenshtein_cache[(string_a, string_b)] = result
-
-        return result
-
     # Processing entity data by fields and fields selections.
 
     count_dict = collections.Counter()
@@ -815,18 +791,16 @@ def match_fields(entry_data_list, field_selection_list, threshold):
                 log.debug('entry_feature_dict:\n' + pprint.pformat(entry_feature_dict))
                 log.debug('feature_entry_dict:\n' + pprint.pformat(feature_entry_dict))
 
-                # At the moment we have to compute N^2/2 Levenshtein distances. If such computations will be
-                # found too time consuming, we can try optimized Levenshtein distance computation with
-                # prefix sharing and lazy evaluations.
+                # Instead of computing N^2/2 Levenshtein distances we check only pairs of features sharing a
+                # deletion variant, with distance computation bounded by the limit, see levenshtein_pairs().
 
                 levenshtein_dict = collections.defaultdict(list)
                 feature_list = sorted(feature_entry_dict.keys())
 
-                for index, feature_a in enumerate(feature_list):
-                    for feature_b in feature_list[index + 1:]:
+                for feature_a, feature_b in (
+                    merge_perspectives.levenshtein_pairs(feature_list, limit)):
 
-                        if levenshtein(feature_a, feature_b) <= limit:
-                            levenshtein_dict[feature_a].append(feature_b)
+                    levenshtein_dict[feature_a].append(feature_b)
 
                 log.debug('feature_list:\n' + pprint.pformat(feature_list))
                 log.debug('levenshtein_dict:\n' + pprint.pformat(levenshtein_dict))
@@ -4,6 +4,7 @@
 import base64
 import bisect
 import collections
+import concurrent.futures
 import configparser
 import csv
 import datetime
@@ -24,6 +25,7 @@ import pprint
 import re
 from shutil import copyfileobj
 import sndhdr
+import sqlite3
 import string
 import subprocess
 import sys
@@ -38,9 +40,12 @@ import urllib.parse
 
 import warnings
 import zipfile
+import zlib
 
 # External imports.
 
+import billiard
+
 import cchardet as chardet
 
 # So that matplotlib does not require display stuff, in particular, tkinter. See e.g. https://
@@ -111,7 +116,317 @@ log = logging.getLogger(__name__)
 Current cache version
 if it's changed all the cached phonologies will be refreshed
 """
-cache_version = '20240924'
+cache_version = '20261018'
+
+
+#: Default size limit of a perspective's phonology cache in bytes, can be set by the
+#: 'phonology_cache_size' storage setting.
+cache_size_limit = 1 << 30
+
+#: Number of cache entries accumulated in memory before they are written in a single transaction.
+cache_write_batch_size = 64
+
+
+class SqliteCache(object):
+    """
+    Phonology results cache of a perspective, an SQLite database under storage['path']/phonology with
+    one row per sound/markup cache key.
+
+    Each row is versioned with cache_version, outdated rows are treated as missing and are removed on
+    flush. Rows are written in transactions, so concurrent phonology computations on the same
+    perspective add to the cache instead of overwriting each other's results. If the cache grows over
+    the size limit, least recently used rows are evicted.
+    """
+
+    def __init__(self, storage, perspective_id, debug_flag = False):
+
+        storage_dir = path.join(storage['path'], 'phonology')
+        path_prefix = path.join(storage_dir, f'{perspective_id[0]}_{perspective_id[1]}')
+
+        self.sqlite_path = path_prefix + '.sqlite'
+        self.pickle_path = path_prefix + '.pickle.gz'
+
+        makedirs(storage_dir, exist_ok = True)
+
+        self.size_limit = int(storage.get('phonology_cache_size', cache_size_limit))
+        self.debug_flag = debug_flag
+
+        try:
+            self.connection = self.connect()
+
+        except sqlite3.DatabaseError as exception:
+
+            # Cache is not essential, so if we have a damaged cache file, we just start a new one.
+
+            log.warning(
+                f'phonology cache {self.sqlite_path}: {exception}, recreating')
+
+            for suffix in ('', '-wal', '-shm'):
+
+                if path.exists(self.sqlite_path + suffix):
+                    os.remove(self.sqlite_path + suffix)
+
+            self.connection = self.connect()
+
+        self.pending_dict = {}
+        self.access_set = set()
+
+        self.hit_count = 0
+        self.miss_count = 0
+        self.write_count = 0
+        self.evict_count = 0
+
+        self.import_pickle()
+
+    def connect(self):
+        """
+        Opens cache database, creating it if required.
+        """
+
+        connection = (
+
+            sqlite3.connect(
+                self.sqlite_path, timeout = 60, isolation_level = None))
+
+        connection.execute('pragma journal_mode = wal')
+        connection.execute('pragma synchronous = normal')
+
+        connection.execute('''
+            create table if not exists cache (
+                key text primary key,
+                version text not null,
+                value blob not null,
+                size integer not null,
+                access_time real not null)''')
+
+        connection.execute(
+            'create index if not exists cache_access_time on cache (access_time)')
+
+        return connection
+
+    def import_pickle(self):
+        """
+        Imports entries of a previous single-file gzip-pickle cache of the perspective, if we have one,
+        and removes it.
+        """
+
+        if not path.exists(self.pickle_path):
+            return
+
+        try:
+            with gzip.open(self.pickle_path, 'rb') as pickle_file:
+                cache_object = pickle.load(pickle_file)
+
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            cache_object = None
+
+        if (type(cache_object) is dict and
+            cache_object.get('__version__', '') >= cache_version):
+
+            for cache_key, cache_value in cache_object.items():
+
+                if (cache_key != '__version__' and
+                    cache_key not in self.pending_dict and
+                    self.get_row(cache_key) is None):
+
+                    self.pending_dict[cache_key] = cache_value
+
+            self.write()
+
+        os.remove(self.pickle_path)
+
+    def get_row(self, cache_key):
+        """
+        Gets cached value of a key as stored in the database, None if it is missing or outdated.
+        """
+
+        row = (
+
+            self.connection.execute(
+                'select version, value from cache where key = ?',
+                (cache_key,))
+
+                .fetchone())
+
+        if row is None or row[0] < cache_version:
+            return None
+
+        return row[1]
+
+    def contains(self, cache_key):
+        """
+        Checks if we have a current cached value of a key, without loading it and without counting it as a
+        cache hit or miss.
+        """
+
+        if cache_key in self.pending_dict:
+            return True
+
+        row = (
+
+            self.connection.execute(
+                'select 1 from cache where key = ? and version >= ?',
+                (cache_key, cache_version))
+
+                .fetchone())
+
+        return row is not None
+
+    def get(self, cache_key):
+
+        if cache_key in self.pending_dict:
+
+            self.hit_count += 1
+            return self.pending_dict[cache_key]
+
+        value_bytes = self.get_row(cache_key)
+
+        if value_bytes is None:
+
+            self.miss_count += 1
+            return None
+
+        try:
+            cache_value = pickle.loads(zlib.decompress(value_bytes))
+
+        except Exception as exception:
+
+            log.warning(
+                f'phonology cache {self.sqlite_path}, key {repr(cache_key)}: {exception}')
+
+            self.miss_count += 1
+            return None
+
+        self.hit_count += 1
+        self.access_set.add(cache_key)
+
+        return cache_value
+
+    def set(self, cache_key, input_data):
+
+        self.pending_dict[cache_key] = input_data
+
+        if len(self.pending_dict) >= cache_write_batch_size:
+            self.write()
+
+    def write(self):
+        """
+        Writes accumulated entries and access times of used entries in a single transaction.
+        """
+
+        if not self.pending_dict and not self.access_set:
+            return
+
+        access_time = time.time()
+        row_list = []
+
+        for cache_key, cache_value in self.pending_dict.items():
+
+            try:
+                value_bytes = zlib.compress(pickle.dumps(cache_value))
+
+            except Exception as exception:
+
+                log.warning(
+                    f'phonology cache {self.sqlite_path}, key {repr(cache_key)}: {exception}')
+
+                continue
+
+            row_list.append(
+                (cache_key, cache_version, value_bytes, len(value_bytes), access_time))
+
+        with self.connection:
+
+            self.connection.execute('begin immediate')
+
+            self.connection.executemany(
+                'insert or replace into cache values (?, ?, ?, ?, ?)',
+                row_list)
+
+            self.connection.executemany(
+                'update cache set access_time = ? where key = ?',
+                ((access_time, cache_key) for cache_key in self.access_set))
+
+        self.write_count += len(row_list)
+
+        self.pending_dict = {}
+        self.access_set = set()
+
+    def evict(self):
+        """
+        Removes outdated entries, and, if the cache is over its size limit, least recently used entries
+        until it is at most 3/4 of the limit.
+        """
+
+        with self.connection:
+
+            self.connection.execute('begin immediate')
+
+            self.evict_count += (
+
+                self.connection.execute(
+                    'delete from cache where version < ?',
+                    (cache_version,))
+
+                    .rowcount)
+
+            total_size, = (
+
+                self.connection.execute(
+                    'select coalesce(sum(size), 0) from cache')
+
+                    .fetchone())
+
+            if total_size <= self.size_limit:
+                return
+
+            evict_key_list = []
+
+            for cache_key, size in self.connection.execute(
+                'select key, size from cache order by access_time'):
+
+                if total_size <= self.size_limit * 3 // 4:
+                    break
+
+                evict_key_list.append((cache_key,))
+                total_size -= size
+
+            self.connection.executemany(
+                'delete from cache where key = ?',
+                evict_key_list)
+
+            self.evict_count += len(evict_key_list)
+
+    def stats(self):
+
+        return (
+
+            '{} hit{}, {} miss{}, {} written, {} evicted'.format(
+                self.hit_count, '' if self.hit_count == 1 else 's',
+                self.miss_count, '' if self.miss_count == 1 else 'es',
+                self.write_count,
+                self.evict_count))
+
+    def flush(self):
+
+        self.write()
+        self.evict()
+
+        log.info(
+            f'phonology cache {self.sqlite_path}: {self.stats()}')
+
+    def close(self):
+        """
+        Flushes the cache and closes its database connection, the cache can't be used afterwards.
+        """
+
+        if self.connection is None:
+            return
+
+        self.flush()
+
+        self.connection.close()
+        self.connection = None
 
 
 def bessel_i0_approximation(x):
@@ -119,31 +434,38 @@ def bessel_i0_approximation(x):
     Computes approximate value of the Bessel function I_0 according to formulas in Praat source code, file
     num/Num.cpp:185, function NUMbessel_i0_f, which in turn cites Abramowicz & Stegun, "Handbook of
     Mathematical Functions, With Formulas, Graphs, and Mathematical Tables", p. 378.
+
+    Accepts either a scalar or an array of arguments; in the latter case values are computed elementwise
+    and returned as a float64 array of the same shape.
     """
 
-    if x < 0:
-        return bessel_i0_approximation(-x)
+    x = numpy.abs(numpy.asarray(x, dtype = numpy.float64))
 
     # Argument is in [0, 3.75), using formula 9.8.1.
 
-    elif x < 3.75:
+    t = x / 3.75
 
-        t = x / 3.75
-        t2 = t * t
+    small_value = (
 
-        return 1.0 + t * (3.5156229 + t * (3.0899424 +
-            t * (1.2067492 + t * (0.2659732 + t * (0.0360768 + t * 0.0045813)))));
+        1.0 + t * (3.5156229 + t * (3.0899424 +
+            t * (1.2067492 + t * (0.2659732 + t * (0.0360768 + t * 0.0045813))))))
 
-    # Argument is in [3.75, +infinity), using formula 9.8.2.
+    # Argument is in [3.75, +infinity), using formula 9.8.2; clamping the argument from below so that
+    # the formula is well-defined for all elements, values for small arguments are discarded anyway.
 
-    else:
-        t = x / 3.75
+    x_large = numpy.maximum(x, 3.75)
+    t = x_large / 3.75
 
-        return math.exp(x) / math.sqrt(x) * (0.39894228 + t * (0.01328592 + t * (0.00225319 +
+    large_value = (
+
+        numpy.exp(x_large) / numpy.sqrt(x_large) * (0.39894228 + t * (0.01328592 + t * (0.00225319 +
             t * (-0.00157565 + t * (0.00916281 + t * (-0.02057706 + t * (0.02635537 + t * (-0.01647633 +
-            t * 0.00392377))))))))
+            t * 0.00392377)))))))))
+
+    result = numpy.where(x < 3.75, small_value, large_value)
 
-    raise Exception('Unimplemented.')
+    return (
+        float(result) if result.ndim == 0 else result)
 
 
 #: Dictionary used for memoization of Kaiser window function computation.
@@ -152,7 +474,8 @@ kaiser_window_dict = dict()
 
 def get_kaiser_window(half_window_size):
     """
-    Computes (2N + 1)-sample Kaiser window, where N is a half window size in samples.
+    Computes (2N + 1)-sample Kaiser window, where N is a half window size in samples, as a float64 array,
+    returns it together with its sum.
 
     Employs memoization.
     """
@@ -164,14 +487,21 @@ def get_kaiser_window(half_window_size):
 
     pi_alpha = 2 * math.pi ** 2 + 0.5
 
-    window_list = [
-        bessel_i0_approximation(pi_alpha * math.sqrt(1 - (i / half_window_size) ** 2))
-            for i in range(-half_window_size, half_window_size + 1)]
+    ratio_array = (
+
+        numpy.arange(
+            -half_window_size, half_window_size + 1, dtype = numpy.float64)
+
+            / half_window_size)
+
+    window_array = (
+        bessel_i0_approximation(pi_alpha * numpy.sqrt(1 - ratio_array ** 2)))
 
-    window_sum = sum(window_list)
+    window_array.flags.writeable = False
+    window_sum = float(window_array.sum())
 
-    kaiser_window_dict[half_window_size] = (window_list, window_sum)
-    return (window_list, window_sum)
+    kaiser_window_dict[half_window_size] = (window_array, window_sum)
+    return (window_array, window_sum)
 
 
 #: Dictionary used for memoization of Gaussian window function computation.
@@ -180,7 +510,8 @@ gaussian_window_dict = dict()
 
 def get_gaussian_window(window_size):
     """
-    Computes (2N + 1)-sample Gaussian window, where N is a half window size in samples.
+    Computes (2N + 1)-sample Gaussian window, where N is a half window size in samples, as a float64
+    array.
 
     Employs memoization.
     """
@@ -194,63 +525,94 @@ def get_gaussian_window(window_size):
     edge = math.exp(-12)
     edge_one_minus = 1.0 - edge
 
-    window_list = [
-        (math.exp(-48 * ((i - middle) / (window_size + 1)) ** 2) - edge) / edge_one_minus
-            for i in range(1, window_size + 1)]
+    index_array = (
+        numpy.arange(1, window_size + 1, dtype = numpy.float64))
 
-    gaussian_window_dict[window_size] = window_list
-    return window_list
+    window_array = (
+        (numpy.exp(-48 * ((index_array - middle) / (window_size + 1)) ** 2) - edge) / edge_one_minus)
+
+    window_array.flags.writeable = False
+
+    gaussian_window_dict[window_size] = window_array
+    return window_array
 
 
 def burg(sample_list, coefficient_number):
     """
-    Computes Linear Prediction coefficients via Burg method from a list of samples.
+    Computes Linear Prediction coefficients via Burg method from a list or an array of samples.
+
+    Returns a0 and a float64 array of coefficients.
     """
 
-    p = sum(sample ** 2 for sample in sample_list)
-    a0 = p / len(sample_list)
+    sample_array = numpy.asarray(sample_list, dtype = numpy.float64)
+    sample_count = len(sample_array)
 
-    b1 = sample_list[:len(sample_list) - 1]
-    b2 = sample_list[1:]
+    a0 = float(numpy.dot(sample_array, sample_array)) / sample_count
 
-    aa = [0.0 for i in range(coefficient_number)]
-    coefficient_list = [0.0 for i in range(coefficient_number)]
+    b1 = sample_array[:-1].copy()
+    b2 = sample_array[1:].copy()
+
+    aa = numpy.zeros(coefficient_number)
+    coefficient_array = numpy.zeros(coefficient_number)
 
     for i in range(coefficient_number):
 
-        numerator = 0.0
-        denominator = 0.0
+        # Forward and backward prediction errors are shortened by one sample on each iteration.
+
+        length = sample_count - i - 1
+
+        b1_view = b1[:length]
+        b2_view = b2[:length]
 
-        for j in range(len(sample_list) - i - 1):
-            numerator += b1[j] * b2[j]
-            denominator += b1[j] ** 2 + b2[j] **2
+        numerator = float(numpy.dot(b1_view, b2_view))
 
-        coefficient_list[i] = 2.0 * numerator / denominator
-        a0 *= 1.0 - coefficient_list[i] ** 2
+        denominator = (
+            float(numpy.dot(b1_view, b1_view)) + float(numpy.dot(b2_view, b2_view)))
 
-        for j in range(i):
-            coefficient_list[j] = aa[j] - coefficient_list[i] * aa[i - j - 1]
+        # Python float division, so that zero denominator raises ZeroDivisionError as before.
 
-        if i < coefficient_number:
+        coefficient = 2.0 * numerator / denominator
 
-            for j in range(i + 1):
-                aa[j] = coefficient_list[j]
+        coefficient_array[i] = coefficient
+        a0 *= 1.0 - coefficient ** 2
 
-            for j in range(len(sample_list) - i - 2):
-                b1[j] -= aa[i] * b2[j]
-                b2[j] = b2[j + 1] - aa[i] * b1[j + 1]
+        coefficient_array[:i] = aa[:i] - coefficient * aa[:i][::-1]
+        aa[:i + 1] = coefficient_array[:i + 1]
 
-    return a0, coefficient_list
+        # Both updates use values from the previous iteration, so they can be done on whole arrays.
+
+        length -= 1
+
+        b1_next = b1[:length] - coefficient * b2[:length]
+        b2[:length] = b2[1 : length + 1] - coefficient * b1[1 : length + 1]
+        b1[:length] = b1_next
+
+    return a0, coefficient_array
+
+
+def evaluate_polynomial(c_array, value_array):
+    """
+    Evaluates polynomial with coefficients given from the highest degree to the lowest at each value of
+    an array via Horner's method.
+    """
+
+    result = numpy.zeros_like(value_array)
+
+    for c in c_array:
+        result = result * value_array + c
+
+    return result
 
 
 def compute_formants(sample_list, nyquist_frequency):
     """
-    Computes formants of an audio sample.
+    Computes formants of an audio sample given as a list or an array of samples.
     """
 
-    sample_list = [sample * weight
-        for sample, weight in zip(sample_list,
-            get_gaussian_window(len(sample_list)))]
+    sample_array = (
+
+        numpy.asarray(sample_list, dtype = numpy.float64) *
+            get_gaussian_window(len(sample_list)))
 
     # Computing Linear Prediction coefficients via Burg method, number of coefficients is twice the
     # number of formants we want to detect (hence 2 * 5 = 10).
@@ -260,75 +622,83 @@ def compute_formants(sample_list, nyquist_frequency):
     # characteristic polynomial, see https://en.wikipedia.org/wiki/Autoregressive_model. We then find
     # the roots of this polynomial.
 
-    a0, coefficient_list = burg(sample_list, 10)
+    a0, coefficient_array = burg(sample_array, 10)
 
-    polynomial = numpy.polynomial.Polynomial([1.0] + [-c for c in coefficient_list])
-    root_list = polynomial.roots()
+    polynomial = numpy.polynomial.Polynomial(numpy.concatenate(([1.0], -coefficient_array)))
+    root_array = polynomial.roots().astype(numpy.complex128)
 
     # Finding better root approximations via Newton-Raphson iteration (see https://en.wikipedia.org/
-    # wiki/Newton's_method).
-    #
-    # NOTE: profiling shows that instead of using numpy's polynomial evaluation a la 'polynomial(
-    # root_list[0])' it is better to use our own Horner's method implementation.
+    # wiki/Newton's_method), all roots at once, each root is refined while its residual decreases.
 
-    polynomial_list = [-c for c in reversed(coefficient_list)] + [1.0]
-    derivative_list = [c * (10 - i) for i, c in enumerate(polynomial_list)]
+    polynomial_array = numpy.concatenate((-coefficient_array[::-1], [1.0]))
+    derivative_array = polynomial_array[:-1] * numpy.arange(10, 0, -1)
 
-    def evaluate(c_list, value):
-        result = 0.0
+    previous_array = root_array
+    previous_delta = numpy.abs(evaluate_polynomial(polynomial_array, previous_array))
 
-        for c in c_list:
-            result = result * value + c
+    active_mask = numpy.ones(len(root_array), dtype = bool)
 
-        return result
+    while active_mask.any():
 
-    better_root_list = []
-    better_root_index = 0
+        previous = previous_array[active_mask]
 
-    # Processing all roots.
+        current = (
+            previous - evaluate_polynomial(polynomial_array, previous) /
+                evaluate_polynomial(derivative_array, previous))
 
-    while better_root_index < len(root_list):
+        current_delta = numpy.abs(evaluate_polynomial(polynomial_array, current))
 
-        previous = root_list[better_root_index]
-        previous_delta = abs(evaluate(polynomial_list, previous))
+        better_mask = current_delta < previous_delta[active_mask]
 
-        current = previous - evaluate(polynomial_list, previous) / evaluate(derivative_list, previous)
-        current_delta = abs(evaluate(polynomial_list, current))
+        active_index = numpy.flatnonzero(active_mask)
+        better_index = active_index[better_mask]
 
-        while current_delta < previous_delta:
+        previous_array[better_index] = current[better_mask]
+        previous_delta[better_index] = current_delta[better_mask]
 
-            previous = current
-            previous_delta = current_delta
+        active_mask[active_index[~better_mask]] = False
+
+    # If it is a complex root, the next one is just its complex conjugate.
+
+    better_root_list = []
+    better_root_index = 0
 
-            current = previous - evaluate(polynomial_list, previous) / evaluate(derivative_list, previous)
-            current_delta = abs(evaluate(polynomial_list, current))
+    while better_root_index < len(previous_array):
 
-        # If it is a complex root, the next one is just its complex conjugate.
+        root = previous_array[better_root_index]
 
-        better_root_list.append(previous)
+        better_root_list.append(root)
         better_root_index += 1
 
-        if abs(previous.imag) > 0:
+        if abs(root.imag) > 0:
 
-            better_root_list.append(previous.conjugate())
+            better_root_list.append(root.conjugate())
             better_root_index += 1
 
+    better_root_array = numpy.array(better_root_list, dtype = numpy.complex128)
+
     # Moving all roots into the unit circle. If a root is outside, we replace it with reciprocal of its
     # conjugate, reflecting it about the real line and projecting it inside the unit circle. Then we
     # find formants by looking at roots above the real line.
 
-    formant_list = []
+    outside_mask = numpy.abs(better_root_array) > 1.0
+
+    better_root_array[outside_mask] = (
+        1.0 / better_root_array[outside_mask].conjugate())
 
-    for root in better_root_list:
+    better_root_array = (
+        better_root_array[better_root_array.imag >= 0])
 
-        if abs(root) > 1.0:
-            root = 1.0 / root.conjugate()
+    frequency_array = (
 
-        if root.imag >= 0:
-            frequency = abs(math.atan2(root.imag, root.real)) * nyquist_frequency / math.pi
+        numpy.abs(numpy.arctan2(better_root_array.imag, better_root_array.real)) *
+            nyquist_frequency / math.pi)
 
-            if frequency >= 50 and frequency <= nyquist_frequency - 50:
-                formant_list.append(frequency)
+    formant_list = (
+
+        frequency_array[
+            (frequency_array >= 50) &
+            (frequency_array <= nyquist_frequency - 50)].tolist())
 
     # Returning computed formants, from lowest to highest.
 
@@ -439,192 +809,461 @@ def pitch_path_finder(
         raise RuntimeError("Pitch path not found.")
 
 
-# Compute pitch frames
-def sound_into_pitch_frame(
-        pitchFrame, t, pitchFloor,
+#: Number of pitch frames processed at once by sound_into_pitch(), limits memory used by frame arrays.
+pitch_frame_batch_size = 64
+
+
+def spline_segment_value(c, segment_array, frame_array, u_array):
+    """
+    Evaluates batched cubic spline given by its piecewise polynomial coefficients of shape (4,
+    segment_count, frame_count), see scipy.interpolate.PPoly, for each triple of segment index, frame
+    index and argument offset from the beginning of the segment.
+    """
+
+    c_array = c[:, segment_array, frame_array]
+
+    return (
+        ((c_array[0] * u_array + c_array[1]) * u_array + c_array[2]) * u_array + c_array[3])
+
+
+def spline_value(c, frame_array, x_array):
+    """
+    Evaluates batched cubic spline with knots at 0, 1, 2, ... at given arguments for given frames,
+    arguments outside of knot range are extrapolated from the first / last segments like CubicSpline does.
+    """
+
+    segment_array = (
+
+        numpy.clip(
+            numpy.floor(x_array).astype(numpy.int64), 0, c.shape[1] - 1))
+
+    return (
+        spline_segment_value(c, segment_array, frame_array, x_array - segment_array))
+
+
+def spline_maximum(c, frame_array, x_array, xatol = 1e-5, maxiter = 500):
+    """
+    Finds maximums of batched cubic spline with knots at 0, 1, 2, ... on intervals [x - 1, x + 1], with
+    spline values computed in closed form from its coefficients.
+
+    Uses the same bounded Brent's method as scipy.optimize.minimize_scalar(method = 'bounded') does, but
+    for all intervals at once, each interval's iteration stops when it converges.
+
+    Returns arrays of arguments and values of maximums.
+    """
+
+    def f(x):
+        return -spline_value(c, frame_array, x)
+
+    sqrt_eps = math.sqrt(2.2e-16)
+    golden_mean = 0.5 * (3.0 - math.sqrt(5.0))
+
+    a = x_array - 1.0
+    b = x_array + 1.0
+
+    fulc = a + golden_mean * (b - a)
+    nfc, xf = fulc, fulc
+
+    rat = numpy.zeros(len(x_array))
+    e = numpy.zeros(len(x_array))
+
+    fx = f(xf)
+    ffulc = fnfc = fx
+
+    xm = 0.5 * (a + b)
+    tol1 = sqrt_eps * numpy.abs(xf) + xatol / 3.0
+    tol2 = 2.0 * tol1
+
+    active = numpy.abs(xf - xm) > (tol2 - 0.5 * (b - a))
+    num = 1
+
+    while active.any():
+
+        with numpy.errstate(divide = 'ignore', invalid = 'ignore'):
+
+            # Trying parabolic step.
+
+            parabolic_flag = numpy.abs(e) > tol1
+
+            r = (xf - nfc) * (fx - ffulc)
+            q = (xf - fulc) * (fx - fnfc)
+            p = (xf - fulc) * q - (xf - nfc) * r
+            q = 2.0 * (q - r)
+            p = numpy.where(q > 0.0, -p, p)
+            q = numpy.abs(q)
+
+            parabolic_flag &= (
+                (numpy.abs(p) < numpy.abs(0.5 * q * e)) &
+                (p > q * (a - xf)) &
+                (p < q * (b - xf)))
+
+            e_parabolic = rat
+
+            rat_parabolic = (p + 0.0) / q
+            x = xf + rat_parabolic
+
+            si = numpy.sign(xm - xf) + ((xm - xf) == 0)
+
+            rat_parabolic = (
+
+                numpy.where(
+                    ((x - a) < tol2) | ((b - x) < tol2),
+                    tol1 * si,
+                    rat_parabolic))
+
+        # Golden-section step otherwise.
+
+        e_golden = numpy.where(xf >= xm, a - xf, b - xf)
+
+        e_next = numpy.where(parabolic_flag, e_parabolic, e_golden)
+        rat_next = numpy.where(parabolic_flag, rat_parabolic, golden_mean * e_golden)
+
+        si = numpy.sign(rat_next) + (rat_next == 0)
+        x = xf + si * numpy.maximum(numpy.abs(rat_next), tol1)
+        fu = f(x)
+        num += 1
+
+        # Updating bracketing interval and best points.
+
+        better = fu <= fx
+        worse = ~better
+
+        a_next = numpy.where(better & (x >= xf), xf, numpy.where(worse & (x < xf), x, a))
+        b_next = numpy.where(better & (x < xf), xf, numpy.where(worse & (x >= xf), x, b))
+
+        nfc_flag = worse & ((fu <= fnfc) | (nfc == xf))
+        fulc_flag = worse & ~nfc_flag & ((fu <= ffulc) | (fulc == xf) | (fulc == nfc))
+
+        fulc_next = numpy.where(better | nfc_flag, nfc, numpy.where(fulc_flag, x, fulc))
+        ffulc_next = numpy.where(better | nfc_flag, fnfc, numpy.where(fulc_flag, fu, ffulc))
+
+        nfc_next = numpy.where(better, xf, numpy.where(nfc_flag, x, nfc))
+        fnfc_next = numpy.where(better, fx, numpy.where(nfc_flag, fu, fnfc))
+
+        xf_next = numpy.where(better, x, xf)
+        fx_next = numpy.where(better, fu, fx)
+
+        # Only intervals which have not yet converged are updated.
+
+        a = numpy.where(active, a_next, a)
+        b = numpy.where(active, b_next, b)
+        e = numpy.where(active, e_next, e)
+        rat = numpy.where(active, rat_next, rat)
+
+        fulc = numpy.where(active, fulc_next, fulc)
+        ffulc = numpy.where(active, ffulc_next, ffulc)
+        nfc = numpy.where(active, nfc_next, nfc)
+        fnfc = numpy.where(active, fnfc_next, fnfc)
+        xf = numpy.where(active, xf_next, xf)
+        fx = numpy.where(active, fx_next, fx)
+
+        xm = 0.5 * (a + b)
+        tol1 = sqrt_eps * numpy.abs(xf) + xatol / 3.0
+        tol2 = 2.0 * tol1
+
+        active &= numpy.abs(xf - xm) > (tol2 - 0.5 * (b - a))
+
+        if num >= maxiter:
+            break
+
+    return xf, spline_value(c, frame_array, xf)
+
+
+def sound_into_pitch_frames(
+        t_array, pitchFloor,
         maxnCandidates, voicingThreshold,
-        octaveCost, dt_window,
+        octaveCost,
         nsamp_window, halfnsamp_window,
         maximumLag, nsampFFT,
         nsamp_period, halfnsamp_period,
         brent_ixmax, globalPeak,
-        window, windowR, frame,
-        ac, r, imax, localMean,
-        x1, dx, nx, ny, z, **rest):
+        window, windowR,
+        x1, dx, nx, z_array, **rest):
+    """
+    Batched pitch engine, computes pitch candidates of frames centered at each of the times of t_array
+    processing all frames together as 2-D arrays (frames x window).
+
+    Returns a list with None for a silent frame and a (intensity, candidate_list) pair for a non-silent
+    one, where candidate_list is a list of (frequency, strength) pairs of the candidates after the first,
+    unvoiced, one.
+    """
+
+    frame_count = len(t_array)
 
-    leftSample = (t - x1) // dx
+    leftSample = numpy.floor_divide(t_array - x1, dx)
     rightSample = leftSample + 1
 
-    for channel in range(ny):
-        '''
-        Compute the local mean; look one longest period to both sides.
-        '''
-        startSample = int(rightSample - nsamp_period)
-        endSample = int(leftSample + nsamp_period)
-        assert startSample >= 0
-        assert endSample < nx
+    '''
+    Compute the local means; look one longest period to both sides.
+    '''
+    startSample = (rightSample - nsamp_period).astype(numpy.int64)
+    endSample = (leftSample + nsamp_period).astype(numpy.int64)
+    assert startSample.min() >= 0
+    assert endSample.max() < nx
 
-        localMean[channel] = 0.0
-        for i in range(startSample, endSample + 1):
-            localMean[channel] += z[channel][i]
-        localMean[channel] /= 2 * nsamp_period
+    localMean = (
 
-        '''
-		Copy a window to a frame and subtract the local mean.
-		We are going to kill the DC component before windowing.
-        '''
-        startSample = int(rightSample - halfnsamp_window)
-        endSample = int(leftSample + halfnsamp_window)
-        assert startSample >= 0
-        assert endSample < nx
+        numpy.lib.stride_tricks.sliding_window_view(
+            z_array, 2 * nsamp_period, axis = 1)[:, startSample, :]
 
-        for j in range(nsamp_window):
-            frame[channel][j] = (z[channel][j + startSample] - localMean[channel]) * window[j]
-        for j in range(nsamp_window, nsampFFT):
-            frame[channel][j] = 0.0
+            .sum(axis = 2) / (2 * nsamp_period))
 
     '''
-    Compute the local peak; look half a longest period to both sides.
+    Copy windows to frames and subtract the local means.
+    We are going to kill the DC component before windowing.
+    '''
+    startSample = (rightSample - halfnsamp_window).astype(numpy.int64)
+    endSample = (leftSample + halfnsamp_window).astype(numpy.int64)
+    assert startSample.min() >= 0
+    assert endSample.max() < nx
+
+    frame = (
+
+        (numpy.lib.stride_tricks.sliding_window_view(
+            z_array, nsamp_window, axis = 1)[:, startSample, :]
+
+            - localMean[:, :, None]) * window)
+
+    '''
+    Compute the local peaks; look half a longest period to both sides.
     '''
-    localPeak = 0.0
     startSample = int(max(0, halfnsamp_window - halfnsamp_period))
     endSample = int(min(nsamp_window, halfnsamp_window + halfnsamp_period))
 
-    for channel in range(ny):
-        for j in range(startSample, endSample):
-            value = math.fabs(frame[channel][j])
-            if value > localPeak:
-                localPeak = value
+    localPeak = (
+
+        numpy.abs(frame[:, :, startSample : endSample]).max(axis = (0, 2))
+            if endSample > startSample else
+            numpy.zeros(frame_count))
 
     '''
     Shortcut: absolute silence is always voiceless.
-    We are done for this frame.
+    We are done for these frames.
     '''
-    if localPeak == 0.0:
-        return
+    result_list = [None] * frame_count
+
+    sound_index = numpy.flatnonzero(localPeak != 0.0)
 
-    pitchFrame['intensity'] = 1.0 if localPeak > globalPeak else localPeak / globalPeak
+    if len(sound_index) <= 0:
+        return result_list
+
+    frame = frame[:, sound_index, :]
+    localPeak = localPeak[sound_index]
+
+    intensity = numpy.where(localPeak > globalPeak, 1.0, localPeak / globalPeak)
 
     '''
     Compute the correlation into the array 'r'.
-    The FFT of the autocorrelation is the power spectrum.
+    The FFT of the autocorrelation is the power spectrum, summed over channels.
     '''
+    spectrum = numpy.fft.rfft(frame, nsampFFT, axis = 2)
 
-    nsampRFFT = nsampFFT // 2 + 1
-
-    # Initially 'ac' consists of zeroes
-    for channel in range(ny):
-        frame_view = numpy.fft.rfft(frame[channel]).view('float')  # complex spectrum
+    ac = (
 
-        ac[0] += frame_view[0] ** 2  # DC component
-        for i in range(2, nsampFFT, 2):
-            ac[i // 2] += frame_view[i] ** 2 + frame_view[i + 1] ** 2  # power spectrum
-        ac[nsampRFFT - 1] += frame_view[nsampFFT] ** 2  # Nyquist frequency
-
-    ac[:] = numpy.fft.irfft(ac[:nsampRFFT])  # autocorrelation
+        numpy.fft.irfft(
+            (spectrum.real ** 2 + spectrum.imag ** 2).sum(axis = 0),
+            nsampFFT, axis = 1))
 
     '''
     Normalize the autocorrelation to the value with zero lag,
 	and divide it by the normalized autocorrelation of the window.
     '''
-    r[0] = 1.0
-    for i in range(1, brent_ixmax + 1):
-        r[-i] = r[i] = ac[i] / (ac[0] * windowR[i])
+    B = brent_ixmax
+
+    r = numpy.empty((len(sound_index), 2 * B + 1))
+
+    r[:, 0] = 1.0
+    r[:, 1 : B + 1] = ac[:, 1 : B + 1] / (ac[:, :1] * windowR[1 : B + 1])
+    r[:, B + 1:] = r[:, B : 0 : -1]
 
     '''
-	Find the strongest maxima of the correlation of this frame,
+	Find the strongest maxima of the correlation of each frame,
 	and register them as candidates.
     '''
 
-    offset = - brent_ixmax - 1
+    offset = - B - 1
+
+    # Use cubic spline to interpolete discrete values and get function for exact argument, a single
+    # spline for all frames, evaluated via its piecewise polynomial coefficients.
+
+    c = (
+
+        CubicSpline(
+            numpy.arange(B - offset),
+            numpy.concatenate((r[:, offset + 1:], r[:, :- offset]), axis = 1),
+            axis = 1).c)
 
-    # Use cubic spline to interpolete discrete values and get function for exact argument
-    r_offset_spline_func = CubicSpline(numpy.arange(brent_ixmax - offset),
-                                       list(r[offset + 1:]) + list(r[:- offset]))
-    def inverted_spline(x):
-        return (-r_offset_spline_func(x))
+    i_array = numpy.arange(2, min(maximumLag, B))
+
+    r_i = r[:, i_array]
+    r_prev = r[:, i_array - 1]
+    r_next = r[:, i_array + 1]
+
+    maximum_frame, maximum_index = (
+
+        numpy.nonzero(
+            (r_i > 0.5 * voicingThreshold) &
+            (r_i > r_prev) &
+            (r_i >= r_next)))
 
     '''
-    x = numpy.arange(0, brent_ixmax - offset, 0.5)
-    pyplot.plot(x, r_offset_spline_func(x))
-    pyplot.savefig('spline.png')
+    Use parabolic interpolation for first estimate of frequency,
+	and cubic spline interpolation to compute the strength of this frequency.
     '''
+    r_i = r_i[maximum_frame, maximum_index]
+    r_prev = r_prev[maximum_frame, maximum_index]
+    r_next = r_next[maximum_frame, maximum_index]
 
-    imax[0] = 0
-    for i in range(2, min(maximumLag, brent_ixmax)):
-        if r[i] > 0.5 * voicingThreshold and r[i] > r[i-1] and r[i] >= r[i+1]:  # maximum?
-            place = None
-            '''
-            Use parabolic interpolation for first estimate of frequency,
-			and cubic spline interpolation to compute the strength of this frequency.
-            '''
-            dr = 0.5 * (r[i+1] - r[i-1])
-            d2r = 2.0 * r[i] - r[i-1] - r[i+1]
-            frequencyOfMaximum = 1.0 / dx / (i + dr / d2r)
-            strengthOfMaximum = float(r_offset_spline_func(1.0 / dx / frequencyOfMaximum - offset))
+    maximum_index = i_array[maximum_index]
 
-            '''
-            High values due to short windows are to be reflected around 1.
-            '''
-            if strengthOfMaximum > 1.0:
-                strengthOfMaximum = 1.0 / strengthOfMaximum
+    dr = 0.5 * (r_next - r_prev)
+    d2r = 2.0 * r_i - r_prev - r_next
+    frequencyOfMaximum = 1.0 / dx / (maximum_index + dr / d2r)
+
+    strengthOfMaximum = (
+        spline_value(c, maximum_frame, 1.0 / dx / frequencyOfMaximum - offset))
+
+    '''
+    High values due to short windows are to be reflected around 1.
+    '''
+    strengthOfMaximum = (
+
+        numpy.where(
+            strengthOfMaximum > 1.0,
+            1.0 / strengthOfMaximum,
+            strengthOfMaximum))
+
+    '''
+    Find a place for each maximum, going through maxima of each frame in order.
+    '''
+    candidate_list_list = [[] for _ in range(len(sound_index))]
+
+    for iframe, i, frequency, strength in zip(
+        maximum_frame.tolist(),
+        maximum_index.tolist(),
+        frequencyOfMaximum.tolist(),
+        strengthOfMaximum.tolist()):
 
+        candidate_list = candidate_list_list[iframe]
+
+        if len(candidate_list) + 1 < maxnCandidates:
+            candidate_list.append((frequency, strength, i))
+            continue
+
+        '''
+        Try the place of the weakest candidate so far.
+        '''
+        place = None
+        weakest = 2.0
+
+        for iweak, (weak_frequency, weak_strength, _) in enumerate(candidate_list):
             '''
-            Find a place for this maximum.
+            High frequencies are to be favoured
+			if we want to analyze a perfectly periodic signal correctly.
             '''
-            if pitchFrame['nCandidates'] < maxnCandidates:
-                pitchFrame['nCandidates'] += 1
-                while len(pitchFrame['candidates']) < pitchFrame['nCandidates']:
-                    pitchFrame['candidates'].append(pitchFrame['candidates'][-1].copy())
-                place = pitchFrame['nCandidates'] - 1
-            else:
-                '''
-                Try the place of the weakest candidate so far.
-                '''
-                weakest = 2.0
-                for iweak in range(1, maxnCandidates):
-                    '''
-                    High frequencies are to be favoured
-					if we want to analyze a perfectly periodic signal correctly.
-                    '''
-                    localStrength = (pitchFrame['candidates'][iweak]['strength'] -
-                                     octaveCost * math.log2(pitchFloor / pitchFrame['candidates'][iweak]['frequency']))
-                    if localStrength < weakest:
-                        weakest = localStrength
-                        place = iweak
-                '''
-                If this maximum is weaker than the weakest candidate so far, give it no place.
-                '''
-                if strengthOfMaximum - octaveCost * math.log2(pitchFloor / frequencyOfMaximum) <= weakest:
-                    place = None
-
-            if place is not None:
-                pitchFrame['candidates'][place]['frequency'] = frequencyOfMaximum
-                pitchFrame['candidates'][place]['strength'] = strengthOfMaximum
-                imax[place] = i
+            localStrength = weak_strength - octaveCost * math.log2(pitchFloor / weak_frequency)
+            if localStrength < weakest:
+                weakest = localStrength
+                place = iweak
+
+        '''
+        If this maximum is weaker than the weakest candidate so far, give it no place.
+        '''
+        if strength - octaveCost * math.log2(pitchFloor / frequency) <= weakest:
+            place = None
+
+        if place is not None:
+            candidate_list[place] = (frequency, strength, i)
 
     '''
-    Second pass: for extra precision, maximize cubic spline interpolation.
+    Second pass: for extra precision, maximize cubic spline interpolation, for all candidates of all
+    frames at once.
     '''
-    for i in range(1, pitchFrame['nCandidates']):
-        # Get improved x and y of function maximum after cubic spline interpolation
-        x = imax[i] - offset
-        xmid = minimize_scalar(inverted_spline, bounds=(x - 1, x + 1), method='bounded').x
-        ymid = float(r_offset_spline_func(xmid))
-        xmid += offset
-        pitchFrame['candidates'][i]['frequency'] = 1.0 / dx / xmid - 1.0 # -1.0 is an empirique delta due to used methods
-        if ymid > 1.0:
-            ymid = 1.0 / ymid
-        pitchFrame['candidates'][i]['strength'] = ymid
+    candidate_frame = numpy.array([
+        iframe
+        for iframe, candidate_list in enumerate(candidate_list_list)
+        for _ in candidate_list],
+        dtype = numpy.int64)
+
+    candidate_x = numpy.array([
+        i - offset
+        for candidate_list in candidate_list_list
+        for _, _, i in candidate_list],
+        dtype = numpy.int64)
+
+    xmid, ymid = spline_maximum(c, candidate_frame, candidate_x)
+    xmid += offset
+
+    frequency_list = (1.0 / dx / xmid - 1.0).tolist() # -1.0 is an empirique delta due to used methods
+    strength_list = numpy.where(ymid > 1.0, 1.0 / ymid, ymid).tolist()
+
+    candidate_index = 0
+
+    for iframe, candidate_list in enumerate(candidate_list_list):
+
+        candidate_count = len(candidate_list)
+
+        result_list[sound_index[iframe]] = (
+
+            float(intensity[iframe]),
+
+            list(zip(
+                frequency_list[candidate_index : candidate_index + candidate_count],
+                strength_list[candidate_index : candidate_index + candidate_count])))
+
+        candidate_index += candidate_count
+
+    return result_list
+
+
+def fill_pitch_frame(pitchFrame, result):
+    """
+    Compatibility adapter, stores pitch candidates computed by sound_into_pitch_frames() in a dict-based
+    pitch frame.
+    """
+
+    if result is None:
+        return
+
+    intensity, candidate_list = result
+
+    pitchFrame['intensity'] = intensity
+    pitchFrame['nCandidates'] = len(candidate_list) + 1
+
+    pitchFrame['candidates'][1:] = [
+        {'frequency': frequency, 'strength': strength}
+        for frequency, strength in candidate_list]
+
+
+# Compute pitch frames
+def sound_into_pitch_frame(pitchFrame, t, **arg):
+    """
+    Computes a single dict-based pitch frame centered at time t.
+    """
+
+    fill_pitch_frame(
+        pitchFrame,
+        sound_into_pitch_frames(numpy.array([t]), **arg)[0])
 
 
 def sound_into_pitch(arg):
-    def f(arg, firstFrame, lastFrame, x1, dx, frames, **rest):
-        for iframe in range(firstFrame, lastFrame):
-            sound_into_pitch_frame(pitch_frame := frames[iframe],
-                                   t := x1 + iframe * dx,
-                                   **arg, **(arg.get('sound')))
-    f(arg, **arg, **(arg.get('pitch')))
+    """
+    Computes dict-based pitch frames [firstFrame, lastFrame) of a pitch contour in batches.
+    """
+
+    pitch = arg['pitch']
+    frames = pitch['frames']
+
+    for batch_from in range(arg['firstFrame'], arg['lastFrame'], pitch_frame_batch_size):
+        batch_to = min(batch_from + pitch_frame_batch_size, arg['lastFrame'])
+
+        t_array = pitch['x1'] + numpy.arange(batch_from, batch_to) * pitch['dx']
+
+        result_list = (
+            sound_into_pitch_frames(t_array, **arg, **arg['sound']))
+
+        for iframe, result in zip(range(batch_from, batch_to), result_list):
+            fill_pitch_frame(frames[iframe], result)
 
 
 class AudioPraatLike(object):
@@ -668,6 +1307,7 @@ class AudioPraatLike(object):
             math.floor((self.intensity_sound.frame_count() - 1) // self.intensity_step_size + 1))
 
         self.intensity_list = [None for i in range(self.intensity_step_count)]
+        self.intensity_energy_array = None
 
         self.fast_track_flag = (
             args and args.use_fast_track)
@@ -757,49 +1397,94 @@ class AudioPraatLike(object):
 
         self.init_formant_f = self.init_formant_fft
 
-    def get_intensity(self, step_index):
+    def init_intensity(self):
         """
-        Computes intensity at the point specified by intensity time step index.
+        Initializes intensity computation data, i.e. sum over channels of squared normalized sample
+        amplitudes for each frame of the sound, as a float64 array.
         """
 
-        if step_index < 4 or step_index >= self.intensity_step_count - 4:
-            raise ValueError('step index {0} is out of bounds [4, {1})'.format(
-                step_index, self.intensity_step_count - 4))
+        channel_count = self.intensity_sound.channels
+        amplitude_limit = self.intensity_sound.max_possible_amplitude
 
-        # Checking if we already computed required intensity value.
+        sample_array = (
 
-        if self.intensity_list[step_index] != None:
-            return self.intensity_list[step_index]
+            numpy.asarray(
+                self.intensity_sound.get_array_of_samples(), dtype = numpy.float64)
 
-        # No, we haven't, so we are going to compute it.
+                / amplitude_limit)
 
-        window_list, window_sum = get_kaiser_window(self.intensity_half_window_size)
+        self.intensity_energy_array = (
 
-        sample_array = self.intensity_sound.get_array_of_samples()
-        sample_sum = 0.0
+            numpy.square(sample_array)
+                .reshape(-1, channel_count)
+                .sum(axis = 1))
 
-        channel_count = self.intensity_sound.channels
-        amplitude_limit = self.intensity_sound.max_possible_amplitude
+    def compute_intensity(self, step_from, step_to):
+        """
+        Computes intensity values at points specified by intensity time step indices in [step_from,
+        step_to) which are not computed yet, all at once via a strided view of windows.
+        """
+
+        if self.intensity_energy_array is None:
+            self.init_intensity()
 
-        # We sum squared normalized amplitudes of all samples of all channels in the window.
+        step_index_array = numpy.array([
+            step_index
+            for step_index in range(step_from, step_to)
+            if self.intensity_list[step_index] is None],
+            dtype = numpy.int64)
 
-        sample_from = (step_index - 4) * self.intensity_step_size * channel_count
+        if len(step_index_array) <= 0:
+            return
 
-        for i in range(self.intensity_window_size):
-            for j in range(channel_count):
-                sample = sample_array[sample_from + i * channel_count + j] / amplitude_limit
-                sample_sum += sample ** 2 * window_list[i]
+        window_array, window_sum = get_kaiser_window(self.intensity_half_window_size)
+
+        # We sum squared normalized amplitudes of all samples of all channels in each window, windows
+        # are rows of a strided view of per-frame energies, without copying.
+
+        frame_window_array = (
+
+            numpy.lib.stride_tricks.sliding_window_view(
+                self.intensity_energy_array, self.intensity_window_size))
+
+        sample_sum_array = (
+            frame_window_array[(step_index_array - 4) * self.intensity_step_size] @ window_array)
 
         # Multiplication by 2.5e9 is taken directly from Praat source code, where it is performed via
         # division by 4e-10.
 
-        intensity_ratio = sample_sum / (channel_count * window_sum) * 2.5e9
-        intensity = -300 if intensity_ratio < 1e-30 else 10 * math.log10(intensity_ratio)
+        intensity_ratio_array = (
+            sample_sum_array / (self.intensity_sound.channels * window_sum) * 2.5e9)
+
+        with numpy.errstate(divide = 'ignore'):
+
+            intensity_array = (
 
-        # Saving computed intensity value for reuse, and returning it.
+                numpy.where(
+                    intensity_ratio_array < 1e-30,
+                    -300.0,
+                    10 * numpy.log10(intensity_ratio_array)))
 
-        self.intensity_list[step_index] = intensity
-        return intensity
+        # Saving computed intensity values for reuse.
+
+        for step_index, intensity in zip(step_index_array.tolist(), intensity_array.tolist()):
+            self.intensity_list[step_index] = intensity
+
+    def get_intensity(self, step_index):
+        """
+        Computes intensity at the point specified by intensity time step index.
+        """
+
+        if step_index < 4 or step_index >= self.intensity_step_count - 4:
+            raise ValueError('step index {0} is out of bounds [4, {1})'.format(
+                step_index, self.intensity_step_count - 4))
+
+        # Checking if we already computed required intensity value, computing it if we haven't.
+
+        if self.intensity_list[step_index] is None:
+            self.compute_intensity(step_index, step_index + 1)
+
+        return self.intensity_list[step_index]
 
     def get_interval_intensity(self, begin, end):
         """
@@ -823,9 +1508,10 @@ class AudioPraatLike(object):
         # Computing intensity point values, getting minimum and maximum like in Praat, with additional
         # parabolic interpolation.
 
-        intensity_list = [
-            self.get_intensity(step_index)
-            for step_index in range(begin_step, end_step + 1)]
+        self.compute_intensity(begin_step, end_step + 1)
+
+        intensity_list = (
+            self.intensity_list[begin_step : end_step + 1])
 
         intensity_min = (
             min(intensity_list[0], intensity_list[-1]))
@@ -887,9 +1573,8 @@ class AudioPraatLike(object):
 
         energy_sum = (
 
-            sum(
-                math.pow(10, 0.1 * intensity)
-                for intensity in intensity_list))
+            float(
+                numpy.power(10.0, 0.1 * numpy.array(intensity_list)).sum()))
 
         return (
             10 * math.log10(energy_sum / (end_step - begin_step + 1)),
@@ -981,26 +1666,13 @@ class AudioPraatLike(object):
 
             source_list[padding:-padding] = sample_array
 
-        elif channel_count == 2:
-
-            for i in range(frame_count):
-
-                source_list[padding + i] = (
-                    (sample_array[i * 2] + sample_array[i * 2 + 1]) / 2.0)
-
         else:
 
-            # General case.
-
-            for i in range(frame_count):
+            source_list[padding:-padding] = (
 
-                source_list[padding + i] = (
-
-                    sum(
-                        sample_array[i * channel_count + j]
-                        for j in range(channel_count))
-
-                        / channel_count)
+                numpy.asarray(sample_array, dtype = numpy.float64)
+                    .reshape(-1, channel_count)
+                    .mean(axis = 1))
 
         # If we are using samples only from vowel intervals.
 
@@ -1075,8 +1747,8 @@ class AudioPraatLike(object):
 
             # Preparing data for formant analysis in each interval.
 
-            self.formant_sample_list = [
-                None for i in range(resample_count)]
+            self.formant_sample_list = (
+                numpy.full(resample_count, numpy.nan))
 
             factor_filter = (
                 math.exp(-2.0 * math.pi * 50 / self.formant_frame_rate))
@@ -1097,10 +1769,8 @@ class AudioPraatLike(object):
                 self.formant_sample_list[formant_from] = (
                     sample_list[0] * (1 - factor_filter))
 
-                for i in range(1, formant_count):
-
-                    self.formant_sample_list[formant_from + i] = (
-                        sample_list[i] - factor_filter * sample_list[i - 1])
+                self.formant_sample_list[formant_from + 1 : formant_to] = (
+                    sample_list[1:] - factor_filter * sample_list[:-1])
 
         # Using full length of the sound, standard formant computation algorithm.
 
@@ -1115,12 +1785,12 @@ class AudioPraatLike(object):
                 math.exp(-2.0 * math.pi * 50 / self.formant_frame_rate))
 
             formant_frame_count = len(sample_list)
-            formant_sample_list = [sample_list[0]]
 
-            for i in range(1, int(formant_frame_count)):
+            formant_sample_list = numpy.empty(formant_frame_count)
+            formant_sample_list[0] = sample_list[0]
 
-                formant_sample_list.append(
-                    sample_list[i] - factor_filter * sample_list[i - 1])
+            formant_sample_list[1:] = (
+                sample_list[1:] - factor_filter * sample_list[:-1])
 
             self.formant_sample_list = formant_sample_list
 
@@ -1158,12 +1828,12 @@ class AudioPraatLike(object):
                     math.exp(-2.0 * math.pi * 50 / formant_frame_rate))
 
                 formant_frame_count = len(sample_list)
-                formant_sample_list = [sample_list[0]]
 
-                for j in range(1, int(formant_frame_count)):
+                formant_sample_list = numpy.empty(formant_frame_count)
+                formant_sample_list[0] = sample_list[0]
 
-                    formant_sample_list.append(
-                        sample_list[j] - factor_filter * sample_list[j - 1])
+                formant_sample_list[1:] = (
+                    sample_list[1:] - factor_filter * sample_list[:-1])
 
                 self.formant_sample_list_list.append(formant_sample_list)
 
@@ -1222,9 +1892,8 @@ class AudioPraatLike(object):
         sample_from = (
             step_index * self.formant_step_size - self.formant_half_window_size)
 
-        sample_list = [
-            self.formant_sample_list[sample_from + i]
-                for i in range(self.formant_window_size)]
+        sample_list = (
+            self.formant_sample_list[sample_from : sample_from + self.formant_window_size])
 
         formant_list = (
 
@@ -1282,9 +1951,8 @@ class AudioPraatLike(object):
         sample_from = (
             step_index * formant_step_size - formant_half_window_size)
 
-        sample_list = [
-            formant_sample_list[sample_from + i]
-                for i in range(formant_window_size)]
+        sample_list = (
+            formant_sample_list[sample_from : sample_from + formant_window_size])
 
         formant_list = (
 
@@ -1575,15 +2243,14 @@ class AudioPraatLike(object):
         duration = nx / fq  # duration of samples to compute in sec
 
         ny = self.intensity_sound.channels  # number of channels
-        plain_z = [ smp / self.intensity_sound.max_possible_amplitude
-                    for smp in self.intensity_sound.get_array_of_samples() ]  # samples of all the channels
+        plain_z = (
+            numpy.asarray(self.intensity_sound.get_array_of_samples(), dtype = numpy.float64) /
+            self.intensity_sound.max_possible_amplitude)  # samples of all the channels
         assert nx * ny <= len(plain_z)
 
         # lay out samples by channels
-        z = [[] for _ in range(ny)]
-        for channel in range(ny):
-            for frame in range(nx):
-                z[channel].append(plain_z[ny * frame + channel])  # signal
+        z_array = plain_z[:nx * ny].reshape(nx, ny).T.copy()  # signal
+        z = z_array.tolist()
 
         minimumPitch = 50 # 75?
         maximumPitch = 800 # 600?
@@ -1655,13 +2322,8 @@ class AudioPraatLike(object):
         }
 
         # Compute the global absolute peak for determination of silence threshold.
-        globalPeak = 0.0
-        for ichan in range(ny):
-            mean = sum(z[ichan])/len(z[ichan])
-            for i in range(nx):
-                value = math.fabs(z[ichan][i] - mean)
-                if value > globalPeak:
-                    globalPeak = value
+        globalPeak = float(
+            numpy.abs(z_array - z_array.mean(axis = 1, keepdims = True)).max())
 
         if globalPeak == 0.0:
             return thee
@@ -1677,23 +2339,16 @@ class AudioPraatLike(object):
             nsampFFT *= 2
 
         window = get_gaussian_window(nsamp_window)
-        windowR = window + numpy.zeros(nsampFFT - nsamp_window).tolist()
+        windowR = numpy.concatenate((window, numpy.zeros(nsampFFT - nsamp_window)))
 
         windowR = numpy.fft.rfft(windowR)
 
-        windowR_view = windowR.view('float')
-
         # Change input windowR according to praat algorithms
-        windowR_view[0] *= windowR_view[0]  # DC component
-        for i in range(2, nsampFFT, 2):
-            windowR_view[i] = windowR_view[i] ** 2 + windowR_view[i + 1] ** 2
-            windowR_view[i + 1] = 0.0  # power spectrum: square and zero
-        windowR_view[nsampFFT] *= windowR_view[nsampFFT]  # Nyquist frequency
+        windowR = windowR.real ** 2 + windowR.imag ** 2  # power spectrum
 
-        windowR = numpy.fft.irfft(windowR)  # autocorrelation
+        windowR = numpy.fft.irfft(windowR, nsampFFT)  # autocorrelation
 
-        for i in range(1, nsamp_window):
-            windowR[i] /= windowR[0]  # normalize
+        windowR[1:nsamp_window] /= windowR[0]  # normalize
         windowR[0] = 1.0  # normalize
 
         '''
@@ -1707,71 +2362,35 @@ class AudioPraatLike(object):
 
         brent_ixmax = math.floor(nsamp_window * interpolation_depth)
 
-        # Calculating threads number
-        numberOfFramesPerThread = 20
-        numberOfThreads = (numberOfFrames - 1) // numberOfFramesPerThread + 1
-        numberOfProcessors = multiprocessing.cpu_count()
-        log.debug(f"{numberOfProcessors} processors")
-        numberOfThreads = min(numberOfThreads, numberOfProcessors)
-        numberOfThreads = max(1, min(numberOfThreads, 16))
-        numberOfFramesPerThread = (numberOfFrames - 1) // numberOfThreads + 1
-
-        firstFrame = 0
-        lastFrame = numberOfFramesPerThread
-        #cancelled = [False]
-
         # Gather parameters into 'sound'
         sound = {}
-        for key in 'x1', 'dx', 'nx', 'ny', 'z':
+        for key in 'x1', 'dx', 'nx', 'ny', 'z', 'z_array':
             sound[key] = locals()[key]
 
-        args = []
-        for ithread in range(numberOfThreads):
-            # Get the rest
-            if ithread == numberOfThreads - 1:
-                lastFrame = numberOfFrames
-
-            arg = {
-                'sound': sound,
-                'pitch': thee,
-                'firstFrame': firstFrame,
-                'lastFrame': lastFrame,
-                'pitchFloor': minimumPitch,
-                'maxnCandidates': maxnCandidates,
-                'voicingThreshold': voicingThreshold,
-                'octaveCost': octaveCost,
-                'dt_window': dt_window,
-                'nsamp_window': nsamp_window,
-                'halfnsamp_window': halfnsamp_window,
-                'maximumLag': maximumLag,
-                'nsampFFT': nsampFFT,
-                'nsamp_period': nsamp_period,
-                'halfnsamp_period': halfnsamp_period,
-                'brent_ixmax': brent_ixmax,
-                'globalPeak': globalPeak,
-                'window': window,
-                'windowR': windowR,
-                'frame': numpy.zeros((ny, nsampFFT)),
-                'ac': numpy.zeros(nsampFFT, dtype=float),
-                'imax': numpy.zeros(maxnCandidates, dtype=int),
-                'localMean': numpy.zeros(ny, dtype=float),
-                'r': numpy.zeros(brent_ixmax * 2 + 1)
-            }
-
-            args.append(arg)
-            firstFrame = lastFrame
-            lastFrame += numberOfFramesPerThread
-
-            # single-thread
-            sound_into_pitch(arg)
+        # All frames are computed by the batched pitch engine.
+        arg = {
+            'sound': sound,
+            'pitch': thee,
+            'firstFrame': 0,
+            'lastFrame': numberOfFrames,
+            'pitchFloor': minimumPitch,
+            'maxnCandidates': maxnCandidates,
+            'voicingThreshold': voicingThreshold,
+            'octaveCost': octaveCost,
+            'dt_window': dt_window,
+            'nsamp_window': nsamp_window,
+            'halfnsamp_window': halfnsamp_window,
+            'maximumLag': maximumLag,
+            'nsampFFT': nsampFFT,
+            'nsamp_period': nsamp_period,
+            'halfnsamp_period': halfnsamp_period,
+            'brent_ixmax': brent_ixmax,
+            'globalPeak': globalPeak,
+            'window': window,
+            'windowR': windowR
+        }
 
-        '''
-        # multi-thread
-        pool = multiprocessing.Pool(numberOfThreads)
-        pool.map(sound_into_pitch, args)
-        pool.close()
-        pool.join()
-        '''
+        sound_into_pitch(arg)
 
         log.debug("Sound to Pitch: path finder - 95% complete")
         pitch_path_finder(silenceThreshold, voicingThreshold, octaveCost,
@@ -4309,6 +4928,9 @@ class Phonology_Parameters(object):
 
             self.use_fast_track = 'use_fast_track' in request.params
 
+            self.worker_count = (int(request.params['worker_count'])
+                if 'worker_count' in request.params else None)
+
             self.no_cache = 'no_cache' in request.params
             self.interval_only = 'interval_only' in request.params
 
@@ -4353,6 +4975,7 @@ class Phonology_Parameters(object):
                     for perspective_id, field_id in self.link_perspective_list}
 
             self.use_fast_track = request_json.get('use_fast_track')
+            self.worker_count = request_json.get('worker_count')
 
             self.no_cache = request_json.get('no_cache')
             self.interval_only = request_json.get('interval_only')
@@ -4453,6 +5076,7 @@ class Phonology_Parameters(object):
                 for perspective_id, field_id in self.link_perspective_list}
 
         self.use_fast_track = args.get('use_fast_track')
+        self.worker_count = args.get('worker_count')
 
         self.synchronous = args.get('synchronous')
 
@@ -4486,6 +5110,7 @@ def phonology(request):
         synchronous
         use_automatic_markup
         vowel_selection
+        worker_count
     """
 
     task_status = None
@@ -4631,22 +5256,19 @@ def analyze_sound_markup(
     row_str,
     text_list,
     fails_dict,
-    cache):
+    cache,
+    computed = None):
     """
     Performs phonological analysis of a single sound/markup pair.
+
+    If analysis computations were already performed, e.g. in a worker process, their outcome, as returned
+    by compute_sound_markup(), is given by 'computed'.
     """
 
     markup_url = row.Markup.content
     sound_url = row.Sound.content
-    err_msg = ""
-    warn_msg = ""
 
-    cache_key = (
-        f'{row.Sound.client_id}:'
-        f'{row.Sound.object_id}:'
-        f'{row.Markup.client_id}:'
-        f'{row.Markup.object_id}'
-        f'{"+ft" if args and args.use_fast_track else ""}')
+    cache_key = sound_markup_cache_key(args, row)
 
     fails_dict[row_str] = {
         'urls': f"sound_url: {sound_url}\nmarkup_url: {markup_url}",
@@ -4752,6 +5374,114 @@ def analyze_sound_markup(
         except:
             return False, 'cache_error'
 
+    # Analyzing the pair, if it was not already analyzed by a worker process.
+
+    if computed is None:
+
+        computed = (
+
+            compute_sound_markup(
+                args, storage, sound_url, markup_url, row_str))
+
+    kind, value, warn_msg, err_msg = computed
+
+    if warn_msg:
+        fails_dict[row_str]['warns'] += warn_msg
+        cache.set(f'{cache_key}:warn', warn_msg)
+
+    # If there are no tiers with vowel markup, we skip this sound-markup pair altogether.
+
+    if kind == 'no_vowel':
+
+        cache.set(cache_key, 'no_vowel')
+        state.no_vowel_counter += 1
+
+        task_status.set(2, 1 + int(math.floor(
+            complete_already + complete_range * (index + 1) / state.total_count)),
+            'Analyzing sound and markup')
+
+        return (
+            args.limit_no_vowel and state.no_vowel_counter >= args.limit_no_vowel or
+            args.limit and index + 1 >= args.limit), None
+
+    # If we encountered an exception, we show its info and remember not to try offending sound/markup
+    # pair again.
+
+    elif kind == 'exception':
+
+        exception, traceback_string = value
+
+        log.debug(
+            '{0}: exception\n{1}\n{2}\n{3}'.format(
+            row_str, markup_url, sound_url, text_list))
+
+        log.debug(traceback_string)
+
+        fails_dict[row_str]['errs'] += f"{err_msg}\n{traceback_string}"
+
+        cache.set(cache_key, ('exception', exception,
+            traceback_string.replace('Traceback', 'CACHEd traceback'), err_msg))
+
+        state.exception_counter += 1
+
+        task_status.set(2, 1 + int(math.floor(
+            complete_already + complete_range * (index + 1) / state.total_count)),
+            'Analyzing sound and markup')
+
+        return (
+            args.limit_exception and state.exception_counter >= args.limit_exception or
+            args.limit and index + 1 >= args.limit), None
+
+    textgrid_result_list = value
+
+    cache.set(cache_key, textgrid_result_list)
+
+    # Showing analysis results.
+
+    filtered_result_list = \
+        result_filter(textgrid_result_list) \
+            if result_filter else textgrid_result_list
+
+    log.debug(
+        '{0}:\n{1}\n{2}\n{3}\n{4}'.format(
+        row_str, markup_url, sound_url, text_list,
+        format_textgrid_result(group_list, textgrid_result_list)))
+
+    if result_filter and args.maybe_tier_set:
+
+        log.debug('filtered result:\n{0}'.format(
+            format_textgrid_result(group_list, filtered_result_list)))
+
+    # Updating progress status, returning analysis results.
+
+    task_status.set(2, 1 + int(math.floor(
+        complete_already + complete_range * (index + 1) / state.total_count)),
+        'Analyzing sound and markup')
+
+    return False, (group_list, filtered_result_list)
+
+
+def compute_sound_markup(
+    args,
+    storage,
+    sound_url,
+    markup_url,
+    row_str):
+    """
+    Performs phonological analysis computations of a single sound/markup pair, without accessing either DB
+    or phonology cache, so that it can be run in a worker process.
+
+    Returns a tuple of analysis outcome kind, which is either 'result', 'no_vowel' or 'exception', outcome
+    value, warning and error messages.
+    """
+
+    err_msg = ""
+    warn_msg = ""
+
+    # Warnings are reported only if we've got to processing TextGrid markup.
+
+    warn_result = ""
+
     try:
 
         storage_f = (
@@ -4827,24 +5557,12 @@ def analyze_sound_markup(
                 no_vowel_selected_f,
                 args.interval_only))
 
-        if warn_msg:
-            fails_dict[row_str]['warns'] += warn_msg
-            cache.set(f'{cache_key}:warn', warn_msg)
+        warn_result = warn_msg
 
         # If there are no tiers with vowel markup, we skip this sound-markup pair altogether.
 
         if not vowel_flag:
-
-            cache.set(cache_key, 'no_vowel')
-            state.no_vowel_counter += 1
-
-            task_status.set(2, 1 + int(math.floor(
-                complete_already + complete_range * (index + 1) / state.total_count)),
-                'Analyzing sound and markup')
-
-            return (
-                args.limit_no_vowel and state.no_vowel_counter >= args.limit_no_vowel or
-                args.limit and index + 1 >= args.limit), None
+            return 'no_vowel', None, warn_result, err_msg
 
         if args.interval_only:
 
@@ -4875,31 +5593,7 @@ def analyze_sound_markup(
         textgrid_result_list = (
             process_sound(tier_data_list, sound, args.vowel_selection))
 
-        cache.set(cache_key, textgrid_result_list)
-
-        # Showing analysis results.
-
-        filtered_result_list = \
-            result_filter(textgrid_result_list) \
-                if result_filter else textgrid_result_list
-
-        log.debug(
-            '{0}:\n{1}\n{2}\n{3}\n{4}'.format(
-            row_str, markup_url, sound_url, text_list,
-            format_textgrid_result(group_list, textgrid_result_list)))
-
-        if result_filter and args.maybe_tier_set:
-
-            log.debug('filtered result:\n{0}'.format(
-                format_textgrid_result(group_list, filtered_result_list)))
-
-        # Updating progress status, returning analysis results.
-
-        task_status.set(2, 1 + int(math.floor(
-            complete_already + complete_range * (index + 1) / state.total_count)),
-            'Analyzing sound and markup')
-
-        return False, (group_list, filtered_result_list)
+        return 'result', textgrid_result_list, warn_result, err_msg
 
     except Exception as exception:
 
@@ -4919,39 +5613,195 @@ def analyze_sound_markup(
         #     Perspective 330/4, LexicalEntry 330/20, sound-Entity 330/6297, markup-Entity 330/6967
         #
 
-        log.debug(
-            '{0}: exception\n{1}\n{2}\n{3}'.format(
-            row_str, markup_url, sound_url, text_list))
-
-        # if we encountered an exception, we show its info and remember not to try offending
-        # sound/markup pair again.
-
         traceback_string = ''.join(traceback.format_exception(
             exception, exception, exception.__traceback__))[:-1]
 
-        log.debug(traceback_string)
-
         err_msg += "ERROR: Sound-markup analysis general exception.\n"
 
-        fails_dict[row_str]['errs'] += f"{err_msg}\n{traceback_string}"
+        # Exception is to be cached and possibly passed from a worker process, so it must be picklable.
 
-        cache.set(cache_key, ('exception', exception,
-            traceback_string.replace('Traceback', 'CACHEd traceback'), err_msg))
+        try:
+            pickle.dumps(exception)
 
-        state.exception_counter += 1
+        except Exception:
+            exception = Exception(repr(exception))
 
-        task_status.set(2, 1 + int(math.floor(
-            complete_already + complete_range * (index + 1) / state.total_count)),
-            'Analyzing sound and markup')
+        return 'exception', (exception, traceback_string), warn_result, err_msg
+
+
+def sound_markup_cache_key(args, row):
+    """
+    Returns phonology cache key of a sound/markup pair.
+    """
+
+    return (
+        f'{row.Sound.client_id}:'
+        f'{row.Sound.object_id}:'
+        f'{row.Markup.client_id}:'
+        f'{row.Markup.object_id}'
+        f'{"+ft" if args and args.use_fast_track else ""}')
+
+
+class Billiard_Future(object):
+    """
+    Result of a computation submitted to a Billiard_Executor, supports the subset of concurrent.futures.Future
+    interface used by iterate_sound_markup().
+    """
+
+    def __init__(self, async_result):
+        self.async_result = async_result
+
+    def result(self):
+        return self.async_result.get()
+
+    def cancel(self):
+        """
+        Pending computations of a billiard pool can't be cancelled, they are discarded on executor
+        shutdown.
+        """
+
+        return False
+
+
+class Billiard_Executor(object):
+    """
+    Process pool executor based on billiard process pool, which, unlike multiprocessing-based pools, can be
+    started from daemonic processes, e.g. from Celery prefork pool workers which run async_phonology().
+    """
+
+    def __init__(self, worker_count):
+        self.pool = billiard.Pool(processes = worker_count)
+
+    def submit(self, function, *args):
 
         return (
-            args.limit_exception and state.exception_counter >= args.limit_exception or
-            args.limit and index + 1 >= args.limit), None
+            Billiard_Future(
+                self.pool.apply_async(function, args)))
+
+    def shutdown(self, wait = True):
+        """
+        By the time of shutdown all needed results are already retrieved, so we just stop worker processes,
+        discarding computations still pending if we are stopping early.
+        """
+
+        self.pool.terminate()
+
+        if wait:
+            self.pool.join()
+
+
+def get_phonology_executor(args):
+    """
+    Returns process pool executor for parallel analysis of sound/markup pairs if it is enabled by the
+    'worker_count' parameter, or None for sequential analysis.
+
+    Daemonic processes, e.g. Celery prefork pool workers, can't have multiprocessing-based children, so in
+    them we use billiard process pool instead.
+    """
+
+    worker_count = getattr(args, 'worker_count', None)
+
+    if not worker_count or worker_count <= 1:
+        return None
+
+    if multiprocessing.current_process().daemon:
+        return Billiard_Executor(worker_count)
+
+    return (
+
+        concurrent.futures.ProcessPoolExecutor(
+            max_workers = worker_count,
+            mp_context = multiprocessing.get_context('spawn')))
+
+
+def iterate_sound_markup(args, storage, cache, row_iter, executor):
+    """
+    Iterates over sound/markup rows, yielding (index, row, computed) tuples.
+
+    If we have a process pool executor, computations for pairs without cached results are submitted to
+    the worker processes ahead of time, with a bounded number of pending pairs, and their outcomes are
+    yielded as 'computed' values in the original row order, so that results, cache contents and progress
+    reporting are the same as with sequential analysis. Otherwise 'computed' is None and the analysis is
+    performed by analyze_sound_markup() itself.
+    """
+
+    if executor is None:
+
+        for index, row in enumerate(row_iter):
+            yield index, row, None
+
+        return
+
+    pending_limit = 4 * args.worker_count
+    pending_deque = collections.deque()
+
+    try:
+
+        for index, row in enumerate(row_iter):
+
+            future = None
+
+            if (args.no_cache or
+                not cache.contains(sound_markup_cache_key(args, row))):
+
+                row_str = '{0} (sound-Entity {1}/{2}, markup-Entity {3}/{4})'.format(
+                    index,
+                    row.Sound.client_id, row.Sound.object_id,
+                    row.Markup.client_id, row.Markup.object_id)
+
+                future = (
+
+                    executor.submit(
+                        compute_sound_markup,
+                        args,
+                        storage,
+                        row.Sound.content,
+                        row.Markup.content,
+                        row_str))
+
+            pending_deque.append((index, row, future))
+
+            if len(pending_deque) >= pending_limit:
+
+                index, row, future = pending_deque.popleft()
+                yield index, row, future and future.result()
+
+        while pending_deque:
+
+            index, row, future = pending_deque.popleft()
+            yield index, row, future and future.result()
+
+    # If we are stopping early, we do not need not yet started computations.
+
+    finally:
+
+        for index, row, future in pending_deque:
+
+            if future is not None:
+                future.cancel()
 
 
 def perform_phonology(args, task_status, storage):
     """
-    Performs phonology compilation.
+    Performs phonology compilation, with sound/markup analysis possibly performed by a pool of worker
+    processes, see get_phonology_executor().
+    """
+
+    executor = get_phonology_executor(args)
+
+    try:
+        return perform_phonology_executor(args, task_status, storage, executor)
+
+    finally:
+
+        if executor is not None:
+            executor.shutdown(wait = True)
+
+
+def perform_phonology_executor(args, task_status, storage, executor):
+    """
+    Performs phonology compilation using a specified process pool executor, or sequentially, if the
+    executor is None.
     """
 
     fails_dict = collections.OrderedDict()
@@ -4968,6 +5818,7 @@ def perform_phonology(args, task_status, storage):
         '\n  link_field_dict: {}'
         '\n  link_perspective_dict: {}'
         '\n  use_fast_track: {}'
+        '\n  worker_count: {}'
         '\n  limit: {}\n  limit_exception: {}'
         '\n  limit_no_vowel: {}\n  limit_result: {}'.format(
         args.perspective_cid, args.perspective_oid,
@@ -4982,6 +5833,7 @@ def perform_phonology(args, task_status, storage):
         args.link_field_dict,
         args.link_perspective_dict,
         args.use_fast_track,
+        args.worker_count,
         args.limit, args.limit_exception,
         args.limit_no_vowel, args.limit_result))
 
@@ -5138,13 +5990,16 @@ def perform_phonology(args, task_status, storage):
     '''
     Cache initializing
     '''
-    cache = PickleCache(storage, (args.perspective_cid, args.perspective_oid))
+    cache = SqliteCache(storage, (args.perspective_cid, args.perspective_oid))
 
     # Skipping automatic markup, if required.
 
-    for index, row in enumerate(row
-        for row in data_query.yield_per(100)
-        if args.use_automatic_markup or 'amr' not in row.Markup.additional_metadata):
+    for index, row, computed in iterate_sound_markup(
+        args, storage, cache,
+        (row
+            for row in data_query.yield_per(100)
+            if args.use_automatic_markup or 'amr' not in row.Markup.additional_metadata),
+        executor):
 
         text_list = ([] if not text_field else
             [text for text in row[3] if text])
@@ -5171,7 +6026,8 @@ def perform_phonology(args, task_status, storage):
                 index, row, row_str,
                 text_list,
                 fails_dict,
-                cache))
+                cache,
+                computed))
 
         # If we had cache processing error, we terminate.
 
@@ -5219,7 +6075,7 @@ def perform_phonology(args, task_status, storage):
     '''
     Writing cache to file if there is any change
     '''
-    cache.flush()
+    cache.close()
 
     log.debug(
         'phonology {}/{}: {} result{}, {} no vowels, {} exceptions, {:.3f}s elapsed time'.format(
@@ -5422,13 +6278,16 @@ def perform_phonology(args, task_status, storage):
             Cache initializing
             '''
             if not perspective_cache_dict.get(tuple(perspective_id)):
-                perspective_cache_dict[tuple(perspective_id)] = PickleCache(storage, perspective_id)
+                perspective_cache_dict[tuple(perspective_id)] = SqliteCache(storage, perspective_id)
 
             # Skipping automatic markup, if required.
 
-            for index, row in enumerate(row
-                for row in data_query.yield_per(100)
-                if args.use_automatic_markup or 'amr' not in row.Markup.additional_metadata):
+            for index, row, computed in iterate_sound_markup(
+                args, storage, perspective_cache_dict[tuple(perspective_id)],
+                (row
+                    for row in data_query.yield_per(100)
+                    if args.use_automatic_markup or 'amr' not in row.Markup.additional_metadata),
+                executor):
 
                 text_list = ([] if not text_field else
                     [text for text in row[7] if text])
@@ -5464,7 +6323,8 @@ def perform_phonology(args, task_status, storage):
                     index, row, row_str,
                     text_list,
                     fails_dict,
-                    perspective_cache_dict[tuple(perspective_id)])
+                    perspective_cache_dict[tuple(perspective_id)],
+                    computed)
 
                 # If we had cache processing error, we terminate.
 
@@ -5526,7 +6386,7 @@ def perform_phonology(args, task_status, storage):
     Writing cache to file if there is any change
     '''
     for cache in perspective_cache_dict.values():
-        cache.flush()
+        cache.close()
 
     #for row in fails_dict.values(): print(row.get('errs'))
     #sys.stdout.flush()
@@ -5748,7 +6608,7 @@ class Sound_Markup_Iterator(object):
         '''
         Cache initializing
         '''
-        cache = PickleCache(self.storage, self.perspective_id)
+        cache = SqliteCache(self.storage, self.perspective_id)
 
         for index, row in enumerate(data_query.yield_per(100)):
 
@@ -5824,7 +6684,7 @@ class Sound_Markup_Iterator(object):
         '''
         Writing cache to file if there is any change
         '''
-        cache.flush()
+        cache.close()
 
 
 class Tier_List_Iterator(Sound_Markup_Iterator):
@@ -7095,39 +7955,49 @@ def cpu_time(reference_cpu_time = 0.0):
 
 def main_cache_delete_exceptions(args):
     """
-    Removes cached phonology exceptions from the redis cache.
+    Removes cached phonology exceptions from phonology caches of all perspectives, storage directory
+    path is given by the first argument.
     """
 
+    storage = {'path': args[0]}
     storage_dir = path.join(storage['path'], 'phonology')
-    makedirs(storage_dir, exist_ok=True)
-
-    cache_path_list = glob.iglob(path.join(storage_dir, '*_*.pickle.gz'))
 
     count = 0
-    for cache_path in cache_path_list:
-        try:
-            with gzip.open(cache_path, 'rb') as cache_file:
-                cache_result = pickle.load(cache_file)
 
-                if type(cache_result) is not dict:
-                    continue
+    for cache_path in glob.iglob(path.join(storage_dir, '*_*.sqlite')):
+
+        match = re.fullmatch(r'(\d+)_(\d+)\.sqlite', path.basename(cache_path))
 
-        except (FileNotFoundError, OSError, EOFError, ValueError):
+        if not match:
             continue
 
-        start_count = count
-        for cache_key, cache_block in cache_result.items():
+        cache = SqliteCache(storage, tuple(map(int, match.groups())))
+        exception_key_list = []
+
+        for cache_key, value_bytes in cache.connection.execute('select key, value from cache'):
+
+            try:
+                cache_block = pickle.loads(zlib.decompress(value_bytes))
+
+            except Exception:
+                continue
+
             if (isinstance(cache_block, tuple) and
                     cache_block[0] == 'exception'):
 
                 print(cache_block[1])
-                del cache_result[cache_key]
-                count += 1
                 print(cache_key)
 
-        if count > start_count:
-            with gzip.open(cache_path, 'wb') as cache_file:
-                pickle.dump(cache_object, cache_file)
+                exception_key_list.append((cache_key,))
+
+        with cache.connection:
+
+            cache.connection.executemany(
+                'delete from cache where key = ?',
+                exception_key_list)
+
+        count += len(exception_key_list)
+        cache.close()
 
     print('{} cached exceptions removed'.format(count))
 
@@ -7376,6 +8246,84 @@ def main_test_profile(args):
         total_elapsed_cpu_time / total_pair_count))
 
 
+def main_test_kernels(args):
+    """
+    Profiles array-based intensity and formant computation kernels on the whole length of sound files,
+    either given directly or found as phonology:*.wav files in given data directories, in the same
+    manner as main_test_profile().
+    """
+
+    wav_path_list = []
+
+    for data_path in map(path.realpath, args):
+
+        if path.isdir(data_path):
+            wav_path_list.extend(sorted(glob.glob(path.join(data_path, 'phonology:*.wav'))))
+
+        else:
+            wav_path_list.append(data_path)
+
+    total_intensity_cpu_time = 0.0
+    total_formant_cpu_time = 0.0
+
+    total_intensity_count = 0
+    total_formant_count = 0
+
+    for index, wav_path in enumerate(wav_path_list):
+
+        sound = AudioPraatLike(pydub.AudioSegment.from_wav(wav_path))
+
+        # Intensity for all points of the sound, computed at once.
+
+        start_cpu_time = cpu_time()
+
+        sound.compute_intensity(4, sound.intensity_step_count - 4)
+
+        intensity_cpu_time = cpu_time(start_cpu_time)
+        intensity_count = max(0, sound.intensity_step_count - 8)
+
+        # Formants for all points of the sound.
+
+        start_cpu_time = cpu_time()
+
+        sound.init_formant_f()
+
+        step_range = range(
+            sound.formant_step_shift,
+            sound.formant_step_count - sound.formant_step_shift)
+
+        for step_index in step_range:
+            sound.get_formants(step_index)
+
+        formant_cpu_time = cpu_time(start_cpu_time)
+
+        print(
+            '[{0}] {1}: {2} intensity point{3} {4:.3f}s, {5} formant point{6} {7:.3f}s'.format(
+            index,
+            path.basename(wav_path),
+            intensity_count, '' if intensity_count == 1 else 's',
+            intensity_cpu_time,
+            len(step_range), '' if len(step_range) == 1 else 's',
+            formant_cpu_time))
+
+        sys.stdout.flush()
+
+        total_intensity_cpu_time += intensity_cpu_time
+        total_formant_cpu_time += formant_cpu_time
+
+        total_intensity_count += intensity_count
+        total_formant_count += len(step_range)
+
+    print(
+        '{0} sound{1}, total elapsed CPU time: intensity {2:.3f}s ({3:.6f}s / point), '
+        'formants {4:.3f}s ({5:.6f}s / point)'.format(
+        len(wav_path_list), '' if len(wav_path_list) == 1 else 's',
+        total_intensity_cpu_time,
+        total_intensity_cpu_time / max(1, total_intensity_count),
+        total_formant_cpu_time,
+        total_formant_cpu_time / max(1, total_formant_count)))
+
+
 def main_praat_escape(args):
     """
     Extracts data of valid character escape sequences from Praat sources (at the moment source files
@@ -7458,6 +8406,7 @@ command_dict = {
     'cache_delete_exceptions': main_cache_delete_exceptions,
     'praat_escape': main_praat_escape,
     'test_alpha': main_test_alpha,
+    'test_kernels': main_test_kernels,
     'test_profile': main_test_profile}
 
 if __name__ == '__main__':
@@ -7472,54 +8421,3 @@ if __name__ == '__main__':
 
     else:
         print('Please specify command to execute.')
-
-
-# Read or write cache from/into pickle file
-
-class PickleCache(object):
-
-    def __init__(self, storage, perspective_id, debug_flag=False):
-
-        storage_dir = path.join(storage['path'], 'phonology')
-        pickle_path = path.join(storage_dir, f'{perspective_id[0]}_{perspective_id[1]}.pickle.gz')
-
-        if debug_flag:
-            print(f"{pickle_path=}")
-
-        makedirs(storage_dir, exist_ok=True)
-        init_flag = False
-
-        try:
-            with gzip.open(pickle_path, 'rb') as pickle_file:
-                cache_object = pickle.load(pickle_file)
-                if (type(cache_object) is not dict or
-                        '__version__' not in cache_object or
-                        cache_object['__version__'] < cache_version):
-                    init_flag = True
-
-        except (FileNotFoundError, OSError, EOFError, ValueError):
-            init_flag = True
-
-        if init_flag:
-            cache_object = {'__version__': cache_version}
-
-        self.pickle_path = pickle_path
-        self.cache_object = cache_object
-        self.init_flag = init_flag
-        self.dirty_flag = False
-        self.debug_flag = debug_flag
-
-    def get(self, cache_key):
-        return self.cache_object.get(cache_key)
-
-    def set(self, cache_key, input_data):
-        self.cache_object[cache_key] = input_data
-        self.dirty_flag = True
-
-    def flush(self):
-        if self.init_flag or self.dirty_flag:
-            with gzip.open(self.pickle_path, 'wb') as pickle_file:
-                pickle.dump(self.cache_object, pickle_file)
-
-            self.init_flag = False
-            self.dirty_flag = False
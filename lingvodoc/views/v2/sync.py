@@ -1,5 +1,6 @@
 __author__ = 'alexander'
 
+from lingvodoc.acl import invalidate_permission_cache
 from lingvodoc.exceptions import CommonException
 from lingvodoc.models import (
     BaseGroup,
@@ -276,6 +277,10 @@ def basic_sync(request):
             insertion = user_to_group_association.insert().values(user_id=entry[0], group_id=entry[1])
             DBSession.execute(insertion)
 
+    # Permission groups could have been changed bypassing ORM, so we invalidate cached permissions.
+
+    invalidate_permission_cache()
+
     existing = [row2dict(entry) for entry in
                 DBSession.query(ObjectTOC).filter(ObjectTOC.table_name.in_(['language',
                                                                             'field']))]
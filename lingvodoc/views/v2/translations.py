@@ -7,7 +7,8 @@ from lingvodoc.models import (
     User,
     TranslationAtom,
     TranslationGist,
-    ObjectTOC
+    ObjectTOC,
+    bump_translation_version
 )
 """
 from lingvodoc.views.v2.utils import (
@@ -154,15 +155,10 @@ def edit_translationatom(request):
     object_id = request.matchdict.get('object_id')
     translationatom = DBSession.query(TranslationAtom).filter_by(client_id=client_id, object_id=object_id).first()
     if translationatom:
-        key = "translation:%s:%s:%s" % (
-            str(translationatom.parent_client_id),
-            str(translationatom.parent_object_id),
-            str(translationatom.locale_id))
-        CACHE.rem(key)
-        key = "translations:%s:%s" % (
-            str(translationatom.parent_client_id),
-            str(translationatom.parent_object_id))
-        CACHE.rem(key)
+        bump_translation_version(
+            translationatom.parent_client_id,
+            translationatom.parent_object_id)
+
         translationatom.content = content
         request.response.status = HTTPOk.code
         return response
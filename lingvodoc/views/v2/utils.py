@@ -45,6 +45,7 @@ from pyramid.httpexceptions import (
     HTTPConflict
 )
 from lingvodoc.exceptions import CommonException
+from lingvodoc.utils.blob_storage import Blob_Storage, ispras_url_prefix
 from sqlalchemy.exc import IntegrityError
 
 
@@ -593,34 +594,14 @@ def anonymous_userid(request):
     return base64.b64encode(md5(unique_string.encode('utf-8')).digest())[:7]
 
 
-ispras_url_prefix = 'http://lingvodoc.ispras.ru/objects/'
-
-
 def storage_file(storage_config, url):
     """
     Given a URL of a file from storage, first tries to open it as a file from local storage, and
     then as a download stream.
     """
 
-    storage_file_path = None
-
-    if url.startswith(ispras_url_prefix):
-
-        storage_file_path = os.path.join(
-            storage_config['path'],
-            url[len(ispras_url_prefix):])
-
-    else:
-
-        local_url_prefix = (
-            storage_config['prefix'] +
-            storage_config['static_route'])
-
-        if url.startswith(local_url_prefix):
-
-            storage_file_path = os.path.join(
-                storage_config['path'],
-                url[len(local_url_prefix):])
+    storage_file_path = (
+        Blob_Storage(storage_config).url_path(url))
 
     if (storage_file_path is not None and
         os.path.exists(storage_file_path)):
@@ -650,38 +631,17 @@ def as_storage_file(storage_config, url):
     Used for testing and debugging.
     """
 
-    storage_file_path = None
-
-    if url.startswith(ispras_url_prefix):
-
-        storage_file_path = os.path.join(
-            storage_config['path'],
-            url[len(ispras_url_prefix):])
-
-    else:
-
-        local_url_prefix = (
-            storage_config['prefix'] +
-            storage_config['static_route'])
-
-        if url.startswith(local_url_prefix):
-
-            storage_file_path = os.path.join(
-                storage_config['path'],
-                url[len(local_url_prefix):])
+    storage_file_path = (
+        Blob_Storage(storage_config).url_path(url))
 
     if storage_file_path is not None:
 
         if not os.path.exists(storage_file_path):
 
-            os.makedirs(
-                os.path.dirname(storage_file_path),
-                exist_ok = True)
-
-            with open(storage_file_path, 'wb') as storage_file, \
-                urllib.request.urlopen(urllib.parse.quote(url, safe = '/:')) as url_file:
+            with urllib.request.urlopen(urllib.parse.quote(url, safe = '/:')) as url_file:
 
-                shutil.copyfileobj(url_file, storage_file)
+                Blob_Storage(storage_config).store(
+                    url_file, storage_file_path)
 
         return open(storage_file_path, 'rb')
 
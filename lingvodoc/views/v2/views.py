@@ -1,6 +1,7 @@
 
 # Standard library imports.
 
+import collections
 import datetime
 import json
 import logging
@@ -29,6 +30,7 @@ from pyramid.httpexceptions import (
     HTTPBadRequest,
     HTTPConflict,
     HTTPInternalServerError,
+    HTTPNotModified,
     HTTPOk)
 
 from pyramid.renderers import render_to_response
@@ -69,13 +71,16 @@ from lingvodoc.exceptions import CommonException
 
 from lingvodoc.schema.gql_holders import (
     delete_message,
-    del_object)
+    del_object,
+    object_loader_middleware)
 
 from sqlalchemy.orm.attributes import flag_modified
 
+from lingvodoc.schema.gql_language import language_tree_cache
 from lingvodoc.schema.query import schema, Context
 
 from lingvodoc.utils.creation import translationgist_contents
+from lingvodoc.utils.document_cache import document_cache, execute_query
 from lingvodoc.utils.proxy import ProxyPass
 from lingvodoc.utils.verification import check_client_id
 
@@ -1170,6 +1175,8 @@ def graphql(request):
 
         batch = False
         variable_values = {}
+        operation_name = None
+        hash_str = None
 
         client_id = (
             request.authenticated_userid or None)
@@ -1199,15 +1206,17 @@ def graphql(request):
             json_req = (
                 json.loads(request_string))
 
-            if "query" not in json_req:
-                return {'errors': [{"message": 'query key not found'}]}
+            request_string, hash_str, error_str = (
+                document_cache.get_query(json_req))
 
-            request_string = (
-                json_req["query"].rstrip())
+            if error_str is not None:
+                return {'errors': [{"message": error_str}]}
 
             if "variables" in json_req:
                 variable_values = json_req["variables"]
 
+            operation_name = json_req.get("operationName")
+
             '''
             if data and "file" in data and "graphene" in data:
                 # We can get next file from the list inside file upload mutation resolve
@@ -1238,14 +1247,17 @@ def graphql(request):
 
             if type(json_req) is not list:
 
-                if "query" not in json_req:
-                    return {'errors': [{"message": 'query key not found'}]}
+                request_string, hash_str, error_str = (
+                    document_cache.get_query(json_req))
 
-                request_string = json_req["query"]
+                if error_str is not None:
+                    return {'errors': [{"message": error_str}]}
 
                 if "variables" in json_req:
                     variable_values = json_req["variables"]
 
+                operation_name = json_req.get("operationName")
+
             else:
 
                 batch = True
@@ -1269,6 +1281,44 @@ def graphql(request):
         t_start_real, t_start_process = (
             time.time(), time.process_time())
 
+        # Parsing, validation and execution time, queries are parsed and validated only if they are not in
+        # the document cache, see Document_Cache.
+
+        timing_dict = collections.Counter()
+
+        # Language tree queries can have cached results, see Language_Tree_Cache, with snapshot digest as
+        # result's ETag.
+
+        snapshot_digest = None
+        snapshot_data = None
+
+        document_tuple = None
+
+        if not batch:
+
+            if hash_str is None:
+
+                request_string, hash_str, _ = (
+                    document_cache.get_query({'query': request_string}))
+
+            document_tuple = (
+
+                document_cache.get(
+                    schema, request_string, hash_str, timing_dict))
+
+            snapshot_digest = (
+
+                language_tree_cache.digest(
+                    document_tuple[0], hash_str, variable_values, locale_id, context))
+
+            if snapshot_digest is not None:
+
+                if snapshot_digest in request.if_none_match:
+                    return HTTPNotModified(etag = snapshot_digest)
+
+                snapshot_data = (
+                    language_tree_cache.get(snapshot_digest))
+
         if batch:
 
             # Multiple queries.
@@ -1278,15 +1328,23 @@ def graphql(request):
 
             for query in json_req:
 
-                if "query" not in query:
-                    return {'errors': [{"message": 'query key not found'}]}
+                query_str, query_hash_str, error_str = (
+                    document_cache.get_query(query))
+
+                if error_str is not None:
+                    return {'errors': [{"message": error_str}]}
 
                 result_item = (
 
-                    schema.execute(
-                        query["query"],
+                    execute_query(
+                        schema,
+                        query_str,
+                        query_hash_str,
+                        timing_dict,
                         context_value = context,
-                        variable_values = query.get("variables", {})))
+                        variable_values = query.get("variables") or {},
+                        operation_name = query.get("operationName"),
+                        middleware = object_loader_middleware))
 
                 if result_item.invalid:
 
@@ -1298,7 +1356,7 @@ def graphql(request):
                     error_flag = True
                     break
 
-                if result.errors:
+                if result_item.errors:
 
                     sp.rollback()
 
@@ -1315,16 +1373,27 @@ def graphql(request):
 
                 result = {'data': result}
 
+        elif snapshot_data is not None:
+
+            result = {
+                'data': snapshot_data}
+
         else:
 
             # Single query.
 
             result = (
 
-                schema.execute(
+                execute_query(
+                    schema,
                     request_string,
+                    hash_str,
+                    timing_dict,
+                    document_tuple,
                     context_value = context,
-                    variable_values = variable_values))
+                    variable_values = variable_values or {},
+                    operation_name = operation_name,
+                    middleware = object_loader_middleware))
 
             if result.invalid:
 
@@ -1376,6 +1445,11 @@ def graphql(request):
                 result = {
                     'data': result.data}
 
+                if snapshot_digest is not None:
+
+                    language_tree_cache.set(
+                        snapshot_digest, result['data'])
+
         t_end_real, t_end_process = (
             time.time(), time.process_time())
 
@@ -1387,11 +1461,21 @@ def graphql(request):
 
         log.debug(
             '\nschema.execute() elapsed time real, process: '
-            f'{t_elapsed_real:.6f}s, {t_elapsed_process:.6f}s')
+            f'{t_elapsed_real:.6f}s, {t_elapsed_process:.6f}s'
+            '\nparse, validate, execute: '
+            f'{timing_dict["parse"]:.6f}s, {timing_dict["validate"]:.6f}s, {timing_dict["execute"]:.6f}s')
 
         request.response.headerlist.append((
             'Server-Timing',
-            f'real;dur={t_elapsed_real:.6f}, process;dur={t_elapsed_process:.6f}'))
+            f'real;dur={t_elapsed_real:.6f}, process;dur={t_elapsed_process:.6f}, '
+            f'parse;dur={timing_dict["parse"]:.6f}, validate;dur={timing_dict["validate"]:.6f}, '
+            f'execute;dur={timing_dict["execute"]:.6f}'))
+
+        # Snapshots are per user, so results can't be stored by shared caches.
+
+        if snapshot_digest is not None and 'errors' not in result:
+            request.response.etag = snapshot_digest
+            request.response.cache_control.private = True
                         
         result['time_real'] = t_elapsed_real
         result['time_process'] = t_elapsed_process
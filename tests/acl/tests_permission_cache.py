@@ -0,0 +1,185 @@
+"""
+Tests of permission checks with request-scoped permission cache, see get_permission_set() of lingvodoc.acl,
+with permissions granted and revoked within the same request, before modifications are flushed.
+"""
+
+import types
+
+import pytest
+
+from lingvodoc.acl import (
+    check_direct,
+    groupfinder)
+
+from lingvodoc.models import (
+    BaseGroup,
+    Client,
+    Group,
+    Organization,
+    User)
+
+
+table_name_list = [
+    'user',
+    'client',
+    'basegroup',
+    'group',
+    'organization',
+    'user_to_group_association',
+    'organization_to_group_association',
+    'user_to_organization_association']
+
+
+@pytest.fixture
+def session(db_session):
+
+    user = User(id = 2, login = 'user', intl_name = 'user')
+
+    db_session.add_all([
+        user,
+        Client(id = 2, user = user),
+        BaseGroup(id = 1, name = 'edit', subject = 'perspective', action = 'edit')])
+
+    db_session.flush()
+
+    return db_session
+
+
+def make_request():
+
+    return (
+        types.SimpleNamespace(
+            registry = types.SimpleNamespace(settings = {})))
+
+
+def test_user_grant_revoke(session):
+
+    request = make_request()
+    user = session.query(User).get(2)
+
+    assert not check_direct(2, request, 'edit', 'perspective', (5, 6))
+
+    # Granting, checking without a flush.
+
+    group = Group(base_group_id = 1, subject_client_id = 5, subject_object_id = 6)
+    session.add(group)
+
+    group.users.append(user)
+
+    assert check_direct(2, request, 'edit', 'perspective', (5, 6))
+    assert not check_direct(2, request, 'edit', 'perspective', (5, 7))
+
+    assert (
+        groupfinder(2, request, subject = 'perspective') ==
+            {'edit:perspective:5:6'})
+
+    # Revoking, again without a flush.
+
+    group.users.remove(user)
+
+    assert not check_direct(2, request, 'edit', 'perspective', (5, 6))
+    assert groupfinder(2, request, subject = 'perspective') == set()
+
+    # Granting via the other side of the relationship, and then by modification of a group's subject.
+
+    user.groups.append(group)
+
+    assert check_direct(2, request, 'edit', 'perspective', (5, 6))
+
+    group.subject_object_id = 7
+
+    assert not check_direct(2, request, 'edit', 'perspective', (5, 6))
+    assert check_direct(2, request, 'edit', 'perspective', (5, 7))
+
+
+def test_organization_grant_revoke(session):
+
+    request = make_request()
+    user = session.query(User).get(2)
+
+    group = Group(base_group_id = 1, subject_client_id = 5, subject_object_id = 6)
+    organization = (
+
+        Organization(
+            id = 1,
+            translation_gist_client_id = 1,
+            translation_gist_object_id = 1,
+            about_translation_gist_client_id = 1,
+            about_translation_gist_object_id = 2))
+
+    session.add_all([group, organization])
+    session.flush()
+
+    assert not check_direct(2, request, 'edit', 'perspective', (5, 6))
+
+    organization.groups.append(group)
+    organization.users.append(user)
+
+    assert check_direct(2, request, 'edit', 'perspective', (5, 6))
+
+    organization.users.remove(user)
+
+    assert not check_direct(2, request, 'edit', 'perspective', (5, 6))
+
+
+def test_no_request(session):
+    """
+    Without a request permissions are checked by per-check queries.
+    """
+
+    user = session.query(User).get(2)
+
+    group = Group(base_group_id = 1, subject_client_id = 5, subject_object_id = 6)
+    group.users.append(user)
+
+    session.add(group)
+    session.flush()
+
+    assert check_direct(2, None, 'edit', 'perspective', (5, 6))
+    assert not check_direct(2, None, 'edit', 'perspective', (5, 7))
+    assert not check_direct(2, None, 'edit', 'perspective', None)
+
+    assert (
+        groupfinder(2, None, subject = 'perspective') ==
+            {'edit:perspective:5:6'})
+
+    override_group = Group(base_group_id = 1, subject_override = True)
+    override_group.users.append(user)
+
+    session.add(override_group)
+    session.flush()
+
+    assert check_direct(2, None, 'edit', 'perspective', (5, 7))
+    assert check_direct(2, None, 'edit', 'perspective', None)
+
+
+def test_override_group_list(session):
+    """
+    Groups of specific subjects are skipped if there is an override group with the same base group.
+    """
+
+    user = session.query(User).get(2)
+
+    session.add(
+        BaseGroup(id = 2, name = 'view', subject = 'perspective', action = 'view'))
+
+    group_list = [
+        Group(base_group_id = 1, subject_override = True),
+        Group(base_group_id = 1, subject_client_id = 5, subject_object_id = 6),
+        Group(base_group_id = 2, subject_client_id = 5, subject_object_id = 6)]
+
+    for group in group_list:
+        group.users.append(user)
+
+    session.add_all(group_list)
+    session.flush()
+
+    request = make_request()
+
+    assert (
+        groupfinder(2, request, subject = 'perspective') ==
+            {'edit:perspective:True', 'view:perspective:5:6'})
+
+    assert check_direct(2, request, 'edit', 'perspective', (5, 7))
+    assert check_direct(2, request, 'view', 'perspective', (5, 6))
+    assert not check_direct(2, request, 'view', 'perspective', (5, 7))
@@ -0,0 +1,304 @@
+"""
+Tests of object caching via ThroughCache of lingvodoc.cache.through.cache: bulk object reads with a single
+MGET and a single query for cache misses, key time-to-live values and invalidation of cached objects on
+flush, commit and rollback.
+
+Redis is replaced by a dictionary based stand-in recording issued commands.
+"""
+
+import pickle
+
+import dill
+import pytest
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+import lingvodoc.cache.through.cache as through_cache
+
+from lingvodoc.cache.through.cache import (
+    object_key,
+    ThroughCache)
+
+from lingvodoc.models import LexicalEntry
+
+
+table_name_list = ['objecttoc', 'lexicalentry']
+
+
+class Redis_Pipeline:
+    """
+    Pipeline of the Redis stand-in, executes commands on execute().
+    """
+
+    def __init__(self, redis):
+
+        self.redis = redis
+        self.command_list = []
+
+    def set(self, *args, **kwargs):
+        self.command_list.append(('set', args, kwargs))
+
+    def mget(self, *args):
+        self.command_list.append(('mget', args, {}))
+
+    def execute(self):
+
+        self.redis.pipeline_list.append(
+            [name for name, _, _ in self.command_list])
+
+        return [
+            getattr(self.redis, name)(*args, **kwargs)
+            for name, args, kwargs in self.command_list]
+
+
+class Redis:
+    """
+    Dictionary based stand-in of a Redis client, with counts of commands and key expiration times.
+    """
+
+    def __init__(self):
+
+        self.value_dict = {}
+        self.ttl_dict = {}
+
+        self.mget_count = 0
+        self.pipeline_list = []
+
+    def get(self, key):
+        return self.value_dict.get(key)
+
+    def mget(self, key_list):
+
+        self.mget_count += 1
+
+        return [
+            self.value_dict.get(key) for key in key_list]
+
+    def set(self, key, value, ex = None):
+
+        self.value_dict[key] = value
+        self.ttl_dict[key] = ex
+
+    def delete(self, *key_list):
+
+        for key in key_list:
+            self.value_dict.pop(key, None)
+
+    def pipeline(self, transaction = True):
+        return Redis_Pipeline(self)
+
+
+@pytest.fixture
+def session_f(db_schema, db_session):
+
+    db_schema.connection.execute(
+        LexicalEntry.__table__.insert(), [
+            {'client_id': 1,
+                'object_id': object_id,
+                'parent_client_id': 5,
+                'parent_object_id': 6,
+                'marked_for_deletion': False}
+            for object_id in range(1, 11)])
+
+    # Counting queries to check that cached objects are not loaded from the DB.
+
+    query_list = []
+
+    @event.listens_for(db_schema.engine, 'before_cursor_execute')
+    def before_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+
+        if statement.lstrip().upper().startswith('SELECT'):
+            query_list.append(statement)
+
+    # Objects' constructors check ObjectTOC via the global session, bound to the same engine.
+
+    session_list = []
+
+    def session_f():
+
+        session = Session(bind = db_schema.engine)
+        session_list.append(session)
+
+        return session
+
+    session_f.query_list = query_list
+
+    yield session_f
+
+    for session in session_list:
+        session.close()
+
+
+def test_get_objects(session_f, monkeypatch):
+
+    redis = Redis()
+    cache = ThroughCache(redis)
+
+    id_list = [(1, object_id) for object_id in range(1, 6)] + [(1, 20)]
+
+    session = session_f()
+
+    entry_list = (
+        cache.get(objects = {LexicalEntry: id_list}, DBSession = session))
+
+    assert [entry and entry.id for entry in entry_list] == id_list[:-1] + [None]
+
+    # All keys requested at once, missing objects loaded with a single query.
+
+    assert redis.mget_count == 1
+    assert len(session_f.query_list) == 1
+
+    assert redis.pipeline_list == [['set'] * 5]
+    assert redis.ttl_dict[object_key(LexicalEntry, 1, 1)] == 24 * 60 * 60
+
+    session.close()
+
+    # Objects are restored from the cache without queries.
+
+    session = session_f()
+
+    entry_list = (
+        cache.get(objects = {LexicalEntry: id_list[:5]}, DBSession = session))
+
+    assert len(session_f.query_list) == 1
+
+    assert [entry.id for entry in entry_list] == id_list[:5]
+    assert [entry.parent_id for entry in entry_list] == [(5, 6)] * 5
+
+    assert all(entry in session for entry in entry_list)
+    assert not session.dirty
+
+    # Objects of the session are taken from its identity map.
+
+    assert (
+        cache.get(objects = {LexicalEntry: [(1, 1)]}, DBSession = session) is entry_list[0])
+
+    assert (
+        cache.get(objects = {LexicalEntry: [(1, 1)]}, DBSession = session, keep_dims = True) ==
+            [entry_list[0]])
+
+    session.close()
+
+    # Many keys are requested with pipelined MGETs, values in the previous format are cache misses.
+
+    monkeypatch.setattr(through_cache, 'chunk_size', 2)
+
+    redis.value_dict[object_key(LexicalEntry, 1, 2)] = (
+        dill.dumps(entry_list[1]))
+
+    redis.pipeline_list.clear()
+
+    session = session_f()
+
+    entry_list = (
+        cache.get(objects = {LexicalEntry: id_list}, DBSession = session))
+
+    assert [entry and entry.id for entry in entry_list] == id_list[:-1] + [None]
+
+    assert redis.pipeline_list == [['mget'] * 3, ['set']]
+    assert len(session_f.query_list) == 2
+
+    assert (
+        pickle.loads(redis.value_dict[object_key(LexicalEntry, 1, 2)])['object_id'] == 2)
+
+    session.close()
+
+
+def test_ttl():
+
+    redis = Redis()
+
+    cache = (
+        ThroughCache(redis, {'auto': 60, 'default': 3600}))
+
+    assert cache.ttl('auto:LexicalEntry:1:1') == 60
+    assert cache.ttl('language_tree:digest') == 24 * 60 * 60
+    assert cache.ttl('task:1') == 3600
+
+    cache.set(key = 'task:1', value = {'status': 1})
+    cache.set(key_value = {'task:2': 'a', 'auto:other': 'b'})
+
+    assert redis.ttl_dict == {'task:1': 3600, 'task:2': 3600, 'auto:other': 60}
+
+    assert cache.get(keys = 'task:1') == {'status': 1}
+    assert cache.get(keys = ['task:2', 'task:3']) == ['a', None]
+
+    assert ThroughCache(redis).ttl('task:1') is None
+
+
+def test_invalidation(session_f):
+
+    redis = Redis()
+    cache = ThroughCache(redis)
+
+    key_1 = object_key(LexicalEntry, 1, 1)
+    key_2 = object_key(LexicalEntry, 1, 2)
+
+    session = session_f()
+
+    entry_1, entry_2 = (
+        cache.get(objects = {LexicalEntry: [(1, 1), (1, 2)]}, DBSession = session))
+
+    # Modified object is invalidated on flush.
+
+    entry_1.marked_for_deletion = True
+    session.flush()
+
+    assert key_1 not in redis.value_dict
+    assert key_2 in redis.value_dict
+
+    # Cached again with the previous state by another transaction, and invalidated again on commit.
+
+    other_session = session_f()
+    cache.get(objects = {LexicalEntry: [(1, 1)]}, DBSession = other_session)
+    other_session.close()
+
+    assert not pickle.loads(redis.value_dict[key_1])['marked_for_deletion']
+
+    session.commit()
+
+    assert key_1 not in redis.value_dict
+
+    session = session_f()
+
+    assert (
+        cache.get(objects = {LexicalEntry: [(1, 1)]}, DBSession = session).marked_for_deletion)
+
+    # Objects modified or created in a rolled back transaction are invalidated.
+
+    entry_2 = (
+        cache.get(objects = {LexicalEntry: [(1, 2)]}, DBSession = session))
+
+    entry_2.marked_for_deletion = True
+
+    new_entry = (
+        LexicalEntry(client_id = 1, object_id = 11, parent_client_id = 5, parent_object_id = 6))
+
+    assert cache.set(objects = [new_entry], DBSession = session) == [True]
+
+    key_new = object_key(LexicalEntry, 1, 11)
+
+    assert key_new in redis.value_dict
+
+    session.flush()
+
+    other_session = session_f()
+    cache.get(objects = {LexicalEntry: [(1, 2)]}, DBSession = other_session)
+    other_session.close()
+
+    assert key_2 in redis.value_dict
+
+    session.rollback()
+
+    assert key_2 not in redis.value_dict
+    assert key_new not in redis.value_dict
+
+    session.close()
+
+    session = session_f()
+
+    assert cache.get(objects = {LexicalEntry: [(1, 11)]}, DBSession = session) is None
+    assert not cache.get(objects = {LexicalEntry: [(1, 2)]}, DBSession = session).marked_for_deletion
+
+    session.close()
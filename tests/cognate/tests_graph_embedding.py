@@ -0,0 +1,151 @@
+#
+# Tests of stress minimization graph embedding of cognate analysis, see
+# CognateAnalysis.graph_embedding() in lingvodoc/schema/gql_cognate.py. Do not require DB.
+#
+
+import numpy
+import scipy.optimize
+
+from lingvodoc.schema.gql_cognate import CognateAnalysis
+
+
+def graph_embedding_reference(d_ij, dimension):
+    """
+    Previous pairwise loop implementation of graph_2d_embedding() / graph_3d_embedding(), used as a
+    reference.
+    """
+
+    N = numpy.size(d_ij, 0)
+
+    min_non_zero_d_ij = (
+
+        min(
+            (d_ij[i,j]
+                for i in range(1, N)
+                for j in range(i)
+                if d_ij[i,j] > 0),
+
+            default = 1))
+
+    zero_d_ij_scale = 1. / min(1, min_non_zero_d_ij)
+
+    def f(xy):
+
+        xy = xy.reshape(dimension, N)
+        result = 0.0
+
+        for i in range(1, N):
+            for j in range(i):
+
+                dr2 = sum((xy[k, i] - xy[k, j]) ** 2 for k in range(dimension))
+
+                if d_ij[i,j] <= 0:
+                    result += 4 * dr2 * zero_d_ij_scale
+
+                else:
+                    d2_ij = d_ij[i,j] ** 2
+                    result += dr2 / d2_ij + d2_ij / dr2
+
+        return result
+
+    def df(xy):
+
+        xy = xy.reshape(dimension, N)
+        df_xy = numpy.zeros((dimension, N))
+
+        for i in range(1, N):
+            for j in range(i):
+
+                delta = [xy[k, i] - xy[k, j] for k in range(dimension)]
+                dr2 = sum(d ** 2 for d in delta)
+
+                if d_ij[i,j] <= 0:
+                    factor = 4 * zero_d_ij_scale
+
+                else:
+                    d2_ij = d_ij[i,j] ** 2
+                    factor = (1 / d2_ij - d2_ij / dr2 ** 2)
+
+                for k in range(dimension):
+                    df_xy[k, i] += delta[k] * factor
+                    df_xy[k, j] -= delta[k] * factor
+
+        return df_xy.reshape(-1)
+
+    rng = (
+
+        numpy.random.Generator(
+            numpy.random.PCG64(
+
+                tuple(
+                    hash(value)
+                    for value in d_ij.flat))))
+
+    result = (
+
+        scipy.optimize.minimize(f,
+            rng.random(N * dimension),
+            jac = df))
+
+    return result.x.reshape(dimension, N).T, f(result.x)
+
+
+def distance_matrix(N, seed):
+    """
+    Simmetric distance matrix of random points of a 4d space, with some coinciding points to get zero
+    distances.
+    """
+
+    rng = numpy.random.default_rng(seed)
+
+    point_array = rng.random((N, 4)) * 10
+    point_array[1::5] = point_array[::5][:len(point_array[1::5])]
+
+    return (
+        numpy.sqrt(
+            numpy.square(point_array[:, None, :] - point_array[None, :, :]).sum(axis = 2)))
+
+
+def test_stress():
+
+    d_ij = distance_matrix(12, 1)
+
+    for dimension in (2, 3):
+
+        f, df = CognateAnalysis.graph_embedding_stress(d_ij, dimension)
+
+        xy = numpy.random.default_rng(dimension).random(12 * dimension)
+
+        # Comparing gradient with finite differences of the stress.
+
+        epsilon = 1e-6
+
+        numerical_df = numpy.array([
+            (f(xy + epsilon * e) - f(xy - epsilon * e)) / (2 * epsilon)
+            for e in numpy.eye(len(xy))])
+
+        # Gradient is half of the actual one, see graph_2d_embedding().
+
+        numpy.testing.assert_allclose(2 * df(xy), numerical_df, rtol = 1e-4, atol = 1e-4)
+
+
+def test_embedding():
+    """
+    Compares embeddings and stress with the reference implementation.
+    """
+
+    for N in (2, 8, 40):
+
+        d_ij = distance_matrix(N, N)
+
+        for dimension, embedding_f in (
+            (2, CognateAnalysis.graph_2d_embedding),
+            (3, CognateAnalysis.graph_3d_embedding)):
+
+            reference_x, reference_stress = graph_embedding_reference(d_ij, dimension)
+            result_x, stress = embedding_f(d_ij)
+
+            assert result_x.shape == (N, dimension)
+
+            numpy.testing.assert_allclose(stress, reference_stress, rtol = 1e-6)
+            numpy.testing.assert_allclose(result_x, reference_x, rtol = 1e-4, atol = 1e-4)
@@ -0,0 +1,120 @@
+"""
+Shared fixtures of tests using the testing PostgreSQL database from the alembictests.ini.
+
+Test modules list model tables they need in 'table_name_list' and, if required, sequences in
+'sequence_list', and get a separate schema with them via the db_schema fixture. Tests using it are skipped
+if the database is not available.
+"""
+
+import configparser
+import os
+import types
+
+import pytest
+import transaction
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.schema import CreateSequence, CreateTable
+
+import lingvodoc.cache.caching as caching
+
+from lingvodoc.cache.mock.cache import MockCache
+
+from lingvodoc.models import (
+    Base,
+    DBSession)
+
+
+@pytest.fixture
+def db_schema(request):
+    """
+    Creates a schema named after the test module with tables of its 'table_name_list', created from their
+    models without foreign keys, and sequences of its 'sequence_list', drops it afterwards.
+
+    Returns namespace with schema's name, engine with the schema as its search path and a connection of
+    the engine for test data setup.
+    """
+
+    parser = configparser.ConfigParser()
+
+    parser.read(
+        os.path.join(os.path.dirname(__file__), '..', 'alembictests.ini'))
+
+    url = parser.get('alembic', 'sqlalchemy.url').strip()
+
+    schema_name = (
+        request.module.__name__.rsplit('.', 1)[-1])
+
+    admin_engine = create_engine(url)
+
+    try:
+        admin_connection = admin_engine.connect()
+
+    except OperationalError:
+        pytest.skip('testing database is not available')
+
+    with admin_connection.begin():
+
+        admin_connection.execute('drop schema if exists {0} cascade'.format(schema_name))
+        admin_connection.execute('create schema {0}'.format(schema_name))
+
+    # Using schema search path and not schema translation, as the latter also qualifies ids VALUES
+    # aliases, see ids_to_id_query().
+
+    engine = (
+
+        create_engine(
+            url,
+            connect_args = {'options': '-c search_path={0}'.format(schema_name)}))
+
+    connection = engine.connect()
+
+    with connection.begin():
+
+        for table_name in getattr(request.module, 'table_name_list', ()):
+
+            connection.execute(
+                CreateTable(
+                    Base.metadata.tables[table_name],
+                    include_foreign_key_constraints = []))
+
+        for sequence in getattr(request.module, 'sequence_list', ()):
+            connection.execute(CreateSequence(sequence))
+
+    yield (
+
+        types.SimpleNamespace(
+            name = schema_name,
+            engine = engine,
+            connection = connection))
+
+    # All sessions using the schema should be closed by now, or dropping it would wait for them.
+
+    connection.close()
+    engine.dispose()
+
+    admin_connection.execute('drop schema {0} cascade'.format(schema_name))
+    admin_connection.close()
+
+    admin_engine.dispose()
+
+
+@pytest.fixture
+def db_session(db_schema, monkeypatch):
+    """
+    Global DBSession bound to the engine of the db_schema, with Redis cache replaced by MockCache, its
+    transaction is aborted afterwards.
+    """
+
+    monkeypatch.setattr(caching, 'CACHE', MockCache())
+
+    DBSession.remove()
+    DBSession.configure(bind = db_schema.engine)
+
+    yield DBSession
+
+    transaction.abort()
+    DBSession.remove()
+
+    DBSession.configure(bind = None)
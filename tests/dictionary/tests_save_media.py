@@ -0,0 +1,169 @@
+"""
+Tests of saving sound / markup files of lexical entries into the dictionary zip archive, see
+Save_Context.get_sound_link() and Media_Prefetcher of lingvodoc.scripts.save_dictionary, with files served
+by a local HTTP server.
+"""
+
+import collections
+import functools
+import hashlib
+import http.server
+import io
+import os
+import struct
+import threading
+import zipfile
+
+import pytest
+
+from lingvodoc.scripts.save_dictionary import Media_Prefetcher, Save_Context
+from lingvodoc.views.v2.utils import storage_file
+
+
+def wav_bytes(frame_count):
+
+    data = bytes(range(256)) * (frame_count // 128)
+
+    return (
+        b'RIFF' + struct.pack('<I', 36 + len(data)) + b'WAVE' +
+        b'fmt ' + struct.pack('<IHHIIHH', 16, 1, 1, 8000, 16000, 2, 16) +
+        b'data' + struct.pack('<I', len(data)) + data)
+
+
+class Save_Context_Media(Save_Context):
+    """
+    Saving context only with sound / markup file info.
+    """
+
+    def __init__(self, storage):
+
+        self.sound_flag = True
+        self.markup_flag = True
+
+        self.storage = storage
+        self.storage_f = storage_file
+
+        self.media_prefetcher = None
+        self.task_status = None
+
+        self.media_count = 0
+        self.media_size = 0
+
+        self.media_start_time = 0
+        self.media_status_time = 0
+
+        self.zip_buffer = io.BytesIO()
+        self.zip_file = zipfile.ZipFile(self.zip_buffer, 'w')
+
+        self.zip_name_dict = collections.Counter()
+        self.zip_hash_dict = {}
+
+
+@pytest.fixture
+def server(tmp_path):
+
+    file_dict = {
+        'a/sound.wav': wav_bytes(4096),
+        'b/sound.wav': wav_bytes(8192),
+        'c/sound.wav': wav_bytes(4096),
+        'a/markup.TextGrid': b'File type = "ooTextFile"\n' * 1000,
+        'b/other.mp3': os.urandom(100000)}
+
+    for name, content in file_dict.items():
+
+        (tmp_path / name).parent.mkdir(parents = True, exist_ok = True)
+        (tmp_path / name).write_bytes(content)
+
+    class Handler(http.server.SimpleHTTPRequestHandler):
+
+        def log_message(self, *args):
+            pass
+
+    http_server = (
+
+        http.server.ThreadingHTTPServer(
+            ('127.0.0.1', 0),
+            functools.partial(Handler, directory = str(tmp_path))))
+
+    thread = threading.Thread(target = http_server.serve_forever, daemon = True)
+    thread.start()
+
+    url_prefix = 'http://127.0.0.1:{}/'.format(http_server.server_address[1])
+
+    yield url_prefix, file_dict
+
+    http_server.shutdown()
+    http_server.server_close()
+
+
+def test_media_links(server, tmp_path):
+
+    url_prefix, file_dict = server
+
+    context = (
+
+        Save_Context_Media({
+            'path': str(tmp_path / 'storage'),
+            'prefix': 'http://localhost/',
+            'static_route': 'objects/'}))
+
+    # Entry 1 with a sound and a markup, entry 2 with a sound, entry 3 with a sound of the same name as
+    # the first one and the same content, entry 4 without prefetched files, entry 5 with a sound never
+    # requested.
+
+    context.media_prefetcher = (
+        Media_Prefetcher(context.fetch_media, context.discard_media, 2, 2))
+
+    context.media_prefetcher.set_entries([
+        ((1, 1), [url_prefix + 'a/sound.wav', url_prefix + 'a/markup.TextGrid']),
+        ((1, 2), [url_prefix + 'b/sound.wav']),
+        ((1, 3), [url_prefix + 'c/sound.wav']),
+        ((1, 5), [url_prefix + 'b/other.mp3'])])
+
+    link_list = []
+
+    for entry_id, link_type, name in [
+        ((1, 1), 'markup', 'a/markup.TextGrid'),
+        ((1, 1), 'sound', 'a/sound.wav'),
+        ((1, 2), 'sound', 'b/sound.wav'),
+        ((1, 3), 'sound', 'c/sound.wav'),
+        ((1, 4), 'sound', 'b/other.mp3')]:
+
+        context.media_prefetcher.advance(entry_id)
+
+        f = (
+            context.get_sound_link if link_type == 'sound' else
+            context.get_markup_link)
+
+        link_list.append(
+            f(url_prefix + name, 1500000000))
+
+    context.close_media()
+    context.zip_file.close()
+
+    assert link_list == [
+        'markup.TextGrid', 'sound.wav', 'sound_1.wav', 'sound.wav', 'other.mp3']
+
+    assert context.media_count == 4
+
+    with zipfile.ZipFile(context.zip_buffer) as zip_file:
+
+        info_dict = {
+            info.filename: info
+            for info in zip_file.infolist()}
+
+        assert set(info_dict) == {'markup.TextGrid', 'sound.wav', 'sound_1.wav', 'other.mp3'}
+
+        for zip_name, name in [
+            ('markup.TextGrid', 'a/markup.TextGrid'),
+            ('sound.wav', 'a/sound.wav'),
+            ('sound_1.wav', 'b/sound.wav'),
+            ('other.mp3', 'b/other.mp3')]:
+
+            assert (
+                hashlib.sha256(zip_file.read(zip_name)).digest() ==
+                hashlib.sha256(file_dict[name]).digest())
+
+        assert info_dict['sound.wav'].compress_type == zipfile.ZIP_DEFLATED
+        assert info_dict['markup.TextGrid'].compress_type == zipfile.ZIP_DEFLATED
+        assert info_dict['other.mp3'].compress_type == zipfile.ZIP_STORED
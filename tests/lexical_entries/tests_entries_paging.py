@@ -0,0 +1,202 @@
+"""
+Tests of retrieval of lexical entries with entities via entries_with_entities() of
+lingvodoc.schema.gql_dictionaryperspective, with cursor pages checked against offset pages for both sort
+directions, and of the connected_words query using it.
+"""
+
+import datetime
+import types
+
+import pytest
+
+from lingvodoc.models import (
+    Entity,
+    EntryGroupIdSequence,
+    LexicalEntry,
+    PublishingEntity)
+
+from lingvodoc.schema.gql_dictionaryperspective import entries_with_entities
+from lingvodoc.schema.query import Query
+from lingvodoc.utils.search import update_entry_groups
+
+
+table_name_list = [
+    'lexicalentry',
+    'entity',
+    'publishingentity',
+    'entry_group_data']
+
+sequence_list = [EntryGroupIdSequence]
+
+text_field_id = (66, 10)
+tag_field_id = (66, 25)
+
+entry_count = 17
+
+
+@pytest.fixture
+def session(db_schema, db_session):
+
+    connection = db_schema.connection
+
+    # Entries with coinciding creation times to check ordering by ids, the last one without entities.
+
+    base_time = datetime.datetime(2020, 1, 1)
+
+    connection.execute(
+        LexicalEntry.__table__.insert(), [
+            {'created_at': base_time + datetime.timedelta(seconds = object_id // 3),
+                'client_id': 1 + object_id % 2,
+                'object_id': object_id,
+                'parent_client_id': 5,
+                'parent_object_id': 6,
+                'marked_for_deletion': False}
+            for object_id in range(1, entry_count + 2)])
+
+    # Text entities and grouping tags linking every third entry.
+
+    entity_list = []
+
+    for object_id in range(1, entry_count + 1):
+
+        entity_list.append(
+            (text_field_id, object_id, 'text {0}'.format(object_id)))
+
+        if object_id % 3 == 0:
+
+            entity_list.append(
+                (tag_field_id, object_id, 'tag {0}'.format(object_id % 2)))
+
+    connection.execute(
+        Entity.__table__.insert(), [
+            {'created_at': base_time,
+                'client_id': 3,
+                'object_id': index,
+                'parent_client_id': 1 + object_id % 2,
+                'parent_object_id': object_id,
+                'field_client_id': field_id[0],
+                'field_object_id': field_id[1],
+                'content': content,
+                'marked_for_deletion': False}
+            for index, (field_id, object_id, content) in enumerate(entity_list)])
+
+    connection.execute(
+        PublishingEntity.__table__.insert(), [
+            {'created_at': base_time,
+                'client_id': 3,
+                'object_id': index,
+                'published': True,
+                'accepted': True}
+            for index in range(len(entity_list))])
+
+    update_entry_groups(
+        [(tag_field_id, (1 + object_id % 2, object_id))
+            for object_id in range(3, entry_count + 1, 3)],
+        db_session)
+
+    return db_session
+
+
+def entry_query(session):
+
+    return (
+        session.query(
+            LexicalEntry.client_id,
+            LexicalEntry.object_id))
+
+
+def test_pages(session):
+
+    for is_edit_mode in (False, True):
+        for is_ascending in (True, False):
+
+            page_list = []
+            offset = 0
+
+            # Offset pages.
+
+            while True:
+
+                entry_list, total_count, _ = (
+
+                    entries_with_entities(
+                        entry_query(session),
+                        is_edit_mode = is_edit_mode,
+                        is_ascending = is_ascending,
+                        check_perspective = False,
+                        offset = offset,
+                        limit = 5))
+
+                # Counted before joining entities, so with the empty entry.
+
+                assert total_count == entry_count + 1
+
+                if not entry_list:
+                    break
+
+                page_list.append([entry.dbObject.id for entry in entry_list])
+                offset += 5
+
+            # Same pages via cursors.
+
+            cursor = None
+
+            for page in page_list:
+
+                entry_list, total_count, cursor = (
+
+                    entries_with_entities(
+                        entry_query(session),
+                        is_edit_mode = is_edit_mode,
+                        is_ascending = is_ascending,
+                        check_perspective = False,
+                        after = cursor,
+                        limit = 5))
+
+                assert [entry.dbObject.id for entry in entry_list] == page
+
+            # There can be a cursor after the last page only if it's full, and then it gives an empty page.
+
+            if cursor is not None:
+
+                entry_list, _, cursor = (
+
+                    entries_with_entities(
+                        entry_query(session),
+                        is_edit_mode = is_edit_mode,
+                        is_ascending = is_ascending,
+                        check_perspective = False,
+                        after = cursor,
+                        limit = 5))
+
+                assert entry_list == [] and cursor is None
+
+            # All entries are in the pages, each of them once.
+
+            entry_id_list = [
+                entry_id for page in page_list for entry_id in page]
+
+            assert len(entry_id_list) == len(set(entry_id_list)) == entry_count + is_edit_mode
+
+
+def test_connected_words(session):
+
+    info = types.SimpleNamespace(context = None)
+
+    result = (
+
+        Query.resolve_connected_words(
+            None, info, id = [2, 3], field_id = list(tag_field_id), mode = 'all'))
+
+    # Odd entries with the 'tag 1' tag.
+
+    assert (
+        sorted(entry.dbObject.id for entry in result.lexical_entries) ==
+            sorted((2, object_id) for object_id in range(3, entry_count + 1, 6)))
+
+    assert (
+        sorted(entity.dbObject.content for entity in result.entities) ==
+            sorted(
+                content
+                for object_id in range(3, entry_count + 1, 6)
+                for content in ('text {0}'.format(object_id), 'tag 1')))
@@ -0,0 +1,144 @@
+#
+# Tests of lexical entry / entity tree construction of LexicalEntry.track_multiple(), see
+# LexicalEntry.group_entities() in lingvodoc/models.py. Do not require DB.
+#
+
+import datetime
+
+from lingvodoc.models import LexicalEntry
+
+
+created_at = datetime.datetime(2020, 1, 1)
+timestamp = 1577836800.0
+
+
+def entity_row(
+    object_id,
+    parent_object_id,
+    order,
+    numbering,
+    level,
+    content,
+    locale_id = None,
+    additional_metadata = None):
+    """
+    Entity row as in track_multiple() query results.
+    """
+
+    return {
+        'client_id': 4,
+        'object_id': object_id,
+        'parent_client_id': 1,
+        'parent_object_id': parent_object_id,
+        'self_client_id': None if level == 1 else 4,
+        'self_object_id': None if level == 1 else object_id - 1,
+        'content': content,
+        'locale_id': locale_id,
+        'additional_metadata': additional_metadata,
+        'created_at': created_at,
+        'marked_for_deletion': False,
+        'published': True,
+        'accepted': True,
+        'traversal_lexical_order': order,
+        'tree_level': level,
+        'tree_numbering_scheme': numbering}
+
+
+lex_1 = (created_at, 1, 1, 2, 3, False, {'came_from': None, 'merged': [1, None]}, None)
+lex_2 = (created_at, 1, 2, 2, 3, False, None, 'dictionary')
+lex_3 = (created_at, 1, 3, 2, 3, True, None, None)
+
+entity_row_list = [
+    entity_row(1, 1, 0, 1, 1, 'a'),
+    entity_row(2, 1, 0, 1, 2, 'b', locale_id = 2),
+    entity_row(3, 1, 0, 2, 1, 'c', locale_id = 1, additional_metadata = {'hash': None, 'size': 5}),
+    entity_row(4, 3, 2, 1, 1, 'd')]
+
+
+def expected_entity(object_id, parent_object_id, content, locale_id, contains, **kwargs):
+
+    entity = {
+        'client_id': 4,
+        'object_id': object_id,
+        'parent_client_id': 1,
+        'parent_object_id': parent_object_id,
+        'content': content,
+        'locale_id': locale_id,
+        'created_at': timestamp,
+        'marked_for_deletion': False,
+        'published': True,
+        'accepted': True,
+        'level': 'entity',
+        'contains': contains}
+
+    entity.update(kwargs)
+
+    return entity
+
+
+entity_b = dict(
+    expected_entity(2, 1, 'b', 2, []),
+    self_client_id = 4,
+    self_object_id = 1)
+
+lex_1_expected = {
+    'created_at': created_at,
+    'client_id': 1,
+    'object_id': 1,
+    'parent_client_id': 2,
+    'parent_object_id': 3,
+    'contains': [
+        expected_entity(1, 1, 'a', 0, [entity_b]),
+        expected_entity(3, 1, 'c', 1, [], additional_metadata = {'size': 5})],
+    'marked_for_deletion': False,
+    'additional_metadata': {'merged': [1, None]},
+    'level': 'lexicalentry',
+    'published': False}
+
+lex_2_expected = {
+    'created_at': created_at,
+    'client_id': 1,
+    'object_id': 2,
+    'parent_client_id': 2,
+    'parent_object_id': 3,
+    'contains': [],
+    'marked_for_deletion': False,
+    'came_from': 'dictionary',
+    'level': 'lexicalentry',
+    'published': False}
+
+lex_3_expected = {
+    'created_at': created_at,
+    'client_id': 1,
+    'object_id': 3,
+    'parent_client_id': 2,
+    'parent_object_id': 3,
+    'contains': [expected_entity(4, 3, 'd', 0, [])],
+    'marked_for_deletion': True,
+    'level': 'lexicalentry',
+    'published': False}
+
+
+def test_group_entities():
+
+    assert (
+        LexicalEntry.group_entities([lex_1, lex_2, lex_3], entity_row_list) ==
+            [lex_1_expected, lex_2_expected, lex_3_expected])
+
+
+def test_group_entities_order():
+    """
+    Lexical entries are output in the given order, duplicated lexical entries are processed the same as
+    before, entities of lexical entries not given are ignored.
+    """
+
+    assert (
+        LexicalEntry.group_entities([lex_3, lex_1, lex_1], entity_row_list) ==
+            [lex_3_expected, lex_1_expected, lex_1_expected])
+
+    assert (
+        LexicalEntry.group_entities([lex_2], entity_row_list) ==
+            [lex_2_expected])
+
+    assert LexicalEntry.group_entities([], entity_row_list) == []
+    assert LexicalEntry.group_entities([lex_3], []) == [dict(lex_3_expected, contains = [])]
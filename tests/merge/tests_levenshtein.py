@@ -0,0 +1,126 @@
+"""
+Tests of bounded Levenshtein distance and Levenshtein-similar string pair search used for merge
+suggestions, checked against full pylev distance computation.
+"""
+
+import random
+
+import pylev
+
+import lingvodoc.merge_perspectives as merge_perspectives
+
+from lingvodoc.merge_perspectives import (
+    bounded_edit_distance,
+    deletion_variant_count,
+    deletion_variants,
+    levenshtein_pairs,
+    mergeDicts)
+
+
+def random_string_list(count, seed, alphabet = 'abcабв', max_length = 9):
+    """
+    Generates sorted list of distinct random strings over a small alphabet, so that there are many close
+    strings.
+    """
+
+    rng = random.Random(seed)
+
+    return sorted(set(
+        ''.join(rng.choice(alphabet) for i in range(rng.randint(0, max_length)))
+        for j in range(count)))
+
+
+def test_bounded_edit_distance():
+
+    string_list = random_string_list(150, 1)
+
+    for string_a in string_list:
+        for string_b in string_list[::7]:
+
+            distance = pylev.levenshtein(string_a, string_b)
+
+            for limit in range(5):
+
+                assert (
+                    bounded_edit_distance(string_a, string_b, limit) ==
+                        min(distance, limit + 1))
+
+
+def test_deletion_variants():
+
+    for string in ('', 'a', 'abc', 'abcabc'):
+        for limit in range(4):
+
+            variant_set = deletion_variants(string, limit)
+
+            assert len(variant_set) <= deletion_variant_count(len(string), limit)
+
+            # Deleting characters selected by bit masks.
+
+            assert variant_set == set(
+                ''.join(string[i] for i in range(len(string)) if not (mask >> i) & 1)
+                for mask in range(2 ** len(string))
+                if bin(mask).count('1') <= limit)
+
+
+def test_levenshtein_pairs(monkeypatch):
+
+    string_list = random_string_list(300, 2)
+
+    for unindexed in (False, True):
+
+        # Checking both indexed and unindexed strings.
+
+        if unindexed:
+            monkeypatch.setattr(merge_perspectives, 'deletion_variant_limit', 8)
+
+        for limit in range(4):
+
+            pair_list = [
+                (string_a, string_b)
+                for index, string_a in enumerate(string_list)
+                for string_b in string_list[index + 1:]
+                if limit > 0 and pylev.levenshtein(string_a, string_b) <= limit]
+
+            assert levenshtein_pairs(string_list, limit) == pair_list
+
+
+def test_merge_dicts(monkeypatch):
+
+    rng = random.Random(3)
+
+    word_list = random_string_list(40, 4, max_length = 3)
+    translation_list = random_string_list(60, 5)
+
+    entry_list = [
+        ('{0}, {1}'.format(rng.choice(word_list), rng.choice(word_list)),
+            '{0}; {1} (x)'.format(rng.choice(translation_list), rng.choice(translation_list)),
+            (1, index))
+        for index in range(400)]
+
+    result_list = mergeDicts(entry_list, entry_list, 0.1, 2)
+
+    monkeypatch.setattr(
+        merge_perspectives,
+        'additional_checks',
+        lambda w1, w2, levenstein = 1: pylev.levenshtein(w1, w2) <= levenstein)
+
+    assert result_list == mergeDicts(entry_list, entry_list, 0.1, 2)
+
+
+def test_levenshtein_pairs_larger():
+    """
+    Compares pairs found on a larger set of longer strings with all pairs distance computation.
+    """
+
+    string_list = random_string_list(600, 6, alphabet = 'abcdefghijklmnop', max_length = 12)
+
+    pair_list = [
+        (string_a, string_b)
+        for index, string_a in enumerate(string_list)
+        for string_b in string_list[index + 1:]
+        if pylev.levenshtein(string_a, string_b) <= 1]
+
+    assert pair_list
+
+    assert levenshtein_pairs(string_list, 1) == pair_list
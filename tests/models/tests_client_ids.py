@@ -0,0 +1,154 @@
+"""
+Tests of object id allocation via client counters, see get_client_counter() and reserve_client_ids() of
+lingvodoc.models.
+
+Client table with only ids and counters is created in the test schema, see db_schema of tests/conftest.py.
+"""
+
+import random
+import threading
+
+import pytest
+
+from sqlalchemy.orm import sessionmaker
+
+from lingvodoc.models import (
+    client_id_block_size_max,
+    get_client_counter,
+    reserve_client_ids)
+
+
+@pytest.fixture
+def engine(db_schema):
+
+    with db_schema.connection.begin():
+
+        db_schema.connection.execute(
+            'create table client (id bigint primary key, counter bigint not null)')
+
+        db_schema.connection.execute(
+            'insert into client values (1, 1), (2, 1)')
+
+    return db_schema.engine
+
+
+def get_counter(session, client_id):
+
+    return (
+        session
+            .execute('select counter from client where id = {0}'.format(client_id))
+            .scalar())
+
+
+def test_reservation(engine):
+
+    session = sessionmaker(bind = engine)()
+
+    assert reserve_client_ids(1, 10, session) == 2
+    assert get_counter(session, 1) == 11
+
+    # Ids reserved in blocks growing twice each time.
+
+    id_list = [get_client_counter(1, session) for i in range(15)]
+
+    assert id_list == list(range(12, 27))
+    assert get_counter(session, 1) == 26
+
+    # Other clients have separate pools.
+
+    assert get_client_counter(2, session) == 2
+
+    session.commit()
+
+    # Reserved but not used ids are not reused in the next transaction.
+
+    get_client_counter(1, session)
+    get_client_counter(1, session)
+
+    session.commit()
+
+    assert get_client_counter(1, session) == 30
+
+    # Rolled back reservations are undone.
+
+    session.rollback()
+
+    assert get_client_counter(1, session) == 30
+    assert get_counter(session, 1) == 30
+
+    session.close()
+
+
+def test_block_size(engine):
+
+    session = sessionmaker(bind = engine)()
+
+    count = client_id_block_size_max * 4
+    id_list = [get_client_counter(1, session) for i in range(count)]
+
+    assert id_list == list(range(2, count + 2))
+    assert get_counter(session, 1) - id_list[-1] < client_id_block_size_max
+
+    session.close()
+
+
+def test_concurrency(engine):
+    """
+    Allocates ids for the same client in parallel sessions, some of transactions rolled back, checks that
+    there are no id collisions between committed transactions.
+    """
+
+    Session = sessionmaker(bind = engine)
+
+    id_list = []
+    exception_list = []
+
+    lock = threading.Lock()
+
+    def allocate(seed):
+
+        rng = random.Random(seed)
+        session = Session()
+
+        try:
+
+            for i in range(25):
+
+                transaction_id_list = [
+                    get_client_counter(1, session)
+                    for j in range(rng.randint(1, 100))]
+
+                if rng.random() < 0.25:
+                    session.rollback()
+                    continue
+
+                session.commit()
+
+                with lock:
+                    id_list.extend(transaction_id_list)
+
+        except Exception as exception:
+            exception_list.append(exception)
+
+        finally:
+            session.close()
+
+    thread_list = [
+        threading.Thread(target = allocate, args = (seed,))
+        for seed in range(8)]
+
+    for thread in thread_list:
+        thread.start()
+
+    for thread in thread_list:
+        thread.join()
+
+    assert not exception_list
+
+    assert len(id_list) == len(set(id_list))
+
+    session = Session()
+
+    assert max(id_list) <= get_counter(session, 1)
+
+    session.close()
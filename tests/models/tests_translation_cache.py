@@ -0,0 +1,138 @@
+"""
+Tests of translation retrieval via the two-level translation cache, see Translation_Cache of
+lingvodoc.models.
+
+Translation atoms are stored in a simplified table of the test schema, see tests/conftest.py. Redis is not
+used, second cache level is disabled with MockCache.
+"""
+
+import pytest
+
+from sqlalchemy.orm import sessionmaker
+
+import lingvodoc.cache.caching as caching
+import lingvodoc.models as models
+
+from lingvodoc.cache.mock.cache import MockCache
+
+from lingvodoc.models import (
+    get_translation,
+    get_translations,
+    select_translation,
+    Translation_Cache)
+
+
+@pytest.fixture
+def session(db_schema, monkeypatch):
+
+    with db_schema.connection.begin():
+
+        db_schema.connection.execute(
+            'create table translationatom ('
+            'parent_client_id bigint, parent_object_id bigint, locale_id bigint not null, '
+            'content text not null, marked_for_deletion boolean not null)')
+
+        db_schema.connection.execute(
+            'insert into translationatom values '
+            '(1, 1, 1, \'русский\', false), (1, 1, 2, \'english\', false), '
+            '(1, 2, 1, \'только русский\', false), (1, 2, 2, \'deleted\', true)')
+
+    monkeypatch.setattr(caching, 'CACHE', MockCache())
+    monkeypatch.setattr(models, 'translation_cache', Translation_Cache())
+
+    session = sessionmaker(bind = db_schema.engine)()
+
+    yield session
+
+    session.close()
+
+
+def test_select_translation():
+
+    translation_dict = {'1': 'ru', '2': 'en', '5': 'de'}
+
+    assert select_translation(translation_dict, 5) == 'de'
+    assert select_translation(translation_dict, 4) == 'en'
+    assert select_translation(translation_dict, 2) == 'en'
+    assert select_translation({'1': 'ru', '5': 'de'}, 2) == 'ru'
+    assert select_translation({'5': 'de', '3': 'fr'}, 2) == 'fr'
+
+    assert select_translation({}, 2) is None
+    assert select_translation(None, 2) is None
+
+
+def test_translations(session):
+
+    assert get_translation(2, 1, 1, session) == 'english'
+    assert get_translation(1, 1, 1, session) == 'русский'
+    assert get_translation(2, 1, 2, session) == 'только русский'
+
+    assert get_translation(2, 1, 3, session) == 'Translation missing for all locales'
+    assert get_translation(2, 1, 3, session, default = 'default') == 'default'
+
+    assert get_translations(1, 1, session) == {'1': 'русский', '2': 'english'}
+    assert get_translations(1, 3, session) is None
+
+    metrics = models.translation_cache.metrics()
+
+    assert metrics['lookup'] == 7
+    assert metrics['miss'] == 3
+    assert metrics['l1_hit'] == 4
+
+
+def test_warm_and_bump(session):
+
+    models.warm_translations([(1, 1), (1, 2), (1, 3)], session)
+
+    assert models.translation_cache.metrics()['miss'] == 3
+
+    session.execute(
+        'update translationatom set content = \'changed\' '
+        'where parent_client_id = 1 and parent_object_id = 1 and locale_id = 2')
+
+    # Cached translation until the gist's translations are invalidated.
+
+    assert get_translation(2, 1, 1, session) == 'english'
+
+    models.bump_translation_version(1, 1, session)
+
+    assert get_translation(2, 1, 1, session) == 'changed'
+    assert get_translation(1, 1, 2, session) == 'только русский'
+
+    metrics = models.translation_cache.metrics()
+
+    assert metrics['miss'] == 4
+    assert metrics['l1_hit'] == 2
+
+
+def test_commit_and_rollback(session):
+
+    update_str = (
+        'update translationatom set content = :content '
+        'where parent_client_id = 1 and parent_object_id = 1 and locale_id = 2')
+
+    session.execute(update_str, {'content': 'committed'})
+    models.bump_translation_version(1, 1, session)
+
+    # Translation cached again before the commit, e.g. by another transaction, is invalidated on commit.
+
+    assert get_translation(2, 1, 1, session) == 'committed'
+
+    models.translation_cache.gist_dict[(1, 1)] = {'2': 'previous'}
+
+    assert get_translation(2, 1, 1, session) == 'previous'
+
+    session.commit()
+
+    assert get_translation(2, 1, 1, session) == 'committed'
+
+    # Uncommitted translation cached by the transaction is invalidated on rollback.
+
+    session.execute(update_str, {'content': 'rolled back'})
+    models.bump_translation_version(1, 1, session)
+
+    assert get_translation(2, 1, 1, session) == 'rolled back'
+
+    session.rollback()
+
+    assert get_translation(2, 1, 1, session) == 'committed'
@@ -0,0 +1,179 @@
+#
+# Tests of the SQLite-based phonology results cache, see SqliteCache in lingvodoc/views/v2/phonology.py.
+# Do not require DB.
+#
+
+import gzip
+import logging
+import os.path
+import pickle
+import threading
+
+import lingvodoc.views.v2.phonology as phonology
+from lingvodoc.views.v2.phonology import SqliteCache
+
+
+perspective_id = (1, 2)
+
+
+def test_get_set(tmp_path):
+
+    storage = {'path': str(tmp_path)}
+
+    cache = SqliteCache(storage, perspective_id)
+
+    assert cache.get('a') is None
+
+    cache.set('a', [1, 2, 3])
+    cache.set('b', ('exception', ValueError('b'), 'traceback'))
+
+    assert cache.get('a') == [1, 2, 3]
+
+    cache.close()
+
+    assert os.path.exists(os.path.join(str(tmp_path), 'phonology', '1_2.sqlite'))
+
+    cache = SqliteCache(storage, perspective_id)
+
+    assert cache.get('a') == [1, 2, 3]
+    assert cache.get('b')[0] == 'exception'
+    assert cache.get('c') is None
+
+    assert (cache.hit_count, cache.miss_count) == (2, 1)
+    assert '2 hits, 1 miss' in cache.stats()
+
+
+def test_contains(tmp_path, monkeypatch):
+
+    storage = {'path': str(tmp_path)}
+
+    cache = SqliteCache(storage, perspective_id)
+
+    cache.set('a', [])
+    assert cache.contains('a')
+
+    cache.close()
+
+    cache = SqliteCache(storage, perspective_id)
+
+    assert cache.contains('a')
+    assert not cache.contains('b')
+
+    assert (cache.hit_count, cache.miss_count) == (0, 0)
+
+    monkeypatch.setattr(phonology, 'cache_version', phonology.cache_version + '1')
+
+    assert not cache.contains('a')
+
+    cache.close()
+
+
+def test_close_stats(tmp_path, caplog):
+
+    storage = {'path': str(tmp_path)}
+
+    cache = SqliteCache(storage, perspective_id)
+
+    cache.set('a', 1)
+    cache.get('a')
+    cache.get('b')
+
+    with caplog.at_level(logging.INFO, logger = phonology.log.name):
+        cache.close()
+
+    assert cache.connection is None
+
+    # Hit / miss statistics are in the task log.
+
+    record, = [
+        record for record in caplog.records
+        if record.name == phonology.log.name and '1_2.sqlite' in record.getMessage()]
+
+    assert record.levelno == logging.INFO
+    assert '1 hit, 1 miss, 1 written' in record.getMessage()
+
+    # Closing again does nothing.
+
+    cache.close()
+
+
+def test_version(tmp_path, monkeypatch):
+
+    storage = {'path': str(tmp_path)}
+
+    cache = SqliteCache(storage, perspective_id)
+    cache.set('a', 1)
+    cache.close()
+
+    monkeypatch.setattr(phonology, 'cache_version', phonology.cache_version + '1')
+
+    cache = SqliteCache(storage, perspective_id)
+    assert cache.get('a') is None
+
+    cache.flush()
+    assert cache.evict_count == 1
+
+
+def test_concurrent(tmp_path):
+    """
+    Several caches of the same perspective used concurrently keep all results.
+    """
+
+    storage = {'path': str(tmp_path)}
+
+    def f(index):
+
+        cache = SqliteCache(storage, perspective_id)
+
+        for i in range(200):
+            cache.set(f'{index}:{i}', i)
+
+        cache.close()
+
+    thread_list = [
+        threading.Thread(target = f, args = (index,))
+        for index in range(4)]
+
+    for thread in thread_list:
+        thread.start()
+
+    for thread in thread_list:
+        thread.join()
+
+    cache = SqliteCache(storage, perspective_id)
+
+    for index in range(4):
+        for i in range(200):
+            assert cache.get(f'{index}:{i}') == i
+
+
+def test_evict(tmp_path):
+
+    storage = {'path': str(tmp_path), 'phonology_cache_size': '8192'}
+
+    cache = SqliteCache(storage, perspective_id)
+
+    for i in range(64):
+        cache.set(f'{i}', os.urandom(1024))
+
+    cache.flush()
+
+    assert cache.evict_count > 0
+    assert cache.get('63') is not None
+    assert cache.get('0') is None
+
+
+def test_import_pickle(tmp_path):
+
+    storage = {'path': str(tmp_path)}
+
+    os.makedirs(os.path.join(str(tmp_path), 'phonology'))
+    pickle_path = os.path.join(str(tmp_path), 'phonology', '1_2.pickle.gz')
+
+    with gzip.open(pickle_path, 'wb') as pickle_file:
+        pickle.dump({'__version__': phonology.cache_version, 'a': 'no_vowel'}, pickle_file)
+
+    cache = SqliteCache(storage, perspective_id)
+
+    assert cache.get('a') == 'no_vowel'
+    assert not os.path.exists(pickle_path)
@@ -0,0 +1,320 @@
+#
+# Regression tests of array-based DSP kernels of lingvodoc/views/v2/phonology.py against their previous
+# per-sample pure-Python implementations, on the sample sound/markup files. Do not require DB.
+#
+
+import math
+import os.path
+
+import numpy
+import pydub
+import pympi
+
+from lingvodoc.views.v2.phonology import (
+    AudioPraatLike,
+    bessel_i0_approximation,
+    burg,
+    compute_formants,
+    get_gaussian_window,
+    get_kaiser_window)
+
+
+files_dir = (
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), 'files'))
+
+
+def bessel_i0_reference(x):
+    """
+    Previous scalar implementation of bessel_i0_approximation(), used as a reference.
+    """
+
+    if x < 0:
+        return bessel_i0_reference(-x)
+
+    elif x < 3.75:
+
+        t = x / 3.75
+
+        return 1.0 + t * (3.5156229 + t * (3.0899424 +
+            t * (1.2067492 + t * (0.2659732 + t * (0.0360768 + t * 0.0045813)))))
+
+    else:
+        t = x / 3.75
+
+        return math.exp(x) / math.sqrt(x) * (0.39894228 + t * (0.01328592 + t * (0.00225319 +
+            t * (-0.00157565 + t * (0.00916281 + t * (-0.02057706 + t * (0.02635537 + t * (-0.01647633 +
+            t * 0.00392377))))))))
+
+
+def kaiser_window_reference(half_window_size):
+
+    pi_alpha = 2 * math.pi ** 2 + 0.5
+
+    window_list = [
+        bessel_i0_reference(pi_alpha * math.sqrt(1 - (i / half_window_size) ** 2))
+            for i in range(-half_window_size, half_window_size + 1)]
+
+    return window_list, sum(window_list)
+
+
+def gaussian_window_reference(window_size):
+
+    middle = float(window_size + 1) / 2
+    edge = math.exp(-12)
+    edge_one_minus = 1.0 - edge
+
+    return [
+        (math.exp(-48 * ((i - middle) / (window_size + 1)) ** 2) - edge) / edge_one_minus
+            for i in range(1, window_size + 1)]
+
+
+def burg_reference(sample_list, coefficient_number):
+    """
+    Previous per-sample implementation of burg(), used as a reference.
+    """
+
+    p = sum(sample ** 2 for sample in sample_list)
+    a0 = p / len(sample_list)
+
+    b1 = list(sample_list[:len(sample_list) - 1])
+    b2 = list(sample_list[1:])
+
+    aa = [0.0 for i in range(coefficient_number)]
+    coefficient_list = [0.0 for i in range(coefficient_number)]
+
+    for i in range(coefficient_number):
+
+        numerator = 0.0
+        denominator = 0.0
+
+        for j in range(len(sample_list) - i - 1):
+            numerator += b1[j] * b2[j]
+            denominator += b1[j] ** 2 + b2[j] **2
+
+        coefficient_list[i] = 2.0 * numerator / denominator
+        a0 *= 1.0 - coefficient_list[i] ** 2
+
+        for j in range(i):
+            coefficient_list[j] = aa[j] - coefficient_list[i] * aa[i - j - 1]
+
+        for j in range(i + 1):
+            aa[j] = coefficient_list[j]
+
+        for j in range(len(sample_list) - i - 2):
+            b1[j] -= aa[i] * b2[j]
+            b2[j] = b2[j + 1] - aa[i] * b1[j + 1]
+
+    return a0, coefficient_list
+
+
+def compute_formants_reference(sample_list, nyquist_frequency):
+    """
+    Previous per-root implementation of compute_formants(), used as a reference.
+    """
+
+    sample_list = [sample * weight
+        for sample, weight in zip(sample_list,
+            gaussian_window_reference(len(sample_list)))]
+
+    a0, coefficient_list = burg_reference(sample_list, 10)
+
+    polynomial = numpy.polynomial.Polynomial([1.0] + [-c for c in coefficient_list])
+    root_list = polynomial.roots()
+
+    polynomial_list = [-c for c in reversed(coefficient_list)] + [1.0]
+    derivative_list = [c * (10 - i) for i, c in enumerate(polynomial_list)]
+
+    def evaluate(c_list, value):
+        result = 0.0
+
+        for c in c_list:
+            result = result * value + c
+
+        return result
+
+    better_root_list = []
+    better_root_index = 0
+
+    while better_root_index < len(root_list):
+
+        previous = root_list[better_root_index]
+        previous_delta = abs(evaluate(polynomial_list, previous))
+
+        current = previous - evaluate(polynomial_list, previous) / evaluate(derivative_list, previous)
+        current_delta = abs(evaluate(polynomial_list, current))
+
+        while current_delta < previous_delta:
+
+            previous = current
+            previous_delta = current_delta
+
+            current = previous - evaluate(polynomial_list, previous) / evaluate(derivative_list, previous)
+            current_delta = abs(evaluate(polynomial_list, current))
+
+        better_root_list.append(previous)
+        better_root_index += 1
+
+        if abs(previous.imag) > 0:
+
+            better_root_list.append(previous.conjugate())
+            better_root_index += 1
+
+    formant_list = []
+
+    for root in better_root_list:
+
+        if abs(root) > 1.0:
+            root = 1.0 / root.conjugate()
+
+        if root.imag >= 0:
+            frequency = abs(math.atan2(root.imag, root.real)) * nyquist_frequency / math.pi
+
+            if frequency >= 50 and frequency <= nyquist_frequency - 50:
+                formant_list.append(frequency)
+
+    while len(formant_list) < 5:
+        formant_list.append(nyquist_frequency)
+
+    formant_list.sort()
+
+    return formant_list
+
+
+def intensity_reference(sound, step_index):
+    """
+    Previous per-sample implementation of AudioPraatLike.get_intensity(), used as a reference.
+    """
+
+    window_list, window_sum = kaiser_window_reference(sound.intensity_half_window_size)
+
+    sample_array = sound.intensity_sound.get_array_of_samples()
+    sample_sum = 0.0
+
+    channel_count = sound.intensity_sound.channels
+    amplitude_limit = sound.intensity_sound.max_possible_amplitude
+
+    sample_from = (step_index - 4) * sound.intensity_step_size * channel_count
+
+    for i in range(sound.intensity_window_size):
+        for j in range(channel_count):
+            sample = sample_array[sample_from + i * channel_count + j] / amplitude_limit
+            sample_sum += sample ** 2 * window_list[i]
+
+    intensity_ratio = sample_sum / (channel_count * window_sum) * 2.5e9
+    return -300 if intensity_ratio < 1e-30 else 10 * math.log10(intensity_ratio)
+
+
+def get_sample_sound():
+
+    return (
+
+        AudioPraatLike(
+            pydub.AudioSegment.from_wav(
+                os.path.join(files_dir, 'test.wav'))))
+
+
+def get_sample_interval_list():
+
+    textgrid = (
+
+        pympi.Praat.TextGrid(
+            os.path.join(files_dir, 'test.TextGrid')))
+
+    return [
+        (begin, end)
+        for tier in textgrid.get_tiers()
+        for begin, end, text in tier.get_all_intervals()]
+
+
+def get_formant_sample_list(sound):
+    """
+    Formant analysis windows of the whole sample sound.
+    """
+
+    sound.init_formant_f()
+
+    step_range = (
+        range(sound.formant_step_shift, sound.formant_step_count - sound.formant_step_shift))
+
+    return [
+        sound.formant_sample_list[
+            step_index * sound.formant_step_size - sound.formant_half_window_size :
+            step_index * sound.formant_step_size + sound.formant_half_window_size + 1]
+        for step_index in step_range]
+
+
+def test_windows():
+
+    x_array = numpy.linspace(-25.0, 25.0, 1001)
+
+    numpy.testing.assert_allclose(
+        bessel_i0_approximation(x_array),
+        [bessel_i0_reference(x) for x in x_array],
+        rtol = 1e-12)
+
+    assert isinstance(bessel_i0_approximation(1.5), float)
+
+    for half_window_size in (1, 50, 2205):
+
+        window_array, window_sum = get_kaiser_window(half_window_size)
+        window_list, reference_sum = kaiser_window_reference(half_window_size)
+
+        numpy.testing.assert_allclose(window_array, window_list, rtol = 1e-12)
+        assert math.isclose(window_sum, reference_sum, rel_tol = 1e-12)
+
+    for window_size in (1, 277, 4096):
+
+        numpy.testing.assert_allclose(
+            get_gaussian_window(window_size),
+            gaussian_window_reference(window_size),
+            rtol = 1e-12, atol = 1e-15)
+
+
+def test_burg_formants():
+
+    sound = get_sample_sound()
+    nyquist_frequency = sound.formant_frame_rate * 0.5
+
+    for sample_array in get_formant_sample_list(sound)[::8]:
+
+        sample_list = sample_array.tolist()
+
+        a0, coefficient_array = burg(sample_array, 10)
+        reference_a0, reference_list = burg_reference(sample_list, 10)
+
+        assert math.isclose(a0, reference_a0, rel_tol = 1e-9)
+        numpy.testing.assert_allclose(coefficient_array, reference_list, rtol = 1e-7, atol = 1e-9)
+
+        numpy.testing.assert_allclose(
+            compute_formants(sample_array, nyquist_frequency),
+            compute_formants_reference(sample_list, nyquist_frequency),
+            rtol = 1e-6)
+
+
+def test_intensity():
+
+    sound = get_sample_sound()
+
+    for step_index in range(4, sound.intensity_step_count - 4):
+
+        assert math.isclose(
+            sound.get_intensity(step_index),
+            intensity_reference(sound, step_index),
+            rel_tol = 1e-9, abs_tol = 1e-9)
+
+    # Interval intensity, batch computation with a fresh sound against reference point values.
+
+    reference_sound = get_sample_sound()
+
+    for step_index in range(4, reference_sound.intensity_step_count - 4):
+
+        reference_sound.intensity_list[step_index] = (
+            intensity_reference(reference_sound, step_index))
+
+    for begin, end in get_sample_interval_list():
+
+        numpy.testing.assert_allclose(
+            get_sample_sound().get_interval_intensity(begin, end),
+            reference_sound.get_interval_intensity(begin, end),
+            rtol = 1e-9)
+
@@ -0,0 +1,76 @@
+#
+# Tests of process pools for parallel sound/markup analysis, see get_phonology_executor() in
+# lingvodoc/views/v2/phonology.py, both from a regular process and from a daemonic one, as are Celery
+# prefork pool workers running async_phonology(). Do not require DB.
+#
+
+import concurrent.futures
+import types
+
+import billiard
+
+from lingvodoc.views.v2.phonology import (
+    Billiard_Executor,
+    get_phonology_executor)
+
+
+def compute(executor):
+
+    future_list = [
+        executor.submit(pow, 2, n)
+        for n in range(16)]
+
+    return [future.result() for future in future_list]
+
+
+def test_sequential():
+
+    assert get_phonology_executor(types.SimpleNamespace()) is None
+    assert get_phonology_executor(types.SimpleNamespace(worker_count = None)) is None
+    assert get_phonology_executor(types.SimpleNamespace(worker_count = 1)) is None
+
+
+def test_regular_process():
+
+    executor = get_phonology_executor(types.SimpleNamespace(worker_count = 2))
+
+    try:
+
+        assert isinstance(executor, concurrent.futures.ProcessPoolExecutor)
+        assert compute(executor) == [2 ** n for n in range(16)]
+
+    finally:
+        executor.shutdown(wait = True)
+
+
+def daemonic_target(queue):
+
+    executor = get_phonology_executor(types.SimpleNamespace(worker_count = 2))
+
+    try:
+        queue.put((type(executor).__name__, compute(executor)))
+
+    finally:
+        executor.shutdown(wait = True)
+
+
+def test_daemonic_process():
+
+    queue = billiard.Queue()
+
+    process = (
+
+        billiard.Process(
+            target = daemonic_target,
+            args = (queue,),
+            daemon = True))
+
+    process.start()
+
+    executor_name, result_list = queue.get(timeout = 60)
+
+    process.join(timeout = 60)
+
+    assert executor_name == Billiard_Executor.__name__
+    assert result_list == [2 ** n for n in range(16)]
+    assert process.exitcode == 0
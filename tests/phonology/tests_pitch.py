@@ -0,0 +1,225 @@
+#
+# Regression tests of the batched pitch engine of lingvodoc/views/v2/phonology.py, see
+# sound_into_pitch_frames(), against the previous per-frame implementation, on the sample sound file.
+# Do not require DB.
+#
+
+import copy
+import math
+import os.path
+
+import numpy
+import pydub
+from scipy.interpolate import CubicSpline
+from scipy.optimize import minimize_scalar
+
+from lingvodoc.views.v2.phonology import AudioPraatLike, sound_into_pitch, sound_into_pitch_frame
+
+
+files_dir = (
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), 'files'))
+
+
+def sound_into_pitch_frame_reference(
+        pitchFrame, t, pitchFloor,
+        maxnCandidates, voicingThreshold,
+        octaveCost,
+        nsamp_window, halfnsamp_window,
+        maximumLag, nsampFFT,
+        nsamp_period, halfnsamp_period,
+        brent_ixmax, globalPeak,
+        window, windowR,
+        x1, dx, nx, ny, z, **rest):
+    """
+    Previous per-frame implementation of sound_into_pitch_frame(), used as a reference; autocorrelation
+    accumulator is reset for each frame.
+    """
+
+    frame = numpy.zeros((ny, nsampFFT))
+    ac = numpy.zeros(nsampFFT)
+    r = numpy.zeros(brent_ixmax * 2 + 1)
+    imax = numpy.zeros(maxnCandidates, dtype = int)
+    localMean = numpy.zeros(ny)
+
+    leftSample = (t - x1) // dx
+    rightSample = leftSample + 1
+
+    for channel in range(ny):
+
+        startSample = int(rightSample - nsamp_period)
+        endSample = int(leftSample + nsamp_period)
+
+        localMean[channel] = 0.0
+        for i in range(startSample, endSample + 1):
+            localMean[channel] += z[channel][i]
+        localMean[channel] /= 2 * nsamp_period
+
+        startSample = int(rightSample - halfnsamp_window)
+
+        for j in range(nsamp_window):
+            frame[channel][j] = (z[channel][j + startSample] - localMean[channel]) * window[j]
+
+    localPeak = 0.0
+    startSample = int(max(0, halfnsamp_window - halfnsamp_period))
+    endSample = int(min(nsamp_window, halfnsamp_window + halfnsamp_period))
+
+    for channel in range(ny):
+        for j in range(startSample, endSample):
+            value = math.fabs(frame[channel][j])
+            if value > localPeak:
+                localPeak = value
+
+    if localPeak == 0.0:
+        return
+
+    pitchFrame['intensity'] = 1.0 if localPeak > globalPeak else localPeak / globalPeak
+
+    nsampRFFT = nsampFFT // 2 + 1
+
+    for channel in range(ny):
+        frame_view = numpy.fft.rfft(frame[channel]).view('float')
+
+        ac[0] += frame_view[0] ** 2
+        for i in range(2, nsampFFT, 2):
+            ac[i // 2] += frame_view[i] ** 2 + frame_view[i + 1] ** 2
+        ac[nsampRFFT - 1] += frame_view[nsampFFT] ** 2
+
+    ac[:] = numpy.fft.irfft(ac[:nsampRFFT])
+
+    r[0] = 1.0
+    for i in range(1, brent_ixmax + 1):
+        r[-i] = r[i] = ac[i] / (ac[0] * windowR[i])
+
+    offset = - brent_ixmax - 1
+
+    r_offset_spline_func = CubicSpline(numpy.arange(brent_ixmax - offset),
+                                       list(r[offset + 1:]) + list(r[:- offset]))
+    def inverted_spline(x):
+        return (-r_offset_spline_func(x))
+
+    imax[0] = 0
+    for i in range(2, min(maximumLag, brent_ixmax)):
+        if r[i] > 0.5 * voicingThreshold and r[i] > r[i-1] and r[i] >= r[i+1]:
+            place = None
+
+            dr = 0.5 * (r[i+1] - r[i-1])
+            d2r = 2.0 * r[i] - r[i-1] - r[i+1]
+            frequencyOfMaximum = 1.0 / dx / (i + dr / d2r)
+            strengthOfMaximum = float(r_offset_spline_func(1.0 / dx / frequencyOfMaximum - offset))
+
+            if strengthOfMaximum > 1.0:
+                strengthOfMaximum = 1.0 / strengthOfMaximum
+
+            if pitchFrame['nCandidates'] < maxnCandidates:
+                pitchFrame['nCandidates'] += 1
+                while len(pitchFrame['candidates']) < pitchFrame['nCandidates']:
+                    pitchFrame['candidates'].append(pitchFrame['candidates'][-1].copy())
+                place = pitchFrame['nCandidates'] - 1
+            else:
+                weakest = 2.0
+                for iweak in range(1, maxnCandidates):
+                    localStrength = (pitchFrame['candidates'][iweak]['strength'] -
+                                     octaveCost * math.log2(pitchFloor / pitchFrame['candidates'][iweak]['frequency']))
+                    if localStrength < weakest:
+                        weakest = localStrength
+                        place = iweak
+                if strengthOfMaximum - octaveCost * math.log2(pitchFloor / frequencyOfMaximum) <= weakest:
+                    place = None
+
+            if place is not None:
+                pitchFrame['candidates'][place]['frequency'] = frequencyOfMaximum
+                pitchFrame['candidates'][place]['strength'] = strengthOfMaximum
+                imax[place] = i
+
+    for i in range(1, pitchFrame['nCandidates']):
+        x = imax[i] - offset
+        xmid = minimize_scalar(inverted_spline, bounds=(x - 1, x + 1), method='bounded').x
+        ymid = float(r_offset_spline_func(xmid))
+        xmid += offset
+        pitchFrame['candidates'][i]['frequency'] = 1.0 / dx / xmid - 1.0
+        if ymid > 1.0:
+            ymid = 1.0 / ymid
+        pitchFrame['candidates'][i]['strength'] = ymid
+
+
+def get_pitch_arg():
+    """
+    Pitch engine parameters of the sample sound, captured from AudioPraatLike.get_pitch(), with pitch
+    frames reset to their initial state.
+    """
+
+    sound = (
+
+        AudioPraatLike(
+            pydub.AudioSegment.from_wav(
+                os.path.join(files_dir, 'test.wav'))))
+
+    arg_list = []
+
+    import lingvodoc.views.v2.phonology as phonology
+
+    sound_into_pitch_saved = phonology.sound_into_pitch
+
+    try:
+        phonology.sound_into_pitch = arg_list.append
+        sound.get_pitch()
+
+    finally:
+        phonology.sound_into_pitch = sound_into_pitch_saved
+
+    arg, = arg_list
+
+    for frame in arg['pitch']['frames']:
+        frame.update(intensity = 0.0, nCandidates = 1, candidates = [{'frequency': 0.0, 'strength': 0.0}])
+
+    return arg
+
+
+def check_frame_list(frame_list, reference_list):
+
+    for frame, reference in zip(frame_list, reference_list):
+
+        assert math.isclose(frame['intensity'], reference['intensity'], rel_tol = 1e-9, abs_tol = 1e-12)
+        assert frame['nCandidates'] == reference['nCandidates']
+
+        for candidate, reference_candidate in zip(
+            frame['candidates'][:frame['nCandidates']],
+            reference['candidates'][:reference['nCandidates']]):
+
+            assert math.isclose(
+                candidate['frequency'], reference_candidate['frequency'], rel_tol = 1e-5)
+
+            assert math.isclose(
+                candidate['strength'], reference_candidate['strength'], rel_tol = 1e-6, abs_tol = 1e-9)
+
+
+def test_pitch_frames():
+    """
+    Compares batched, single frame and reference pitch frames.
+    """
+
+    arg = get_pitch_arg()
+    pitch = arg['pitch']
+
+    reference_list = copy.deepcopy(pitch['frames'])
+    single_list = copy.deepcopy(pitch['frames'])
+
+    for iframe, frame in enumerate(reference_list):
+
+        sound_into_pitch_frame_reference(
+            frame, pitch['x1'] + iframe * pitch['dx'], **arg, **arg['sound'])
+
+    sound_into_pitch(arg)
+
+    assert any(frame['nCandidates'] > 1 for frame in reference_list)
+
+    check_frame_list(pitch['frames'], reference_list)
+
+    # Single frame compatibility adapter.
+
+    for iframe, frame in enumerate(single_list):
+
+        sound_into_pitch_frame(
+            frame, pitch['x1'] + iframe * pitch['dx'], **arg, **arg['sound'])
+
+    check_frame_list(single_list, reference_list)
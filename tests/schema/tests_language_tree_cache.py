@@ -0,0 +1,146 @@
+"""
+Tests of language tree snapshot digests, see Language_Tree_Cache of lingvodoc.schema.gql_language, checking
+that digests depend on the query, its user and language tree data changes.
+
+Do not require DB, Redis is replaced by a dictionary based stand-in.
+"""
+
+import types
+
+import pytest
+
+from graphql.language.parser import parse
+from sqlalchemy.orm import Session
+
+import lingvodoc.cache.caching as caching
+
+from lingvodoc.models import (
+    Group as dbGroup,
+    User as dbUser)
+
+from lingvodoc.schema.gql_language import (
+    language_tree_after_commit,
+    language_tree_after_flush,
+    Language_Tree_Cache)
+
+
+class Cache(object):
+    """
+    Dictionary based stand-in of the Redis cache.
+    """
+
+    def __init__(self):
+        self.value_dict = {}
+
+    def get(self, keys = None, **kwargs):
+
+        if isinstance(keys, list):
+            return [self.value_dict.get(key) for key in keys]
+
+        return self.value_dict.get(keys)
+
+    def set(self, key = None, value = None, **kwargs):
+        self.value_dict[key] = value
+
+
+@pytest.fixture
+def cache(monkeypatch):
+
+    monkeypatch.setattr(caching, 'CACHE', Cache())
+
+    return Language_Tree_Cache()
+
+
+def context(user_id):
+    return types.SimpleNamespace(user_id = user_id)
+
+
+def test_digest(cache):
+
+    query_str = '{ language_tree { languages { id } } }'
+    document = parse(query_str)
+
+    def digest(user_id, locale_id = 2, variable_values = None):
+        return cache.digest(document, 'hash', variable_values, locale_id, context(user_id))
+
+    assert cache.digest(parse('{ languages { id } }'), 'hash', None, 2, context(1)) is None
+
+    assert digest(5) == digest(5)
+
+    # Different users and anonymous users get different snapshots, as data can be user-dependent.
+
+    digest_set = {
+        digest(None), digest(1), digest(5), digest(6), digest(5, locale_id = 1),
+        digest(5, variable_values = {'a': 1})}
+
+    assert len(digest_set) == 6
+
+    # Snapshots stored by digest.
+
+    cache.set(digest(5), {'language_tree': []})
+
+    assert cache.get(digest(5)) == {'language_tree': []}
+    assert cache.get(digest(6)) is None
+
+
+def test_snapshot_query(cache):
+
+    for query_str in (
+        '{ language_tree { tree languages { id translation } } }',
+        '{ language_tree(by_grants: true) { languages { id dictionaries(published: true) { id status '
+            'perspectives { id translation(locale_id: 2) columns { field_id position } } } } } }',
+        '{ language_tree { __typename languages { __typename id } } }'):
+
+        assert cache.snapshot_query(parse(query_str))
+
+    # Queries with fields depending on other data or with fragments are not cached.
+
+    for query_str in (
+        '{ language_tree { languages { id } } languages { id } }',
+        '{ language_tree { languages { id dictionaries { id last_modified_at } } } }',
+        '{ language_tree { languages { dictionaries { perspectives(with_verb_data: true) { id } } } } }',
+        '{ language_tree { languages { dictionaries { perspectives { id statistic } } } } }',
+        '{ language_tree { languages { id translation { id } } } }',
+        '{ language_tree { languages { ...language } } } fragment language on Language { id }',
+        'mutation { language_tree { languages { id } } }'):
+
+        assert not cache.snapshot_query(parse(query_str))
+
+
+def test_invalidation(cache, monkeypatch):
+
+    monkeypatch.setattr(
+        'lingvodoc.schema.gql_language.language_tree_cache', cache)
+
+    document = parse('{ language_tree { languages { id } } }')
+
+    def digest():
+        return cache.digest(document, 'hash', None, 2, context(5))
+
+    session = Session()
+    digest_before = digest()
+
+    # Changes of unrelated objects don't affect snapshots.
+
+    session.add(dbUser(id = 5, login = 'user', intl_name = 'user'))
+    language_tree_after_flush(session, None)
+
+    assert digest() == digest_before
+
+    language_tree_after_commit(session)
+
+    assert digest() == digest_before
+
+    # Permission changes do, on flush and again on commit.
+
+    session.add(dbGroup(base_group_id = 1, subject_override = True))
+    language_tree_after_flush(session, None)
+
+    digest_flush = digest()
+    assert digest_flush != digest_before
+
+    language_tree_after_commit(session)
+
+    assert digest() not in (digest_before, digest_flush)
+
+    session.expunge_all()
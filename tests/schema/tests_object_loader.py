@@ -0,0 +1,139 @@
+"""
+Tests of batched retrieval of DB objects of GraphQL objects via ObjectLoader and ObjectLoaderMiddleware, see
+lingvodoc.schema.gql_holders, with queries executed by the graphene / graphql-core in use.
+
+Uses a separate schema of the testing database with the translation gist table, see tests/conftest.py.
+"""
+
+import types
+
+import graphene
+import pytest
+
+from sqlalchemy import event
+
+from lingvodoc.models import TranslationGist as dbTranslationGist
+
+from lingvodoc.schema.gql_holders import (
+    fetch_object,
+    LingvodocID,
+    LingvodocObjectType,
+    ObjectLoader,
+    object_loader_middleware)
+
+
+table_name_list = ['translationgist']
+
+
+class Gist(LingvodocObjectType):
+
+    dbType = dbTranslationGist
+
+    id = LingvodocID()
+    type = graphene.String()
+
+    @fetch_object('type')
+    def resolve_type(self, info):
+        return self.dbObject.type
+
+
+class Query(graphene.ObjectType):
+
+    gists = graphene.List(Gist, count = graphene.Int())
+    gist = graphene.Field(Gist, id = LingvodocID())
+
+    def resolve_gists(self, info, count):
+        return [Gist(id = [1, object_id]) for object_id in range(1, count + 1)]
+
+    def resolve_gist(self, info, id):
+        return Gist(id = id)
+
+
+schema = graphene.Schema(query = Query)
+
+
+@pytest.fixture
+def statement_list(db_schema, db_session):
+
+    db_schema.connection.execute(
+        'insert into translationgist '
+        '(client_id, object_id, type, marked_for_deletion, created_at) '
+        'select 1, n, \'type \' || n, false, now() from generate_series(1, 8) n')
+
+    statement_list = []
+
+    @event.listens_for(db_schema.engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statement_list.append(statement)
+
+    return statement_list
+
+
+def execute(query_str, middleware = None):
+
+    context = types.SimpleNamespace(object_loader = ObjectLoader())
+
+    result = (
+
+        schema.execute(
+            query_str,
+            context_value = context,
+            middleware = middleware))
+
+    assert not result.errors
+
+    return result.data
+
+
+def select_count(statement_list):
+
+    return (
+        sum(
+            1 for statement in statement_list
+            if 'FROM translationgist' in statement))
+
+
+def test_batched_list(statement_list):
+
+    query_str = '{ gists(count: 8) { id type } }'
+
+    data = execute(query_str, object_loader_middleware)
+
+    assert data['gists'] == [
+        {'id': [1, object_id], 'type': 'type {0}'.format(object_id)}
+        for object_id in range(1, 9)]
+
+    # All gists of the list are retrieved with a single query.
+
+    assert select_count(statement_list) == 1
+
+    # Without the middleware objects are not registered, and are retrieved one by one with the same result.
+
+    del statement_list[:]
+
+    assert execute(query_str) == data
+    assert select_count(statement_list) == 8
+
+
+def test_single_and_missing(statement_list):
+
+    data = execute('{ gist(id: [1, 3]) { id type } }', object_loader_middleware)
+
+    assert data == {'gist': {'id': [1, 3], 'type': 'type 3'}}
+
+    context = types.SimpleNamespace(object_loader = ObjectLoader())
+
+    result = (
+
+        schema.execute(
+            '{ gists(count: 10) { type } }',
+            context_value = context,
+            middleware = object_loader_middleware))
+
+    # Missing gists produce errors, existing ones are still resolved.
+
+    assert len(result.errors) == 2
+
+    assert (
+        [gist and gist['type'] for gist in result.data['gists']][:8] ==
+            ['type {0}'.format(object_id) for object_id in range(1, 9)])
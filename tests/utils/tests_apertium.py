@@ -0,0 +1,168 @@
+"""
+Tests of persistent Apertium pipeline processes, see lingvodoc.utils.apertium, using a stub 'apertium'
+executable which outputs canned analyses of words of its input, and which can fail or never output null
+flushes in null-flush mode.
+"""
+
+import os
+import stat
+import sys
+
+import pytest
+
+from lingvodoc.utils import apertium
+from lingvodoc.utils.apertium import Apertium_Worker
+
+
+stub_source = '''#!{executable}
+
+import sys
+
+args = sys.argv[1:]
+
+null_flush = '-z' in args
+
+if null_flush:
+    args.remove('-z')
+
+if null_flush and {fail_null_flush}:
+    sys.exit(1)
+
+if null_flush and {silent_null_flush}:
+
+    sys.stdin.buffer.read()
+    sys.exit(0)
+
+mode = args[2]
+
+def analyze(text):
+
+    return ''.join(
+        '^{{0}}/{{0}}<{{1}}>$ '.format(word, mode)
+        for word in text.split()).encode('utf-8')
+
+if not null_flush:
+
+    sys.stdout.buffer.write(analyze(sys.stdin.buffer.read().decode('utf-8')))
+    sys.exit(0)
+
+buffer = b''
+
+while True:
+
+    chunk = sys.stdin.buffer.read1(65536)
+
+    if not chunk:
+        break
+
+    buffer += chunk
+
+    while b'\\0' in buffer:
+
+        text, buffer = buffer.split(b'\\0', 1)
+
+        sys.stdout.buffer.write(analyze(text.decode('utf-8')) + b'\\0')
+        sys.stdout.buffer.flush()
+'''
+
+
+def write_stub(tmp_path, fail_null_flush = False, silent_null_flush = False):
+
+    stub_path = str(tmp_path / 'apertium')
+
+    with open(stub_path, 'w') as stub_file:
+
+        stub_file.write(
+            stub_source.format(
+                executable = sys.executable,
+                fail_null_flush = fail_null_flush,
+                silent_null_flush = silent_null_flush))
+
+    os.chmod(stub_path, os.stat(stub_path).st_mode | stat.S_IEXEC)
+
+    return stub_path
+
+
+@pytest.fixture(params = [False, True], ids = ['null_flush', 'fallback'])
+def stub(request, tmp_path, monkeypatch):
+
+    stub_path = (
+        write_stub(tmp_path, fail_null_flush = request.param))
+
+    monkeypatch.setattr(apertium, 'apertium_command', stub_path)
+    monkeypatch.setattr(apertium, 'apertium_pool', apertium.Apertium_Pool())
+
+    yield request.param
+
+    apertium.apertium_pool.close()
+
+
+def test_run(stub):
+
+    text = 'ӟеч бур'
+
+    for i in range(3):
+
+        assert (
+            apertium.run('/opt/apertium/apertium-udm', 'udm-morph', text) ==
+            '^ӟеч/ӟеч<udm-morph>$ ^бур/бур<udm-morph>$ ')
+
+    # Persistent process is reused, unless it does not support null flushing.
+
+    worker_list = (
+        apertium.apertium_pool.worker_dict[('/opt/apertium/apertium-udm', 'udm-morph')])
+
+    assert len(worker_list) == (0 if stub else 1)
+
+    assert (
+        apertium.apertium_pool.is_failed('/opt/apertium/apertium-udm', 'udm-morph') == stub)
+
+
+def test_silent_mode(tmp_path, monkeypatch):
+
+    stub_path = (
+        write_stub(tmp_path, silent_null_flush = True))
+
+    monkeypatch.setattr(apertium, 'apertium_command', stub_path)
+    monkeypatch.setattr(apertium, 'apertium_pool', apertium.Apertium_Pool())
+    monkeypatch.setattr(apertium, 'worker_check_timeout', 0.5)
+
+    # Mode which never outputs null flushes is found out by the check of a new process, and then is
+    # always processed with one-time runs without starting new processes.
+
+    worker_list = []
+
+    monkeypatch.setattr(
+        apertium,
+        'Apertium_Worker',
+        lambda *args: worker_list.append(args) or Apertium_Worker(*args))
+
+    for i in range(3):
+
+        assert (
+            apertium.run('/opt/apertium/apertium-udm', 'udm-morph', 'ӟеч') ==
+            '^ӟеч/ӟеч<udm-morph>$ ')
+
+    assert worker_list == [('/opt/apertium/apertium-udm', 'udm-morph')]
+
+    apertium.apertium_pool.close()
+
+
+def test_run_modes(stub):
+
+    text = 'a b' * 50000
+
+    result_list = (
+
+        apertium.run_modes(
+            '/opt/apertium/apertium-tat-rus',
+            ['tat-rus-biltrans', 'tat-rus-morph'],
+            text))
+
+    for result, mode in zip(result_list, ['tat-rus-biltrans', 'tat-rus-morph']):
+
+        assert (
+            result ==
+            ''.join(
+                f'^{word}/{word}<{mode}>$ '
+                for word in text.split()))
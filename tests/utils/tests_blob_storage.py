@@ -0,0 +1,223 @@
+"""
+Tests of content-addressed storage of uploaded files, see lingvodoc.utils.blob_storage.
+"""
+
+import concurrent.futures
+import hashlib
+import io
+import os
+
+import pytest
+
+from lingvodoc.scripts import dedup_storage
+from lingvodoc.utils import blob_storage
+from lingvodoc.utils.blob_storage import Blob_Storage, file_sha256
+
+
+def make_storage(tmp_path):
+
+    return (
+
+        Blob_Storage({
+            'path': str(tmp_path / 'storage'),
+            'prefix': 'http://localhost/',
+            'static_route': 'objects/'}))
+
+
+def blob_list(storage):
+
+    return sorted(
+        file_name
+        for dir_path, dir_name_list, file_name_list in os.walk(storage.blob_path)
+        if not dir_path.startswith(storage.tmp_path)
+        for file_name in file_name_list)
+
+
+def test_store_release(tmp_path):
+
+    storage = make_storage(tmp_path)
+
+    content = os.urandom(3 * 1048576 + 17)
+    other_content = b'other'
+
+    path_a = os.path.join(storage.path, 'entity', 'graphql_files', '1', '1', 'a.wav')
+    path_b = os.path.join(storage.path, 'entity', 'graphql_files', '1', '2', 'a.wav')
+    path_c = os.path.join(storage.path, 'userblobs', 'pdf', '2', '1', 'c.pdf')
+
+    # Stored from a file object and from bytes, with additional hashes.
+
+    hash, hash_dict = (
+        storage.store(io.BytesIO(content), path_a, ['sha224']))
+
+    assert hash == hashlib.sha256(content).hexdigest()
+    assert hash_dict == {'sha224': hashlib.sha224(content).hexdigest()}
+
+    storage.store(content, path_b)
+    storage.store(other_content, path_c)
+
+    assert blob_list(storage) == sorted([hash, hashlib.sha256(other_content).hexdigest()])
+    assert os.listdir(storage.tmp_path) == []
+
+    with open(path_b, 'rb') as file:
+        assert file.read() == content
+
+    blob_path = storage.hash_blob_path(hash)
+
+    assert blob_path.endswith(os.path.join(hash[0:2], hash[2:4], hash))
+    assert os.stat(blob_path).st_nlink == 3
+    assert os.path.samefile(path_a, path_b)
+
+    assert (
+        storage.url_path('http://localhost/objects/entity/graphql_files/1/1/a.wav') == path_a)
+
+    # Blob is removed with its last reference.
+
+    storage.release(path_a)
+
+    assert os.stat(blob_path).st_nlink == 2
+
+    storage.release(path_b)
+
+    assert not os.path.exists(blob_path)
+    assert blob_list(storage) == [hashlib.sha256(other_content).hexdigest()]
+
+    # Replacing file contents releases the previous blob.
+
+    storage.store(content, path_c)
+
+    assert blob_list(storage) == [hash]
+    assert file_sha256(path_c) == hash
+
+
+def test_deduplicate(tmp_path, monkeypatch):
+
+    storage = make_storage(tmp_path)
+
+    content = b'sound' * 10000
+
+    path_list = [
+        os.path.join(storage.path, 'entity', 'graphql_files', '1', str(i), 'a.wav')
+        for i in range(3)]
+
+    for path in path_list:
+
+        os.makedirs(os.path.dirname(path))
+
+        with open(path, 'wb') as file:
+            file.write(content)
+
+    freed_size = sum(
+        storage.deduplicate(path)
+        for path in path_list * 2)
+
+    assert freed_size == 2 * len(content)
+
+    blob_path = storage.hash_blob_path(hashlib.sha256(content).hexdigest())
+
+    assert os.stat(blob_path).st_nlink == 4
+
+    for path in path_list:
+        assert os.path.samefile(path, blob_path)
+
+    # Unreferenced blobs are collected only after they are old enough.
+
+    for path in path_list:
+        os.remove(path)
+
+    assert storage.collect() == (0, 0)
+
+    monkeypatch.setattr(blob_storage, 'collect_min_age', -60)
+
+    assert storage.collect() == (1, len(content))
+    assert blob_list(storage) == []
+
+
+def test_stored_hash(tmp_path, monkeypatch):
+
+    storage = make_storage(tmp_path)
+
+    path_a = os.path.join(storage.path, 'entity', 'graphql_files', '1', '1', 'a.wav')
+    path_b = os.path.join(storage.path, 'entity', 'graphql_files', '1', '2', 'b.wav')
+
+    hash, _ = storage.store(b'content', path_a)
+    storage.store(b'content', path_b)
+
+    try:
+        os.getxattr(path_a, blob_storage.hash_xattr_name)
+
+    except OSError:
+        pytest.skip('extended attributes are not supported')
+
+    # Blobs of files are found by their stored hashes without reading the files.
+
+    def file_sha256(file_path):
+        raise AssertionError('file is hashed')
+
+    monkeypatch.setattr(blob_storage, 'file_sha256', file_sha256)
+
+    assert storage.file_blob_path(path_a) == storage.hash_blob_path(hash)
+
+    storage.store(b'other content', path_a)
+    storage.release(path_b)
+
+    assert blob_list(storage) == [hashlib.sha256(b'other content').hexdigest()]
+
+
+def test_concurrent_link(tmp_path):
+
+    storage = make_storage(tmp_path)
+
+    file_path = os.path.join(storage.path, 'entity', 'graphql_files', '1', '1', 'a.wav')
+
+    hash, _ = storage.put(b'content')
+
+    # Threads linking the same file do not interfere with each other's temporary links.
+
+    def f():
+
+        for i in range(200):
+            storage.link(hash, file_path)
+
+    with concurrent.futures.ThreadPoolExecutor(8) as executor:
+
+        for future in [executor.submit(f) for i in range(8)]:
+            future.result()
+
+    assert os.path.samefile(file_path, storage.hash_blob_path(hash))
+    assert os.listdir(os.path.dirname(file_path)) == ['a.wav']
+
+
+def test_dedup_storage_files(tmp_path):
+
+    storage = make_storage(tmp_path)
+
+    for file_path in (
+        'entity/graphql_files/1/2/a.wav',
+        'entity/graphql_files/1/2/.a.wav.tmp',
+        'userblobs/pdf/1/3/b.pdf',
+        'phonology/1_2.sqlite',
+        'phonology/1_2.sqlite-wal',
+        'cognate/1577836800/result.xlsx'):
+
+        os.makedirs(os.path.join(storage.path, os.path.dirname(file_path)), exist_ok = True)
+
+        with open(os.path.join(storage.path, file_path), 'wb') as file:
+            file.write(b'content')
+
+    storage.store(io.BytesIO(b'content'), os.path.join(storage.path, 'entity/graphql_files/1/4/c.wav'))
+
+    # Only object files are deduplicated, files which can be rewritten in place and blobs are not.
+
+    assert (
+
+        [os.path.relpath(file_path, storage.path)
+            for file_path in dedup_storage.storage_file_iter(storage.path)] ==
+
+        ['entity/graphql_files/1/2/a.wav',
+            'entity/graphql_files/1/4/c.wav',
+            'userblobs/pdf/1/3/b.pdf'])
+
+    assert dedup_storage.dedup_storage({'path': storage.path}) == (3, 2 * len(b'content'))
+
+    assert (
+        os.stat(os.path.join(storage.path, 'phonology/1_2.sqlite')).st_nlink == 1)
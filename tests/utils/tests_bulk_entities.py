@@ -0,0 +1,240 @@
+"""
+Tests of bulk entity creation, see bulk_insert_entities() of lingvodoc.utils.creation and BulkCreateEntity
+mutation, checking created entities, their ObjectTOC and PublishingEntity rows and entry groups of
+grouping tag entities.
+"""
+
+import types
+
+import pytest
+
+import lingvodoc.utils.creation as creation
+
+from lingvodoc.models import (
+    Client,
+    DBSession,
+    Entity,
+    EntryGroupData,
+    EntryGroupIdSequence,
+    Field,
+    LexicalEntry,
+    ObjectTOC,
+    PublishingEntity,
+    TranslationAtom)
+
+from lingvodoc.schema.gql_entity import BulkCreateEntity
+from lingvodoc.utils.creation import bulk_insert_entities
+from lingvodoc.utils.search import flush_entry_groups, linked_group_list
+
+
+table_name_list = [
+    'client',
+    'lexicalentry',
+    'field',
+    'translationatom',
+    'objecttoc',
+    'entity',
+    'publishingentity',
+    'entry_group_data']
+
+sequence_list = [EntryGroupIdSequence]
+
+text_field_id = (66, 10)
+tag_field_id = (66, 25)
+
+
+@pytest.fixture
+def session(db_session, monkeypatch):
+
+    # Only the tag field is a grouping one, without going through the service registry.
+
+    monkeypatch.setattr(
+        creation,
+        'grouping_field_id_set',
+        lambda session: frozenset([tag_field_id]))
+
+    DBSession.add_all([
+        Client(id = 2, user_id = 2, counter = 10)] + [
+        LexicalEntry(client_id = 2, object_id = object_id, parent_client_id = 5, parent_object_id = 6)
+        for object_id in range(1, 5)])
+
+    # Fields with 'Text' and 'Grouping Tag' data types.
+
+    for field_id, gist_object_id, data_type in (
+        (text_field_id, 1, 'Text'),
+        (tag_field_id, 2, 'Grouping Tag')):
+
+        DBSession.add_all([
+
+            Field(
+                client_id = field_id[0],
+                object_id = field_id[1],
+                translation_gist_client_id = 1,
+                translation_gist_object_id = 100,
+                data_type_translation_gist_client_id = 1,
+                data_type_translation_gist_object_id = gist_object_id),
+
+            TranslationAtom(
+                client_id = 1,
+                object_id = gist_object_id,
+                parent_client_id = 1,
+                parent_object_id = gist_object_id,
+                locale_id = 2,
+                content = data_type)])
+
+    DBSession.flush()
+
+    return DBSession
+
+
+def entity_dict(session):
+    """
+    Gets data of all entities by their ids.
+    """
+
+    return {
+
+        (entity.client_id, entity.object_id):
+
+            (entity.parent_id,
+                entity.field_id,
+                entity.content,
+                entity.additional_metadata,
+                entity.publishingentity.accepted,
+                entity.publishingentity.published)
+
+        for entity in session.query(Entity)}
+
+
+def tag_group_set(session):
+    """
+    Gets entry groups of the tag field as a set of sets of entry ids.
+    """
+
+    entry_id_list = [
+        (2, object_id) for object_id in range(1, 5)]
+
+    return set(
+        frozenset(group)
+        for group in linked_group_list(tag_field_id, entry_id_list, None, None, session))
+
+
+def test_bulk_insert_entities(session, monkeypatch):
+
+    # Small chunks to check chunked inserts.
+
+    monkeypatch.setattr(creation, 'bulk_insert_chunk_size', 2)
+
+    entity_list = [
+
+        {'parent_id': (2, 1),
+            'field_id': text_field_id,
+            'locale_id': 2,
+            'content': 'text',
+            'additional_metadata': {'key': 'value'},
+            'accepted': True,
+            'published': False},
+
+        {'parent_id': (2, 1), 'field_id': tag_field_id, 'content': 'tag a', 'accepted': True},
+        {'parent_id': (2, 2), 'field_id': tag_field_id, 'content': 'tag a', 'accepted': True},
+        {'parent_id': (2, 3), 'field_id': tag_field_id, 'content': 'tag b', 'accepted': False},
+        {'parent_id': (2, 4), 'field_id': text_field_id, 'content': 'tag b', 'published': True}]
+
+    id_list = bulk_insert_entities(2, entity_list, session)
+
+    # Ids are a single range after the client's counter.
+
+    assert id_list == [(2, object_id) for object_id in range(11, 16)]
+    assert session.query(Client).get(2).counter == 15
+
+    assert entity_dict(session) == {
+        (2, 11): ((2, 1), text_field_id, 'text', {'key': 'value'}, True, False),
+        (2, 12): ((2, 1), tag_field_id, 'tag a', None, True, False),
+        (2, 13): ((2, 2), tag_field_id, 'tag a', None, True, False),
+        (2, 14): ((2, 3), tag_field_id, 'tag b', None, False, False),
+        (2, 15): ((2, 4), text_field_id, 'tag b', None, False, True)}
+
+    assert (
+        set(
+            (toc.client_id, toc.object_id)
+            for toc in session.query(ObjectTOC).filter_by(table_name = 'entity')) ==
+            set(id_list))
+
+    # Groups are updated at the end of the transaction or before they are read, and are created only
+    # for tag field entities, the last entity is of the text field.
+
+    assert session.query(EntryGroupData).count() == 0
+
+    flush_entry_groups(session)
+
+    assert (
+        set(
+            (group.entry_client_id, group.entry_object_id)
+            for group in session.query(EntryGroupData)) ==
+            {(2, 1), (2, 2), (2, 3)})
+
+    assert tag_group_set(session) == {
+        frozenset({(2, 1), (2, 2)}), frozenset({(2, 3)}), frozenset({(2, 4)})}
+
+    # Joining groups with another bulk insert.
+
+    bulk_insert_entities(
+        2, [{'parent_id': (2, 4), 'field_id': tag_field_id, 'content': 'tag a'},
+            {'parent_id': (2, 4), 'field_id': tag_field_id, 'content': 'tag b'}],
+        session)
+
+    assert tag_group_set(session) == {
+        frozenset({(2, 1), (2, 2), (2, 3), (2, 4)})}
+
+    assert bulk_insert_entities(2, [], session) == []
+
+
+def test_bulk_create_entity(session):
+
+    context = (
+
+        types.SimpleNamespace(
+            user_id = 1,
+            effective_client_id = lambda client_id: client_id or 2,
+            acl_check = lambda *args: None))
+
+    info = types.SimpleNamespace(context = context)
+
+    result = (
+
+        BulkCreateEntity.mutate(
+            None,
+            info,
+            entities = [
+                {'parent_id': [2, 1], 'field_id': list(tag_field_id), 'content': 'tag'},
+                {'parent_id': [2, 2], 'field_id': list(tag_field_id), 'content': 'tag'},
+                {'parent_id': [2, 2], 'field_id': list(text_field_id), 'content': 'text'}]))
+
+    assert result.triumph
+    assert result.ids == [(2, 11), (2, 12), (2, 13)]
+
+    # Admin's entities are accepted and published.
+
+    assert entity_dict(session) == {
+        (2, 11): ((2, 1), tag_field_id, 'tag', None, True, True),
+        (2, 12): ((2, 2), tag_field_id, 'tag', None, True, True),
+        (2, 13): ((2, 2), text_field_id, 'text', None, True, True)}
+
+    assert tag_group_set(session) == {
+        frozenset({(2, 1), (2, 2)}), frozenset({(2, 3)}), frozenset({(2, 4)})}
+
+    assert (
+        [entity.id for entity in result.resolve_entities(info)] ==
+            [(2, 11), (2, 12), (2, 13)])
+
+    # Unknown entries are rejected.
+
+    result = (
+
+        BulkCreateEntity.mutate(
+            None,
+            info,
+            entities = [
+                {'parent_id': [2, 7], 'field_id': list(tag_field_id), 'content': 'tag'}]))
+
+    assert result.message == 'No such lexical entry in the system'
@@ -0,0 +1,126 @@
+"""
+Tests of GraphQL query execution with cached parsed and validated documents and of persisted queries, see
+lingvodoc.utils.document_cache.
+"""
+
+import collections
+
+import pytest
+
+from graphql import (
+    GraphQLArgument,
+    GraphQLField,
+    GraphQLObjectType,
+    GraphQLSchema,
+    GraphQLString)
+
+import lingvodoc.cache.caching as caching
+import lingvodoc.utils.document_cache as document_cache_module
+
+from lingvodoc.cache.mock.cache import MockCache
+
+from lingvodoc.utils.document_cache import (
+    Document_Cache,
+    execute_query,
+    query_hash)
+
+
+schema = (
+
+    GraphQLSchema(
+        GraphQLObjectType(
+            'Query', {
+                'hello': GraphQLField(
+                    GraphQLString,
+                    args = {'name': GraphQLArgument(GraphQLString)},
+                    resolver = lambda root, info, name = 'world': 'hello ' + name)})))
+
+
+@pytest.fixture
+def document_cache(monkeypatch):
+
+    document_cache = Document_Cache(size = 2)
+
+    monkeypatch.setattr(caching, 'CACHE', MockCache())
+    monkeypatch.setattr(document_cache_module, 'document_cache', document_cache)
+
+    return document_cache
+
+
+def test_execute(document_cache):
+
+    query_str = 'query q($name: String) { hello(name: $name) }'
+    timing_dict = collections.Counter()
+
+    for name in ('a', 'b', 'c'):
+
+        result = (
+
+            execute_query(
+                schema,
+                query_str,
+                timing_dict = timing_dict,
+                variable_values = {'name': name}))
+
+        assert result.data == {'hello': 'hello ' + name}
+
+    assert document_cache.metrics() == {'size': 1, 'hit': 2, 'miss': 1}
+    assert set(timing_dict) == {'parse', 'validate', 'execute'}
+
+    # Validation errors are cached, syntax errors are not.
+
+    for i in range(2):
+
+        assert execute_query(schema, '{ unknown }').invalid
+        assert execute_query(schema, '{ hello').invalid
+
+    assert document_cache.metrics() == {'size': 2, 'hit': 3, 'miss': 4}
+
+    # Least recently used document is evicted.
+
+    execute_query(schema, '{ hello }')
+
+    assert query_hash(query_str) not in document_cache.document_dict
+    assert query_hash('{ unknown }') in document_cache.document_dict
+
+
+def test_persisted_query(document_cache):
+
+    query_str = '{ hello }'
+    hash_str = query_hash(query_str)
+
+    persisted_dict = {
+        'extensions': {'persistedQuery': {'version': 1, 'sha256Hash': hash_str}}}
+
+    assert document_cache.get_query(persisted_dict) == (None, None, 'PersistedQueryNotFound')
+
+    assert document_cache.get_query({'query': 'x', **persisted_dict})[2] is not None
+    assert document_cache.get_query({'query': query_str, **persisted_dict}) == (query_str, hash_str, None)
+
+    assert execute_query(schema, query_str, hash_str).data == {'hello': 'hello world'}
+
+    assert document_cache.get_query(persisted_dict) == (query_str, hash_str, None)
+    assert document_cache.get_query({'query': query_str}) == (query_str, hash_str, None)
+    assert document_cache.get_query({})[2] == 'query key not found'
+
+
+def test_execute_document(document_cache):
+
+    query_str = '{ hello }'
+
+    # Document already got from the cache is not looked up again.
+
+    document_tuple = document_cache.get(schema, query_str)
+
+    result = (
+
+        execute_query(
+            schema, query_str, document_tuple = document_tuple))
+
+    assert result.data == {'hello': 'hello world'}
+    assert document_cache.metrics() == {'size': 1, 'hit': 0, 'miss': 1}
+
+    document_tuple = document_cache.get(schema, '{ unknown }')
+
+    assert execute_query(schema, '{ unknown }', document_tuple = document_tuple).invalid
+    assert document_cache.metrics() == {'size': 2, 'hit': 0, 'miss': 2}
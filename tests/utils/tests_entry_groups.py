@@ -0,0 +1,261 @@
+"""
+Tests of groups of lexical entries linked through grouping tags, see update_entry_groups() of
+lingvodoc.utils.search, checked against iterative search of linked entries, as done by linked_group()
+PL/pgSQL function and find_all_tags(), and of deferred group updates, see defer_entry_groups().
+
+Lexical entry, entity, publishing entity and entry group tables of the test schema, see tests/conftest.py,
+have only columns used for grouping.
+"""
+
+import random
+
+import pytest
+
+from sqlalchemy.orm import Session
+
+from lingvodoc.utils.search import (
+    check_entry_groups,
+    defer_entry_groups,
+    linked_group_list,
+    rebuild_entry_groups,
+    Union_Find,
+    update_entry_groups)
+
+
+field_id = (66, 25)
+
+
+@pytest.fixture
+def session(db_schema):
+
+    connection = db_schema.connection
+
+    with connection.begin():
+
+        connection.execute(
+            'create table lexicalentry ('
+            'client_id bigint, object_id bigint, marked_for_deletion boolean not null, '
+            'primary key (client_id, object_id))')
+
+        connection.execute(
+            'create table entity ('
+            'client_id bigint, object_id bigint, parent_client_id bigint, parent_object_id bigint, '
+            'field_client_id bigint, field_object_id bigint, content text, '
+            'marked_for_deletion boolean not null, primary key (client_id, object_id))')
+
+        connection.execute(
+            'create table publishingentity ('
+            'client_id bigint, object_id bigint, accepted boolean not null, published boolean not null, '
+            'primary key (client_id, object_id))')
+
+        connection.execute('create sequence entry_group_id_seq')
+
+        connection.execute(
+            'create table entry_group_data ('
+            'field_client_id bigint, field_object_id bigint, entry_client_id bigint, '
+            'entry_object_id bigint, group_id bigint not null, '
+            'primary key (field_client_id, field_object_id, entry_client_id, entry_object_id))')
+
+    session = Session(bind = connection)
+
+    yield session
+
+    session.close()
+
+
+def linked_group_iterative(entity_list, deleted_set, entry_id, publish, accept):
+    """
+    Gathers linked entries iteratively, as linked_group() does.
+    """
+
+    def f(entity):
+
+        return (
+            not entity['deleted'] and
+            (accept is None or entity['accepted'] == accept) and
+            (publish is None or entity['published'] == publish))
+
+    tag_set = set(
+        entity['tag'] for entity in entity_list
+        if entity['entry_id'] == entry_id and f(entity))
+
+    entry_set = {entry_id}
+
+    while True:
+
+        new_entry_set = set(
+            entity['entry_id'] for entity in entity_list
+            if entity['tag'] in tag_set and entity['entry_id'] not in deleted_set and f(entity))
+
+        new_tag_set = set(
+            entity['tag'] for entity in entity_list
+            if entity['entry_id'] in new_entry_set and f(entity))
+
+        if new_entry_set <= entry_set and new_tag_set <= tag_set:
+            return entry_set
+
+        entry_set |= new_entry_set
+        tag_set |= new_tag_set
+
+
+def test_union_find():
+
+    union_find = Union_Find()
+
+    for x, y in [(1, 2), (3, 4), (2, 4), (5, 5), (6, 7)]:
+        union_find.union(x, y)
+
+    group_set = set(
+        frozenset(group)
+        for group in union_find.groups().values())
+
+    assert group_set == {frozenset((1, 2, 3, 4)), frozenset((5,)), frozenset((6, 7))}
+
+
+def test_entry_groups(session):
+
+    rng = random.Random(1)
+
+    entry_id_list = [(1, i) for i in range(60)]
+    deleted_set = set(rng.sample(entry_id_list, 6))
+
+    session.execute(
+        'insert into lexicalentry values ' +
+        ', '.join(
+            '({0}, {1}, {2})'.format(*entry_id, entry_id in deleted_set)
+            for entry_id in entry_id_list))
+
+    entity_list = []
+
+    # Adding tag entities one by one, deleting some of them, updating groups as on flush.
+
+    for i in range(90):
+
+        entity = {
+            'id': (2, i),
+            'entry_id': rng.choice(entry_id_list),
+            'tag': 'tag {0}'.format(rng.randrange(45)),
+            'accepted': rng.random() < 0.8,
+            'published': rng.random() < 0.8,
+            'deleted': False}
+
+        entity_list.append(entity)
+
+        session.execute(
+            'insert into entity values '
+            '(:client_id, :object_id, :entry_client_id, :entry_object_id, 66, 25, :tag, false)', {
+                'client_id': entity['id'][0],
+                'object_id': entity['id'][1],
+                'entry_client_id': entity['entry_id'][0],
+                'entry_object_id': entity['entry_id'][1],
+                'tag': entity['tag']})
+
+        session.execute(
+            'insert into publishingentity values (:client_id, :object_id, :accepted, :published)', {
+                'client_id': entity['id'][0],
+                'object_id': entity['id'][1],
+                'accepted': entity['accepted'],
+                'published': entity['published']})
+
+        update_entry_groups([(field_id, entity['entry_id'])], session)
+
+        if rng.random() < 0.1:
+
+            deleted = rng.choice(entity_list)
+            deleted['deleted'] = True
+
+            session.execute(
+                'update entity set marked_for_deletion = true '
+                'where client_id = :client_id and object_id = :object_id', {
+                    'client_id': deleted['id'][0],
+                    'object_id': deleted['id'][1]})
+
+    assert check_entry_groups([field_id], session) == {field_id: 0}
+
+    def check():
+
+        for publish, accept in [(True, True), (None, None), (None, True)]:
+
+            start_id_list = [
+                entry_id for entry_id in entry_id_list
+                if entry_id not in deleted_set]
+
+            group_list = (
+                linked_group_list(field_id, start_id_list, publish, accept, session))
+
+            group_dict = {}
+
+            for group in group_list:
+                for entry_id in group:
+                    group_dict[entry_id] = group
+
+            for entry_id in start_id_list:
+
+                assert (
+                    group_dict[entry_id] ==
+                    linked_group_iterative(entity_list, deleted_set, entry_id, publish, accept))
+
+    check()
+
+    # After rebuild groups are exactly connected groups.
+
+    group_count_dict = (
+        rebuild_entry_groups([field_id], session))
+
+    assert check_entry_groups([field_id], session) == {field_id: 0}
+
+    union_find = Union_Find()
+
+    for entity in entity_list:
+        if not entity['deleted']:
+            union_find.union(entity['entry_id'], entity['tag'])
+
+    assert group_count_dict == {field_id: len(union_find.groups())}
+
+    check()
+
+
+def test_deferred_entry_groups(session):
+
+    session.execute(
+        'insert into lexicalentry values ' +
+        ', '.join('(1, {0}, false)'.format(i) for i in range(4)))
+
+    for i, tag in enumerate(['a', 'a', 'b', 'b']):
+
+        session.execute(
+            'insert into entity values (2, {0}, 1, {0}, 66, 25, :tag, false)'.format(i), {'tag': tag})
+
+        session.execute(
+            'insert into publishingentity values (2, {0}, true, true)'.format(i))
+
+    def group_count():
+
+        return (
+            session.execute('select count(distinct group_id) from entry_group_data').scalar())
+
+    # Updates are deferred until groups are read.
+
+    defer_entry_groups([(field_id, (1, 0))], session)
+
+    assert group_count() == 0
+
+    assert (
+        linked_group_list(field_id, [(1, 0)], session = session) == [{(1, 0), (1, 1)}])
+
+    assert group_count() == 1
+
+    session.commit()
+
+    # Deferred updates are dropped on rollback and performed on commit.
+
+    defer_entry_groups([(field_id, (1, 2))], session)
+    session.rollback()
+
+    assert 'entry_group_list' not in session.info
+    assert group_count() == 1
+
+    defer_entry_groups([(field_id, (1, 2))], session)
+    session.commit()
+
+    assert group_count() == 2
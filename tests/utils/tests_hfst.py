@@ -0,0 +1,131 @@
+"""
+Tests of HFST parser lexicon indexing, word analysis and per-process caching of transducers, see
+hfst_parser() of lingvodoc.utils.doc_parser, with a small transducer built by hfst_dev.
+"""
+
+import os
+import re
+
+import hfst_dev
+import pytest
+
+import lingvodoc.utils.doc_parser as doc_parser
+
+from lingvodoc.utils.doc_parser import (
+    hfst_analyze,
+    hfst_lexicon_index,
+    hfst_load,
+    hfst_parser,
+    hfst_translation)
+
+
+lexicon_str = (
+    'LEXICON Root\n'
+    'kala:kala N ; ! рыба\n'
+    'kala:kalat N ; ! рыбы\n'
+    'kala:kalan N ; ! рыбы (род.)\n'
+    'talo:talo N ; !0 comment\n'
+    'puu:puu N ; ! дерево ! дерево, лес\n'
+    'no translation\n'
+    'last:last N ; ! skipped')
+
+
+@pytest.fixture
+def hfst_dir(tmp_path, monkeypatch):
+
+    lang_path = tmp_path / 'test'
+    lang_path.mkdir()
+
+    (lang_path / 'lexicon.lexc').write_text(lexicon_str)
+
+    hfst_dev.regex(
+        '[{kala}]:{kala} | '
+        '[{kala} %+N %+Pl]:{kalat} | '
+        '[{talo} %+N]:{talo}').write_to_file(
+            str(lang_path / 'rules.xfst.hfst'))
+
+    monkeypatch.setattr(doc_parser, 'hfst_dir_path', str(tmp_path))
+    monkeypatch.setattr(doc_parser, 'hfst_cache_dict', {})
+
+    return lang_path
+
+
+def test_translation():
+
+    assert hfst_translation('kala N ; ! рыба') == ' рыба'
+    assert hfst_translation('N ; ! a ! b') == ' b'
+    assert hfst_translation('N ; ! a !0 b') == ' a !0 b'
+    assert hfst_translation('N ; !0 b') is None
+    assert hfst_translation('N ; !') is None
+    assert hfst_translation('N ;') is None
+
+
+def test_lexicon_index():
+
+    surface_dict, lex_dict = hfst_lexicon_index(lexicon_str)
+
+    # First and last lines are skipped, as they are not both preceded and followed by a line break,
+    # first translations are kept.
+
+    assert surface_dict == {
+        ('kala', 'kala'): ' рыба',
+        ('kala', 'kalat'): ' рыбы',
+        ('kala', 'kalan'): ' рыбы (род.)',
+        ('puu', 'puu'): ' дерево, лес'}
+
+    assert lex_dict == {
+        'kala': ' рыба',
+        'puu': ' дерево, лес'}
+
+
+def test_analyze(hfst_dir):
+
+    xfst, surface_dict, lex_dict = hfst_load('test')
+
+    assert (
+        hfst_analyze(xfst, surface_dict, lex_dict, 'Kalat') ==
+            (True, '\'<w><ana lex=kala gr=N,Pl parts="" gloss="" trans_ru= рыбы></ana>Kalat</w>\''))
+
+    assert (
+        hfst_analyze(xfst, surface_dict, lex_dict, 'kala') ==
+            (True, '\'<w><ana lex=kala gr=Unknown parts="" gloss="" trans_ru= рыба></ana>kala</w>\''))
+
+    assert (
+        hfst_analyze(xfst, surface_dict, lex_dict, 'talo') ==
+            (True, '\'<w><ana lex=talo gr=N parts="" gloss="" trans_ru=Unknown></ana>talo</w>\''))
+
+    assert (
+        hfst_analyze(xfst, surface_dict, lex_dict, 'xyz') ==
+            (False, '\'<w><ana lex="" gr="" parts="" gloss=""></ana>xyz</w>\''))
+
+
+def test_parser_cache(hfst_dir):
+
+    result_str = hfst_parser('<p>Kalat kala. Xyz kalat.</p>', 'test')
+
+    assert result_str.count('"trans_ru": "рыбы"') == 2
+    assert result_str.count('"trans_ru": "рыба"') == 1
+    assert 'Xyz' in result_str
+
+    # Transducer and lexicon index are loaded once...
+
+    cache_entry = doc_parser.hfst_cache_dict['test']
+
+    assert (
+        re.sub(r' id=\d+', '', hfst_parser('<p>Kalat kala. Xyz kalat.</p>', 'test')) ==
+            re.sub(r' id=\d+', '', result_str))
+
+    assert doc_parser.hfst_cache_dict['test'] is cache_entry
+
+    # ...and are reloaded if the lexicon is modified.
+
+    lexicon_path = hfst_dir / 'lexicon.lexc'
+    lexicon_path.write_text(lexicon_str.replace('рыбы\n', 'множ\n', 1))
+
+    mtime = os.path.getmtime(str(lexicon_path)) + 1
+    os.utime(str(lexicon_path), (mtime, mtime))
+
+    result_str = hfst_parser('<p>Kalat kala.</p>', 'test')
+
+    assert doc_parser.hfst_cache_dict['test'] is not cache_entry
+    assert '"trans_ru": "множ"' in result_str
@@ -0,0 +1,139 @@
+"""
+Tests of cursor pagination helpers of lingvodoc.utils, with pages selected via keyset_condition() checked
+against full ordering for all combinations of sort directions, on an in-memory SQLite database.
+"""
+
+import datetime
+import itertools
+import random
+
+import pytest
+
+from sqlalchemy import (
+    asc,
+    Column,
+    create_engine,
+    DateTime,
+    desc,
+    Integer,
+    MetaData,
+    select,
+    String,
+    Table)
+
+from sqlalchemy.sql.expression import nullsfirst, nullslast
+
+from lingvodoc.utils import (
+    decode_cursor,
+    encode_cursor,
+    keyset_condition)
+
+
+@pytest.fixture
+def table_engine():
+
+    engine = create_engine('sqlite://')
+    metadata = MetaData()
+
+    table = (
+
+        Table(
+            'keyset_test',
+            metadata,
+            Column('count', Integer),
+            Column('content', String),
+            Column('created_at', DateTime),
+            Column('id', Integer, primary_key = True)))
+
+    metadata.create_all(engine)
+
+    rng = random.Random(1)
+    base_time = datetime.datetime(2020, 1, 1, 12, 0, 0, 123456)
+
+    engine.execute(
+        table.insert(),
+        [{'count': rng.choice([None, 1, 2, 3]),
+            'content': rng.choice([None, 'a', 'b']),
+            'created_at': base_time + datetime.timedelta(seconds = rng.randint(0, 3)),
+            'id': index}
+            for index in range(300)])
+
+    return table, engine
+
+
+def test_cursor():
+
+    name_list = ['created_at desc', 'id desc']
+    value_list = [datetime.datetime(2020, 1, 1, 12, 0, 0, 123456), 5]
+
+    cursor = encode_cursor(name_list, value_list)
+
+    assert decode_cursor(cursor, name_list) == value_list
+
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, ['created_at asc', 'id desc'])
+
+    with pytest.raises(ValueError):
+        decode_cursor('not a cursor', name_list)
+
+
+def test_keyset_condition(table_engine):
+
+    table, engine = table_engine
+
+    column_list = [
+        table.c.count,
+        table.c.content,
+        table.c.created_at,
+        table.c.id]
+
+    name_list = [
+        'count', 'content', 'created_at', 'id']
+
+    rng = random.Random(2)
+
+    for ascending_list in itertools.product([True, False], repeat = 4):
+
+        nulls_first_list = [
+            rng.choice([True, False]) for column in column_list]
+
+        key_list = list(
+            zip(column_list, ascending_list, nulls_first_list))
+
+        order_by_list = [
+            (nullsfirst if nulls_first else nullslast)((asc if ascending else desc)(column))
+            for column, ascending, nulls_first in key_list]
+
+        id_list = [
+            row.id
+            for row in engine.execute(select([table]).order_by(*order_by_list))]
+
+        # Getting all rows page by page.
+
+        page_id_list = []
+        cursor = None
+
+        while True:
+
+            query = (
+                select([table]).order_by(*order_by_list).limit(7))
+
+            if cursor is not None:
+
+                query = (
+                    query.where(
+                        keyset_condition(key_list, decode_cursor(cursor, name_list))))
+
+            row_list = engine.execute(query).fetchall()
+
+            page_id_list.extend(
+                row.id for row in row_list)
+
+            if len(row_list) < 7:
+                break
+
+            cursor = (
+                encode_cursor(
+                    name_list, [row_list[-1][column.name] for column in column_list]))
+
+        assert page_id_list == id_list
@@ -0,0 +1,100 @@
+"""
+Golden output tests of updating parser result content, see lingvodoc.utils.parser_result, with expected
+outputs of the previous implementation, and a stub parser wrapping each word into an unverified span.
+"""
+
+import re
+
+import pytest
+
+from bs4 import BeautifulSoup
+
+from lingvodoc.utils import parser_result
+
+
+content = (
+    '<p class="x">Мон <span class="unverified" id="1"><span class="result" id="2">{"lex": "a"}</span>tau</span> '
+    '<span class="verified" id="3"><span class="result approved" id="4">{"lex": "b"}</span>зэ</span>, <b>x &lt; y</b><br><strong>title</strong> '
+    '<span class="unverified user" id="5"><span class="result user" id="5!">{"lex": "c"}</span>'
+    '<span class="result" id="6">{"lex": "d"}</span>kyz</span>'
+    '</p>')
+
+
+def parse(text):
+
+    counter = 100
+
+    def wrap(match):
+
+        nonlocal counter
+
+        word = match.group(0)
+
+        if match.group(1):
+            return word
+
+        counter += 2
+
+        return (
+            f'<span class="unverified" id={counter}>'
+            f'<span class="result" id={counter + 1}>{{"lex": "{word.lower()}"}}</span>{word}</span>')
+
+    return re.sub(r'(<[^>]*>|\$id\$\d*\$id\$)|\w+', wrap, text)
+
+
+@pytest.mark.parametrize('backend', ['lxml', 'html.parser'])
+def test_reexecute_parser(backend, monkeypatch):
+
+    if backend == 'lxml':
+        pytest.importorskip('lxml')
+
+    get_max_span_id = parser_result.get_max_span_id
+
+    monkeypatch.setattr(
+        parser_result,
+        'get_max_span_id',
+        lambda html_str: get_max_span_id(html_str, backend))
+
+    assert (
+        parser_result.reexecute_parser(content, parse) ==
+        '<p class="x"><span class="unverified" id=102><span class="result" id=103>{"lex": "мон"}</span>Мон</span> '
+        '<span class="unverified" id=104><span class="result" id=105>{"lex": "tau"}</span>tau</span> '
+        '<span class="verified" id="108"><span class="result approved" id="109">{"lex": "b"}</span>зэ</span>, <b><span class="unverified" id=106><span class="result" id=107>{"lex": "x"}</span>x</span> '
+        '< y</b><br/> '
+        '<span class="unverified user" id="110"><span class="result user" id="110!">{"lex": "c"}</span>'
+        '<span class="result" id="111">{"lex": "d"}</span>kyz</span>'
+        '</p>')
+
+
+def test_parse_and_insert_element():
+
+    assert (
+        parser_result.parse_and_insert_element(content, '1', parse) ==
+        '<p class="x">Мон <span class="unverified" id="1"><span class="result" id="7">{"lex": "tau"}</span>tau</span> '
+        '<span class="verified" id="3"><span class="result approved" id="4">{"lex": "b"}</span>зэ</span>, <b>x &lt; y</b><br/><strong>title</strong> '
+        '<span class="unverified user" id="5"><span class="result user" id="5!">{"lex": "c"}</span>'
+        '<span class="result" id="6">{"lex": "d"}</span>kyz</span>'
+        '</p>')
+
+    assert (
+        parser_result.parse_and_insert_element(content, '5', parse) ==
+        '<p class="x">Мон <span class="unverified" id="1"><span class="result" id="2">{"lex": "a"}</span>tau</span> '
+        '<span class="verified" id="3"><span class="result approved" id="4">{"lex": "b"}</span>зэ</span>, <b>x &lt; y</b><br/><strong>title</strong> '
+        '<span class="unverified user" id="5"><span class="result" id="7">{"lex": "kyz"}</span>kyz<span class="result user" id="5!">{"lex": "c"}</span>'
+        '</span></p>')
+
+    assert parser_result.parse_and_insert_element(content, '9', parse) == content
+
+
+@pytest.mark.parametrize('backend', ['lxml', 'html.parser'])
+def test_get_max_span_id(backend):
+
+    if backend == 'lxml':
+        pytest.importorskip('lxml')
+
+    html_str = parse(content)
+
+    assert (
+        parser_result.get_max_span_id(html_str, backend) ==
+        parser_result.get_max_id(BeautifulSoup(html_str, 'html.parser')) ==
+        133)
@@ -0,0 +1,82 @@
+"""
+Tests of the process-wide registry of ids of service translation gists and fields, see Service_Registry of
+lingvodoc.utils.search, checking that ids are forgotten only on rollback of transactions which found them.
+
+Do not require DB, sessions are not bound and are only used for their transaction events.
+"""
+
+import pytest
+
+from sqlalchemy.orm import Session
+
+import lingvodoc.cache.caching as caching
+import lingvodoc.utils.search as search
+
+from lingvodoc.cache.mock.cache import MockCache
+from lingvodoc.utils.search import Service_Registry
+
+
+@pytest.fixture
+def registry(monkeypatch):
+
+    monkeypatch.setattr(caching, 'CACHE', MockCache())
+
+    registry = Service_Registry()
+    monkeypatch.setattr(search, 'service_registry', registry)
+
+    return registry
+
+
+def test_registry(registry):
+
+    search_list = []
+
+    def get(key, session = None):
+
+        def f():
+            search_list.append(key)
+            return (1, len(search_list))
+
+        return registry.get(key, f, session)
+
+    session_a = Session()
+    session_b = Session()
+
+    assert get('a', session_a) == (1, 1)
+    assert get('b', session_b) == (1, 2)
+    assert get('c') == (1, 3)
+
+    assert get('a', session_b) == (1, 1)
+    assert search_list == ['a', 'b', 'c']
+
+    # Rollback of a transaction not using the registry does not affect it.
+
+    Session().rollback()
+
+    assert [get(key) for key in 'abc'] == [(1, 1), (1, 2), (1, 3)]
+    assert search_list == ['a', 'b', 'c']
+
+    # Rollback forgets only ids found in the rolled back transaction.
+
+    session_b.rollback()
+
+    assert [get(key) for key in 'abc'] == [(1, 1), (1, 4), (1, 3)]
+    assert search_list == ['a', 'b', 'c', 'b']
+
+    # Ids found in committed transactions are kept.
+
+    session_a.commit()
+    session_a.rollback()
+
+    assert get('a', session_a) == (1, 1)
+    assert search_list == ['a', 'b', 'c', 'b']
+
+    # Names not found are not remembered.
+
+    assert registry.get('d', lambda: None, session_a) is None
+    assert get('d', session_a) == (1, 5)
+
+    session_a.rollback()
+
+    assert get('d') == (1, 6)
+    assert get('a') == (1, 1)
@@ -0,0 +1,130 @@
+"""
+Tests of per-process caching of uniparser analyzers and memoization of word analyses, see
+uniparser_analyze() and timarkh_uniparser() of lingvodoc.utils.doc_parser, with a stub analyzer recording
+analyzed words.
+"""
+
+import pytest
+
+import lingvodoc.utils.doc_parser as doc_parser
+
+from lingvodoc.utils.doc_parser import (
+    timarkh_uniparser,
+    uniparser_analyze,
+    uniparser_analyzer)
+
+
+class Analyzer(object):
+    """
+    Stub of uniparser analyzers, analyzes words 'kala', 'talo' and 'kala-talo', records analyzed words.
+    """
+
+    instance_list = []
+
+    def __init__(self, mode = 'strict'):
+
+        self.mode = mode
+        self.word_list = []
+
+        self.instance_list.append(self)
+
+    def analyze_words(self, word_list, format = None, disambiguate = False):
+
+        assert format == 'xml' and not disambiguate
+
+        self.word_list.extend(word_list)
+
+        return [
+
+            '<w><ana lex="{0}" gr="N" parts="" gloss="{0}"></ana>{0}</w>'.format(word)
+                if word in ('kala', 'talo', 'kala-talo') else
+                '<w><ana lex="" gr="" parts="" gloss=""></ana>{0}</w>'.format(word)
+
+            for word in word_list]
+
+
+@pytest.fixture
+def analyzer(monkeypatch):
+
+    monkeypatch.setattr(Analyzer, 'instance_list', [])
+
+    monkeypatch.setattr(doc_parser, 'uniparser_analyzer_dict', {'test': Analyzer})
+    monkeypatch.setattr(doc_parser, 'uniparser_cache_dict', {})
+
+    analyzer, _, _ = uniparser_analyzer('test')
+
+    return analyzer
+
+
+def parse(text, monkeypatch):
+
+    # Span ids are counted from the start for each parse, so that outputs can be compared.
+
+    monkeypatch.setattr(doc_parser, 'span_id_counter', 0)
+
+    return timarkh_uniparser(text, 'test')
+
+
+def test_cache(analyzer, monkeypatch):
+
+    # Analyzer is created once per language and mode.
+
+    assert uniparser_analyzer('test')[0] is analyzer
+    assert uniparser_analyzer('test', mode = 'nodiacritics')[0] is not analyzer
+
+    assert len(Analyzer.instance_list) == 2
+
+    # Each unique word is analyzed once, subsequent calls use memoized analyses.
+
+    output_list = (
+        uniparser_analyze('test', ['kala', 'talo', 'kala', 'puu']))
+
+    assert analyzer.word_list == ['kala', 'talo', 'puu']
+
+    assert output_list[0] == output_list[2]
+    assert output_list[3] == '<w><ana lex="" gr="" parts="" gloss=""></ana>puu</w>'
+
+    assert (
+        uniparser_analyze('test', ['puu', 'kala', 'talo', 'kuu']) ==
+            output_list[3:] + output_list[:2] + ['<w><ana lex="" gr="" parts="" gloss=""></ana>kuu</w>'])
+
+    assert analyzer.word_list == ['kala', 'talo', 'puu', 'kuu']
+
+    # Memo is cleared when it would outgrow its maximum size.
+
+    monkeypatch.setattr(doc_parser, 'uniparser_memo_size', 5)
+
+    uniparser_analyze('test', ['a', 'b'])
+
+    _, _, memo = uniparser_analyzer('test')
+
+    assert sorted(memo) == ['a', 'b']
+
+    uniparser_analyze('test', ['kala', 'a'])
+
+    assert analyzer.word_list == ['kala', 'talo', 'puu', 'kuu', 'a', 'b', 'kala']
+
+
+def test_parse(analyzer, monkeypatch):
+
+    text = '<p>kala-talo puu-kala talo&nbsp;kala</p><p>kuu</p>'
+
+    result = parse(text, monkeypatch)
+
+    # Composite words without analyses are split into parts.
+
+    assert result.count('<span class="unverified ') == 4
+    assert '"lex": "kala-talo"' in result
+    assert 'puu-' in result
+
+    assert analyzer.word_list == ['kala-talo', 'puu-kala', 'puu', 'kala', 'talo', 'kuu']
+
+    # Parsing with memoized analyses gives the same result, as does parsing with a cleared memo.
+
+    assert parse(text, monkeypatch) == result
+    assert len(analyzer.word_list) == 6
+
+    uniparser_analyzer('test')[2].clear()
+
+    assert parse(text, monkeypatch) == result
+    assert len(analyzer.word_list) == 12